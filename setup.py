@@ -36,6 +36,7 @@ setup(
         "numpy>=1.24.0",
         "matplotlib>=3.7.0",
         "seaborn>=0.12.0",
+        "pyarrow>=14.0.0",
         "tushare>=1.2.89",
         "akshare>=1.12.0",
         "baostock>=0.8.80",
@@ -56,6 +57,12 @@ setup(
             "streamlit>=1.28.0",
             "plotly>=5.18.0",
         ],
+        "jit": [
+            "numba>=0.58.0",
+        ],
+        "async": [
+            "aiohttp>=3.9.0",
+        ],
     },
     entry_points={
         "console_scripts": [
@@ -6,10 +6,14 @@
 import pandas as pd
 import numpy as np
 from datetime import datetime, timedelta
-from typing import Dict, List, Optional, Tuple, Callable
+from typing import Dict, List, Optional, Tuple, Callable, Union
 import logging
 from enum import Enum
 
+from src.data.panel_store import PANEL_FIELDS, MarketPanel
+from src.data.quality import apply_quality
+from src.data.reference import TradingCalendar
+
 logger = logging.getLogger(__name__)
 
 
@@ -184,6 +188,9 @@ class Portfolio:
 class Strategy:
     """策略基类"""
     
+    # 为 True 时回测引擎调用 generate_panel_signals 一次计算全部股票，否则逐只股票调用 generate_signals
+    cross_sectional = False
+    
     def __init__(self, name: str = "BaseStrategy"):
         self.name = name
         self.signals: List[Dict] = []
@@ -211,6 +218,18 @@ class Strategy:
             包含指标的数据
         """
         return data
+    
+    def generate_panel_signals(self, fields: Dict[str, np.ndarray]) -> np.ndarray:
+        """
+        一次生成全部股票的交易信号（横截面计算），cross_sectional 为 True 的策略需实现
+        
+        Args:
+            fields: 字段 -> 日期×股票 矩阵，股票缺少K线的日期为NaN
+            
+        Returns:
+            日期×股票 的 positions 矩阵，与 generate_signals 结果中的 positions 列含义相同
+        """
+        raise NotImplementedError("横截面策略必须实现此方法")
 
 
 class MovingAverageCrossover(Strategy):
@@ -264,98 +283,208 @@ class BacktestEngine:
         
     def run(
         self,
-        data: Dict[str, pd.DataFrame],
+        data: Union[Dict[str, pd.DataFrame], MarketPanel],
         strategy: Strategy,
         start_date: Optional[str] = None,
-        end_date: Optional[str] = None
+        end_date: Optional[str] = None,
+        calendar: Optional[TradingCalendar] = None,
+        quality: Optional[Dict[str, pd.Series]] = None,
+        bad_bars: str = "keep"
     ) -> Dict:
         """
         运行回测
         
         Args:
-            data: 股票数据 {symbol: DataFrame}
+            data: 股票数据 {symbol: DataFrame}，或内存映射面板 MarketPanel
             strategy: 策略实例
             start_date: 回测开始日期
             end_date: 回测结束日期
+            calendar: 交易日历，提供时以其交易日为时间轴，否则合并各股票数据的日期
+            quality: 质量标记 {symbol: 以日期为索引的标记}，如 LocalDataStore.read_quality 的结果；
+                     data 为面板时默认使用面板保存的标记
+            bad_bars: 有质量标记的K线的处理方式，"keep" 不处理（默认），"exclude" 剔除，"repair" 以前收盘价修复
             
         Returns:
             回测结果
         """
         logger.info(f"开始回测: {strategy.name}")
         
-        if not data:
-            raise ValueError("没有数据可供回测")
-            
-        # 确定时间范围
-        all_dates = set()
-        for df in data.values():
-            all_dates.update(df.index)
-            
-        dates = sorted(list(all_dates))
-        
-        if start_date:
-            dates = [d for d in dates if d >= pd.Timestamp(start_date)]
-        if end_date:
-            dates = [d for d in dates if d <= pd.Timestamp(end_date)]
+        if isinstance(data, MarketPanel):
+            if quality is None and bad_bars != "keep":
+                quality = data.quality_flags(start_date=start_date, end_date=end_date)
+            if quality and bad_bars != "keep":
+                # 问题K线需要逐只剔除或修复，转换为数据字典处理
+                data = data.to_dict(start_date=start_date, end_date=end_date)
             
-        if not dates:
-            raise ValueError("在指定时间范围内没有数据")
+        if quality and bad_bars != "keep":
+            data = {symbol: apply_quality(df, quality.get(symbol), bad_bars) for symbol, df in data.items()}
             
-        logger.info(f"回测时间范围: {dates[0].date()} 到 {dates[-1].date()}, 共{len(dates)}个交易日")
-        
-        # 为每只股票生成信号
-        signals = {}
-        for symbol, df in data.items():
-            signals[symbol] = strategy.generate_signals(df)
+        if isinstance(data, MarketPanel):
+            symbols, dates, closes, positions = self._panel_inputs(data, strategy, start_date, end_date, calendar)
+        else:
+            symbols, dates, closes, positions = self._dict_inputs(data, strategy, start_date, end_date, calendar)
+        symbol_pos = {symbol: j for j, symbol in enumerate(symbols)}
+        has_price = ~np.isnan(closes)
             
         # 逐日回测
-        for date in dates:
-            daily_prices = {}
-            
-            # 获取当日价格
-            for symbol, df in data.items():
-                if date in df.index:
-                    daily_prices[symbol] = df.loc[date, 'close']
-                    
-            if not daily_prices:
+        for i, date in enumerate(dates):
+            if not has_price[i].any():
                 continue
                 
             # 执行交易信号
-            for symbol, signal_df in signals.items():
-                if date in signal_df.index:
-                    signal_row = signal_df.loc[date]
+            for j in np.flatnonzero(np.abs(np.nan_to_num(positions[i])) > 0):
+                symbol = symbols[j]
+                if not has_price[i, j] or closes[i, j] == 0:
+                    continue
+                price = closes[i, j]
+                signal = positions[i, j]
+                
+                # 考虑滑点
+                trade_price = price * (1 + self.slippage) if signal > 0 else price * (1 - self.slippage)
+                
+                if signal > 0:  # 买入信号
+                    # 计算买入数量（这里简化：使用可用资金的50%）
+                    available_cash = self.portfolio.cash * 0.5
+                    quantity = int(available_cash / trade_price / 100) * 100  # 按手买入
                     
-                    # 检查是否有交易信号
-                    if 'positions' in signal_row and abs(signal_row['positions']) > 0:
-                        price = daily_prices.get(symbol)
-                        if price:
-                            # 考虑滑点
-                            trade_price = price * (1 + self.slippage) if signal_row['positions'] > 0 else price * (1 - self.slippage)
-                            
-                            if signal_row['positions'] > 0:  # 买入信号
-                                # 计算买入数量（这里简化：使用可用资金的50%）
-                                available_cash = self.portfolio.cash * 0.5
-                                quantity = int(available_cash / trade_price / 100) * 100  # 按手买入
-                                
-                                if quantity > 0:
-                                    self.portfolio.buy(symbol, trade_price, quantity, self.commission_rate)
-                                    
-                            elif signal_row['positions'] < 0:  # 卖出信号
-                                if symbol in self.portfolio.positions:
-                                    quantity = self.portfolio.positions[symbol]
-                                    self.portfolio.sell(symbol, trade_price, quantity, self.commission_rate + 0.001)  # 加印花税
+                    if quantity > 0:
+                        self.portfolio.buy(symbol, trade_price, quantity, self.commission_rate)
+                        
+                elif signal < 0:  # 卖出信号
+                    if symbol in self.portfolio.positions:
+                        quantity = self.portfolio.positions[symbol]
+                        self.portfolio.sell(symbol, trade_price, quantity, self.commission_rate + 0.001)  # 加印花税
             
-            # 更新组合市值并记录快照
+            # 更新组合市值并记录快照（只需持仓股票的当日价格）
+            daily_prices = {
+                symbol: closes[i, symbol_pos[symbol]] for symbol in self.portfolio.positions
+                if has_price[i, symbol_pos[symbol]]
+            }
             total_value = self.portfolio.update_position_values(daily_prices)
             self.portfolio.record_daily_snapshot(date, total_value)
         
         # 计算回测结果
-        self._calculate_results(dates, data)
+        self._calculate_results(dates)
         
         logger.info(f"回测完成，总交易次数: {len(self.portfolio.trades)}")
         return self.results
     
-    def _calculate_results(self, dates: List, data: Dict[str, pd.DataFrame]):
+    @staticmethod
+    def _backtest_dates(
+        history: pd.DatetimeIndex,
+        start_date: Optional[str],
+        end_date: Optional[str],
+        calendar: Optional[TradingCalendar]
+    ) -> List:
+        """确定回测日期：有交易日历时取数据首尾之间的交易日，否则使用数据日期，再按开始/结束日期截取"""
+        if calendar is not None and len(calendar):
+            dates = calendar.sessions(start_date or history[0], end_date or history[-1]) if len(history) \
+                else pd.DatetimeIndex([])
+        else:
+            dates = history
+        
+        if start_date:
+            dates = dates[dates >= pd.Timestamp(start_date)]
+        if end_date:
+            dates = dates[dates <= pd.Timestamp(end_date)]
+        dates = list(dates)
+            
+        if not dates:
+            raise ValueError("在指定时间范围内没有数据")
+            
+        logger.info(f"回测时间范围: {dates[0].date()} 到 {dates[-1].date()}, 共{len(dates)}个交易日")
+        return dates
+    
+    def _dict_inputs(
+        self,
+        data: Dict[str, pd.DataFrame],
+        strategy: Strategy,
+        start_date: Optional[str],
+        end_date: Optional[str],
+        calendar: Optional[TradingCalendar]
+    ) -> Tuple[List[str], List, np.ndarray, np.ndarray]:
+        """由数据字典生成 股票列表、回测日期，以及按回测日期对齐的收盘价与 positions 矩阵"""
+        if not data:
+            raise ValueError("没有数据可供回测")
+            
+        history = pd.DatetimeIndex(np.unique(np.concatenate(
+            [df.index.values.astype('datetime64[ns]') for df in data.values()])))
+        dates = self._backtest_dates(history, start_date, end_date, calendar)
+        
+        # 按回测日期对齐为 日期×股票 矩阵，逐日按行读取，避免逐只 df.loc 查找
+        symbols = list(data.keys())
+        closes = np.column_stack([self._align(data[s]['close'], dates) for s in symbols])
+        
+        # 横截面策略一次生成全部股票的信号，否则逐只股票生成
+        if strategy.cross_sectional:
+            # 与逐只计算一样使用全部历史数据（含回测开始前的预热期），再对齐到回测日期
+            fields = {
+                field: np.column_stack([self._align(data[s][field], history) for s in symbols])
+                for field in PANEL_FIELDS if all(field in df.columns for df in data.values())
+            }
+            positions = self._take_dates(strategy.generate_panel_signals(fields), history, dates)
+        else:
+            positions = np.column_stack([self._symbol_positions(strategy, data[s], dates) for s in symbols])
+        return symbols, dates, closes, positions
+    
+    def _panel_inputs(
+        self,
+        panel: MarketPanel,
+        strategy: Strategy,
+        start_date: Optional[str],
+        end_date: Optional[str],
+        calendar: Optional[TradingCalendar]
+    ) -> Tuple[List[str], List, np.ndarray, np.ndarray]:
+        """
+        由内存映射面板生成回测输入，直接按字段切片，不为每只股票构造DataFrame
+
+        横截面策略的输入为面板字段的零拷贝视图；逐只计算的策略每次只还原一只股票。
+        """
+        if not panel.symbols or not len(panel.dates):
+            raise ValueError("没有数据可供回测")
+            
+        dates = self._backtest_dates(panel.dates, start_date, end_date, calendar)
+        closes = self._take_dates(panel.field('close'), panel.dates, dates)
+        
+        if strategy.cross_sectional:
+            fields = {field: panel.field(field) for field in PANEL_FIELDS if field in panel.fields}
+            positions = self._take_dates(strategy.generate_panel_signals(fields), panel.dates, dates)
+        else:
+            columns = []
+            for symbol in panel.symbols:
+                values = np.asarray(panel.symbol(symbol))
+                valid = ~np.isnan(values).all(axis=1)
+                df = pd.DataFrame(values[valid], index=panel.dates[valid], columns=panel.fields)
+                columns.append(self._symbol_positions(strategy, df, dates))
+            positions = np.column_stack(columns)
+        return list(panel.symbols), dates, closes, positions
+    
+    def _symbol_positions(self, strategy: Strategy, df: pd.DataFrame, dates: List) -> np.ndarray:
+        """逐只股票生成信号，按回测日期对齐 positions 列"""
+        if df.empty:
+            return np.full(len(dates), np.nan)
+        signals = strategy.generate_signals(df)
+        if 'positions' not in signals.columns:
+            return np.full(len(dates), np.nan)
+        return self._align(signals['positions'], dates)
+    
+    @staticmethod
+    def _take_dates(matrix: np.ndarray, index: pd.DatetimeIndex, dates: List) -> np.ndarray:
+        """按回测日期取 日期×股票 矩阵的行（float64），不在 index 中的日期为NaN"""
+        matrix = np.asarray(matrix)
+        pos = index.get_indexer(pd.DatetimeIndex(dates))
+        result = np.full((len(dates), matrix.shape[1]), np.nan)
+        found = pos >= 0
+        result[found] = matrix[pos[found]]
+        return result
+    
+    @staticmethod
+    def _align(series: pd.Series, dates: List) -> np.ndarray:
+        """将序列按回测日期对齐为float64数组，缺失日期为NaN"""
+        series = series[~series.index.duplicated(keep='last')]
+        return series.reindex(dates).to_numpy(dtype=np.float64, na_value=np.nan)
+    
+    def _calculate_results(self, dates: List):
         """计算回测结果指标"""
         if not self.portfolio.history:
             self.results = {"error": "没有回测历史数据"}
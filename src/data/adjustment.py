@@ -0,0 +1,88 @@
+"""
+复权计算模块
+根据复权因子或除权除息事件，对不复权行情按需计算前复权、后复权价格
+"""
+
+import pandas as pd
+import numpy as np
+from typing import List, Optional
+import logging
+
+logger = logging.getLogger(__name__)
+
+# 需要复权的价格列
+PRICE_COLUMNS = ['open', 'high', 'low', 'close', 'pre_close']
+
+# 除权除息事件的列（均为每股数值），与通达信 gbbq 中"除权除息"类记录的字段对应
+EVENT_COLUMNS = ['cash_dividend', 'bonus_ratio', 'rights_ratio', 'rights_price']
+
+
+def factors_from_events(close: pd.Series, events: pd.DataFrame) -> pd.Series:
+    """
+    由除权除息事件计算累积后复权因子
+
+    除权价 = (前收盘 - 每股现金分红 + 配股价 × 每股配股数) / (1 + 每股送转股数 + 每股配股数)，
+    事件当日的复权比例为 前收盘 / 除权价，累积连乘得到后复权因子。
+
+    Args:
+        close: 不复权收盘价，以日期为索引
+        events: 以除权除息日为索引的事件表，列为 EVENT_COLUMNS 的子集，缺失列视为0
+
+    Returns:
+        与 close 同索引的累积后复权因子，首日为1
+    """
+    close = close.sort_index()
+    if events is None or events.empty or close.empty:
+        return pd.Series(1.0, index=close.index, name='factor')
+
+    events = events.reindex(columns=EVENT_COLUMNS).fillna(0.0)
+    # 同一天的多条事件合并；除权日不是交易日时顺延到下一个交易日
+    events = events.groupby(level=0).sum().sort_index()
+    pos = close.index.searchsorted(events.index, side='left')
+    valid = (pos > 0) & (pos < len(close))
+    events, pos = events[valid], pos[valid]
+
+    prev_close = close.to_numpy(dtype=np.float64)[pos - 1]
+    ex_price = (prev_close - events['cash_dividend'].to_numpy()
+                + events['rights_price'].to_numpy() * events['rights_ratio'].to_numpy())
+    ex_price /= 1.0 + events['bonus_ratio'].to_numpy() + events['rights_ratio'].to_numpy()
+
+    ratios = np.ones(len(close))
+    np.multiply.at(ratios, pos, np.where(ex_price > 0, prev_close / ex_price, 1.0))
+    return pd.Series(np.cumprod(ratios), index=close.index, name='factor')
+
+
+def apply_adjustment(
+    df: pd.DataFrame,
+    factors: pd.Series,
+    adjust: str,
+    columns: Optional[List[str]] = None
+) -> pd.DataFrame:
+    """
+    按复权因子对不复权行情做前复权或后复权
+
+    Args:
+        df: 以日期为索引的不复权行情
+        factors: 以日期为索引的累积后复权因子（如 Tushare adj_factor、Baostock backAdjustFactor），
+                 行情日期取不晚于该日的最近一个因子
+        adjust: "qfq" 前复权（以最新因子为基准），"hfq" 后复权，"None" 不复权
+        columns: 需要复权的列，默认 PRICE_COLUMNS 中存在的列
+
+    Returns:
+        复权后的新DataFrame
+    """
+    if adjust not in ("qfq", "hfq") or df.empty or factors is None or factors.empty:
+        return df
+
+    factors = factors.sort_index()
+    values = factors.to_numpy(dtype=np.float64)
+    pos = factors.index.searchsorted(df.index, side='right') - 1
+    # 早于第一个因子的日期使用第一个因子
+    multiplier = values[np.clip(pos, 0, len(values) - 1)]
+    if adjust == "qfq":
+        multiplier = multiplier / values[-1]
+
+    df = df.copy()
+    for col in columns or [c for c in PRICE_COLUMNS if c in df.columns]:
+        df[col] = (df[col].to_numpy(dtype=np.float64) * multiplier).astype(df[col].dtype)
+    return df
@@ -6,8 +6,17 @@
 import pandas as pd
 import numpy as np
 from datetime import datetime, timedelta
-from typing import Dict, List, Optional, Union
+from typing import Callable, Dict, List, Optional, Union
 import logging
+from concurrent.futures import ThreadPoolExecutor
+
+from src.data.adjustment import apply_adjustment
+from src.data.local_store import LocalDataStore, create_local_store
+from src.data.rate_limiter import call_with_retry, get_rate_limiter, get_source_settings
+from src.data.reference import ReferenceData
+from src.data.resample import ResampleCache, normalize_frequency, period_start, resample_bars
+from src.data.schema import normalize_daily
+from src.utils.config import get_config_section
 
 logger = logging.getLogger(__name__)
 
@@ -15,14 +24,27 @@ logger = logging.getLogger(__name__)
 class DataProvider:
     """基础数据提供器类"""
     
-    def __init__(self, data_source: str = "tushare"):
+    def __init__(
+        self,
+        data_source: str = "tushare",
+        store: Optional[LocalDataStore] = None,
+        use_cache: bool = True
+    ):
         """
         初始化数据提供器
         
         Args:
             data_source: 数据源类型，可选 "tushare", "akshare", "baostock"
+            store: 本地存储，为None时根据配置文件 storage 段创建
+            use_cache: 是否启用本地存储
         """
         self.data_source = data_source
+        self.store = (store if store is not None else create_local_store()) if use_cache else None
+        self.resampler = ResampleCache(self.store) if self.store is not None else None
+        self.rate_limiter = get_rate_limiter(data_source)
+        self.retry_count = get_source_settings(data_source)['retry_count']
+        # 每次上游请求完成后以返回的数据调用，供同步等调用方统计请求量
+        self.fetch_hooks: List[Callable[[pd.DataFrame], None]] = []
         self._init_data_source()
         
     def _init_data_source(self):
@@ -78,6 +100,57 @@ class DataProvider:
         """
         logger.info(f"获取{symbol}日线数据: {start_date} 到 {end_date}")
         
+        if self.store is None:
+            return self._fetch_with_retry(symbol, start_date, end_date, adjust)
+        
+        store_adjust = self._store_adjust(adjust)
+        df = self._get_stored_daily(symbol, start_date, end_date, store_adjust)
+        if store_adjust != adjust:
+            return self._adjust_price(df, adjust, symbol)
+        return df
+    
+    def _get_stored_daily(
+        self, 
+        symbol: str, 
+        start_date: str, 
+        end_date: str,
+        adjust: str
+    ) -> pd.DataFrame:
+        """只请求本地缺失的子区间，写入后与已有数据按日期合并读取"""
+        for gap_start, gap_end in self.store.missing_ranges(symbol, start_date, end_date, adjust):
+            logger.info(f"从{self.data_source}补齐{symbol}数据: {gap_start} 到 {gap_end}")
+            df = self._fetch_with_retry(symbol, gap_start, gap_end, adjust)
+            # 没有数据的缺口（节假日、停牌）也记为已覆盖，之后不再重复请求
+            if df is not None:
+                self.store.write(symbol, df, gap_start, gap_end, adjust)
+                
+        return self.store.load(symbol, start_date, end_date, adjust)
+    
+    def _fetch_with_retry(
+        self, 
+        symbol: str, 
+        start_date: str, 
+        end_date: str,
+        adjust: str
+    ) -> pd.DataFrame:
+        """经数据源限流器获取日线数据，失败时按 retry_count 指数退避重试，成功后调用 fetch_hooks"""
+        df = call_with_retry(
+            self._fetch_daily, symbol, start_date, end_date, adjust,
+            retry_count=self.retry_count,
+            limiter=self.rate_limiter
+        )
+        for hook in self.fetch_hooks:
+            hook(df)
+        return df
+    
+    def _fetch_daily(
+        self, 
+        symbol: str, 
+        start_date: str, 
+        end_date: str,
+        adjust: str
+    ) -> pd.DataFrame:
+        """从上游数据源获取日线数据"""
         try:
             if self.data_source == "tushare":
                 return self._get_tushare_daily(symbol, start_date, end_date, adjust)
@@ -103,34 +176,189 @@ class DataProvider:
             end_date=end_date.replace("-", ""),
         )
         
-        if df.empty:
-            return pd.DataFrame()
-        
-        # 重命名列以统一格式
-        df = df.rename(columns={
-            'trade_date': 'date',
-            'ts_code': 'symbol',
-            'open': 'open',
-            'high': 'high',
-            'low': 'low',
-            'close': 'close',
-            'pre_close': 'pre_close',
-            'change': 'change',
-            'pct_chg': 'pct_change',
-            'vol': 'volume',
-            'amount': 'amount'
-        })
-        
-        # 转换日期格式
-        df['date'] = pd.to_datetime(df['date'], format='%Y%m%d')
-        df = df.set_index('date').sort_index()
+        df = normalize_daily(df, symbol, date_format='%Y%m%d', source="tushare")
         
         # 如果需要复权数据
         if adjust != "None":
-            df = self._adjust_price(df, adjust)
+            df = self._adjust_price(df, adjust, symbol)
             
         return df
     
+    def get_market_daily_bulk(
+        self, 
+        start_date: str, 
+        end_date: str,
+        symbols: Optional[List[str]] = None,
+        adjust: str = "qfq",
+        as_panel: bool = False,
+        max_workers: Optional[int] = None
+    ) -> Dict[str, pd.DataFrame]:
+        """
+        按交易日批量获取全市场日线数据（仅支持Tushare）
+        
+        每个交易日调用一次 pro.daily(trade_date=...) 取得全市场行情，
+        一年约250次调用即可覆盖全部A股，而逐只获取需要约5000次。
+        启用本地存储时结果按股票写入本地存储。
+        
+        Args:
+            start_date: 开始日期，格式 "YYYY-MM-DD"
+            end_date: 结束日期，格式 "YYYY-MM-DD"
+            symbols: 只保留这些股票，为None时保留全市场；
+                     指定且本地存储已覆盖全部股票的交易日不再请求
+            adjust: 复权类型
+            as_panel: 为True时返回 {字段: 日期×股票 DataFrame} 面板，否则返回 {股票代码: DataFrame}
+            max_workers: 并发线程数，默认读取配置 performance.max_workers
+            
+        Returns:
+            按股票或按字段组织的数据字典
+        """
+        if self.data_source != "tushare":
+            raise ValueError(f"按交易日批量获取仅支持 tushare 数据源: {self.data_source}")
+            
+        trade_dates = self._get_tushare_trade_dates(start_date, end_date)
+        
+        # 指定股票时跳过本地已完整覆盖的交易日；本地只存储不复权行情
+        needed: Dict[str, set] = {}
+        if symbols is not None and self.store is not None:
+            for symbol in symbols:
+                needed[symbol] = {
+                    d for gap_start, gap_end in self.store.missing_ranges(symbol, start_date, end_date, "None")
+                    for d in trade_dates if gap_start <= d <= gap_end
+                }
+            missing = set().union(*needed.values())
+            trade_dates = [d for d in trade_dates if d in missing]
+        
+        logger.info(f"按交易日批量获取全市场日线数据: {start_date} 到 {end_date}, 共{len(trade_dates)}个交易日")
+        
+        def fetch(trade_date: str) -> pd.DataFrame:
+            try:
+                return call_with_retry(
+                    self.pro.daily, trade_date=trade_date.replace("-", ""),
+                    retry_count=self.retry_count,
+                    limiter=self.rate_limiter
+                )
+            except Exception as e:
+                logger.error(f"获取 {trade_date} 全市场数据失败: {e}")
+                return None
+        
+        max_workers = self._resolve_max_workers(max_workers)
+        if max_workers > 1 and len(trade_dates) > 1:
+            with ThreadPoolExecutor(max_workers=min(max_workers, len(trade_dates))) as executor:
+                frames = list(executor.map(fetch, trade_dates))
+        else:
+            frames = [fetch(d) for d in trade_dates]
+        
+        # 需要的交易日中有获取失败的股票不写入本地存储，避免把缺失数据的区间标记为已覆盖
+        failed = {d for d, f in zip(trade_dates, frames) if f is None}
+        if failed:
+            logger.warning(f"{len(failed)}个交易日获取失败，需要这些交易日的股票本次不写入本地存储: "
+                           f"{sorted(failed)[:5]}")
+        
+        frames = [f for f in frames if f is not None and not f.empty]
+        if frames:
+            market = pd.concat(frames, ignore_index=True)
+            if symbols is not None:
+                market = market[market['ts_code'].isin(symbols)]
+        else:
+            market = pd.DataFrame(columns=['trade_date', 'ts_code'])
+        
+        raw, written = {}, set()
+        for symbol, df in market.groupby('ts_code', sort=True):
+            df = normalize_daily(df, symbol, date_format='%Y%m%d', source="tushare")
+            if self.store is not None and not failed.intersection(needed.get(symbol, trade_dates)):
+                self.store.write(symbol, df, start_date, end_date, "None")
+                written.add(symbol)
+            raw[symbol] = df
+        
+        # 本地已覆盖的部分从本地存储读取，未写入的股票与本次获取的数据合并
+        if symbols is not None and self.store is not None:
+            for symbol in symbols:
+                df = self.store.load(symbol, start_date, end_date, "None")
+                if symbol in raw and symbol not in written and not df.empty:
+                    df = pd.concat([df, raw[symbol]])
+                    df = df[~df.index.duplicated(keep='last')].sort_index()
+                if not df.empty:
+                    raw[symbol] = df
+        
+        result = raw
+        if adjust in ("qfq", "hfq"):
+            factors = self._get_market_adjust_factors(list(raw.keys()), max_workers)
+            result = {
+                symbol: apply_adjustment(df, factors.get(symbol), adjust)
+                for symbol, df in raw.items()
+            }
+        
+        logger.info(f"批量获取完成，共 {len(result)} 只股票")
+        
+        if as_panel:
+            return self._to_panel(result)
+        return result
+    
+    def _get_market_adjust_factors(
+        self, 
+        symbols: List[str],
+        max_workers: Optional[int] = None
+    ) -> Dict[str, pd.Series]:
+        """
+        批量获取多只股票的复权因子
+        
+        复权因子需要完整历史，逐只调用一次即可取得全部历史因子，
+        本地已缓存的股票不再请求。
+        
+        Args:
+            symbols: 股票代码列表
+            max_workers: 并发线程数
+            
+        Returns:
+            {股票代码: 累积后复权因子}，获取失败的股票不在结果中
+        """
+        max_workers = self._resolve_max_workers(max_workers)
+        if max_workers > 1 and len(symbols) > 1:
+            with ThreadPoolExecutor(max_workers=min(max_workers, len(symbols))) as executor:
+                series = list(executor.map(self._get_adjust_factors, symbols))
+        else:
+            series = [self._get_adjust_factors(symbol) for symbol in symbols]
+        return {symbol: s for symbol, s in zip(symbols, series) if s is not None}
+    
+    def _get_tushare_trade_dates(self, start_date: str, end_date: str) -> List[str]:
+        """获取区间内的交易日列表，日期格式为 YYYY-MM-DD"""
+        cal = call_with_retry(
+            self.pro.trade_cal,
+            exchange='SSE',
+            start_date=start_date.replace("-", ""),
+            end_date=end_date.replace("-", ""),
+            is_open='1',
+            retry_count=self.retry_count,
+            limiter=self.rate_limiter
+        )
+        if 'is_open' in cal.columns:
+            cal = cal[cal['is_open'].astype(int) == 1]
+        dates = pd.to_datetime(cal['cal_date'], format='%Y%m%d').sort_values()
+        return [d.strftime('%Y-%m-%d') for d in dates]
+    
+    @staticmethod
+    def _to_panel(data: Dict[str, pd.DataFrame]) -> Dict[str, pd.DataFrame]:
+        """
+        将 {股票代码: DataFrame} 转换为 {字段: 日期×股票 DataFrame} 面板
+        
+        Args:
+            data: 按股票组织的数据
+            
+        Returns:
+            按字段组织的面板，缺失值为NaN
+        """
+        if not data:
+            return {}
+            
+        stacked = pd.concat(data, names=['symbol', 'date'])
+        fields = [c for c in stacked.columns if c != 'symbol' and pd.api.types.is_numeric_dtype(stacked[c])]
+        stacked = stacked[fields]
+        
+        panel = {}
+        for field in fields:
+            panel[field] = stacked[field].unstack('symbol').sort_index()
+        return panel
+    
     def _get_akshare_daily(
         self, 
         symbol: str, 
@@ -139,46 +367,19 @@ class DataProvider:
         adjust: str
     ) -> pd.DataFrame:
         """使用AkShare获取日线数据"""
-        # 转换股票代码格式
-        if symbol.endswith('.SZ'):
-            code = f"sz{symbol[:6]}"
-        elif symbol.endswith('.SH'):
-            code = f"sh{symbol[:6]}"
-        else:
-            code = symbol
+        # stock_zh_a_hist 使用6位数字代码、YYYYMMDD日期，不复权时adjust为空字符串
+        code = symbol[:6] if symbol.endswith(('.SZ', '.SH')) else symbol
             
         # 获取数据
         df = self.ak.stock_zh_a_hist(
             symbol=code,
             period="daily",
-            start_date=start_date,
-            end_date=end_date,
-            adjust=adjust
+            start_date=start_date.replace("-", ""),
+            end_date=end_date.replace("-", ""),
+            adjust=adjust if adjust in ("qfq", "hfq") else ""
         )
         
-        if df.empty:
-            return pd.DataFrame()
-        
-        # 重命名列
-        df = df.rename(columns={
-            '日期': 'date',
-            '开盘': 'open',
-            '收盘': 'close',
-            '最高': 'high',
-            '最低': 'low',
-            '成交量': 'volume',
-            '成交额': 'amount',
-            '振幅': 'amplitude',
-            '涨跌幅': 'pct_change',
-            '涨跌额': 'change',
-            '换手率': 'turnover'
-        })
-        
-        df['date'] = pd.to_datetime(df['date'])
-        df['symbol'] = symbol
-        df = df.set_index('date').sort_index()
-        
-        return df
+        return normalize_daily(df, symbol, source=self.data_source)
     
     def _get_baostock_daily(
         self, 
@@ -204,7 +405,8 @@ class DataProvider:
             start_date=start_date,
             end_date=end_date,
             frequency="d",
-            adjustflag="3" if adjust == "qfq" else "2" if adjust == "hfq" else "1"
+            # baostock: 1后复权，2前复权，3不复权
+            adjustflag="2" if adjust == "qfq" else "1" if adjust == "hfq" else "3"
         )
         
         data_list = []
@@ -212,43 +414,266 @@ class DataProvider:
             data_list.append(rs.get_row_data())
             
         df = pd.DataFrame(data_list, columns=rs.fields)
+        if self.store is not None and not df.empty:
+            # 停牌与ST标记暂存到本地参考数据，批量获取结束或 cleanup 时统一保存，之后的请求据此裁剪
+            self.store.reference.buffer_status(pd.DataFrame({
+                'symbol': symbol,
+                'date': df['date'],
+                'suspended': df['tradestatus'] == '0',
+                'is_st': df['isST'] == '1',
+            }))
+        return normalize_daily(df, symbol, source=self.data_source)
+    
+    def _supports_adjust_factors(self) -> bool:
+        """数据源是否提供复权因子"""
+        return self.data_source in ("tushare", "akshare", "baostock")
+    
+    def _store_adjust(self, adjust: str) -> Optional[str]:
+        """
+        本地存储使用的复权类型
         
-        if df.empty:
-            return pd.DataFrame()
+        支持复权因子的数据源只存储不复权行情，前/后复权按因子即时计算
+        
+        Args:
+            adjust: 请求的复权类型
+            
+        Returns:
+            存储使用的复权类型
+        """
+        if adjust in ("qfq", "hfq") and self._supports_adjust_factors():
+            return "None"
+        return adjust
+    
+    def _get_adjust_factors(self, symbol: str) -> Optional[pd.Series]:
+        """
+        获取累积后复权因子，优先读取本地存储
         
-        # 转换数据类型
-        numeric_cols = ['open', 'high', 'low', 'close', 'preclose', 'volume', 'amount', 'pctChg', 'turn']
-        for col in numeric_cols:
-            if col in df.columns:
-                df[col] = pd.to_numeric(df[col], errors='coerce')
+        Args:
+            symbol: 股票代码
+            
+        Returns:
+            以日期为索引的复权因子，获取失败时返回None
+        """
+        if self.store is not None:
+            factors = self.store.read_adjust_factors(symbol)
+            if factors is not None:
+                return factors
+                
+        try:
+            factors = call_with_retry(
+                self._fetch_adjust_factors, symbol,
+                retry_count=self.retry_count,
+                limiter=self.rate_limiter
+            )
+        except Exception as e:
+            logger.error(f"获取{symbol}复权因子失败: {e}")
+            return None
+            
+        if factors is None or factors.empty:
+            return None
+        if self.store is not None:
+            self.store.write_adjust_factors(symbol, factors)
+        return factors
+    
+    def _fetch_adjust_factors(self, symbol: str) -> pd.Series:
+        """从上游数据源获取全部历史的累积后复权因子"""
+        if self.data_source == "tushare":
+            df = self.pro.adj_factor(ts_code=symbol)
+            if df is None or df.empty:
+                return pd.Series(dtype=np.float64, name='factor')
+            index = pd.to_datetime(df['trade_date'], format='%Y%m%d')
+            return pd.Series(df['adj_factor'].astype(np.float64).values, index=index, name='factor').sort_index()
+            
+        elif self.data_source == "akshare":
+            code = f"{symbol[-2:].lower()}{symbol[:6]}" if symbol.endswith(('.SZ', '.SH')) else symbol
+            df = self.ak.stock_zh_a_daily(symbol=code, adjust="hfq-factor")
+            if df is None or df.empty:
+                return pd.Series(dtype=np.float64, name='factor')
+            index = pd.to_datetime(df['date'])
+            return pd.Series(df['hfq_factor'].astype(np.float64).values, index=index, name='factor').sort_index()
+            
+        elif self.data_source == "baostock":
+            code = f"{symbol[-2:].lower()}.{symbol[:6]}" if symbol.endswith(('.SZ', '.SH')) else symbol
+            rs = self.bs.query_adjust_factor(code=code, start_date="1990-01-01")
+            rows = []
+            while (rs.error_code == '0') & rs.next():
+                rows.append(rs.get_row_data())
+            df = pd.DataFrame(rows, columns=rs.fields)
+            if df.empty:
+                # 从未除权除息的股票没有因子记录
+                return pd.Series([1.0], index=pd.DatetimeIndex(["1990-01-01"]), name='factor')
+            index = pd.to_datetime(df['dividOperateDate'])
+            return pd.Series(pd.to_numeric(df['backAdjustFactor']).values, index=index, name='factor').sort_index()
+            
+        raise ValueError(f"数据源不提供复权因子: {self.data_source}")
+    
+    def update_reference_data(self, start_date: str, end_date: str) -> ReferenceData:
+        """
+        从数据源更新本地交易日历、证券主表与停牌日期
         
-        df['date'] = pd.to_datetime(df['date'])
-        df = df.rename(columns={'code': 'symbol', 'pctChg': 'pct_change'})
-        df = df.set_index('date').sort_index()
+        更新后本地存储计算缺失区间时会裁剪掉上市前、退市后、节假日与停牌的日期，
+        回测引擎也可以使用 reference.calendar 作为时间轴。Baostock 的停牌与ST标记
+        在获取日线时自动记录。
         
-        return df
+        Args:
+            start_date: 交易日历开始日期
+            end_date: 交易日历结束日期
+            
+        Returns:
+            更新后的参考数据
+        """
+        if self.store is None:
+            raise ValueError("未启用本地存储，无法保存参考数据")
+            
+        reference = self.store.reference
+        reference.update_calendar(call_with_retry(self._fetch_trade_calendar, start_date, end_date,
+                                                  retry_count=self.retry_count, limiter=self.rate_limiter))
+        reference.update_securities(call_with_retry(self._fetch_securities,
+                                                    retry_count=self.retry_count, limiter=self.rate_limiter))
+        if self.data_source == "tushare":
+            suspended = call_with_retry(self.pro.suspend_d, suspend_type='S',
+                                        start_date=start_date.replace("-", ""), end_date=end_date.replace("-", ""),
+                                        retry_count=self.retry_count, limiter=self.rate_limiter)
+            if suspended is not None and not suspended.empty:
+                reference.update_status(pd.DataFrame({
+                    'symbol': suspended['ts_code'],
+                    'date': pd.to_datetime(suspended['trade_date'], format='%Y%m%d'),
+                    'suspended': True,
+                    'is_st': False,
+                }))
+        reference.flush_status()
+                
+        logger.info(f"参考数据已更新: {len(reference.calendar)} 个交易日, {len(reference.securities)} 只股票")
+        return reference
     
-    def _adjust_price(self, df: pd.DataFrame, adjust_type: str) -> pd.DataFrame:
+    def _fetch_trade_calendar(self, start_date: str, end_date: str) -> List[str]:
+        """从上游数据源获取区间内的交易日"""
+        if self.data_source == "tushare":
+            return self._get_tushare_trade_dates(start_date, end_date)
+            
+        elif self.data_source == "akshare":
+            dates = pd.to_datetime(self.ak.tool_trade_date_hist_sina()['trade_date'])
+            dates = dates[(dates >= pd.Timestamp(start_date)) & (dates <= pd.Timestamp(end_date))]
+            return [d.strftime('%Y-%m-%d') for d in dates]
+            
+        elif self.data_source == "baostock":
+            rs = self.bs.query_trade_dates(start_date=start_date, end_date=end_date)
+            rows = []
+            while (rs.error_code == '0') & rs.next():
+                rows.append(rs.get_row_data())
+            df = pd.DataFrame(rows, columns=rs.fields)
+            return df.loc[df['is_trading_day'] == '1', 'calendar_date'].tolist() if not df.empty else []
+            
+        raise ValueError(f"数据源不提供交易日历: {self.data_source}")
+    
+    def _fetch_securities(self) -> pd.DataFrame:
+        """从上游数据源获取证券主表，以股票代码为索引"""
+        if self.data_source == "tushare":
+            frames = [self.pro.stock_basic(exchange='', list_status=status,
+                                           fields='ts_code,name,list_date,delist_date')
+                      for status in ('L', 'D', 'P')]
+            df = pd.concat([f for f in frames if f is not None and not f.empty])
+            return pd.DataFrame({
+                'name': df['name'].values,
+                'list_date': pd.to_datetime(df['list_date'], format='%Y%m%d', errors='coerce').values,
+                'delist_date': pd.to_datetime(df['delist_date'], format='%Y%m%d', errors='coerce').values,
+                'is_st': df['name'].str.contains('ST').values,
+            }, index=pd.Index(df['ts_code'].values, name='symbol'))
+            
+        elif self.data_source == "akshare":
+            # AkShare 的代码表不含上市日期，只记录名称与ST标记
+            df = self.ak.stock_info_a_code_name()
+            codes = df['code'].astype(str).str.zfill(6)
+            suffix = np.where(codes.str[0].isin(['6', '9']), '.SH',
+                              np.where(codes.str[0].isin(['4', '8']), '.BJ', '.SZ'))
+            return pd.DataFrame({
+                'name': df['name'].values,
+                'is_st': df['name'].str.contains('ST').values,
+            }, index=pd.Index(codes + suffix, name='symbol'))
+            
+        elif self.data_source == "baostock":
+            rs = self.bs.query_stock_basic()
+            rows = []
+            while (rs.error_code == '0') & rs.next():
+                rows.append(rs.get_row_data())
+            df = pd.DataFrame(rows, columns=rs.fields)
+            df = df[df['type'] == '1']  # 只保留股票
+            symbols = df['code'].str[3:] + '.' + df['code'].str[:2].str.upper()
+            return pd.DataFrame({
+                'name': df['code_name'].values,
+                'list_date': pd.to_datetime(df['ipoDate'], errors='coerce').values,
+                'delist_date': pd.to_datetime(df['outDate'], errors='coerce').values,
+                'is_st': df['code_name'].str.contains('ST').values,
+            }, index=pd.Index(symbols.values, name='symbol'))
+            
+        raise ValueError(f"数据源不提供证券主表: {self.data_source}")
+    
+    def _adjust_price(
+        self, 
+        df: pd.DataFrame, 
+        adjust_type: str,
+        symbol: Optional[str] = None
+    ) -> pd.DataFrame:
         """
-        价格复权处理（简化版）
+        价格复权处理，按累积复权因子向量化计算
         
         Args:
-            df: 原始数据
+            df: 不复权数据
             adjust_type: 复权类型
+            symbol: 股票代码，默认取 df['symbol']
             
         Returns:
             复权后的数据
+            
+        Raises:
+            ValueError: 取不到复权因子，不以不复权价格冒充复权行情
         """
-        # 这里实现复权逻辑
-        # 实际使用时需要获取复权因子进行计算
-        return df
+        if adjust_type not in ("qfq", "hfq") or df.empty:
+            return df
+            
+        symbol = symbol or df['symbol'].iloc[0]
+        factors = self._get_adjust_factors(symbol)
+        if factors is None:
+            raise ValueError(f"未获取到{symbol}复权因子，无法计算{adjust_type}行情")
+        return apply_adjustment(df, factors, adjust_type)
+    
+    def get_bars(
+        self, 
+        symbol: str, 
+        start_date: str, 
+        end_date: str,
+        adjust: str = "qfq",
+        frequency: str = "D"
+    ) -> pd.DataFrame:
+        """
+        获取指定周期的K线，周线/月线由本地日线聚合，不额外请求网络
+        
+        Args:
+            symbol: 股票代码
+            start_date: 开始日期，周线/月线向前对齐到周期第一天
+            end_date: 结束日期
+            adjust: 复权类型
+            frequency: 周期，"D"/"W"/"M" 或 "日线"/"周线"/"月线"
+            
+        Returns:
+            以日期为索引的K线，周线/月线以周期最后一个交易日为索引
+        """
+        def load_daily(start: str, end: str) -> pd.DataFrame:
+            return self.get_daily_data(symbol, start, end, adjust)
+        
+        if self.resampler is None:
+            frequency = normalize_frequency(frequency)
+            return resample_bars(load_daily(period_start(start_date, frequency).strftime('%Y-%m-%d'), end_date),
+                                 frequency)
+        return self.resampler.get(symbol, start_date, end_date, adjust, frequency, load_daily)
     
     def get_multiple_stocks(
         self, 
         symbols: List[str], 
         start_date: str, 
         end_date: str,
-        adjust: str = "qfq"
+        adjust: str = "qfq",
+        max_workers: Optional[int] = None
     ) -> Dict[str, pd.DataFrame]:
         """
         批量获取多只股票数据
@@ -258,24 +683,52 @@ class DataProvider:
             start_date: 开始日期
             end_date: 结束日期
             adjust: 复权类型
+            max_workers: 并发线程数，默认读取配置 performance.max_workers，为1时顺序获取
             
         Returns:
             字典，key为股票代码，value为DataFrame
         """
-        result = {}
-        for symbol in symbols:
+        symbols = list(dict.fromkeys(symbols))
+        max_workers = self._resolve_max_workers(max_workers)
+        
+        def fetch(symbol: str) -> Optional[pd.DataFrame]:
             try:
-                df = self.get_daily_data(symbol, start_date, end_date, adjust)
-                if not df.empty:
-                    result[symbol] = df
-                    logger.info(f"成功获取 {symbol} 数据，共 {len(df)} 条记录")
-                else:
-                    logger.warning(f"未获取到 {symbol} 数据")
+                return self.get_daily_data(symbol, start_date, end_date, adjust)
             except Exception as e:
                 logger.error(f"获取 {symbol} 数据失败: {e}")
+                return None
+        
+        if max_workers > 1 and len(symbols) > 1:
+            with ThreadPoolExecutor(max_workers=min(max_workers, len(symbols))) as executor:
+                frames = list(executor.map(fetch, symbols))
+        else:
+            frames = [fetch(symbol) for symbol in symbols]
+        self._flush_reference_status()
+        
+        result = {}
+        for symbol, df in zip(symbols, frames):
+            if df is None:
+                continue
+            if not df.empty:
+                result[symbol] = df
+                logger.info(f"成功获取 {symbol} 数据，共 {len(df)} 条记录")
+            else:
+                logger.warning(f"未获取到 {symbol} 数据")
                 
         return result
     
+    def _resolve_max_workers(self, max_workers: Optional[int]) -> int:
+        """确定批量获取的并发线程数"""
+        # baostock 所有查询共用一个登录会话，不支持并发
+        if self.data_source == "baostock":
+            return 1
+        if max_workers is None:
+            performance = get_config_section("performance")
+            if not performance.get('use_multiprocessing', True):
+                return 1
+            max_workers = performance.get('max_workers', 4)
+        return max(1, int(max_workers))
+    
     def get_index_data(
         self, 
         index_code: str, 
@@ -296,8 +749,14 @@ class DataProvider:
         # 实现指数数据获取
         return self.get_daily_data(index_code, start_date, end_date, "None")
     
+    def _flush_reference_status(self):
+        """保存获取日线时暂存的停牌与ST日期"""
+        if self.store is not None:
+            self.store.reference.flush_status()
+    
     def cleanup(self):
         """清理资源"""
+        self._flush_reference_status()
         if self.data_source == "baostock":
             self.bs.logout()
             logger.info("Baostock已登出")
@@ -0,0 +1,252 @@
+"""
+数据指纹模块
+本地存储写入日线时按 股票/复权类型/月份 记录内容哈希与版本号，
+派生结果（指标、信号、回测结果、面板）保存计算时输入数据的指纹，
+读取时与当前指纹比较，输入数据变化时恰好失效，未变化时重复写入相同数据不会失效
+"""
+
+import pandas as pd
+import numpy as np
+import hashlib
+import json
+import os
+import pickle
+import shutil
+import time
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, List, Optional, Union
+import logging
+
+from src.utils.config import get_config_section
+
+logger = logging.getLogger(__name__)
+
+
+def frame_fingerprint(df: Union[pd.DataFrame, pd.Series]) -> str:
+    """
+    计算数据内容的哈希
+
+    列按名称排序，数值列统一按 float64 比较，全部为空的列被忽略，
+    因此列顺序、整数/浮点类型或存储后端不同但内容相同的数据得到相同的哈希。
+
+    Args:
+        df: 以日期为索引的数据
+
+    Returns:
+        16位十六进制哈希
+    """
+    if isinstance(df, pd.Series):
+        df = df.to_frame()
+    digest = hashlib.sha1()
+    if isinstance(df.index, pd.DatetimeIndex):
+        digest.update(df.index.values.astype('datetime64[ns]').astype(np.int64).tobytes())
+    else:
+        digest.update('\x1f'.join(map(str, df.index)).encode('utf-8'))
+
+    for col in sorted(df.columns, key=str):
+        values = df[col]
+        if pd.api.types.is_numeric_dtype(values) and not pd.api.types.is_bool_dtype(values):
+            array = values.to_numpy(dtype=np.float64, na_value=np.nan)
+            missing = np.isnan(array)
+            if missing.all():
+                continue
+            # NaN 的二进制表示不唯一，统一后再哈希
+            array = np.where(missing, np.nan, array)
+            digest.update(f"\x1e{col}".encode('utf-8'))
+            digest.update(array.tobytes())
+        else:
+            if values.isna().all():
+                continue
+            digest.update(f"\x1e{col}".encode('utf-8'))
+            digest.update('\x1f'.join(values.astype(str)).encode('utf-8'))
+    return digest.hexdigest()[:16]
+
+
+def combine_fingerprints(parts: Iterable[str]) -> str:
+    """
+    合并多个指纹
+
+    Args:
+        parts: 指纹（或带区间名称的指纹）序列，顺序有意义
+
+    Returns:
+        16位十六进制哈希
+    """
+    digest = hashlib.sha1()
+    for part in parts:
+        digest.update(part.encode('utf-8'))
+        digest.update(b'\n')
+    return digest.hexdigest()[:16]
+
+
+class ArtifactCache:
+    """按输入数据指纹失效的派生结果缓存，用于指标、信号与回测结果"""
+
+    def __init__(self, cache_dir: Union[str, Path], store=None):
+        """
+        初始化派生结果缓存
+
+        Args:
+            cache_dir: 缓存目录，文件为 {cache_dir}/{名称}/{参数哈希}.pkl
+            store: 提供输入指纹的本地存储（LocalDataStore 或 SQLiteBarStore）
+        """
+        self.cache_dir = Path(cache_dir)
+        self.store = store
+        self.stats = {'hits': 0, 'misses': 0, 'invalidated': 0}
+
+    @staticmethod
+    def make_key(name: str, params: Optional[Dict] = None) -> str:
+        """由结果名称与计算参数生成稳定的哈希键"""
+        text = json.dumps([name, params or {}], sort_keys=True, default=str, ensure_ascii=False)
+        return hashlib.sha1(text.encode('utf-8')).hexdigest()[:16]
+
+    def _path(self, name: str, params: Optional[Dict]) -> Path:
+        return self.cache_dir / name / f"{self.make_key(name, params)}.pkl"
+
+    def inputs(
+        self,
+        symbols: List[str],
+        start_date: Optional[str] = None,
+        end_date: Optional[str] = None,
+        adjust: str = "qfq"
+    ) -> Dict[str, Optional[str]]:
+        """
+        获取输入数据的当前指纹
+
+        Args:
+            symbols: 股票代码列表
+            start_date: 开始日期
+            end_date: 结束日期
+            adjust: 复权类型
+
+        Returns:
+            {股票代码: 指纹}，本地没有数据的股票为None
+        """
+        if self.store is None:
+            raise ValueError("未指定本地存储，无法获取输入指纹")
+        return self.store.fingerprints(symbols, start_date, end_date, adjust)
+
+    def get(self, name: str, params: Optional[Dict], inputs: Dict[str, Optional[str]]) -> Optional[Any]:
+        """
+        读取缓存结果
+
+        Args:
+            name: 结果名称，如 "signals"、"backtest"
+            params: 计算参数（策略参数、日期区间等）
+            inputs: 输入数据的当前指纹
+
+        Returns:
+            输入指纹与计算时一致时返回缓存结果，否则删除过期结果并返回None
+        """
+        path = self._path(name, params)
+        if not path.exists():
+            self.stats['misses'] += 1
+            return None
+        try:
+            with open(path, 'rb') as f:
+                saved = pickle.load(f)
+        except Exception as e:
+            logger.warning(f"读取缓存结果 {name} 失败: {e}")
+            self.stats['misses'] += 1
+            return None
+
+        if saved.get('inputs') != inputs:
+            changed = sorted(symbol for symbol in set(saved.get('inputs', {})) | set(inputs)
+                             if saved.get('inputs', {}).get(symbol) != inputs.get(symbol))
+            logger.info(f"输入数据已变化，缓存结果 {name} 失效: {', '.join(changed[:10])}")
+            path.unlink(missing_ok=True)
+            self.stats['invalidated'] += 1
+            self.stats['misses'] += 1
+            return None
+        self.stats['hits'] += 1
+        return saved['value']
+
+    def put(self, name: str, params: Optional[Dict], inputs: Dict[str, Optional[str]], value: Any):
+        """
+        保存结果及计算时的输入指纹
+
+        Args:
+            name: 结果名称
+            params: 计算参数
+            inputs: 输入数据的指纹
+            value: 可序列化的结果
+        """
+        path = self._path(name, params)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_suffix('.tmp')
+        with open(tmp_path, 'wb') as f:
+            pickle.dump({'name': name, 'params': params, 'inputs': inputs, 'value': value,
+                         'created_at': time.time()}, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_path, path)
+
+    def get_or_compute(
+        self,
+        name: str,
+        params: Optional[Dict],
+        symbols: List[str],
+        start_date: Optional[str],
+        end_date: Optional[str],
+        compute: Callable[[], Any],
+        adjust: str = "qfq"
+    ) -> Any:
+        """
+        读取缓存结果，输入数据变化或没有缓存时重新计算并保存
+
+        Args:
+            name: 结果名称
+            params: 计算参数，日期区间与复权类型会自动加入
+            symbols: 输入股票代码列表
+            start_date: 输入数据开始日期
+            end_date: 输入数据结束日期
+            compute: 无参数的计算函数
+            adjust: 复权类型
+
+        Returns:
+            计算结果
+        """
+        params = dict(params or {}, symbols=sorted(symbols), start_date=start_date, end_date=end_date,
+                      adjust=adjust)
+        inputs = self.inputs(symbols, start_date, end_date, adjust)
+        value = self.get(name, params, inputs)
+        if value is None:
+            value = compute()
+            self.put(name, params, inputs, value)
+        return value
+
+    def clear(self, name: Optional[str] = None):
+        """
+        清除缓存结果
+
+        Args:
+            name: 结果名称，为None时清除全部
+        """
+        shutil.rmtree(self.cache_dir / name if name is not None else self.cache_dir, ignore_errors=True)
+
+
+def create_artifact_cache(store=None, config_path: Optional[Union[str, Path]] = None) -> ArtifactCache:
+    """
+    根据配置文件创建派生结果缓存
+
+    Args:
+        store: 提供输入指纹的本地存储，为None时根据配置文件 storage 段创建
+        config_path: 配置文件路径，默认为 config/config.yaml
+
+    Returns:
+        位于 storage.data_dir/artifacts 的派生结果缓存
+    """
+    if store is None:
+        from src.data.local_store import create_local_store
+        store = create_local_store(config_path)
+    storage = get_config_section("storage", config_path)
+    return ArtifactCache(Path(storage.get('data_dir', './data')) / "artifacts", store)
+
+
+if __name__ == "__main__":
+    # 测试代码
+    logging.basicConfig(level=logging.INFO)
+
+    dates = pd.bdate_range("2024-01-01", "2024-01-31")
+    df = pd.DataFrame({'close': np.linspace(10, 11, len(dates)), 'volume': np.arange(len(dates))}, index=dates)
+    print(frame_fingerprint(df), frame_fingerprint(df[['volume', 'close']].astype(float)))
+    df.loc[dates[5], 'close'] += 0.01
+    print(frame_fingerprint(df))
@@ -6,12 +6,19 @@
 import pandas as pd
 import numpy as np
 from datetime import datetime, timedelta
-from typing import Dict, List, Optional, Union
+from typing import Callable, Dict, List, Optional, Tuple, Union
 import logging
+from concurrent.futures import ThreadPoolExecutor
 import yfinance as yf
-import requests
-import json
-from io import StringIO
+
+from src.data.adjustment import apply_adjustment, factors_from_events
+from src.data.local_store import LocalDataStore, create_local_store
+from src.data.http_client import AsyncHTTPFetcher, get_http_session
+from src.data.quote_cache import QUOTE_COLUMNS, get_quote_cache
+from src.data.rate_limiter import call_with_retry, get_rate_limiter, get_source_settings
+from src.data.resample import ResampleCache, normalize_frequency, period_start, resample_bars
+from src.data.schema import normalize_daily
+from src.utils.config import get_config_section
 
 logger = logging.getLogger(__name__)
 
@@ -19,14 +26,41 @@ logger = logging.getLogger(__name__)
 class FreeDataProvider:
     """免费数据源提供器类"""
     
-    def __init__(self, data_source: str = "yfinance"):
+    # HTTP数据源接口地址
+    EASTMONEY_KLINE_URL = "http://push2his.eastmoney.com/api/qt/stock/kline/get"
+    SINA_KLINE_URL = "http://money.finance.sina.com.cn/quotes_service/api/json_v2.php/CN_MarketData.getKLineData"
+    EASTMONEY_QUOTE_URL = "http://push2.eastmoney.com/api/qt/ulist.np/get"
+    SINA_QUOTE_URL = "http://hq.sinajs.cn/"
+    
+    # 批量实时行情每次请求的最大股票数
+    QUOTE_BATCH_SIZE = 500
+    
+    # 只返回最近若干根K线的数据源（新浪财经日K线最多 datalen=1000 根），写入本地存储时按返回数据记录覆盖区间
+    PARTIAL_HISTORY_SOURCES = ("sina",)
+    
+    def __init__(
+        self,
+        data_source: str = "yfinance",
+        store: Optional[LocalDataStore] = None,
+        use_cache: bool = True
+    ):
         """
         初始化免费数据提供器
         
         Args:
             data_source: 数据源类型，可选 "yfinance", "eastmoney", "sina", "akshare"
+            store: 本地存储，为None时根据配置文件 storage 段创建
+            use_cache: 是否启用本地存储
         """
         self.data_source = data_source
+        self.store = (store if store is not None else create_local_store()) if use_cache else None
+        self.resampler = ResampleCache(self.store) if self.store is not None else None
+        self.rate_limiter = get_rate_limiter(data_source)
+        settings = get_source_settings(data_source)
+        self.retry_count = settings['retry_count']
+        self.timeout = settings['timeout']
+        # 每次上游请求完成后以返回的数据调用，供同步等调用方统计请求量
+        self.fetch_hooks: List[Callable[[pd.DataFrame], None]] = []
         self._init_data_source()
         
     def _init_data_source(self):
@@ -37,11 +71,13 @@ class FreeDataProvider:
                 logger.info("Yahoo Finance数据源初始化成功")
                 
             elif self.data_source == "eastmoney":
-                # 东方财富数据源
+                # 东方财富数据源，复用长连接会话
+                self.session = get_http_session("eastmoney", self._resolve_max_workers(None))
                 logger.info("东方财富数据源初始化成功")
                 
             elif self.data_source == "sina":
-                # 新浪财经数据源
+                # 新浪财经数据源，复用长连接会话
+                self.session = get_http_session("sina", self._resolve_max_workers(None))
                 logger.info("新浪财经数据源初始化成功")
                 
             elif self.data_source == "akshare":
@@ -77,6 +113,70 @@ class FreeDataProvider:
         """
         logger.info(f"使用{self.data_source}获取{symbol}日线数据: {start_date} 到 {end_date}")
         
+        store_adjust = self._store_adjust(adjust)
+        if self.store is None or store_adjust is None:
+            return self._fetch_with_retry(symbol, start_date, end_date, adjust)
+        
+        # 只请求本地缺失的子区间，写入后与已有数据按日期合并
+        for gap_start, gap_end in self.store.missing_ranges(symbol, start_date, end_date, store_adjust):
+            logger.info(f"从{self.data_source}补齐{symbol}数据: {gap_start} 到 {gap_end}")
+            df = self._fetch_with_retry(symbol, gap_start, gap_end, store_adjust)
+            # 没有数据的缺口（节假日、停牌）也记为已覆盖，之后不再重复请求；只返回最近历史的数据源除外
+            if df is not None:
+                self.store.write(symbol, df, gap_start, gap_end, store_adjust,
+                                 partial_history=self.data_source in self.PARTIAL_HISTORY_SOURCES)
+                
+        df = self.store.load(symbol, start_date, end_date, store_adjust)
+        if adjust in ("qfq", "hfq") and self._supports_adjust_factors():
+            return self._adjust_price(df, adjust, symbol)
+        return df
+    
+    def _supports_adjust_factors(self) -> bool:
+        """数据源是否提供复权因子"""
+        return self.data_source in ("yfinance", "akshare")
+    
+    def _store_adjust(self, adjust: str) -> Optional[str]:
+        """
+        本地存储使用的复权类型
+        
+        上游的前复权以请求当天为基准，不同时间取得的区间合并后基准不一致，因此不缓存上游复权行情：
+        提供复权因子的数据源只存储不复权行情，前/后复权按因子即时计算；新浪只提供不复权行情。
+        
+        Args:
+            adjust: 请求的复权类型
+            
+        Returns:
+            存储使用的复权类型，为None时不经过本地存储
+        """
+        if adjust not in ("qfq", "hfq") or self.data_source == "sina" or self._supports_adjust_factors():
+            return "None"
+        return None
+    
+    def _fetch_with_retry(
+        self, 
+        symbol: str, 
+        start_date: str, 
+        end_date: str,
+        adjust: str
+    ) -> pd.DataFrame:
+        """经数据源限流器获取日线数据，失败时按 retry_count 指数退避重试，成功后调用 fetch_hooks"""
+        df = call_with_retry(
+            self._fetch_daily, symbol, start_date, end_date, adjust,
+            retry_count=self.retry_count,
+            limiter=self.rate_limiter
+        )
+        for hook in self.fetch_hooks:
+            hook(df)
+        return df
+    
+    def _fetch_daily(
+        self, 
+        symbol: str, 
+        start_date: str, 
+        end_date: str,
+        adjust: str
+    ) -> pd.DataFrame:
+        """从上游数据源获取日线数据"""
         try:
             if self.data_source == "yfinance":
                 return self._get_yfinance_daily(symbol, start_date, end_date, adjust)
@@ -98,76 +198,130 @@ class FreeDataProvider:
         adjust: str
     ) -> pd.DataFrame:
         """使用Yahoo Finance获取日线数据"""
-        # 转换股票代码格式
-        if symbol.endswith('.SZ'):
-            yf_symbol = f"{symbol[:6]}.SZ"
-        elif symbol.endswith('.SH'):
-            yf_symbol = f"{symbol[:6]}.SS"
-        else:
-            yf_symbol = symbol
-            
         # 获取数据
-        ticker = yf.Ticker(yf_symbol)
-        df = ticker.history(start=start_date, end=end_date)
+        ticker = yf.Ticker(self._yfinance_symbol(symbol))
+        # 取不复权价格，复权由本地按全部历史的分红事件计算；history 不包含 end 当天，向后顺延一天
+        end = (pd.Timestamp(end_date) + pd.Timedelta(days=1)).strftime('%Y-%m-%d')
+        df = ticker.history(start=start_date, end=end, auto_adjust=False)
         
         if df.empty:
-            return pd.DataFrame()
-        
-        # 重命名列以统一格式
-        df = df.rename(columns={
-            'Open': 'open',
-            'High': 'high',
-            'Low': 'low',
-            'Close': 'close',
-            'Volume': 'volume'
-        })
-        
-        # 添加其他必要列
-        df['symbol'] = symbol
+            return normalize_daily(df, symbol)
+        
+        df = df.rename(columns={'Open': 'open', 'High': 'high', 'Low': 'low', 'Close': 'close', 'Volume': 'volume'})
         df['amount'] = df['close'] * df['volume']
         
         # 计算涨跌幅
         df['pct_change'] = df['close'].pct_change() * 100
         
         # 复权处理
-        if adjust != "None":
-            df = self._adjust_yfinance_price(df, adjust, ticker)
-            
-        return df
+        return self._adjust_price(normalize_daily(df, symbol, source="yfinance"), adjust, symbol)
+    
+    @staticmethod
+    def _yfinance_symbol(symbol: str) -> str:
+        """转换为Yahoo Finance股票代码，上海市场后缀为 .SS"""
+        if symbol.endswith('.SH'):
+            return f"{symbol[:6]}.SS"
+        return symbol
     
-    def _adjust_yfinance_price(self, df: pd.DataFrame, adjust_type: str, ticker) -> pd.DataFrame:
-        """Yahoo Finance复权处理"""
+    def _get_adjust_factors(self, symbol: str) -> Optional[pd.Series]:
+        """
+        获取累积后复权因子，优先读取本地存储
+        
+        Args:
+            symbol: 股票代码
+            
+        Returns:
+            以日期为索引的复权因子，获取失败时返回None
+        """
+        if self.store is not None:
+            factors = self.store.read_adjust_factors(symbol)
+            if factors is not None:
+                return factors
+                
         try:
-            # 获取分红和拆股数据
-            dividends = ticker.dividends
-            splits = ticker.splits
+            factors = call_with_retry(
+                self._fetch_adjust_factors, symbol,
+                retry_count=self.retry_count,
+                limiter=self.rate_limiter
+            )
+        except Exception as e:
+            logger.error(f"获取{symbol}复权因子失败: {e}")
+            return None
             
-            # 这里实现复权逻辑
-            # 简化版：直接返回原始数据
-            return df
-        except:
+        if factors is None or factors.empty:
+            return None
+        if self.store is not None:
+            self.store.write_adjust_factors(symbol, factors)
+        return factors
+    
+    def _fetch_adjust_factors(self, symbol: str) -> pd.Series:
+        """
+        从上游数据源获取全部历史的累积后复权因子
+        
+        Yahoo Finance 不提供复权因子，按上市以来的全部分红由 factors_from_events 计算；
+        Yahoo 的不复权价格与分红金额已按拆股/送转调整，因此只计入现金分红。
+        """
+        if self.data_source == "yfinance":
+            history = yf.Ticker(self._yfinance_symbol(symbol)).history(period="max", auto_adjust=False)
+            if history.empty:
+                return pd.Series(dtype=np.float64, name='factor')
+            if history.index.tz is not None:
+                history.index = history.index.tz_localize(None)
+            dividends = history['Dividends'] if 'Dividends' in history.columns else pd.Series(dtype=np.float64)
+            events = pd.DataFrame({'cash_dividend': dividends[dividends > 0]})
+            return factors_from_events(history['Close'], events)
+            
+        elif self.data_source == "akshare":
+            code = f"{symbol[-2:].lower()}{symbol[:6]}" if symbol.endswith(('.SZ', '.SH')) else symbol
+            df = self.ak.stock_zh_a_daily(symbol=code, adjust="hfq-factor")
+            if df is None or df.empty:
+                return pd.Series(dtype=np.float64, name='factor')
+            index = pd.to_datetime(df['date'])
+            return pd.Series(df['hfq_factor'].astype(np.float64).values, index=index, name='factor').sort_index()
+            
+        raise ValueError(f"数据源不提供复权因子: {self.data_source}")
+    
+    def _adjust_price(self, df: pd.DataFrame, adjust_type: str, symbol: str) -> pd.DataFrame:
+        """
+        价格复权处理，按全部历史的累积复权因子计算，前复权以最新因子为基准
+        
+        Args:
+            df: 不复权数据
+            adjust_type: 复权类型
+            symbol: 股票代码
+            
+        Returns:
+            复权后的数据
+            
+        Raises:
+            ValueError: 取不到复权因子，不以不复权价格冒充复权行情
+        """
+        if adjust_type not in ("qfq", "hfq") or df.empty:
             return df
+            
+        factors = self._get_adjust_factors(symbol)
+        if factors is None:
+            raise ValueError(f"未获取到{symbol}复权因子，无法计算{adjust_type}行情")
+        return apply_adjustment(df, factors, adjust_type)
     
-    def _get_eastmoney_daily(
+    def _eastmoney_request(
         self, 
         symbol: str, 
         start_date: str, 
         end_date: str,
         adjust: str
-    ) -> pd.DataFrame:
-        """使用东方财富获取日线数据"""
-        # 转换股票代码格式
-        if symbol.endswith('.SZ'):
-            code = f"sz{symbol[:6]}"
-        elif symbol.endswith('.SH'):
-            code = f"sh{symbol[:6]}"
+    ) -> Tuple[str, Dict]:
+        """构造东方财富日K线请求"""
+        # 转换股票代码格式：上海市场为 1.xxxxxx，深圳市场为 0.xxxxxx
+        if symbol.endswith('.SH'):
+            secid = f"1.{symbol[:6]}"
+        elif symbol.endswith('.SZ'):
+            secid = f"0.{symbol[:6]}"
         else:
-            code = symbol
+            secid = symbol
             
-        # 东方财富API
-        url = f"http://push2his.eastmoney.com/api/qt/stock/kline/get"
         params = {
-            'secid': code,
+            'secid': secid,
             'fields1': 'f1,f2,f3,f4,f5',
             'fields2': 'f51,f52,f53,f54,f55,f56,f57,f58,f59,f60,f61',
             'klt': '101',  # 日线
@@ -175,49 +329,52 @@ class FreeDataProvider:
             'beg': start_date.replace("-", ""),
             'end': end_date.replace("-", ""),
         }
-        
-        try:
-            response = requests.get(url, params=params, timeout=30)
-            data = response.json()
-            
-            if data.get('rc') == 0 and 'data' in data:
-                klines = data['data']['klines']
-                data_list = []
-                
-                for kline in klines:
-                    items = kline.split(',')
-                    if len(items) >= 6:
-                        data_list.append({
-                            'date': items[0],
-                            'open': float(items[1]),
-                            'close': float(items[2]),
-                            'high': float(items[3]),
-                            'low': float(items[4]),
-                            'volume': float(items[5]),
-                            'amount': float(items[6]) if len(items) > 6 else 0,
-                            'pct_change': float(items[8]) if len(items) > 8 else 0,
-                        })
-                
-                df = pd.DataFrame(data_list)
-                if not df.empty:
-                    df['date'] = pd.to_datetime(df['date'])
-                    df['symbol'] = symbol
-                    df = df.set_index('date').sort_index()
-                    return df
-                    
-        except Exception as e:
-            logger.error(f"东方财富API请求失败: {e}")
+        return self.EASTMONEY_KLINE_URL, params
+    
+    def _parse_eastmoney_klines(self, data: Optional[Dict], symbol: str) -> pd.DataFrame:
+        """解析东方财富日K线响应"""
+        if not data or data.get('rc') != 0 or not data.get('data'):
+            return normalize_daily(None, symbol)
             
-        return pd.DataFrame()
+        data_list = []
+        for kline in data['data'].get('klines') or []:
+            items = kline.split(',')
+            if len(items) >= 6:
+                data_list.append({
+                    'date': items[0],
+                    'open': float(items[1]),
+                    'close': float(items[2]),
+                    'high': float(items[3]),
+                    'low': float(items[4]),
+                    'volume': float(items[5]),
+                    'amount': float(items[6]) if len(items) > 6 else 0,
+                    'pct_change': float(items[8]) if len(items) > 8 else 0,
+                })
+        
+        return normalize_daily(pd.DataFrame(data_list), symbol, source="eastmoney")
     
-    def _get_sina_daily(
+    def _get_eastmoney_daily(
         self, 
         symbol: str, 
         start_date: str, 
         end_date: str,
         adjust: str
     ) -> pd.DataFrame:
-        """使用新浪财经获取日线数据"""
+        """使用东方财富获取日线数据"""
+        url, params = self._eastmoney_request(symbol, start_date, end_date, adjust)
+        
+        try:
+            response = self.session.get(url, params=params, timeout=self.timeout)
+            response.raise_for_status()
+            data = response.json()
+        except Exception as e:
+            logger.error(f"东方财富API请求失败: {e}")
+            raise
+            
+        return self._parse_eastmoney_klines(data, symbol)
+    
+    def _sina_request(self, symbol: str, scale: int = 240, datalen: int = 1000) -> Tuple[str, Dict]:
+        """构造新浪财经K线请求，scale 为K线周期(分钟)，240 为日线"""
         # 转换股票代码格式
         if symbol.endswith('.SZ'):
             code = f"sz{symbol[:6]}"
@@ -226,56 +383,125 @@ class FreeDataProvider:
         else:
             code = symbol
             
-        # 新浪财经API
-        url = f"http://money.finance.sina.com.cn/quotes_service/api/json_v2.php/CN_MarketData.getKLineData"
         params = {
             'symbol': code,
-            'scale': '240',  # 日线
+            'scale': str(scale),
             'ma': 'no',
-            'datalen': '1000'  # 数据长度
+            'datalen': str(datalen)  # 数据长度
         }
+        return self.SINA_KLINE_URL, params
+    
+    def _parse_sina_klines(
+        self, 
+        data: Optional[List], 
+        symbol: str, 
+        start_date: str, 
+        end_date: str
+    ) -> pd.DataFrame:
+        """解析新浪财经日K线响应"""
+        if not isinstance(data, list) or len(data) == 0:
+            return normalize_daily(None, symbol)
+            
+        df = normalize_daily(pd.DataFrame(data), symbol, source="sina")
+        
+        # 过滤日期范围
+        df = df.loc[pd.Timestamp(start_date):pd.Timestamp(end_date)].copy()
+        
+        df['amount'] = df['close'].to_numpy(dtype=np.float64) * df['volume'].to_numpy()
+        df['pct_change'] = (df['close'].pct_change() * 100).astype(np.float32)
+        return df
+    
+    def _get_sina_daily(
+        self, 
+        symbol: str, 
+        start_date: str, 
+        end_date: str,
+        adjust: str
+    ) -> pd.DataFrame:
+        """使用新浪财经获取日线数据"""
+        url, params = self._sina_request(symbol)
         
         try:
-            response = requests.get(url, params=params, timeout=30)
+            response = self.session.get(url, params=params, timeout=self.timeout)
+            response.raise_for_status()
             data = response.json()
-            
-            if isinstance(data, list) and len(data) > 0:
-                df = pd.DataFrame(data)
-                
-                # 重命名列
-                column_mapping = {
-                    'day': 'date',
-                    'open': 'open',
-                    'high': 'high',
-                    'low': 'low',
-                    'close': 'close',
-                    'volume': 'volume'
-                }
-                
-                df = df.rename(columns=column_mapping)
-                
-                # 转换数据类型
-                numeric_cols = ['open', 'high', 'low', 'close', 'volume']
-                for col in numeric_cols:
-                    if col in df.columns:
-                        df[col] = pd.to_numeric(df[col], errors='coerce')
-                
-                # 过滤日期范围
-                df['date'] = pd.to_datetime(df['date'])
-                mask = (df['date'] >= pd.Timestamp(start_date)) & (df['date'] <= pd.Timestamp(end_date))
-                df = df[mask]
-                
-                if not df.empty:
-                    df['symbol'] = symbol
-                    df['amount'] = df['close'] * df['volume']
-                    df['pct_change'] = df['close'].pct_change() * 100
-                    df = df.set_index('date').sort_index()
-                    return df
-                    
         except Exception as e:
             logger.error(f"新浪财经API请求失败: {e}")
+            raise
+            
+        return self._parse_sina_klines(data, symbol, start_date, end_date)
+    
+    def get_intraday_bars(self, symbol: str, scale: int = 1, datalen: int = 240) -> pd.DataFrame:
+        """
+        获取最近的分钟线，用于盘中流式接收前填充缓冲区
+        
+        Args:
+            symbol: 股票代码
+            scale: K线周期(分钟)，可选 1, 5, 15, 30, 60
+            datalen: K线根数
+            
+        Returns:
+            以K线结束时间为索引的分钟线，列为 open/high/low/close/volume/amount；
+            启用本地存储时同时写入 store.minute
+        """
+        if scale not in (1, 5, 15, 30, 60):
+            raise ValueError(f"不支持的分钟线周期: {scale}")
+            
+        if self.data_source == "eastmoney":
+            end = datetime.now().strftime("%Y-%m-%d")
+            start = (datetime.now() - timedelta(days=max(7, datalen * scale // 240 * 2 + 7))).strftime("%Y-%m-%d")
+            url, params = self._eastmoney_request(symbol, start, end, "None")
+            params['klt'] = str(scale)
+            parse = self._parse_eastmoney_intraday
+        elif self.data_source == "sina":
+            url, params = self._sina_request(symbol, scale, datalen)
+            parse = self._parse_sina_intraday
+        else:
+            raise ValueError(f"分钟线不支持该数据源: {self.data_source}")
             
-        return pd.DataFrame()
+        def fetch() -> pd.DataFrame:
+            response = self.session.get(url, params=params, timeout=self.timeout)
+            response.raise_for_status()
+            return parse(response.json())
+        
+        df = call_with_retry(fetch, retry_count=self.retry_count, limiter=self.rate_limiter).iloc[-datalen:]
+        if self.store is not None:
+            try:
+                self.store.minute.write(symbol, df, scale)
+            except Exception as e:
+                logger.warning(f"保存{symbol}分钟线失败: {e}")
+        return df
+    
+    @staticmethod
+    def _intraday_frame(rows: List[Dict]) -> pd.DataFrame:
+        """将分钟线记录列表转换为以时间为索引的DataFrame"""
+        df = pd.DataFrame(rows, columns=['time', 'open', 'high', 'low', 'close', 'volume', 'amount'])
+        df['time'] = pd.to_datetime(df['time'])
+        df = df.set_index('time').sort_index()
+        df = df.astype({'open': np.float64, 'high': np.float64, 'low': np.float64, 'close': np.float64,
+                        'amount': np.float64})
+        df['volume'] = df['volume'].astype(np.float64).round().astype(np.int64)
+        return df
+    
+    def _parse_eastmoney_intraday(self, data: Optional[Dict]) -> pd.DataFrame:
+        """解析东方财富分钟K线响应"""
+        rows = []
+        if data and data.get('rc') == 0 and data.get('data'):
+            for kline in data['data'].get('klines') or []:
+                items = kline.split(',')
+                if len(items) >= 7:
+                    rows.append({'time': items[0], 'open': items[1], 'close': items[2], 'high': items[3],
+                                 'low': items[4], 'volume': items[5], 'amount': items[6]})
+        return self._intraday_frame(rows)
+    
+    def _parse_sina_intraday(self, data: Optional[List]) -> pd.DataFrame:
+        """解析新浪财经分钟K线响应，新浪不提供成交额，按收盘价估算"""
+        rows = []
+        for item in data if isinstance(data, list) else []:
+            close, volume = float(item['close']), float(item['volume'])
+            rows.append({'time': item['day'], 'open': item['open'], 'high': item['high'], 'low': item['low'],
+                         'close': close, 'volume': volume, 'amount': close * volume})
+        return self._intraday_frame(rows)
     
     def _get_akshare_daily(
         self, 
@@ -285,53 +511,57 @@ class FreeDataProvider:
         adjust: str
     ) -> pd.DataFrame:
         """使用AkShare获取日线数据"""
-        # 转换股票代码格式
-        if symbol.endswith('.SZ'):
-            code = f"sz{symbol[:6]}"
-        elif symbol.endswith('.SH'):
-            code = f"sh{symbol[:6]}"
-        else:
-            code = symbol
+        # stock_zh_a_hist 使用6位数字代码、YYYYMMDD日期，不复权时adjust为空字符串
+        code = symbol[:6] if symbol.endswith(('.SZ', '.SH')) else symbol
             
         # 获取数据
         df = self.ak.stock_zh_a_hist(
             symbol=code,
             period="daily",
-            start_date=start_date,
-            end_date=end_date,
-            adjust=adjust
+            start_date=start_date.replace("-", ""),
+            end_date=end_date.replace("-", ""),
+            adjust=adjust if adjust in ("qfq", "hfq") else ""
         )
         
-        if df.empty:
-            return pd.DataFrame()
-        
-        # 重命名列
-        df = df.rename(columns={
-            '日期': 'date',
-            '开盘': 'open',
-            '收盘': 'close',
-            '最高': 'high',
-            '最低': 'low',
-            '成交量': 'volume',
-            '成交额': 'amount',
-            '振幅': 'amplitude',
-            '涨跌幅': 'pct_change',
-            '涨跌额': 'change',
-            '换手率': 'turnover'
-        })
-        
-        df['date'] = pd.to_datetime(df['date'])
-        df['symbol'] = symbol
-        df = df.set_index('date').sort_index()
+        return normalize_daily(df, symbol, source="akshare")
+    
+    def get_bars(
+        self, 
+        symbol: str, 
+        start_date: str, 
+        end_date: str,
+        adjust: str = "qfq",
+        frequency: str = "D"
+    ) -> pd.DataFrame:
+        """
+        获取指定周期的K线，周线/月线由本地日线聚合，不额外请求网络
         
-        return df
+        Args:
+            symbol: 股票代码
+            start_date: 开始日期，周线/月线向前对齐到周期第一天
+            end_date: 结束日期
+            adjust: 复权类型
+            frequency: 周期，"D"/"W"/"M" 或 "日线"/"周线"/"月线"
+            
+        Returns:
+            以日期为索引的K线，周线/月线以周期最后一个交易日为索引
+        """
+        def load_daily(start: str, end: str) -> pd.DataFrame:
+            return self.get_daily_data(symbol, start, end, adjust)
+        
+        if self.resampler is None:
+            frequency = normalize_frequency(frequency)
+            return resample_bars(load_daily(period_start(start_date, frequency).strftime('%Y-%m-%d'), end_date),
+                                 frequency)
+        return self.resampler.get(symbol, start_date, end_date, adjust, frequency, load_daily)
     
     def get_multiple_stocks(
         self, 
         symbols: List[str], 
         start_date: str, 
         end_date: str,
-        adjust: str = "qfq"
+        adjust: str = "qfq",
+        max_workers: Optional[int] = None
     ) -> Dict[str, pd.DataFrame]:
         """
         批量获取多只股票数据
@@ -341,24 +571,147 @@ class FreeDataProvider:
             start_date: 开始日期
             end_date: 结束日期
             adjust: 复权类型
+            max_workers: 并发线程数，默认读取配置 performance.max_workers，为1时顺序获取
             
         Returns:
             字典，key为股票代码，value为DataFrame
         """
-        result = {}
-        for symbol in symbols:
+        symbols = list(dict.fromkeys(symbols))
+        max_workers = self._resolve_max_workers(max_workers)
+        
+        def fetch(symbol: str) -> Optional[pd.DataFrame]:
             try:
-                df = self.get_daily_data(symbol, start_date, end_date, adjust)
-                if not df.empty:
-                    result[symbol] = df
-                    logger.info(f"成功获取 {symbol} 数据，共 {len(df)} 条记录")
-                else:
-                    logger.warning(f"未获取到 {symbol} 数据")
+                return self.get_daily_data(symbol, start_date, end_date, adjust)
             except Exception as e:
                 logger.error(f"获取 {symbol} 数据失败: {e}")
+                return None
+        
+        if max_workers > 1 and len(symbols) > 1:
+            with ThreadPoolExecutor(max_workers=min(max_workers, len(symbols))) as executor:
+                frames = list(executor.map(fetch, symbols))
+        else:
+            frames = [fetch(symbol) for symbol in symbols]
+        
+        result = {}
+        for symbol, df in zip(symbols, frames):
+            if df is None:
+                continue
+            if not df.empty:
+                result[symbol] = df
+                logger.info(f"成功获取 {symbol} 数据，共 {len(df)} 条记录")
+            else:
+                logger.warning(f"未获取到 {symbol} 数据")
                 
         return result
     
+    def get_multiple_stocks_async(
+        self, 
+        symbols: List[str], 
+        start_date: str, 
+        end_date: str,
+        adjust: str = "qfq",
+        concurrency: Optional[int] = None,
+        timeout: Optional[float] = None
+    ) -> Dict[str, pd.DataFrame]:
+        """
+        使用asyncio批量获取多只股票数据（仅支持东方财富、新浪财经）
+        
+        所有K线请求在一个事件循环中并发发出，共享连接池；启用本地存储时只请求缺失区间。
+        
+        Args:
+            symbols: 股票代码列表
+            start_date: 开始日期
+            end_date: 结束日期
+            adjust: 复权类型
+            concurrency: 同时进行的最大请求数，默认读取配置 performance.async_concurrency
+            timeout: 单个请求的超时秒数，默认读取数据源配置 timeout
+            
+        Returns:
+            字典，key为股票代码，value为DataFrame
+        """
+        if self.data_source not in ("eastmoney", "sina"):
+            raise ValueError(f"异步批量获取仅支持 eastmoney 和 sina 数据源: {self.data_source}")
+            
+        symbols = list(dict.fromkeys(symbols))
+        store_adjust = self._store_adjust(adjust)
+        store = self.store if store_adjust is not None else None
+        
+        # 需要向上游请求的 (股票代码, 开始日期, 结束日期)
+        tasks = []
+        for symbol in symbols:
+            if store is None:
+                tasks.append((symbol, start_date, end_date))
+            else:
+                tasks.extend(
+                    (symbol, gap_start, gap_end)
+                    for gap_start, gap_end in store.missing_ranges(symbol, start_date, end_date, store_adjust)
+                )
+        
+        if self.data_source == "eastmoney":
+            request_keys = tasks
+            request_list = [self._eastmoney_request(*task, store_adjust or adjust) for task in tasks]
+        else:
+            # 新浪接口忽略日期区间，每只股票只请求一次，按各缺口在本地切片
+            request_keys = list(dict.fromkeys(symbol for symbol, _, _ in tasks))
+            request_list = [self._sina_request(symbol) for symbol in request_keys]
+            
+        if concurrency is None:
+            concurrency = get_config_section("performance").get('async_concurrency', 50)
+        fetcher = self._create_async_fetcher(concurrency, timeout or self.timeout)
+        logger.info(f"使用{self.data_source}异步获取 {len(symbols)} 只股票数据，共 {len(request_list)} 个请求")
+        payloads = dict(zip(request_keys, fetcher.run(request_list) if request_list else []))
+        
+        fetched: Dict[str, List[pd.DataFrame]] = {}
+        for symbol, gap_start, gap_end in tasks:
+            data = payloads[(symbol, gap_start, gap_end) if self.data_source == "eastmoney" else symbol]
+            if data is None:
+                continue
+            if self.data_source == "eastmoney":
+                df = self._parse_eastmoney_klines(data, symbol)
+            else:
+                df = self._parse_sina_klines(data, symbol, gap_start, gap_end)
+            # 请求成功但没有数据的缺口也写入存储以记录覆盖区间
+            if store is not None:
+                store.write(symbol, df, gap_start, gap_end, store_adjust,
+                            partial_history=self.data_source in self.PARTIAL_HISTORY_SOURCES)
+            else:
+                fetched.setdefault(symbol, []).append(df)
+        
+        result = {}
+        for symbol in symbols:
+            if store is not None:
+                df = store.load(symbol, start_date, end_date, store_adjust)
+            elif symbol in fetched:
+                df = pd.concat(fetched[symbol]).sort_index()
+            else:
+                df = pd.DataFrame()
+                
+            if not df.empty:
+                result[symbol] = df
+                logger.info(f"成功获取 {symbol} 数据，共 {len(df)} 条记录")
+            else:
+                logger.warning(f"未获取到 {symbol} 数据")
+                
+        return result
+    
+    def _create_async_fetcher(self, concurrency: int, timeout: float) -> AsyncHTTPFetcher:
+        """创建异步批量请求器"""
+        return AsyncHTTPFetcher(
+            concurrency=concurrency,
+            timeout=timeout,
+            retry_count=self.retry_count,
+            limiter=self.rate_limiter
+        )
+    
+    def _resolve_max_workers(self, max_workers: Optional[int]) -> int:
+        """确定批量获取的并发线程数"""
+        if max_workers is None:
+            performance = get_config_section("performance")
+            if not performance.get('use_multiprocessing', True):
+                return 1
+            max_workers = performance.get('max_workers', 4)
+        return max(1, int(max_workers))
+    
     def get_realtime_quote(self, symbol: str) -> Dict:
         """
         获取实时行情
@@ -370,22 +723,237 @@ class FreeDataProvider:
             实时行情数据字典
         """
         try:
-            if self.data_source == "yfinance":
-                ticker = yf.Ticker(self._convert_symbol(symbol))
-                info = ticker.info
+            quotes = self.get_realtime_quotes([symbol])
+            if symbol in quotes.index:
+                quote = quotes.loc[symbol]
                 return {
                     'symbol': symbol,
-                    'price': info.get('regularMarketPrice', 0),
-                    'change': info.get('regularMarketChange', 0),
-                    'pct_change': info.get('regularMarketChangePercent', 0),
-                    'volume': info.get('regularMarketVolume', 0),
-                    'time': datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+                    'price': quote['price'],
+                    'change': quote['change'],
+                    'pct_change': quote['pct_change'],
+                    'volume': quote['volume'],
+                    'time': pd.Timestamp(quote['time']).strftime("%Y-%m-%d %H:%M:%S")
                 }
         except Exception as e:
             logger.error(f"获取实时行情失败: {e}")
             
         return {}
     
+    def get_realtime_quotes(self, symbols: List[str], use_cache: bool = True) -> pd.DataFrame:
+        """
+        批量获取实时行情快照
+        
+        东方财富、新浪财经每次请求最多 QUOTE_BATCH_SIZE 只股票，AkShare 一次获取全市场，
+        Yahoo Finance 一次下载全部代码。结果写入进程内共享的短有效期缓存，
+        有效期内其他调用方请求同一股票时不再请求上游。
+        
+        Args:
+            symbols: 股票代码列表
+            use_cache: 是否使用共享缓存
+            
+        Returns:
+            以股票代码为索引、列为 QUOTE_COLUMNS 的行情快照，获取不到的股票不在结果中
+        """
+        if self.data_source not in ("eastmoney", "sina", "akshare", "yfinance"):
+            raise ValueError(f"批量实时行情不支持该数据源: {self.data_source}")
+            
+        if not use_cache:
+            return self._fetch_quotes(list(dict.fromkeys(symbols)))
+        return get_quote_cache().get_or_fetch(self.data_source, symbols, self._fetch_quotes)
+    
+    def _fetch_quotes(self, symbols: List[str]) -> pd.DataFrame:
+        """从上游批量获取实时行情"""
+        if self.data_source == "akshare":
+            snapshot = call_with_retry(self._get_akshare_quotes, symbols,
+                                       retry_count=self.retry_count, limiter=self.rate_limiter)
+        elif self.data_source == "yfinance":
+            snapshot = call_with_retry(self._get_yfinance_quotes, symbols,
+                                       retry_count=self.retry_count, limiter=self.rate_limiter)
+        else:
+            frames = []
+            for i in range(0, len(symbols), self.QUOTE_BATCH_SIZE):
+                batch = symbols[i:i + self.QUOTE_BATCH_SIZE]
+                frames.append(call_with_retry(self._get_http_quotes, batch,
+                                              retry_count=self.retry_count, limiter=self.rate_limiter))
+            snapshot = pd.concat(frames) if frames else self._quote_frame([])
+            
+        logger.info(f"从{self.data_source}获取 {len(snapshot)}/{len(symbols)} 只股票的实时行情")
+        return snapshot
+    
+    def _get_http_quotes(self, symbols: List[str]) -> pd.DataFrame:
+        """通过东方财富或新浪财经接口获取一批实时行情"""
+        if self.data_source == "eastmoney":
+            url, params, headers = self._eastmoney_quote_request(symbols)
+        else:
+            url, params, headers = self._sina_quote_request(symbols)
+            
+        response = self.session.get(url, params=params, headers=headers, timeout=self.timeout)
+        response.raise_for_status()
+        
+        if self.data_source == "eastmoney":
+            return self._parse_eastmoney_quotes(response.json(), symbols)
+        return self._parse_sina_quotes(response.text, symbols)
+    
+    @staticmethod
+    def _quote_frame(rows: List[Dict]) -> pd.DataFrame:
+        """将行情记录列表转换为快照DataFrame"""
+        df = pd.DataFrame(rows, columns=['symbol'] + QUOTE_COLUMNS)
+        for col in QUOTE_COLUMNS:
+            if col not in ('name', 'time'):
+                df[col] = pd.to_numeric(df[col], errors='coerce')
+        df['volume'] = df['volume'].fillna(0).round().astype(np.int64)
+        df['time'] = pd.to_datetime(df['time'])
+        return df.set_index('symbol')
+    
+    def _eastmoney_quote_request(self, symbols: List[str]) -> Tuple[str, Dict, Dict]:
+        """构造东方财富批量实时行情请求"""
+        secids = []
+        for symbol in symbols:
+            market = "1" if symbol.endswith('.SH') else "0"
+            secids.append(f"{market}.{symbol[:6]}")
+        params = {
+            'fltt': '2',  # 价格返回小数
+            'invt': '2',
+            # 最新价、涨跌幅、涨跌额、成交量、成交额、代码、市场、名称、最高、最低、今开、昨收、时间戳
+            'fields': 'f2,f3,f4,f5,f6,f12,f13,f14,f15,f16,f17,f18,f124',
+            'secids': ','.join(secids),
+        }
+        return self.EASTMONEY_QUOTE_URL, params, {}
+    
+    def _parse_eastmoney_quotes(self, data: Optional[Dict], symbols: List[str]) -> pd.DataFrame:
+        """解析东方财富批量实时行情响应"""
+        if not data or not data.get('data'):
+            return self._quote_frame([])
+            
+        diff = data['data'].get('diff') or []
+        if isinstance(diff, dict):
+            diff = list(diff.values())
+            
+        requested = {(("1" if s.endswith('.SH') else "0"), s[:6]): s for s in symbols}
+        rows = []
+        for item in diff:
+            symbol = requested.get((str(item.get('f13')), str(item.get('f12'))))
+            if symbol is None:
+                continue
+            timestamp = item.get('f124')
+            rows.append({
+                'symbol': symbol,
+                'name': item.get('f14'),
+                'price': item.get('f2'),
+                'open': item.get('f17'),
+                'high': item.get('f15'),
+                'low': item.get('f16'),
+                'pre_close': item.get('f18'),
+                'change': item.get('f4'),
+                'pct_change': item.get('f3'),
+                'volume': item.get('f5'),
+                'amount': item.get('f6'),
+                'time': (pd.Timestamp(timestamp, unit='s', tz='Asia/Shanghai').tz_localize(None)
+                         if isinstance(timestamp, (int, float)) and timestamp > 0 else pd.NaT),
+            })
+        return self._quote_frame(rows)
+    
+    def _sina_quote_request(self, symbols: List[str]) -> Tuple[str, Dict, Dict]:
+        """构造新浪财经批量实时行情请求"""
+        codes = [f"{symbol[-2:].lower()}{symbol[:6]}" if symbol.endswith(('.SZ', '.SH')) else symbol
+                 for symbol in symbols]
+        # 新浪行情接口要求来自新浪财经页面的Referer
+        headers = {'Referer': 'https://finance.sina.com.cn'}
+        return self.SINA_QUOTE_URL, {'list': ','.join(codes)}, headers
+    
+    def _parse_sina_quotes(self, text: str, symbols: List[str]) -> pd.DataFrame:
+        """
+        解析新浪财经批量实时行情响应
+        
+        每行格式为 var hq_str_sh600519="名称,今开,昨收,最新价,最高,最低,买一,卖一,成交量,成交额,...,日期,时间,...";
+        """
+        requested = {f"{s[-2:].lower()}{s[:6]}": s for s in symbols if s.endswith(('.SZ', '.SH'))}
+        requested.update({s: s for s in symbols if not s.endswith(('.SZ', '.SH'))})
+        
+        rows = []
+        for line in (text or "").splitlines():
+            if not line.startswith('var hq_str_') or '="' not in line:
+                continue
+            code, _, payload = line[len('var hq_str_'):].partition('="')
+            symbol = requested.get(code)
+            items = payload.rstrip('";').split(',')
+            if symbol is None or len(items) < 32:
+                continue
+            price, pre_close = float(items[3] or 0), float(items[2] or 0)
+            rows.append({
+                'symbol': symbol,
+                'name': items[0],
+                'price': price,
+                'open': items[1],
+                'high': items[4],
+                'low': items[5],
+                'pre_close': pre_close,
+                'change': price - pre_close,
+                'pct_change': (price / pre_close - 1) * 100 if pre_close else np.nan,
+                'volume': items[8],
+                'amount': items[9],
+                'time': f"{items[30]} {items[31]}",
+            })
+        return self._quote_frame(rows)
+    
+    def _get_akshare_quotes(self, symbols: List[str]) -> pd.DataFrame:
+        """使用AkShare一次获取全市场实时行情，再筛选所需股票"""
+        market = self.ak.stock_zh_a_spot_em()
+        by_code = {symbol[:6]: symbol for symbol in symbols}
+        market = market[market['代码'].isin(by_code.keys())]
+        
+        now = datetime.now()
+        rows = [{
+            'symbol': by_code[row['代码']],
+            'name': row['名称'],
+            'price': row['最新价'],
+            'open': row['今开'],
+            'high': row['最高'],
+            'low': row['最低'],
+            'pre_close': row['昨收'],
+            'change': row['涨跌额'],
+            'pct_change': row['涨跌幅'],
+            'volume': row['成交量'],
+            'amount': row['成交额'],
+            'time': now,
+        } for _, row in market.iterrows()]
+        return self._quote_frame(rows)
+    
+    def _get_yfinance_quotes(self, symbols: List[str]) -> pd.DataFrame:
+        """使用Yahoo Finance一次下载全部代码最近几日的日线，取最后一根作为快照"""
+        tickers = {self._convert_symbol(symbol): symbol for symbol in symbols}
+        data = yf.download(list(tickers), period="5d", interval="1d", group_by="ticker",
+                           auto_adjust=False, progress=False, threads=True)
+        
+        rows = []
+        for yf_symbol, symbol in tickers.items():
+            if isinstance(data.columns, pd.MultiIndex):
+                if yf_symbol not in data.columns.get_level_values(0):
+                    continue
+                bars = data[yf_symbol].dropna(how='all')
+            else:
+                bars = data.dropna(how='all')
+            if bars.empty:
+                continue
+                
+            last = bars.iloc[-1]
+            pre_close = bars['Close'].iloc[-2] if len(bars) > 1 else np.nan
+            rows.append({
+                'symbol': symbol,
+                'name': yf_symbol,
+                'price': last['Close'],
+                'open': last['Open'],
+                'high': last['High'],
+                'low': last['Low'],
+                'pre_close': pre_close,
+                'change': last['Close'] - pre_close,
+                'pct_change': (last['Close'] / pre_close - 1) * 100,
+                'volume': last['Volume'],
+                'amount': last['Close'] * last['Volume'],
+                'time': pd.Timestamp(bars.index[-1]).tz_localize(None),
+            })
+        return self._quote_frame(rows)
+    
     def _convert_symbol(self, symbol: str) -> str:
         """转换股票代码格式"""
         if symbol.endswith('.SZ'):
@@ -0,0 +1,157 @@
+"""
+HTTP客户端模块
+为东方财富、新浪等HTTP数据源提供共享的长连接会话池和基于asyncio的批量请求
+"""
+
+import asyncio
+import random
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Optional, Tuple
+import logging
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from src.data.rate_limiter import TokenBucket
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_HEADERS = {
+    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 '
+                  '(KHTML, like Gecko) Chrome/120.0 Safari/537.36',
+    'Connection': 'keep-alive',
+}
+
+_sessions: Dict[str, requests.Session] = {}
+_sessions_lock = threading.Lock()
+
+
+def get_http_session(source: str, pool_size: int = 16) -> requests.Session:
+    """
+    获取数据源共享的HTTP会话，同一数据源的请求复用TCP/TLS连接
+
+    Args:
+        source: 数据源名称，如 "eastmoney"
+        pool_size: 每个主机保持的最大连接数，应不小于并发线程数
+
+    Returns:
+        requests.Session实例
+    """
+    with _sessions_lock:
+        session = _sessions.get(source)
+        if session is None:
+            session = requests.Session()
+            session.headers.update(DEFAULT_HEADERS)
+            adapter = HTTPAdapter(pool_connections=4, pool_maxsize=pool_size)
+            session.mount('http://', adapter)
+            session.mount('https://', adapter)
+            _sessions[source] = session
+        return session
+
+
+def close_http_sessions():
+    """关闭所有共享HTTP会话"""
+    with _sessions_lock:
+        for session in _sessions.values():
+            session.close()
+        _sessions.clear()
+
+
+class AsyncHTTPFetcher:
+    """基于asyncio与aiohttp的批量JSON请求器"""
+
+    def __init__(
+        self,
+        concurrency: int = 50,
+        timeout: float = 30,
+        retry_count: int = 3,
+        limiter: Optional[TokenBucket] = None,
+        headers: Optional[Dict[str, str]] = None
+    ):
+        """
+        初始化批量请求器
+
+        Args:
+            concurrency: 同时进行的最大请求数
+            timeout: 单个请求的超时秒数
+            retry_count: 失败后的最大重试次数
+            limiter: 数据源限流器
+            headers: 额外的请求头
+        """
+        try:
+            import aiohttp
+            self.aiohttp = aiohttp
+        except ImportError as e:
+            raise ImportError("异步批量请求需要 aiohttp，请运行: pip install aiohttp 或 pip install -e .[async]") from e
+
+        self.concurrency = concurrency
+        self.timeout = timeout
+        self.retry_count = retry_count
+        self.limiter = limiter
+        self.headers = dict(DEFAULT_HEADERS, **(headers or {}))
+
+    async def _acquire(self):
+        """异步等待限流令牌"""
+        if self.limiter is None or self.limiter.rate <= 0:
+            return
+        while not self.limiter.try_acquire():
+            await asyncio.sleep(1.0 / self.limiter.rate)
+
+    async def _fetch_one(self, session, semaphore: asyncio.Semaphore, url: str, params: Dict) -> Any:
+        """请求单个URL并解析JSON，失败时指数退避重试"""
+        attempt = 0
+        async with semaphore:
+            while True:
+                await self._acquire()
+                try:
+                    async with session.get(url, params=params) as response:
+                        response.raise_for_status()
+                        # 新浪接口返回 text/html 类型的JSON
+                        return await response.json(content_type=None)
+                except Exception as e:
+                    if attempt >= self.retry_count:
+                        logger.error(f"请求失败 {url} {params}: {e}")
+                        return None
+                    delay = min(8.0, 0.5 * (2 ** attempt)) * (0.5 + random.random() / 2)
+                    attempt += 1
+                    await asyncio.sleep(delay)
+
+    async def fetch_all(self, request_list: List[Tuple[str, Dict]]) -> List[Any]:
+        """
+        并发请求一批URL
+
+        Args:
+            request_list: [(url, params), ...]
+
+        Returns:
+            与请求顺序一致的JSON结果列表，失败的请求对应None
+        """
+        aiohttp = self.aiohttp
+        semaphore = asyncio.Semaphore(self.concurrency)
+        connector = aiohttp.TCPConnector(limit=self.concurrency, keepalive_timeout=60)
+        timeout = aiohttp.ClientTimeout(total=self.timeout)
+
+        async with aiohttp.ClientSession(
+            connector=connector, timeout=timeout, headers=self.headers
+        ) as session:
+            tasks = [self._fetch_one(session, semaphore, url, params) for url, params in request_list]
+            return await asyncio.gather(*tasks)
+
+    def run(self, request_list: List[Tuple[str, Dict]]) -> List[Any]:
+        """
+        同步执行批量请求，已有事件循环运行时在独立线程中执行
+
+        Args:
+            request_list: [(url, params), ...]
+
+        Returns:
+            与请求顺序一致的JSON结果列表，失败的请求对应None
+        """
+        try:
+            asyncio.get_running_loop()
+        except RuntimeError:
+            return asyncio.run(self.fetch_all(request_list))
+
+        with ThreadPoolExecutor(max_workers=1) as executor:
+            return executor.submit(asyncio.run, self.fetch_all(request_list)).result()
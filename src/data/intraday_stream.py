@@ -0,0 +1,459 @@
+"""
+盘中分钟线流式接收模块
+为每只股票维护固定容量的 NumPy 环形缓冲区，接收分钟线或逐笔成交（含轮询得到的行情快照），
+每根K线收盘时以零拷贝视图通知订阅者。内存占用只取决于股票数与缓冲区容量，与运行时长无关。
+"""
+
+import pandas as pd
+import numpy as np
+import threading
+from datetime import datetime
+from typing import Callable, Dict, List, Optional, Sequence, Union
+import logging
+
+from src.utils.config import get_config_section
+
+logger = logging.getLogger(__name__)
+
+# 分钟线字段及类型
+BAR_FIELDS: Dict[str, str] = {
+    'open': 'float64',
+    'high': 'float64',
+    'low': 'float64',
+    'close': 'float64',
+    'volume': 'int64',
+    'amount': 'float64',
+}
+
+TimestampLike = Union[int, str, datetime, np.datetime64, pd.Timestamp]
+
+
+def to_nanoseconds(timestamp: TimestampLike) -> int:
+    """将时间转换为纳秒时间戳，整数视为已是纳秒时间戳"""
+    if isinstance(timestamp, (int, np.integer)):
+        return int(timestamp)
+    return pd.Timestamp(timestamp).value
+
+
+class BarRingBuffer:
+    """
+    单只股票的分钟线环形缓冲区
+
+    每个字段分配 2*capacity 的数组，每根K线同时写入 i 与 i+capacity 两个位置，
+    因此最近 n 根K线（n <= capacity）始终是一段连续内存，读取时直接返回只读视图而不复制。
+    视图在其后再写入 capacity-n 根K线之前保持有效，需要长期保留时应自行复制。
+    """
+
+    def __init__(self, capacity: int, fields: Optional[Dict[str, str]] = None):
+        """
+        初始化缓冲区
+
+        Args:
+            capacity: 保留的K线根数
+            fields: {字段名: 类型}，默认 BAR_FIELDS
+        """
+        if capacity <= 0:
+            raise ValueError(f"缓冲区容量必须大于0: {capacity}")
+        self.capacity = int(capacity)
+        self.fields = dict(fields or BAR_FIELDS)
+        self._time = np.zeros(2 * self.capacity, dtype='datetime64[ns]')
+        self._data = {field: np.zeros(2 * self.capacity, dtype=dtype) for field, dtype in self.fields.items()}
+        self._count = 0
+
+    def __len__(self) -> int:
+        return min(self._count, self.capacity)
+
+    @property
+    def total(self) -> int:
+        """累计写入的K线根数"""
+        return self._count
+
+    @property
+    def nbytes(self) -> int:
+        """缓冲区占用的字节数"""
+        return self._time.nbytes + sum(array.nbytes for array in self._data.values())
+
+    @property
+    def last_time(self) -> Optional[pd.Timestamp]:
+        """最新一根K线的时间"""
+        if self._count == 0:
+            return None
+        return pd.Timestamp(self._time[(self._count - 1) % self.capacity + self.capacity])
+
+    def append(self, timestamp: TimestampLike, **values):
+        """
+        追加一根K线
+
+        Args:
+            timestamp: K线时间
+            **values: 各字段的值，未给出的字段写入0
+        """
+        pos = self._count % self.capacity
+        ns = np.datetime64(to_nanoseconds(timestamp), 'ns')
+        self._time[pos] = self._time[pos + self.capacity] = ns
+        for field, array in self._data.items():
+            array[pos] = array[pos + self.capacity] = values.get(field, 0)
+        self._count += 1
+
+    def _window(self, n: Optional[int]) -> slice:
+        size = len(self) if n is None else max(0, min(int(n), len(self)))
+        end = (self._count - 1) % self.capacity + self.capacity + 1 if self._count else self.capacity
+        return slice(end - size, end)
+
+    @staticmethod
+    def _view(array: np.ndarray, window: slice) -> np.ndarray:
+        view = array[window]
+        view.flags.writeable = False
+        return view
+
+    def times(self, n: Optional[int] = None) -> np.ndarray:
+        """最近 n 根K线的时间（只读视图），n为None时返回全部"""
+        return self._view(self._time, self._window(n))
+
+    def field(self, field: str, n: Optional[int] = None) -> np.ndarray:
+        """
+        最近 n 根K线的单个字段
+
+        Args:
+            field: 字段名
+            n: K线根数，为None时返回缓冲区内全部K线
+
+        Returns:
+            按时间升序排列的只读视图
+        """
+        if field not in self._data:
+            raise ValueError(f"未知字段: {field}")
+        return self._view(self._data[field], self._window(n))
+
+    def last(self, n: Optional[int] = None) -> Dict[str, np.ndarray]:
+        """
+        最近 n 根K线的全部字段
+
+        Returns:
+            {'time': 时间, 字段名: 数值}，均为只读视图
+        """
+        window = self._window(n)
+        arrays = {'time': self._view(self._time, window)}
+        arrays.update({field: self._view(array, window) for field, array in self._data.items()})
+        return arrays
+
+    def to_frame(self, n: Optional[int] = None) -> pd.DataFrame:
+        """最近 n 根K线复制为以时间为索引的DataFrame"""
+        arrays = self.last(n)
+        index = pd.DatetimeIndex(arrays.pop('time'), name='time')
+        return pd.DataFrame({field: array.copy() for field, array in arrays.items()}, index=index)
+
+
+class _BarBuilder:
+    """将逐笔成交聚合为固定周期K线"""
+
+    __slots__ = ('interval', 'end', 'open', 'high', 'low', 'close', 'volume', 'amount')
+
+    def __init__(self, interval: int):
+        self.interval = interval
+        self.end = None
+
+    def update(self, ns: int, price: float, volume: int, amount: float) -> Optional[tuple]:
+        """
+        加入一笔成交
+
+        Returns:
+            成交跨入新周期时返回上一根已完成的K线 (结束时间, open, high, low, close, volume, amount)，否则返回None
+        """
+        end = ns - ns % self.interval + self.interval
+        closed = None
+        if self.end is not None and end > self.end:
+            closed = self.pop()
+        if self.end is None:
+            self.end = end
+            self.open = self.high = self.low = self.close = price
+            self.volume, self.amount = volume, amount
+            return closed
+        if end < self.end:
+            logger.debug(f"忽略早于当前K线的成交: {pd.Timestamp(ns)}")
+            return closed
+
+        self.high = max(self.high, price)
+        self.low = min(self.low, price)
+        self.close = price
+        self.volume += volume
+        self.amount += amount
+        return closed
+
+    def pop(self) -> Optional[tuple]:
+        """结束当前K线并返回，没有未完成K线时返回None"""
+        if self.end is None:
+            return None
+        bar = (self.end, self.open, self.high, self.low, self.close, self.volume, self.amount)
+        self.end = None
+        return bar
+
+
+BarCallback = Callable[[str, BarRingBuffer], None]
+
+
+class IntradayStream:
+    """盘中分钟线流式接收器"""
+
+    def __init__(self, capacity: int = 1200, interval: int = 60, fields: Optional[Dict[str, str]] = None):
+        """
+        初始化接收器
+
+        Args:
+            capacity: 每只股票保留的K线根数，默认约5个交易日的1分钟线
+            interval: 由逐笔成交聚合K线的周期(秒)
+            fields: {字段名: 类型}，默认 BAR_FIELDS
+        """
+        if interval <= 0:
+            raise ValueError(f"K线周期必须大于0: {interval}")
+        self.capacity = int(capacity)
+        self.interval = int(interval)
+        self.fields = dict(fields or BAR_FIELDS)
+        self._buffers: Dict[str, BarRingBuffer] = {}
+        self._builders: Dict[str, _BarBuilder] = {}
+        self._cum_volume: Dict[str, tuple] = {}
+        self._subscribers: List[BarCallback] = []
+        self._lock = threading.RLock()
+
+    @property
+    def symbols(self) -> List[str]:
+        """已接收数据的股票列表"""
+        with self._lock:
+            return list(self._buffers)
+
+    @property
+    def nbytes(self) -> int:
+        """全部缓冲区占用的字节数"""
+        with self._lock:
+            return sum(buffer.nbytes for buffer in self._buffers.values())
+
+    def buffer(self, symbol: str) -> Optional[BarRingBuffer]:
+        """获取股票的缓冲区，未接收过数据时返回None"""
+        return self._buffers.get(symbol)
+
+    def subscribe(self, callback: BarCallback) -> BarCallback:
+        """
+        订阅K线收盘事件
+
+        回调在接收线程中以 (股票代码, 缓冲区) 调用，缓冲区最后一根即刚收盘的K线；
+        回调期间不会写入新K线，回调应尽快返回。
+
+        Args:
+            callback: 回调函数
+
+        Returns:
+            callback，便于用作装饰器
+        """
+        with self._lock:
+            self._subscribers.append(callback)
+        return callback
+
+    def unsubscribe(self, callback: BarCallback):
+        """取消订阅"""
+        with self._lock:
+            if callback in self._subscribers:
+                self._subscribers.remove(callback)
+
+    def _get_buffer(self, symbol: str) -> BarRingBuffer:
+        buffer = self._buffers.get(symbol)
+        if buffer is None:
+            buffer = self._buffers[symbol] = BarRingBuffer(self.capacity, self.fields)
+        return buffer
+
+    def _publish(self, symbol: str, buffer: BarRingBuffer):
+        for callback in list(self._subscribers):
+            try:
+                callback(symbol, buffer)
+            except Exception:
+                logger.exception(f"K线订阅回调处理 {symbol} 失败")
+
+    def _close_bar(self, symbol: str, bar: tuple):
+        end, open_, high, low, close, volume, amount = bar
+        buffer = self._get_buffer(symbol)
+        buffer.append(end, open=open_, high=high, low=low, close=close, volume=volume, amount=amount)
+        self._publish(symbol, buffer)
+
+    def on_bar(
+        self,
+        symbol: str,
+        timestamp: TimestampLike,
+        open: float,
+        high: float,
+        low: float,
+        close: float,
+        volume: int = 0,
+        amount: float = 0.0
+    ):
+        """
+        接收一根已完成的K线并通知订阅者
+
+        Args:
+            symbol: 股票代码
+            timestamp: K线时间
+            open, high, low, close: 开高低收
+            volume: 成交量
+            amount: 成交额
+        """
+        with self._lock:
+            buffer = self._get_buffer(symbol)
+            last_time = buffer.last_time
+            if last_time is not None and to_nanoseconds(timestamp) <= last_time.value:
+                logger.debug(f"忽略重复或过期的K线: {symbol} {timestamp}")
+                return
+            buffer.append(timestamp, open=open, high=high, low=low, close=close, volume=volume, amount=amount)
+            self._publish(symbol, buffer)
+
+    def on_tick(
+        self,
+        symbol: str,
+        timestamp: TimestampLike,
+        price: float,
+        volume: int = 0,
+        amount: Optional[float] = None
+    ):
+        """
+        接收一笔成交，跨入新周期时上一根K线收盘并通知订阅者
+
+        K线以结束时间标记，例如 09:30:00-09:31:00 的成交记为 09:31 的K线。
+
+        Args:
+            symbol: 股票代码
+            timestamp: 成交时间
+            price: 成交价
+            volume: 本笔成交量
+            amount: 本笔成交额，为None时按 price*volume 计算
+        """
+        if amount is None:
+            amount = price * volume
+        ns = to_nanoseconds(timestamp)
+        with self._lock:
+            builder = self._builders.get(symbol)
+            if builder is None:
+                builder = self._builders[symbol] = _BarBuilder(self.interval * 1_000_000_000)
+            closed = builder.update(ns, float(price), int(volume), float(amount))
+            if closed is not None:
+                self._close_bar(symbol, closed)
+
+    def on_quotes(self, quotes: pd.DataFrame):
+        """
+        接收一次行情快照轮询结果
+
+        快照中的成交量、成交额为当日累计值，按与上一次快照的差值作为本次成交。
+
+        Args:
+            quotes: get_realtime_quotes 返回的以股票代码为索引的快照
+        """
+        if quotes.empty:
+            return
+        times = pd.to_datetime(quotes['time']).to_numpy(dtype='datetime64[ns]').astype(np.int64)
+        prices = quotes['price'].to_numpy(dtype=np.float64)
+        volumes = quotes['volume'].to_numpy(dtype=np.int64)
+        amounts = quotes['amount'].to_numpy(dtype=np.float64)
+
+        with self._lock:
+            for symbol, ns, price, volume, amount in zip(quotes.index, times, prices, volumes, amounts):
+                if np.isnan(price) or price <= 0:
+                    continue
+                previous = self._cum_volume.get(symbol)
+                self._cum_volume[symbol] = (volume, amount)
+                if previous is None:
+                    delta_volume, delta_amount = 0, 0.0
+                else:
+                    # 累计值回落说明已是新的交易日
+                    delta_volume = volume - previous[0] if volume >= previous[0] else volume
+                    delta_amount = amount - previous[1] if amount >= previous[1] else amount
+                self.on_tick(symbol, int(ns), price, delta_volume, delta_amount)
+
+    def flush(self, symbols: Optional[Sequence[str]] = None):
+        """
+        立即结束未完成的K线，用于收盘或午间休市
+
+        Args:
+            symbols: 股票代码列表，为None时处理全部股票
+        """
+        with self._lock:
+            for symbol in list(self._builders) if symbols is None else symbols:
+                builder = self._builders.get(symbol)
+                bar = builder.pop() if builder is not None else None
+                if bar is not None:
+                    self._close_bar(symbol, bar)
+
+    def seed(self, symbol: str, bars: pd.DataFrame):
+        """
+        写入历史分钟线作为缓冲区初始内容，不通知订阅者
+
+        Args:
+            symbol: 股票代码
+            bars: 以时间为索引的分钟线，超出容量时只保留最后 capacity 根
+        """
+        if bars is None or bars.empty:
+            return
+        bars = bars.iloc[-self.capacity:]
+        times = bars.index.to_numpy(dtype='datetime64[ns]').astype(np.int64)
+        with self._lock:
+            buffer = self._get_buffer(symbol)
+            columns = [field for field in self.fields if field in bars.columns]
+            values = {field: bars[field].to_numpy() for field in columns}
+            for i, ns in enumerate(times):
+                buffer.append(int(ns), **{field: values[field][i] for field in columns})
+
+    def snapshot(self, field: str = 'close', n: int = 1) -> pd.DataFrame:
+        """
+        各股票最近 n 根K线的单个字段
+
+        Args:
+            field: 字段名
+            n: K线根数
+
+        Returns:
+            列为股票代码的DataFrame，不足 n 根的股票前面补NaN
+        """
+        with self._lock:
+            columns = {}
+            for symbol, buffer in self._buffers.items():
+                values = buffer.field(field, n).astype(np.float64)
+                columns[symbol] = np.concatenate([np.full(n - len(values), np.nan), values])
+        return pd.DataFrame(columns)
+
+
+def create_intraday_stream(capacity: Optional[int] = None, interval: int = 60) -> IntradayStream:
+    """
+    创建盘中分钟线接收器
+
+    Args:
+        capacity: 每只股票保留的K线根数，默认读取配置 performance.intraday_buffer_size
+        interval: 由逐笔成交聚合K线的周期(秒)
+
+    Returns:
+        IntradayStream实例
+    """
+    if capacity is None:
+        capacity = get_config_section("performance").get('intraday_buffer_size', 1200)
+    return IntradayStream(int(capacity), interval)
+
+
+if __name__ == "__main__":
+    # 测试代码
+    import time
+    logging.basicConfig(level=logging.INFO)
+    from src.data.free_data_provider import FreeDataProvider
+
+    provider = FreeDataProvider("sina", use_cache=False)
+    stream = create_intraday_stream()
+    symbols = ["000001.SZ", "600519.SH"]
+    for symbol in symbols:
+        stream.seed(symbol, provider.get_intraday_bars(symbol, scale=1))
+
+    @stream.subscribe
+    def on_close(symbol, buffer):
+        close = buffer.field('close', 5)
+        print(f"{symbol} {buffer.last_time} 收盘 {close[-1]:.2f} 5分钟均价 {close.mean():.2f}")
+
+    try:
+        for _ in range(3):
+            stream.on_quotes(provider.get_realtime_quotes(symbols, use_cache=False))
+            time.sleep(3)
+    finally:
+        stream.flush()
+        print(f"缓冲区占用 {stream.nbytes / 1024:.1f} KB")
+        provider.cleanup()
@@ -0,0 +1,767 @@
+"""
+本地行情存储模块
+将日线数据按 股票代码/年份 分区保存为Parquet文件，供数据提供器透明读取
+"""
+
+import pandas as pd
+import numpy as np
+import json
+import os
+import shutil
+import threading
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Tuple, Union
+import logging
+
+from src.data.fingerprint import combine_fingerprints, frame_fingerprint
+from src.data.minute_store import MinuteBarStore, load_minute_settings
+from src.data.quality import QUALITY_DUPLICATE, QUALITY_FLAGS, quality_counts, validate_bars
+from src.data.reference import ReferenceData, get_reference_data
+from src.data.schema import DUPLICATE_DATES_ATTR
+from src.utils.config import get_config_section
+
+logger = logging.getLogger(__name__)
+
+
+class LocalDataStore:
+    """本地Parquet日线存储"""
+
+    META_FILE = "_meta.json"
+    QUALITY_FILE = "_quality.parquet"
+    # 复权因子在指纹记录中的类型名
+    FACTOR_FINGERPRINT = "factors"
+
+    def __init__(
+        self,
+        data_dir: Union[str, Path] = "./data",
+        cache_ttl: int = 86400
+    ):
+        """
+        初始化本地存储
+
+        Args:
+            data_dir: 数据存储根目录
+            cache_ttl: 未定型数据（获取当天及之后的日期）的有效期(秒)，小于等于0表示永不过期
+        """
+        self.data_dir = Path(data_dir)
+        self.cache_ttl = cache_ttl
+        self.daily_dir = self.data_dir / "daily"
+        self._write_listeners: List[Callable] = []
+        self._minute: Optional[MinuteBarStore] = None
+        self._fingerprint_lock = threading.Lock()
+
+    def add_write_listener(self, callback: Callable[[Optional[str], Optional[str], Optional[pd.Timestamp]], None]):
+        """
+        注册数据变更回调，用于派生数据（如周线、月线缓存）的增量失效
+
+        回调参数为 (股票代码, 复权类型, 最早变更日期)，任一参数为None表示该维度全部失效。
+
+        Args:
+            callback: 回调函数
+        """
+        if callback not in self._write_listeners:
+            self._write_listeners.append(callback)
+
+    def remove_write_listener(self, callback: Callable):
+        """取消数据变更回调"""
+        if callback in self._write_listeners:
+            self._write_listeners.remove(callback)
+
+    @property
+    def reference(self) -> ReferenceData:
+        """存储目录下的交易日历与证券主表（{data_dir}/reference）"""
+        return get_reference_data(self.data_dir / "reference")
+
+    @property
+    def minute(self) -> MinuteBarStore:
+        """存储目录下的分钟线存储（{data_dir}/minute），压缩参数读取配置 storage.minute 段"""
+        if self._minute is None:
+            self._minute = MinuteBarStore(self.data_dir / "minute", **load_minute_settings())
+        return self._minute
+
+    def _notify_write(self, symbol: Optional[str], adjust: Optional[str], since: Optional[pd.Timestamp]):
+        """通知数据变更"""
+        for callback in list(self._write_listeners):
+            try:
+                callback(symbol, adjust, since)
+            except Exception as e:
+                logger.warning(f"数据变更回调失败: {e}")
+
+    def _symbol_dir(self, symbol: str, adjust: str) -> Path:
+        """获取某只股票某种复权类型的存储目录"""
+        return self.daily_dir / (adjust or "None") / symbol
+
+    def _partition_path(self, symbol: str, adjust: str, year: int) -> Path:
+        """获取年份分区文件路径"""
+        return self._symbol_dir(symbol, adjust) / f"{year}.parquet"
+
+    def _load_meta(self, symbol: str, adjust: str) -> Dict:
+        """读取元数据（已覆盖的日期区间）"""
+        meta_path = self._symbol_dir(symbol, adjust) / self.META_FILE
+        if not meta_path.exists():
+            return {'spans': []}
+        try:
+            with open(meta_path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except Exception as e:
+            logger.warning(f"读取{symbol}元数据失败: {e}")
+            return {'spans': []}
+
+    def _save_meta(self, symbol: str, adjust: str, meta: Dict):
+        """写入元数据"""
+        meta_path = self._symbol_dir(symbol, adjust) / self.META_FILE
+        tmp_path = meta_path.with_suffix('.tmp')
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(meta, f, ensure_ascii=False)
+        os.replace(tmp_path, meta_path)
+
+    def _is_fresh(self, fetched_at: float) -> bool:
+        """判断缓存是否仍在有效期内"""
+        if self.cache_ttl is None or self.cache_ttl <= 0:
+            return True
+        return time.time() - fetched_at <= self.cache_ttl
+
+    def _normalize_spans(self, spans: List[List]) -> List[List]:
+        """
+        整理已覆盖区间
+
+        获取时刻之前的日期视为已定型数据，永久有效（fetched_at记为None）；
+        获取当天及之后的部分受 cache_ttl 约束，过期后丢弃。
+        已定型区间之间相交或相邻时合并为一个区间。
+
+        Args:
+            spans: [[开始日期, 结束日期, 获取时间戳或None], ...]
+
+        Returns:
+            整理后的区间列表
+        """
+        one_day = pd.Timedelta(days=1)
+        settled = []
+        pending = []
+
+        for span_start, span_end, fetched_at in spans:
+            start, end = pd.Timestamp(span_start), pd.Timestamp(span_end)
+            if fetched_at is None:
+                settled.append((start, end))
+                continue
+
+            fetched_day = pd.Timestamp(datetime.fromtimestamp(fetched_at)).normalize()
+            if start < fetched_day:
+                settled.append((start, min(end, fetched_day - one_day)))
+            if end >= fetched_day and self._is_fresh(fetched_at):
+                pending.append([max(start, fetched_day), end, fetched_at])
+
+        merged = []
+        for start, end in sorted(settled):
+            if merged and start <= merged[-1][1] + one_day:
+                merged[-1][1] = max(merged[-1][1], end)
+            else:
+                merged.append([start, end])
+
+        result = [[s.strftime('%Y-%m-%d'), e.strftime('%Y-%m-%d'), None] for s, e in merged]
+        result.extend(
+            [s.strftime('%Y-%m-%d'), e.strftime('%Y-%m-%d'), f] for s, e, f in pending
+        )
+        return result
+
+    def covered_ranges(self, symbol: str, adjust: str = "qfq") -> List[Tuple[pd.Timestamp, pd.Timestamp]]:
+        """
+        获取本地已覆盖且有效的日期区间
+
+        Args:
+            symbol: 股票代码
+            adjust: 复权类型
+
+        Returns:
+            按开始日期排序、互不重叠的 (开始日期, 结束日期) 列表
+        """
+        one_day = pd.Timedelta(days=1)
+        spans = self._normalize_spans(self._load_meta(symbol, adjust)['spans'])
+
+        merged = []
+        for span_start, span_end, _ in sorted(spans):
+            start, end = pd.Timestamp(span_start), pd.Timestamp(span_end)
+            if merged and start <= merged[-1][1] + one_day:
+                merged[-1] = (merged[-1][0], max(merged[-1][1], end))
+            else:
+                merged.append((start, end))
+        return merged
+
+    def missing_ranges(
+        self,
+        symbol: str,
+        start_date: str,
+        end_date: str,
+        adjust: str = "qfq"
+    ) -> List[Tuple[str, str]]:
+        """
+        计算请求区间中本地尚未覆盖的子区间
+
+        Args:
+            symbol: 股票代码
+            start_date: 开始日期
+            end_date: 结束日期，晚于今天时截断到今天
+            adjust: 复权类型
+
+        Returns:
+            需要从上游获取的 (开始日期, 结束日期) 列表，格式 "YYYY-MM-DD"；
+            有本地交易日历与证券主表时，缺口被裁剪到上市期间的首尾实际交易日，没有交易日的缺口被略过
+        """
+        one_day = pd.Timedelta(days=1)
+        start = pd.Timestamp(start_date)
+        end = min(pd.Timestamp(end_date), pd.Timestamp.now().normalize())
+
+        gaps = []
+        cursor = start
+        for span_start, span_end in self.covered_ranges(symbol, adjust):
+            if cursor > end:
+                break
+            if span_end < cursor:
+                continue
+            if span_start > cursor:
+                gaps.append((cursor, min(span_start - one_day, end)))
+            cursor = max(cursor, span_end + one_day)
+
+        if cursor <= end:
+            gaps.append((cursor, end))
+
+        gaps = [(s.strftime('%Y-%m-%d'), e.strftime('%Y-%m-%d')) for s, e in gaps]
+        reference = self.reference
+        if gaps and not reference.is_empty:
+            gaps = [gap for gap in (reference.clip_range(symbol, s, e) for s, e in gaps) if gap is not None]
+        return gaps
+
+    def has_range(
+        self,
+        symbol: str,
+        start_date: str,
+        end_date: str,
+        adjust: str = "qfq"
+    ) -> bool:
+        """
+        判断本地是否已有覆盖指定区间的有效数据
+
+        Args:
+            symbol: 股票代码
+            start_date: 开始日期
+            end_date: 结束日期
+            adjust: 复权类型
+
+        Returns:
+            是否命中缓存
+        """
+        return not self.missing_ranges(symbol, start_date, end_date, adjust)
+
+    def load(
+        self,
+        symbol: str,
+        start_date: str,
+        end_date: str,
+        adjust: str = "qfq"
+    ) -> pd.DataFrame:
+        """
+        直接读取本地已有数据，不检查区间覆盖情况
+
+        Args:
+            symbol: 股票代码
+            start_date: 开始日期
+            end_date: 结束日期
+            adjust: 复权类型
+
+        Returns:
+            区间内的本地数据，没有数据时返回空DataFrame
+        """
+        start, end = pd.Timestamp(start_date), pd.Timestamp(end_date)
+        frames = []
+        for year in range(start.year, end.year + 1):
+            path = self._partition_path(symbol, adjust, year)
+            if path.exists():
+                frames.append(pd.read_parquet(path))
+
+        if not frames:
+            return pd.DataFrame()
+
+        df = pd.concat(frames) if len(frames) > 1 else frames[0]
+        return df.loc[(df.index >= start) & (df.index <= end)]
+
+    def read(
+        self,
+        symbol: str,
+        start_date: str,
+        end_date: str,
+        adjust: str = "qfq"
+    ) -> Optional[pd.DataFrame]:
+        """
+        读取本地数据
+
+        Args:
+            symbol: 股票代码
+            start_date: 开始日期，格式 "YYYY-MM-DD"
+            end_date: 结束日期，格式 "YYYY-MM-DD"
+            adjust: 复权类型
+
+        Returns:
+            命中时返回DataFrame，未命中或已过期返回None
+        """
+        if not self.has_range(symbol, start_date, end_date, adjust):
+            return None
+
+        try:
+            return self.load(symbol, start_date, end_date, adjust)
+        except Exception as e:
+            logger.warning(f"读取{symbol}本地数据失败: {e}")
+            return None
+
+    def write(
+        self,
+        symbol: str,
+        df: pd.DataFrame,
+        start_date: str,
+        end_date: str,
+        adjust: str = "qfq",
+        partial_history: bool = False
+    ):
+        """
+        写入数据并记录已覆盖区间
+
+        Args:
+            symbol: 股票代码
+            df: 以日期为索引的日线数据
+            start_date: 本次请求的开始日期
+            end_date: 本次请求的结束日期
+            adjust: 复权类型
+            partial_history: 数据源只返回最近一段历史（如新浪最近1000根K线）时为True，
+                             已覆盖区间从返回数据的第一个交易日开始，没有返回数据时不记录覆盖区间
+        """
+        symbol_dir = self._symbol_dir(symbol, adjust)
+        symbol_dir.mkdir(parents=True, exist_ok=True)
+
+        duplicated = self._duplicate_dates(df)
+        df = self._without_duplicate_attr(df)
+        written = []
+        if not df.empty:
+            df = df[~df.index.duplicated(keep='last')].sort_index()
+            for year, year_df in df.groupby(df.index.year):
+                path = self._partition_path(symbol, adjust, year)
+                if path.exists():
+                    existing = pd.read_parquet(path)
+                    year_df = pd.concat([existing, year_df])
+                    year_df = year_df[~year_df.index.duplicated(keep='last')].sort_index()
+
+                tmp_path = path.with_suffix('.tmp')
+                year_df.to_parquet(tmp_path)
+                os.replace(tmp_path, path)
+                written.append(year_df)
+
+        if partial_history and not df.empty:
+            start_date = max(pd.Timestamp(start_date), df.index[0])
+        if not partial_history or not df.empty:
+            meta = self._load_meta(symbol, adjust)
+            meta['spans'].append([
+                pd.Timestamp(start_date).strftime('%Y-%m-%d'),
+                pd.Timestamp(end_date).strftime('%Y-%m-%d'),
+                time.time()
+            ])
+            meta['spans'] = self._normalize_spans(meta['spans'])
+            self._save_meta(symbol, adjust, meta)
+        if not df.empty:
+            self._record_month_fingerprints(symbol, adjust, pd.concat(written), df.index)
+            self._update_quality(symbol, adjust, df.index[0], df.index[-1], duplicated)
+            self._notify_write(symbol, adjust or "None", df.index[0])
+
+    @staticmethod
+    def _duplicate_dates(df: pd.DataFrame) -> pd.DatetimeIndex:
+        """写入数据中出现重复的日期，包括 normalize_daily 去重前记录在 attrs 中的日期"""
+        duplicated = df.index[df.index.duplicated()]
+        dropped = df.attrs.get(DUPLICATE_DATES_ATTR)
+        if dropped:
+            duplicated = duplicated.union(pd.DatetimeIndex(dropped))
+        return duplicated
+
+    @staticmethod
+    def _without_duplicate_attr(df: pd.DataFrame) -> pd.DataFrame:
+        """去掉 attrs 中的重复日期记录，避免随行情写入Parquet元数据"""
+        if DUPLICATE_DATES_ATTR not in df.attrs:
+            return df
+        df = df.copy(deep=False)
+        df.attrs = {k: v for k, v in df.attrs.items() if k != DUPLICATE_DATES_ATTR}
+        return df
+
+    def _fingerprint_path(self, symbol: str) -> Path:
+        """获取指纹记录文件路径"""
+        return self.data_dir / "fingerprints" / f"{symbol}.json"
+
+    def _load_fingerprints(self, symbol: str) -> Dict[str, Dict[str, Dict]]:
+        """读取指纹记录 {类型: {区间: {'hash', 'version', 'rows', 'updated_at'}}}，类型为复权类型或 factors"""
+        path = self._fingerprint_path(symbol)
+        if not path.exists():
+            return {}
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except Exception as e:
+            logger.warning(f"读取{symbol}指纹记录失败: {e}")
+            return {}
+
+    def _save_fingerprints(self, symbol: str, fingerprints: Dict[str, Dict[str, Dict]]):
+        """写入指纹记录"""
+        path = self._fingerprint_path(symbol)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_suffix('.tmp')
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(fingerprints, f, ensure_ascii=False)
+        os.replace(tmp_path, path)
+
+    def _record_fingerprints(self, symbol: str, kind: str, parts: Dict[str, pd.DataFrame]):
+        """
+        记录各区间的内容哈希，哈希变化时版本号加一，内容未变时保持原记录
+
+        Args:
+            symbol: 股票代码
+            kind: 复权类型或 factors
+            parts: {区间名称: 该区间的全部数据}
+        """
+        if not parts:
+            return
+        with self._fingerprint_lock:
+            fingerprints = self._load_fingerprints(symbol)
+            records = fingerprints.setdefault(kind, {})
+            changed = False
+            for part, part_df in parts.items():
+                digest = frame_fingerprint(part_df)
+                record = records.get(part)
+                if record is not None and record['hash'] == digest:
+                    continue
+                records[part] = {
+                    'hash': digest,
+                    'version': record['version'] + 1 if record is not None else 1,
+                    'rows': len(part_df),
+                    'updated_at': time.time(),
+                }
+                changed = True
+            if changed:
+                self._save_fingerprints(symbol, fingerprints)
+
+    def _record_month_fingerprints(
+        self,
+        symbol: str,
+        adjust: str,
+        stored: pd.DataFrame,
+        written: Optional[pd.DatetimeIndex] = None
+    ):
+        """
+        按月记录日线的内容哈希
+
+        Args:
+            symbol: 股票代码
+            adjust: 复权类型
+            stored: 覆盖涉及月份的全部已存储日线
+            written: 本次写入的日期，只重新计算这些日期所在的月份，为None时计算 stored 的全部月份
+        """
+        try:
+            months = stored.index.strftime('%Y-%m')
+            touched = set(written.strftime('%Y-%m')) if written is not None else set(months)
+            parts = {month: month_df for month, month_df in stored.groupby(months) if month in touched}
+            self._record_fingerprints(symbol, adjust or "None", parts)
+        except Exception as e:
+            logger.warning(f"记录{symbol}数据指纹失败: {e}")
+
+    def _backfill_fingerprints(self, symbol: str, adjust: str):
+        """为启用指纹之前写入的数据补算指纹"""
+        covered = self.covered_ranges(symbol, adjust)
+        if not covered:
+            return
+        stored = self.load(symbol, covered[0][0].strftime('%Y-%m-%d'), covered[-1][1].strftime('%Y-%m-%d'), adjust)
+        if not stored.empty:
+            self._record_month_fingerprints(symbol, adjust, stored)
+
+    def read_fingerprints(self, symbol: str, adjust: str = "qfq") -> Dict[str, Dict]:
+        """
+        读取某只股票按月记录的内容哈希与版本号
+
+        Args:
+            symbol: 股票代码
+            adjust: 复权类型，传 factors 读取复权因子的指纹
+
+        Returns:
+            {"YYYY-MM": {'hash', 'version', 'rows', 'updated_at'}}
+        """
+        return self._load_fingerprints(symbol).get(adjust or "None", {})
+
+    def fingerprint(
+        self,
+        symbol: str,
+        start_date: Optional[str] = None,
+        end_date: Optional[str] = None,
+        adjust: str = "qfq"
+    ) -> Optional[str]:
+        """
+        计算区间内已存储数据的指纹，由涉及月份的内容哈希合并得到，不读取行情
+
+        前/后复权数据可能由不复权行情与复权因子计算，指纹同时包含不复权行情与复权因子，
+        任一变化都会改变指纹。
+
+        Args:
+            symbol: 股票代码
+            start_date: 开始日期，为None时不限
+            end_date: 结束日期，为None时不限
+            adjust: 复权类型
+
+        Returns:
+            16位十六进制指纹，本地没有数据时返回None
+        """
+        adjust = adjust or "None"
+        kinds = [adjust, "None"] if adjust in ("qfq", "hfq") else [adjust]
+        first = pd.Timestamp(start_date).strftime('%Y-%m') if start_date is not None else None
+        last = pd.Timestamp(end_date).strftime('%Y-%m') if end_date is not None else None
+
+        fingerprints = self._load_fingerprints(symbol)
+        parts = []
+        for kind in kinds:
+            if kind not in fingerprints:
+                self._backfill_fingerprints(symbol, kind)
+                fingerprints = self._load_fingerprints(symbol)
+            for month, record in sorted(fingerprints.get(kind, {}).items()):
+                if (first is None or month >= first) and (last is None or month <= last):
+                    parts.append(f"{kind}/{month}:{record['hash']}")
+
+        if adjust in ("qfq", "hfq"):
+            if self.FACTOR_FINGERPRINT not in fingerprints:
+                factors = self.read_adjust_factors(symbol, check_ttl=False)
+                if factors is not None:
+                    self._record_fingerprints(symbol, self.FACTOR_FINGERPRINT, {'all': factors.to_frame()})
+                    fingerprints = self._load_fingerprints(symbol)
+            record = fingerprints.get(self.FACTOR_FINGERPRINT, {}).get('all')
+            if record is not None and parts:
+                parts.append(f"{self.FACTOR_FINGERPRINT}:{record['hash']}")
+        return combine_fingerprints(parts) if parts else None
+
+    def fingerprints(
+        self,
+        symbols: List[str],
+        start_date: Optional[str] = None,
+        end_date: Optional[str] = None,
+        adjust: str = "qfq"
+    ) -> Dict[str, Optional[str]]:
+        """
+        批量计算指纹，派生结果保存该结果作为输入指纹
+
+        Args:
+            symbols: 股票代码列表
+            start_date: 开始日期
+            end_date: 结束日期
+            adjust: 复权类型
+
+        Returns:
+            {股票代码: 指纹}，本地没有数据的股票为None
+        """
+        return {symbol: self.fingerprint(symbol, start_date, end_date, adjust) for symbol in symbols}
+
+    def _update_quality(
+        self,
+        symbol: str,
+        adjust: str,
+        first: pd.Timestamp,
+        last: pd.Timestamp,
+        duplicated: Optional[pd.DatetimeIndex] = None
+    ):
+        """
+        重新校验写入区间及其后一个月的K线并保存质量标记
+
+        写入区间之后的K线只有缺失交易日的判断可能变化，向后多校验一个月即可覆盖；
+        写入区间之前的K线不受影响，沿用已保存的标记。
+
+        Args:
+            symbol: 股票代码
+            adjust: 复权类型
+            first: 本次写入的第一个日期
+            last: 本次写入的最后一个日期
+            duplicated: 本次写入中出现重复的日期
+        """
+        try:
+            window_start, window_end = first - pd.Timedelta(days=31), last + pd.Timedelta(days=31)
+            window = self.load(symbol, window_start.strftime('%Y-%m-%d'), window_end.strftime('%Y-%m-%d'), adjust)
+            if window.empty:
+                return
+            reference = self.reference
+            sessions = (reference.trading_sessions(symbol, window.index[0], window.index[-1])
+                        if len(reference.calendar) else None)
+            flags = pd.Series(validate_bars(window, sessions), index=window.index, name='flags')
+            if duplicated is not None and len(duplicated):
+                flags[flags.index.isin(duplicated)] |= QUALITY_DUPLICATE
+            self._write_quality(symbol, adjust, first, window.index[-1], flags[flags.index >= first])
+        except Exception as e:
+            logger.warning(f"校验{symbol}数据质量失败: {e}")
+
+    def _write_quality(self, symbol: str, adjust: str, start: pd.Timestamp, end: pd.Timestamp, flags: pd.Series):
+        """用 flags 替换 [start, end] 区间内已保存的质量标记，只保存有问题的K线"""
+        path = self._symbol_dir(symbol, adjust) / self.QUALITY_FILE
+        existing = self.read_quality(symbol, adjust=adjust)
+        kept = existing[(existing.index < start) | (existing.index > end)]
+        merged = pd.concat([kept, flags[flags != 0]]).sort_index().astype(np.uint8).rename('flags')
+        merged.index.name = 'date'
+
+        tmp_path = path.with_suffix('.tmp')
+        merged.to_frame().to_parquet(tmp_path)
+        os.replace(tmp_path, path)
+
+    def read_quality(
+        self,
+        symbol: str,
+        start_date: Optional[str] = None,
+        end_date: Optional[str] = None,
+        adjust: str = "qfq"
+    ) -> pd.Series:
+        """
+        读取入库时保存的质量标记
+
+        Args:
+            symbol: 股票代码
+            start_date: 开始日期，为None时不限
+            end_date: 结束日期，为None时不限
+            adjust: 复权类型
+
+        Returns:
+            以日期为索引的 uint8 标记，只包含有问题的K线（见 src.data.quality.QUALITY_FLAGS）
+        """
+        path = self._symbol_dir(symbol, adjust) / self.QUALITY_FILE
+        flags = pd.Series(np.zeros(0, dtype=np.uint8), index=pd.DatetimeIndex([], name='date'), name='flags')
+        if path.exists():
+            try:
+                flags = pd.read_parquet(path)['flags']
+            except Exception as e:
+                logger.warning(f"读取{symbol}质量标记失败: {e}")
+        if start_date is not None:
+            flags = flags[flags.index >= pd.Timestamp(start_date)]
+        if end_date is not None:
+            flags = flags[flags.index <= pd.Timestamp(end_date)]
+        return flags
+
+    def quality_report(self, symbols: Optional[List[str]] = None, adjust: str = "qfq") -> pd.DataFrame:
+        """
+        汇总已保存的质量标记，不重新读取行情
+
+        Args:
+            symbols: 股票代码列表，默认本地存储中的全部股票
+            adjust: 复权类型
+
+        Returns:
+            以股票代码为索引，各类问题的K线数为列的DataFrame，另含 flagged 列
+        """
+        if symbols is None:
+            symbols = self.list_symbols(adjust)
+        report = pd.DataFrame([quality_counts(self.read_quality(symbol, adjust=adjust)) for symbol in symbols],
+                              index=pd.Index(symbols, name='symbol'),
+                              columns=list(QUALITY_FLAGS) + ['flagged'])
+        return report.fillna(0).astype(np.int64)
+
+    def _factor_path(self, symbol: str) -> Path:
+        """获取复权因子文件路径"""
+        return self.data_dir / "adjust_factors" / f"{symbol}.parquet"
+
+    def read_adjust_factors(self, symbol: str, check_ttl: bool = True) -> Optional[pd.Series]:
+        """
+        读取本地复权因子
+
+        Args:
+            symbol: 股票代码
+            check_ttl: 是否检查有效期，为False时返回已过期的因子（离线使用或计算指纹）
+
+        Returns:
+            以日期为索引的累积后复权因子，不存在或（check_ttl 为True时）超过 cache_ttl 时返回None
+        """
+        path = self._factor_path(symbol)
+        if not path.exists() or (check_ttl and not self._is_fresh(path.stat().st_mtime)):
+            return None
+        try:
+            return pd.read_parquet(path)['factor']
+        except Exception as e:
+            logger.warning(f"读取{symbol}复权因子失败: {e}")
+            return None
+
+    def write_adjust_factors(self, symbol: str, factors: pd.Series):
+        """
+        写入复权因子，与已有因子按日期合并
+
+        Args:
+            symbol: 股票代码
+            factors: 以日期为索引的累积后复权因子
+        """
+        path = self._factor_path(symbol)
+        path.parent.mkdir(parents=True, exist_ok=True)
+
+        df = factors.rename('factor').to_frame()
+        if path.exists():
+            df = pd.concat([pd.read_parquet(path), df])
+        df = df[~df.index.duplicated(keep='last')].sort_index()
+
+        tmp_path = path.with_suffix('.tmp')
+        df.to_parquet(tmp_path)
+        os.replace(tmp_path, path)
+        self._record_fingerprints(symbol, self.FACTOR_FINGERPRINT, {'all': df})
+        self._notify_adjust_factors(symbol)
+
+    def _notify_adjust_factors(self, symbol: str):
+        """复权因子变更时前/后复权数据全部失效"""
+        for adjust in ("qfq", "hfq"):
+            self._notify_write(symbol, adjust, None)
+
+    def list_symbols(self, adjust: str = "qfq") -> List[str]:
+        """列出本地已存储的股票代码"""
+        adjust_dir = self.daily_dir / (adjust or "None")
+        if not adjust_dir.exists():
+            return []
+        return sorted(p.name for p in adjust_dir.iterdir() if p.is_dir())
+
+    def clear(self, symbol: Optional[str] = None):
+        """
+        清除本地数据
+
+        Args:
+            symbol: 股票代码，为None时清除全部
+        """
+        self._notify_write(symbol, None, None)
+        if symbol is None:
+            shutil.rmtree(self.daily_dir, ignore_errors=True)
+            shutil.rmtree(self.data_dir / "adjust_factors", ignore_errors=True)
+            shutil.rmtree(self.data_dir / "fingerprints", ignore_errors=True)
+            return
+
+        if self.daily_dir.exists():
+            for adjust_dir in self.daily_dir.iterdir():
+                shutil.rmtree(adjust_dir / symbol, ignore_errors=True)
+        self._factor_path(symbol).unlink(missing_ok=True)
+        self._fingerprint_path(symbol).unlink(missing_ok=True)
+
+
+def create_local_store(config_path: Optional[Union[str, Path]] = None) -> Optional[LocalDataStore]:
+    """
+    根据配置文件创建本地存储
+
+    Args:
+        config_path: 配置文件路径，默认为 config/config.yaml
+
+    Returns:
+        storage.cache_enabled 为真时返回本地存储，storage.database.enabled 为真时使用SQLite，
+        否则返回None
+    """
+    storage = get_config_section("storage", config_path)
+    if not storage.get('cache_enabled', False):
+        return None
+
+    database = storage.get('database') or {}
+    if database.get('enabled', False):
+        if database.get('type', 'sqlite') != 'sqlite':
+            raise ValueError(f"不支持的数据库类型: {database.get('type')}")
+        from src.data.sqlite_store import SQLiteBarStore
+        return SQLiteBarStore(
+            db_path=database.get('path', './data/tdxtools.db'),
+            cache_ttl=storage.get('cache_ttl', 86400)
+        )
+
+    return LocalDataStore(
+        data_dir=storage.get('data_dir', './data'),
+        cache_ttl=storage.get('cache_ttl', 86400)
+    )
@@ -0,0 +1,293 @@
+"""
+分钟线存储模块
+按 股票/月份 分块保存分钟线，每块是一个列式Parquet文件：时间戳与成交量用增量编码
+（DELTA_BINARY_PACKED，等间隔的分钟时间戳几乎不占空间），价格按字节拆分
+（BYTE_STREAM_SPLIT）后再以zstd压缩；区间读取只解压涉及的月份与字段
+"""
+
+import pandas as pd
+import numpy as np
+import os
+import shutil
+from pathlib import Path
+from typing import Dict, List, Optional, Union
+import logging
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from src.utils.config import get_config_section
+
+logger = logging.getLogger(__name__)
+
+# 分钟线字段
+MINUTE_COLUMNS = ['open', 'high', 'low', 'close', 'volume', 'amount']
+PRICE_COLUMNS = ['open', 'high', 'low', 'close']
+
+# 价格以float32保存时读取后保留的小数位，消除float32的舍入尾数
+PRICE_DECIMALS = 3
+
+# 各列的Parquet编码，时间戳为毫秒精度的int64
+COLUMN_ENCODING = {
+    'time': 'DELTA_BINARY_PACKED',
+    'open': 'BYTE_STREAM_SPLIT',
+    'high': 'BYTE_STREAM_SPLIT',
+    'low': 'BYTE_STREAM_SPLIT',
+    'close': 'BYTE_STREAM_SPLIT',
+    'volume': 'DELTA_BINARY_PACKED',
+    'amount': 'BYTE_STREAM_SPLIT',
+}
+
+
+class MinuteBarStore:
+    """按 股票/月份 分块的压缩分钟线存储"""
+
+    def __init__(
+        self,
+        minute_dir: Union[str, Path] = "./data/minute",
+        price_dtype: str = "float32",
+        compression: str = "zstd",
+        compression_level: Optional[int] = 3
+    ):
+        """
+        初始化分钟线存储
+
+        Args:
+            minute_dir: 分钟线存储目录，文件为 {minute_dir}/{周期}m/{股票代码}/{YYYY-MM}.parquet
+            price_dtype: 开高低收的存储类型，float32 体积约为 float64 的一半
+            compression: Parquet压缩算法，如 zstd、snappy、lz4
+            compression_level: 压缩级别，None表示算法默认值
+        """
+        if np.dtype(price_dtype) not in (np.float32, np.float64):
+            raise ValueError(f"不支持的价格存储类型: {price_dtype}，可选 float32, float64")
+        self.minute_dir = Path(minute_dir)
+        self.price_dtype = np.dtype(price_dtype)
+        self.compression = compression
+        self.compression_level = compression_level
+
+    def _symbol_dir(self, symbol: str, scale: int) -> Path:
+        """获取某只股票某个周期的存储目录"""
+        return self.minute_dir / f"{scale}m" / symbol
+
+    def _chunk_path(self, symbol: str, month: pd.Period, scale: int) -> Path:
+        """获取月份分块文件路径"""
+        return self._symbol_dir(symbol, scale) / f"{month.strftime('%Y-%m')}.parquet"
+
+    def _to_table(self, df: pd.DataFrame) -> pa.Table:
+        """转换为按存储类型排列的Arrow表"""
+        arrays = [pa.array(df.index.values.astype('datetime64[ms]'))]
+        for col in MINUTE_COLUMNS:
+            if col in PRICE_COLUMNS:
+                values = df[col].to_numpy(dtype=self.price_dtype, na_value=np.nan)
+            elif col == 'volume':
+                values = df[col].fillna(0).to_numpy(dtype=np.int64)
+            else:
+                values = df[col].to_numpy(dtype=np.float64, na_value=np.nan)
+            arrays.append(pa.array(values))
+        return pa.Table.from_arrays(arrays, names=['time'] + MINUTE_COLUMNS)
+
+    def _write_chunk(self, path: Path, df: pd.DataFrame):
+        """原子写入一个月份分块"""
+        tmp_path = path.with_suffix('.tmp')
+        pq.write_table(self._to_table(df), tmp_path, compression=self.compression,
+                       compression_level=self.compression_level, use_dictionary=False,
+                       column_encoding=COLUMN_ENCODING)
+        os.replace(tmp_path, path)
+
+    def _read_chunk(self, path: Path, fields: Optional[List[str]] = None) -> pd.DataFrame:
+        """读取一个月份分块，只解压需要的字段"""
+        table = pq.read_table(path, columns=['time'] + (fields if fields is not None else MINUTE_COLUMNS))
+        df = table.to_pandas()
+        df['time'] = df['time'].astype('datetime64[ns]')
+        df = df.set_index('time')
+        for col in df.columns:
+            if col in PRICE_COLUMNS and df[col].dtype == np.float32:
+                df[col] = df[col].astype(np.float64).round(PRICE_DECIMALS)
+        return df
+
+    def write(self, symbol: str, df: pd.DataFrame, scale: int = 1) -> int:
+        """
+        写入分钟线，与已有数据按时间合并，时间相同时以新数据为准
+
+        Args:
+            symbol: 股票代码
+            df: 以时间为索引的分钟线，列为 open/high/low/close/volume/amount
+            scale: K线周期(分钟)
+
+        Returns:
+            写入的K线根数
+        """
+        if df is None or df.empty:
+            return 0
+        if not isinstance(df.index, pd.DatetimeIndex):
+            raise ValueError("分钟线必须以时间为索引")
+        missing = [col for col in MINUTE_COLUMNS if col not in df.columns]
+        if missing:
+            raise ValueError(f"分钟线缺少字段: {', '.join(missing)}")
+
+        df = df[MINUTE_COLUMNS]
+        df = df[~df.index.duplicated(keep='last')].sort_index()
+        symbol_dir = self._symbol_dir(symbol, scale)
+        symbol_dir.mkdir(parents=True, exist_ok=True)
+
+        for month, month_df in df.groupby(df.index.to_period('M')):
+            path = self._chunk_path(symbol, month, scale)
+            if path.exists():
+                month_df = pd.concat([self._read_chunk(path), month_df])
+                month_df = month_df[~month_df.index.duplicated(keep='last')].sort_index()
+            self._write_chunk(path, month_df)
+        return len(df)
+
+    def months(self, symbol: str, scale: int = 1) -> List[str]:
+        """已存储的月份，格式 YYYY-MM"""
+        symbol_dir = self._symbol_dir(symbol, scale)
+        if not symbol_dir.exists():
+            return []
+        return sorted(p.stem for p in symbol_dir.glob("*.parquet"))
+
+    def read(
+        self,
+        symbol: str,
+        start: Optional[Union[str, pd.Timestamp]] = None,
+        end: Optional[Union[str, pd.Timestamp]] = None,
+        fields: Optional[List[str]] = None,
+        scale: int = 1
+    ) -> pd.DataFrame:
+        """
+        读取分钟线
+
+        Args:
+            symbol: 股票代码
+            start: 开始时间，为None时从最早的数据开始
+            end: 结束时间，只给日期时包含当天全部分钟线，为None时到最新的数据
+            fields: 读取的字段，默认全部
+            scale: K线周期(分钟)
+
+        Returns:
+            以时间为索引的分钟线，没有数据时为空DataFrame
+        """
+        if fields is not None:
+            unknown = [col for col in fields if col not in MINUTE_COLUMNS]
+            if unknown:
+                raise ValueError(f"未知的分钟线字段: {', '.join(unknown)}")
+        columns = fields if fields is not None else MINUTE_COLUMNS
+
+        start = pd.Timestamp(start) if start is not None else None
+        end = pd.Timestamp(end) if end is not None else None
+        if end is not None and end == end.normalize():
+            end = end + pd.Timedelta(days=1) - pd.Timedelta(1, 'ns')
+
+        frames = []
+        for month in self.months(symbol, scale):
+            period = pd.Period(month, 'M')
+            if start is not None and period.end_time < start:
+                continue
+            if end is not None and period.start_time > end:
+                break
+            frames.append(self._read_chunk(self._chunk_path(symbol, period, scale), columns))
+
+        if not frames:
+            return pd.DataFrame(columns=columns, index=pd.DatetimeIndex([], name='time'))
+        df = pd.concat(frames) if len(frames) > 1 else frames[0]
+        lo = df.index.searchsorted(start, side='left') if start is not None else 0
+        hi = df.index.searchsorted(end, side='right') if end is not None else len(df)
+        return df.iloc[lo:hi]
+
+    def list_symbols(self, scale: int = 1) -> List[str]:
+        """列出已存储分钟线的股票代码"""
+        scale_dir = self.minute_dir / f"{scale}m"
+        if not scale_dir.exists():
+            return []
+        return sorted(p.name for p in scale_dir.iterdir() if p.is_dir())
+
+    def disk_usage(self, symbol: Optional[str] = None, scale: int = 1) -> Dict[str, int]:
+        """
+        统计磁盘占用
+
+        Args:
+            symbol: 股票代码，为None时统计该周期全部股票
+            scale: K线周期(分钟)
+
+        Returns:
+            {'files': 分块数, 'rows': K线根数, 'bytes': 文件字节数}
+        """
+        symbols = [symbol] if symbol is not None else self.list_symbols(scale)
+        usage = {'files': 0, 'rows': 0, 'bytes': 0}
+        for sym in symbols:
+            for path in self._symbol_dir(sym, scale).glob("*.parquet"):
+                usage['files'] += 1
+                usage['rows'] += pq.ParquetFile(path).metadata.num_rows
+                usage['bytes'] += path.stat().st_size
+        return usage
+
+    def clear(self, symbol: Optional[str] = None, scale: Optional[int] = None):
+        """
+        清除分钟线
+
+        Args:
+            symbol: 股票代码，为None时清除全部股票
+            scale: K线周期(分钟)，为None时清除全部周期
+        """
+        if not self.minute_dir.exists():
+            return
+        scale_dirs = [self.minute_dir / f"{scale}m"] if scale is not None else list(self.minute_dir.iterdir())
+        for scale_dir in scale_dirs:
+            shutil.rmtree(scale_dir / symbol if symbol is not None else scale_dir, ignore_errors=True)
+
+
+def load_minute_settings(config_path: Optional[Union[str, Path]] = None) -> Dict:
+    """
+    读取配置文件 storage.minute 段
+
+    Args:
+        config_path: 配置文件路径，默认为 config/config.yaml
+
+    Returns:
+        MinuteBarStore 的 price_dtype、compression、compression_level 参数
+    """
+    settings = get_config_section("storage", config_path).get('minute') or {}
+    return {
+        'price_dtype': settings.get('price_dtype', "float32"),
+        'compression': settings.get('compression', "zstd"),
+        'compression_level': settings.get('compression_level', 3),
+    }
+
+
+def create_minute_store(config_path: Optional[Union[str, Path]] = None) -> MinuteBarStore:
+    """
+    根据配置文件创建分钟线存储
+
+    Args:
+        config_path: 配置文件路径，默认为 config/config.yaml
+
+    Returns:
+        位于 storage.data_dir/minute 的分钟线存储
+    """
+    storage = get_config_section("storage", config_path)
+    return MinuteBarStore(Path(storage.get('data_dir', './data')) / "minute", **load_minute_settings(config_path))
+
+
+if __name__ == "__main__":
+    # 测试代码
+    import tempfile
+    import time
+    logging.basicConfig(level=logging.INFO)
+
+    # 一个月的A股1分钟线（上午、下午各120根）
+    days = pd.bdate_range("2024-01-01", "2024-01-31")
+    minutes = np.r_[np.arange(9 * 60 + 31, 11 * 60 + 31), np.arange(13 * 60 + 1, 15 * 60 + 1)]
+    times = pd.DatetimeIndex((days.values[:, None] + minutes * np.timedelta64(1, 'm')).ravel(), name='time')
+    np.random.seed(42)
+    close = np.round(10 + np.cumsum(np.random.randn(len(times))) * 0.01, 2)
+    volume = np.random.randint(1, 1000, len(times)) * 100
+    df = pd.DataFrame({'open': close, 'high': close + 0.01, 'low': close - 0.01, 'close': close,
+                       'volume': volume, 'amount': close * volume}, index=times)
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        store = MinuteBarStore(tmp_dir)
+        store.write("000001.SZ", df)
+        usage = store.disk_usage("000001.SZ")
+        print(f"{usage['rows']} 根分钟线占用 {usage['bytes'] / 1024:.1f}KB，"
+              f"未压缩 {df.memory_usage().sum() / 1024:.1f}KB")
+        started = time.perf_counter()
+        store.read("000001.SZ", "2024-01-01", "2024-01-31")
+        print(f"读取一个月耗时 {(time.perf_counter() - started) * 1000:.1f}ms")
@@ -0,0 +1,444 @@
+"""
+多数据源对冲获取模块
+按历史耗时选择最快的数据源发出请求，超过该数据源耗时分位数仍未返回时向第二个数据源发出对冲请求，
+采用最先返回的结果；失败时依次切换到其余数据源。各数据源的耗时与错误率统计用于后续请求的路由。
+"""
+
+import pandas as pd
+import numpy as np
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from typing import Dict, List, Optional, Tuple
+import logging
+
+from src.data.adjustment import apply_adjustment
+from src.data.local_store import LocalDataStore, create_local_store
+from src.data.rate_limiter import call_with_retry
+from src.utils.config import get_config_section, load_data_sources_config
+
+logger = logging.getLogger(__name__)
+
+# 未在配置文件 multi_source 段指定时使用的默认值
+DEFAULT_MULTI_SOURCE_SETTINGS = {
+    'sources': ["eastmoney", "akshare", "sina", "baostock", "yfinance"],
+    'hedge_quantile': 0.95,
+    'min_hedge_delay': 0.2,
+    'default_hedge_delay': 2.0,
+    'stats_window': 200,
+    'min_samples': 10,
+}
+
+# 由 FreeDataProvider 提供的数据源，其余由 DataProvider 提供
+FREE_SOURCES = ("yfinance", "eastmoney", "sina")
+
+# 提供复权因子的数据源
+FACTOR_SOURCES = ("tushare", "akshare", "baostock")
+
+# 不复权价格已按拆股/送转调整的数据源，不能与其他数据源的不复权行情合并存储
+SPLIT_ADJUSTED_SOURCES = ("yfinance",)
+
+# 只返回最近若干根K线的数据源（新浪财经最多1000根），写入本地存储时按返回数据记录覆盖区间
+PARTIAL_HISTORY_SOURCES = ("sina",)
+
+
+class SourceStats:
+    """单个数据源最近若干次请求的耗时与错误统计（线程安全）"""
+
+    def __init__(self, window: int = 200):
+        """
+        Args:
+            window: 保留的最近请求数
+        """
+        self._latencies = deque(maxlen=window)
+        self._outcomes = deque(maxlen=window)
+        self._lock = threading.Lock()
+
+    def record(self, latency: float, success: bool):
+        """记录一次请求，失败的请求只计入错误率"""
+        with self._lock:
+            self._outcomes.append(success)
+            if success:
+                self._latencies.append(latency)
+
+    @property
+    def samples(self) -> int:
+        """成功请求的耗时样本数"""
+        return len(self._latencies)
+
+    def quantile(self, q: float) -> Optional[float]:
+        """耗时分位数（秒），没有样本时返回None"""
+        with self._lock:
+            if not self._latencies:
+                return None
+            return float(np.quantile(np.fromiter(self._latencies, dtype=np.float64), q))
+
+    @property
+    def error_rate(self) -> float:
+        """最近请求的错误率"""
+        with self._lock:
+            if not self._outcomes:
+                return 0.0
+            return 1.0 - sum(self._outcomes) / len(self._outcomes)
+
+    def summary(self) -> Dict:
+        """统计摘要"""
+        return {
+            'requests': len(self._outcomes),
+            'p50': self.quantile(0.5),
+            'p99': self.quantile(0.99),
+            'error_rate': self.error_rate,
+        }
+
+
+class MultiSourceProvider:
+    """多数据源对冲获取的数据提供器"""
+
+    def __init__(
+        self,
+        sources: Optional[List[str]] = None,
+        store: Optional[LocalDataStore] = None,
+        use_cache: bool = True,
+        providers: Optional[Dict] = None
+    ):
+        """
+        初始化多数据源提供器
+
+        Args:
+            sources: 数据源列表，默认读取配置 multi_source.sources，初始化失败的数据源会被跳过
+            store: 本地存储，为None时根据配置文件 storage 段创建
+            use_cache: 是否启用本地存储
+            providers: 已创建的 {数据源: 数据提供器}，传入时不再创建
+        """
+        settings = dict(DEFAULT_MULTI_SOURCE_SETTINGS)
+        settings.update(load_data_sources_config().get('multi_source') or {})
+        self.hedge_quantile = float(settings['hedge_quantile'])
+        self.min_hedge_delay = float(settings['min_hedge_delay'])
+        self.default_hedge_delay = float(settings['default_hedge_delay'])
+        self.min_samples = int(settings['min_samples'])
+
+        self.store = (store if store is not None else create_local_store()) if use_cache else None
+        self.providers = providers if providers is not None else self._create_providers(
+            sources or settings['sources'])
+        if not self.providers:
+            raise ValueError("没有可用的数据源")
+
+        self.sources = list(self.providers.keys())
+        self.stats = {source: SourceStats(int(settings['stats_window'])) for source in self.sources}
+        # baostock 所有查询共用一个登录会话，同一时间只允许一个请求
+        self._source_locks = {source: threading.Lock() for source in self.sources if source == "baostock"}
+        # 每个获取线程最多同时向全部数据源发出请求，线程池按 max_workers × 数据源数 配置
+        self._executor_lock = threading.Lock()
+        self._executor_size = 0
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._ensure_executor(get_config_section("performance").get('max_workers', 4))
+
+    def _ensure_executor(self, max_workers: int):
+        """保证对冲线程池能容纳 max_workers 个获取线程同时向全部数据源发出请求"""
+        size = max(1, int(max_workers)) * len(self.sources)
+        with self._executor_lock:
+            if size <= self._executor_size:
+                return
+            previous = self._executor
+            self._executor = ThreadPoolExecutor(max_workers=size, thread_name_prefix="hedge")
+            self._executor_size = size
+        if previous is not None:
+            previous.shutdown(wait=False)
+
+    @staticmethod
+    def _create_providers(sources: List[str]) -> Dict:
+        """创建各数据源的数据提供器，不使用各自的本地存储"""
+        from src.data.data_provider import DataProvider
+
+        providers = {}
+        for source in dict.fromkeys(sources):
+            try:
+                if source in FREE_SOURCES:
+                    from src.data.free_data_provider import FreeDataProvider
+                    providers[source] = FreeDataProvider(source, use_cache=False)
+                else:
+                    providers[source] = DataProvider(source, use_cache=False)
+            except Exception as e:
+                logger.warning(f"数据源 {source} 初始化失败，已跳过: {e}")
+        return providers
+
+    def rank_sources(self) -> List[str]:
+        """
+        按预期耗时对数据源排序
+
+        预期耗时为耗时中位数除以成功率；样本不足的数据源按 default_hedge_delay 估计，
+        耗时相同时保持配置顺序。
+
+        Returns:
+            从快到慢的数据源列表
+        """
+        def expected_latency(source: str) -> float:
+            stats = self.stats[source]
+            if stats.samples < self.min_samples:
+                latency = self.default_hedge_delay
+            else:
+                latency = stats.quantile(0.5)
+            return latency / max(1.0 - stats.error_rate, 0.05)
+
+        return sorted(self.sources, key=expected_latency)
+
+    def hedge_delay(self, source: str) -> float:
+        """向下一个数据源发出对冲请求前等待的时间（秒）"""
+        stats = self.stats[source]
+        if stats.samples < self.min_samples:
+            return self.default_hedge_delay
+        return max(self.min_hedge_delay, stats.quantile(self.hedge_quantile))
+
+    def _fetch_from(self, source: str, symbol: str, start_date: str, end_date: str, adjust: str) -> pd.DataFrame:
+        """从单个数据源获取并记录耗时，对冲请求本身已提供冗余，这里不再重试"""
+        provider = self.providers[source]
+        lock = self._source_locks.get(source)
+        started = time.monotonic()
+        try:
+            if lock is not None:
+                with lock:
+                    df = call_with_retry(provider._fetch_daily, symbol, start_date, end_date, adjust,
+                                         retry_count=0, limiter=provider.rate_limiter)
+            else:
+                df = call_with_retry(provider._fetch_daily, symbol, start_date, end_date, adjust,
+                                     retry_count=0, limiter=provider.rate_limiter)
+        except Exception:
+            self.stats[source].record(time.monotonic() - started, False)
+            raise
+        self.stats[source].record(time.monotonic() - started, True)
+        return df
+
+    def fetch_hedged(
+        self,
+        symbol: str,
+        start_date: str,
+        end_date: str,
+        adjust: str = "qfq",
+        sources: Optional[List[str]] = None
+    ) -> Tuple[pd.DataFrame, Optional[str]]:
+        """
+        对冲获取一段日线数据
+
+        先向最快的数据源发出请求；超过其耗时分位数仍未返回时，向下一个数据源发出对冲请求；
+        请求失败或返回空数据时立即切换到下一个数据源。采用最先返回非空数据的结果，
+        所有请求都返回空数据时返回空DataFrame。
+
+        Args:
+            symbol: 股票代码
+            start_date: 开始日期
+            end_date: 结束日期
+            adjust: 复权类型
+            sources: 限定使用的数据源，默认全部
+
+        Returns:
+            (日线数据, 数据来源)，全部数据源失败时抛出最后一个异常
+        """
+        queue = [source for source in self.rank_sources() if sources is None or source in sources]
+        if not queue:
+            raise ValueError(f"没有可用的数据源: {sources}")
+        pending: Dict[Future, str] = {}
+        empty_source = None
+        last_error = None
+
+        def launch():
+            source = queue.pop(0)
+            future = self._executor.submit(self._fetch_from, source, symbol, start_date, end_date, adjust)
+            pending[future] = source
+            return source
+
+        newest = launch()
+        while pending:
+            timeout = self.hedge_delay(newest) if queue else None
+            done, _ = wait(list(pending), timeout=timeout, return_when=FIRST_COMPLETED)
+
+            if not done:
+                newest = launch()
+                logger.info(f"{symbol} 等待超过 {timeout:.2f}s，向 {newest} 发出对冲请求")
+                continue
+
+            for future in done:
+                source = pending.pop(future)
+                try:
+                    df = future.result()
+                except Exception as e:
+                    last_error = e
+                    logger.warning(f"{source} 获取 {symbol} 失败: {e}")
+                    continue
+                if df is not None and not df.empty:
+                    return df, source
+                empty_source = empty_source or source
+
+            # 失败或返回空数据时，没有其他请求在途则切换到下一个数据源
+            if not pending and queue:
+                newest = launch()
+
+        if empty_source is not None:
+            return pd.DataFrame(), empty_source
+        raise last_error
+
+    def get_daily_data(
+        self,
+        symbol: str,
+        start_date: str,
+        end_date: str,
+        adjust: str = "qfq"
+    ) -> pd.DataFrame:
+        """
+        获取日线数据，只对本地缺失的子区间发出对冲请求
+
+        各数据源的复权基准不同，本地存储只保存不复权行情，前/后复权按复权因子即时计算；
+        没有数据源提供复权因子时，复权行情直接对冲获取，不写入本地存储。
+
+        Args:
+            symbol: 股票代码，如 "000001.SZ"
+            start_date: 开始日期，格式 "YYYY-MM-DD"
+            end_date: 结束日期，格式 "YYYY-MM-DD"
+            adjust: 复权类型
+
+        Returns:
+            pandas DataFrame 包含日线数据
+        """
+        raw_sources = [source for source in self.sources if source not in SPLIT_ADJUSTED_SOURCES]
+        factors = None
+        if self.store is not None and raw_sources and adjust in ("qfq", "hfq"):
+            factors = self._get_adjust_factors(symbol)
+
+        if self.store is None or not raw_sources or (adjust in ("qfq", "hfq") and factors is None):
+            df, source = self.fetch_hedged(symbol, start_date, end_date, adjust)
+            logger.info(f"{symbol} 数据来自 {source}")
+            return df
+
+        for gap_start, gap_end in self.store.missing_ranges(symbol, start_date, end_date, "None"):
+            df, source = self.fetch_hedged(symbol, gap_start, gap_end, "None", sources=raw_sources)
+            logger.info(f"{symbol} {gap_start} 到 {gap_end} 的数据来自 {source}")
+            # 所有数据源都没有数据的缺口也记为已覆盖，之后不再重复请求
+            if source is not None:
+                self.store.write(symbol, df, gap_start, gap_end, "None",
+                                 partial_history=source in PARTIAL_HISTORY_SOURCES)
+
+        df = self.store.load(symbol, start_date, end_date, "None")
+        return apply_adjustment(df, factors, adjust) if factors is not None else df
+
+    def _get_adjust_factors(self, symbol: str) -> Optional[pd.Series]:
+        """
+        获取累积后复权因子，优先读取本地存储，否则依次尝试提供复权因子的数据源
+
+        Args:
+            symbol: 股票代码
+
+        Returns:
+            以日期为索引的复权因子，没有数据源提供时返回None
+        """
+        factors = self.store.read_adjust_factors(symbol)
+        if factors is not None:
+            return factors
+
+        for source in self.rank_sources():
+            if source not in FACTOR_SOURCES:
+                continue
+            provider = self.providers[source]
+            lock = self._source_locks.get(source)
+            try:
+                if lock is not None:
+                    with lock:
+                        factors = call_with_retry(provider._fetch_adjust_factors, symbol,
+                                                  retry_count=0, limiter=provider.rate_limiter)
+                else:
+                    factors = call_with_retry(provider._fetch_adjust_factors, symbol,
+                                              retry_count=0, limiter=provider.rate_limiter)
+            except Exception as e:
+                logger.warning(f"{source} 获取 {symbol} 复权因子失败: {e}")
+                continue
+            if factors is not None and not factors.empty:
+                self.store.write_adjust_factors(symbol, factors)
+                return factors
+        logger.warning(f"没有数据源提供 {symbol} 复权因子，复权行情不写入本地存储")
+        return None
+
+    def get_multiple_stocks(
+        self,
+        symbols: List[str],
+        start_date: str,
+        end_date: str,
+        adjust: str = "qfq",
+        max_workers: Optional[int] = None
+    ) -> Dict[str, pd.DataFrame]:
+        """
+        批量获取多只股票数据
+
+        Args:
+            symbols: 股票代码列表
+            start_date: 开始日期
+            end_date: 结束日期
+            adjust: 复权类型
+            max_workers: 并发线程数，默认读取配置 performance.max_workers
+
+        Returns:
+            字典，key为股票代码，value为DataFrame
+        """
+        symbols = list(dict.fromkeys(symbols))
+        if max_workers is None:
+            max_workers = get_config_section("performance").get('max_workers', 4)
+        self._ensure_executor(max_workers)
+
+        def fetch(symbol: str) -> Optional[pd.DataFrame]:
+            try:
+                return self.get_daily_data(symbol, start_date, end_date, adjust)
+            except Exception as e:
+                logger.error(f"获取 {symbol} 数据失败: {e}")
+                return None
+
+        with ThreadPoolExecutor(max_workers=max(1, min(int(max_workers), len(symbols) or 1))) as executor:
+            frames = list(executor.map(fetch, symbols))
+
+        result = {}
+        for symbol, df in zip(symbols, frames):
+            if df is not None and not df.empty:
+                result[symbol] = df
+            elif df is not None:
+                logger.warning(f"未获取到 {symbol} 数据")
+        return result
+
+    def get_source_stats(self) -> Dict[str, Dict]:
+        """
+        获取各数据源的耗时与错误率统计
+
+        Returns:
+            {数据源: {'requests', 'p50', 'p99', 'error_rate'}}，耗时单位为秒
+        """
+        return {source: self.stats[source].summary() for source in self.sources}
+
+    def cleanup(self):
+        """清理资源"""
+        self._executor.shutdown(wait=False)
+        for provider in self.providers.values():
+            if hasattr(provider, 'cleanup'):
+                provider.cleanup()
+
+
+def create_multi_source_provider(sources: Optional[List[str]] = None) -> MultiSourceProvider:
+    """
+    创建多数据源提供器实例
+
+    Args:
+        sources: 数据源列表，默认读取配置 multi_source.sources
+
+    Returns:
+        MultiSourceProvider实例
+    """
+    return MultiSourceProvider(sources)
+
+
+if __name__ == "__main__":
+    # 测试代码
+    logging.basicConfig(level=logging.INFO)
+
+    provider = create_multi_source_provider(["eastmoney", "sina"])
+    try:
+        data = provider.get_multiple_stocks(["000001.SZ", "600519.SH"], "2024-01-01", "2024-01-31")
+        for symbol, df in data.items():
+            print(f"{symbol}: {len(df)} 条记录")
+        print(provider.get_source_stats())
+    finally:
+        provider.cleanup()
@@ -0,0 +1,430 @@
+"""
+全市场面板存储模块
+将多只股票的日线数据构建为 日期×股票×字段 的连续内存映射数组，
+回测引擎与公式计算可零拷贝打开并按字段、股票切片，无需构造DataFrame
+"""
+
+import pandas as pd
+import numpy as np
+import json
+import os
+import shutil
+import time
+from pathlib import Path
+from typing import Dict, List, Optional, Union
+import logging
+
+from src.data.adjustment import apply_adjustment
+from src.data.local_store import LocalDataStore
+from src.data.quality import validate_panel
+
+logger = logging.getLogger(__name__)
+
+# 默认写入面板的字段
+PANEL_FIELDS = ['open', 'high', 'low', 'close', 'volume', 'amount']
+
+
+class MarketPanel:
+    """只读的内存映射 日期×股票×字段 面板"""
+
+    VALUES_FILE = "values.npy"
+    DATES_FILE = "dates.npy"
+    SYMBOLS_FILE = "symbols.json"
+    META_FILE = "meta.json"
+    QUALITY_FILE = "quality.npy"
+    # 指向当前版本子目录的指针文件；旧版本构建的面板直接把数据文件放在面板目录下
+    CURRENT_FILE = "CURRENT"
+
+    def __init__(self, panel_dir: Union[str, Path]):
+        """
+        打开面板目录
+
+        Args:
+            panel_dir: build_panel 生成的面板目录
+        """
+        self.panel_dir = Path(panel_dir)
+        self.version_dir = self.current_version_dir(self.panel_dir)
+        if self.version_dir is None:
+            raise ValueError(f"面板目录不存在或未构建: {self.panel_dir}")
+
+        with open(self.version_dir / self.META_FILE, 'r', encoding='utf-8') as f:
+            self.meta = json.load(f)
+        with open(self.version_dir / self.SYMBOLS_FILE, 'r', encoding='utf-8') as f:
+            self.symbols: List[str] = json.load(f)
+
+        self.values = np.load(self.version_dir / self.VALUES_FILE, mmap_mode='r')
+        self.dates = pd.DatetimeIndex(np.load(self.version_dir / self.DATES_FILE), name='date')
+        self.fields: List[str] = self.meta['fields']
+        self.adjust: str = self.meta.get('adjust', "None")
+        # 日期×股票 的质量标记，旧版本构建的面板没有该文件
+        quality_path = self.version_dir / self.QUALITY_FILE
+        self.quality: Optional[np.ndarray] = np.load(quality_path, mmap_mode='r') if quality_path.exists() else None
+
+        self._symbol_pos = {symbol: i for i, symbol in enumerate(self.symbols)}
+        self._field_pos = {field: i for i, field in enumerate(self.fields)}
+
+    @classmethod
+    def current_version_dir(cls, panel_dir: Path) -> Optional[Path]:
+        """读取指针文件得到当前版本的数据目录，面板未构建时返回None"""
+        pointer = panel_dir / cls.CURRENT_FILE
+        if pointer.exists():
+            version_dir = panel_dir / pointer.read_text(encoding='utf-8').strip()
+            return version_dir if (version_dir / cls.VALUES_FILE).exists() else None
+        return panel_dir if (panel_dir / cls.VALUES_FILE).exists() else None
+
+    @property
+    def shape(self):
+        """面板形状 (日期数, 股票数, 字段数)"""
+        return self.values.shape
+
+    def symbol_index(self, symbol: str) -> int:
+        """获取股票在面板中的列位置"""
+        if symbol not in self._symbol_pos:
+            raise ValueError(f"面板中没有该股票: {symbol}")
+        return self._symbol_pos[symbol]
+
+    def field_index(self, field: str) -> int:
+        """获取字段在面板中的位置"""
+        if field not in self._field_pos:
+            raise ValueError(f"面板中没有该字段: {field}，可用字段: {self.fields}")
+        return self._field_pos[field]
+
+    def date_slice(self, start_date: Optional[str] = None, end_date: Optional[str] = None) -> slice:
+        """将日期区间转换为日期轴上的切片"""
+        start = 0 if start_date is None else self.dates.searchsorted(pd.Timestamp(start_date), side='left')
+        end = len(self.dates) if end_date is None else self.dates.searchsorted(pd.Timestamp(end_date), side='right')
+        return slice(start, end)
+
+    def field(
+        self,
+        field: str,
+        start_date: Optional[str] = None,
+        end_date: Optional[str] = None
+    ) -> np.ndarray:
+        """
+        获取某个字段的 日期×股票 矩阵
+
+        Args:
+            field: 字段名，如 "close"
+            start_date: 开始日期
+            end_date: 结束日期
+
+        Returns:
+            内存映射数组的视图（不复制数据），缺失值为NaN
+        """
+        return self.values[self.date_slice(start_date, end_date), :, self.field_index(field)]
+
+    def symbol(
+        self,
+        symbol: str,
+        start_date: Optional[str] = None,
+        end_date: Optional[str] = None
+    ) -> np.ndarray:
+        """
+        获取某只股票的 日期×字段 矩阵
+
+        Args:
+            symbol: 股票代码
+            start_date: 开始日期
+            end_date: 结束日期
+
+        Returns:
+            内存映射数组的视图（不复制数据）
+        """
+        return self.values[self.date_slice(start_date, end_date), self.symbol_index(symbol), :]
+
+    def to_frame(
+        self,
+        field: str,
+        start_date: Optional[str] = None,
+        end_date: Optional[str] = None
+    ) -> pd.DataFrame:
+        """将某个字段转换为 日期×股票 DataFrame"""
+        rows = self.date_slice(start_date, end_date)
+        return pd.DataFrame(np.asarray(self.field(field, start_date, end_date)),
+                            index=self.dates[rows], columns=self.symbols)
+
+    def quality_flags(
+        self,
+        symbols: Optional[List[str]] = None,
+        start_date: Optional[str] = None,
+        end_date: Optional[str] = None
+    ) -> Dict[str, pd.Series]:
+        """
+        获取构建面板时保存的质量标记
+
+        Args:
+            symbols: 股票代码列表，默认全部
+            start_date: 开始日期
+            end_date: 结束日期
+
+        Returns:
+            {股票代码: 以日期为索引的 uint8 标记}，只包含有问题K线的股票与日期
+        """
+        if self.quality is None:
+            return {}
+        rows = self.date_slice(start_date, end_date)
+        dates = self.dates[rows]
+        block = self.quality[rows]
+        result = {}
+        for symbol in symbols or self.symbols:
+            flags = np.asarray(block[:, self.symbol_index(symbol)])
+            flagged = np.flatnonzero(flags)
+            if len(flagged):
+                result[symbol] = pd.Series(flags[flagged], index=dates[flagged], name='flags')
+        return result
+
+    def stale_symbols(self, store: LocalDataStore) -> List[str]:
+        """
+        与本地存储的当前指纹比较，找出构建面板之后数据已变化的股票
+
+        Args:
+            store: 构建面板时使用的本地存储
+
+        Returns:
+            输入数据已变化的股票代码，为空表示面板仍是最新的
+        """
+        inputs = self.meta.get('inputs')
+        if inputs is None:
+            raise ValueError(f"面板不是由本地存储构建，没有记录输入数据指纹: {self.panel_dir}")
+        recorded = inputs['fingerprints']
+        current = store.fingerprints(list(recorded), inputs['start_date'], inputs['end_date'], inputs['adjust'])
+        return [symbol for symbol in recorded if current[symbol] != recorded[symbol]]
+
+    def is_stale(self, store: LocalDataStore) -> bool:
+        """构建面板之后本地存储中的输入数据是否已变化"""
+        return bool(self.stale_symbols(store))
+
+    def to_dict(
+        self,
+        symbols: Optional[List[str]] = None,
+        start_date: Optional[str] = None,
+        end_date: Optional[str] = None
+    ) -> Dict[str, pd.DataFrame]:
+        """
+        转换为 {股票代码: DataFrame}，去掉停牌（全部字段缺失）的日期
+
+        Args:
+            symbols: 股票代码列表，默认全部
+            start_date: 开始日期
+            end_date: 结束日期
+
+        Returns:
+            与数据提供器 get_multiple_stocks 相同格式的数据字典
+        """
+        rows = self.date_slice(start_date, end_date)
+        dates = self.dates[rows]
+        result = {}
+        for symbol in symbols or self.symbols:
+            values = np.asarray(self.values[rows, self.symbol_index(symbol), :])
+            valid = ~np.isnan(values).all(axis=1)
+            if valid.any():
+                result[symbol] = pd.DataFrame(values[valid], index=dates[valid], columns=self.fields)
+        return result
+
+
+def build_panel(
+    data: Dict[str, pd.DataFrame],
+    panel_dir: Union[str, Path],
+    fields: Optional[List[str]] = None,
+    dtype: str = "float32",
+    adjust: str = "None",
+    quality: Optional[Dict[str, pd.Series]] = None,
+    inputs: Optional[Dict] = None
+) -> MarketPanel:
+    """
+    由 {股票代码: DataFrame} 构建面板
+
+    交易日历取所有股票日期的并集，股票停牌或缺少某字段时对应位置为NaN。
+    构建时对整个面板做一次向量化质量校验，结果保存为 日期×股票 的质量标记。
+    每次构建写入面板目录下新的版本子目录，完成后原子替换 CURRENT 指针文件切换版本：
+    构建过程中与切换后，已打开旧面板的读者仍可继续使用旧版本的内存映射。
+
+    Args:
+        data: 以日期为索引的日线数据字典
+        panel_dir: 面板输出目录
+        fields: 写入的字段，默认 PANEL_FIELDS
+        dtype: 数值类型，"float32" 或 "float64"
+        adjust: 数据的复权类型，记录在元数据中
+        quality: 已有的质量标记 {股票代码: 以日期为索引的标记}（如本地存储入库时的缺失交易日标记），
+                 与面板校验结果按位合并
+        inputs: 输入数据描述（日期区间、复权类型与各股票的指纹），记录在元数据中，
+                用于 MarketPanel.stale_symbols 判断面板是否过期
+
+    Returns:
+        打开的MarketPanel
+    """
+    if dtype not in ("float32", "float64"):
+        raise ValueError(f"面板数值类型只支持 float32 或 float64: {dtype}")
+
+    fields = list(fields or PANEL_FIELDS)
+    symbols = sorted(symbol for symbol, df in data.items() if df is not None and not df.empty)
+    if symbols:
+        dates = pd.DatetimeIndex(np.unique(np.concatenate(
+            [data[symbol].index.values.astype('datetime64[ns]') for symbol in symbols])))
+    else:
+        dates = pd.DatetimeIndex([])
+
+    panel_dir = Path(panel_dir)
+    version_dir = panel_dir / f"v{time.time_ns()}"
+    version_dir.mkdir(parents=True)
+
+    values = np.lib.format.open_memmap(
+        version_dir / MarketPanel.VALUES_FILE, mode='w+', dtype=dtype,
+        shape=(len(dates), len(symbols), len(fields))
+    )
+    values[:] = np.nan
+    for j, symbol in enumerate(symbols):
+        df = data[symbol]
+        df = df[~df.index.duplicated(keep='last')]
+        rows = dates.searchsorted(df.index)
+        frame = df.reindex(columns=fields)
+        values[rows, j, :] = frame.to_numpy(dtype=np.float64, na_value=np.nan)
+    values.flush()
+
+    flags = validate_panel(values, fields)
+    for j, symbol in enumerate(symbols):
+        known = (quality or {}).get(symbol)
+        if known is not None and not known.empty:
+            known = known[known.index.isin(dates)]
+            flags[dates.searchsorted(known.index), j] |= known.to_numpy(dtype=np.uint8)
+    np.save(version_dir / MarketPanel.QUALITY_FILE, flags)
+    del values
+
+    np.save(version_dir / MarketPanel.DATES_FILE, dates.values.astype('datetime64[D]'))
+    with open(version_dir / MarketPanel.SYMBOLS_FILE, 'w', encoding='utf-8') as f:
+        json.dump(symbols, f, ensure_ascii=False)
+    with open(version_dir / MarketPanel.META_FILE, 'w', encoding='utf-8') as f:
+        json.dump({
+            'fields': fields,
+            'dtype': dtype,
+            'adjust': adjust,
+            'shape': [len(dates), len(symbols), len(fields)],
+            'built_at': time.time(),
+            'inputs': inputs,
+        }, f, ensure_ascii=False)
+
+    pointer = panel_dir / MarketPanel.CURRENT_FILE
+    tmp_pointer = panel_dir / f"{MarketPanel.CURRENT_FILE}.{version_dir.name}.tmp"
+    tmp_pointer.write_text(version_dir.name, encoding='utf-8')
+    os.replace(tmp_pointer, pointer)
+    _remove_old_versions(panel_dir, version_dir.name)
+
+    logger.info(f"面板构建完成: {len(dates)}个交易日 × {len(symbols)}只股票 × {len(fields)}个字段 -> {panel_dir}")
+    return MarketPanel(panel_dir)
+
+
+def _remove_old_versions(panel_dir: Path, current: str):
+    """
+    删除旧版本的面板数据，仍被内存映射打开的文件（Windows）删除失败时保留到下次构建
+
+    Args:
+        panel_dir: 面板目录
+        current: 当前版本子目录名
+    """
+    legacy_files = {MarketPanel.VALUES_FILE, MarketPanel.DATES_FILE, MarketPanel.SYMBOLS_FILE,
+                    MarketPanel.META_FILE, MarketPanel.QUALITY_FILE}
+    for path in panel_dir.iterdir():
+        # 只删除早于当前版本的版本目录（并发构建中的较新版本保留）与旧布局的数据文件
+        is_old_version = path.is_dir() and path.name[1:].isdigit() and int(path.name[1:]) < int(current[1:])
+        if not is_old_version and path.name not in legacy_files:
+            continue
+        try:
+            if path.is_dir():
+                shutil.rmtree(path)
+            else:
+                path.unlink()
+        except OSError as e:
+            logger.debug(f"旧版本面板数据暂时无法删除，下次构建时重试: {path} ({e})")
+
+
+def build_panel_from_store(
+    store: LocalDataStore,
+    panel_dir: Union[str, Path],
+    start_date: str,
+    end_date: str,
+    symbols: Optional[List[str]] = None,
+    adjust: str = "qfq",
+    fields: Optional[List[str]] = None,
+    dtype: str = "float32"
+) -> MarketPanel:
+    """
+    由本地存储构建面板
+
+    优先使用不复权行情与本地复权因子（不检查有效期）计算复权价格，
+    没有复权因子的股票使用本地已存储的对应复权类型数据，两者都没有时记录警告并跳过该股票。
+    元数据记录各股票输入数据的指纹，本地数据变化后 MarketPanel.stale_symbols 可发现过期的面板。
+
+    Args:
+        store: 本地存储
+        panel_dir: 面板输出目录
+        start_date: 开始日期
+        end_date: 结束日期
+        symbols: 股票代码列表，默认本地存储中的全部股票
+        adjust: 复权类型
+        fields: 写入的字段，默认 PANEL_FIELDS
+        dtype: 数值类型
+
+    Returns:
+        打开的MarketPanel
+    """
+    if symbols is None:
+        symbols = sorted(set(store.list_symbols("None")) | set(store.list_symbols(adjust)))
+
+    # 先记录指纹再读取行情，构建期间写入的数据会使面板被判定为过期而不是被漏掉
+    inputs = {'start_date': start_date, 'end_date': end_date, 'adjust': adjust,
+              'fingerprints': store.fingerprints(symbols, start_date, end_date, adjust)}
+    data, quality, skipped = {}, {}, []
+    for symbol in symbols:
+        df = store.load(symbol, start_date, end_date, "None")
+        source_adjust = "None"
+        if adjust in ("qfq", "hfq"):
+            # 面板只读本地数据，超过 cache_ttl 的因子仍然可用，不能因此丢掉已有不复权行情的股票
+            factors = store.read_adjust_factors(symbol, check_ttl=False)
+            if df.empty or factors is None:
+                raw_available = not df.empty
+                df = store.load(symbol, start_date, end_date, adjust)
+                source_adjust = adjust
+                if df.empty and raw_available:
+                    skipped.append(symbol)
+            else:
+                df = apply_adjustment(df, factors, adjust)
+        if not df.empty:
+            data[symbol] = df
+            quality[symbol] = store.read_quality(symbol, start_date, end_date, source_adjust)
+
+    if skipped:
+        logger.warning(f"{len(skipped)}只股票有不复权行情但本地没有复权因子，未写入{adjust}面板: {skipped}")
+
+    return build_panel(data, panel_dir, fields=fields, dtype=dtype, adjust=adjust, quality=quality, inputs=inputs)
+
+
+def load_panel(panel_dir: Union[str, Path]) -> MarketPanel:
+    """
+    打开已构建的面板
+
+    Args:
+        panel_dir: 面板目录
+
+    Returns:
+        MarketPanel实例
+    """
+    return MarketPanel(panel_dir)
+
+
+if __name__ == "__main__":
+    # 测试代码
+    import tempfile
+    logging.basicConfig(level=logging.INFO)
+
+    dates = pd.date_range('2024-01-01', '2024-03-31', freq='B')
+    np.random.seed(42)
+    data = {}
+    for symbol in ["000001.SZ", "600519.SH"]:
+        price = 100 + np.cumsum(np.random.randn(len(dates)))
+        data[symbol] = pd.DataFrame({'close': price, 'volume': 1e6}, index=dates)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        panel = build_panel(data, Path(tmp) / "panel")
+        print(f"面板形状: {panel.shape}")
+        print(panel.to_frame('close').tail())
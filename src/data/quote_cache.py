@@ -0,0 +1,141 @@
+"""
+实时行情快照缓存模块
+进程内共享的短有效期缓存，多个调用方在有效期内轮询同一批股票时只向上游请求一次
+"""
+
+import pandas as pd
+import threading
+import time
+from typing import Callable, Dict, List, Optional, Tuple
+import logging
+
+from src.utils.config import get_config_section
+
+logger = logging.getLogger(__name__)
+
+# 实时行情快照的字段
+QUOTE_COLUMNS = ['name', 'price', 'open', 'high', 'low', 'pre_close',
+                 'change', 'pct_change', 'volume', 'amount', 'time']
+
+
+class QuoteCache:
+    """按 (数据源, 股票代码) 缓存实时行情的线程安全缓存"""
+
+    def __init__(self, ttl: float = 3.0):
+        """
+        初始化缓存
+
+        Args:
+            ttl: 行情有效期(秒)，小于等于0表示不缓存
+        """
+        self.ttl = ttl
+        self._rows: Dict[str, Dict[str, Tuple[float, Dict]]] = {}
+        self._lock = threading.Lock()
+        self._fetch_locks: Dict[str, threading.Lock] = {}
+
+    def get(self, source: str, symbols: List[str]) -> Tuple[pd.DataFrame, List[str]]:
+        """
+        读取缓存
+
+        Args:
+            source: 数据源
+            symbols: 股票代码列表
+
+        Returns:
+            (有效期内的行情快照, 未命中的股票代码列表)
+        """
+        now = time.monotonic()
+        records, missing = {}, []
+        with self._lock:
+            rows = self._rows.get(source, {})
+            for symbol in symbols:
+                entry = rows.get(symbol)
+                if entry is not None and now - entry[0] <= self.ttl:
+                    records[symbol] = entry[1]
+                else:
+                    missing.append(symbol)
+        return self._to_frame(records), missing
+
+    def put(self, source: str, snapshot: pd.DataFrame):
+        """
+        写入行情快照
+
+        Args:
+            source: 数据源
+            snapshot: 以股票代码为索引的行情快照
+        """
+        if self.ttl <= 0 or snapshot.empty:
+            return
+        now = time.monotonic()
+        records = snapshot.to_dict('index')
+        with self._lock:
+            rows = self._rows.setdefault(source, {})
+            for symbol, record in records.items():
+                rows[symbol] = (now, record)
+
+    def get_or_fetch(
+        self,
+        source: str,
+        symbols: List[str],
+        fetch: Callable[[List[str]], pd.DataFrame]
+    ) -> pd.DataFrame:
+        """
+        读取缓存，未命中的股票调用 fetch 批量获取
+
+        同一数据源的获取过程串行执行，并发调用方在等待后直接命中前一个调用方写入的缓存，
+        不会重复请求上游。
+
+        Args:
+            source: 数据源
+            symbols: 股票代码列表
+            fetch: 批量获取函数，参数为未命中的股票代码列表，返回以股票代码为索引的快照
+
+        Returns:
+            按 symbols 顺序排列的行情快照，获取不到的股票不在结果中
+        """
+        symbols = list(dict.fromkeys(symbols))
+        cached, missing = self.get(source, symbols)
+        if missing:
+            with self._lock:
+                fetch_lock = self._fetch_locks.setdefault(source, threading.Lock())
+            with fetch_lock:
+                cached, missing = self.get(source, symbols)
+                if missing:
+                    fetched = fetch(missing)
+                    self.put(source, fetched)
+                    cached = pd.concat([cached, fetched]) if not cached.empty else fetched
+        return cached.reindex([s for s in symbols if s in cached.index])
+
+    def clear(self):
+        """清空缓存"""
+        with self._lock:
+            self._rows.clear()
+
+    @staticmethod
+    def _to_frame(records: Dict[str, Dict]) -> pd.DataFrame:
+        """将 {股票代码: 行情} 转换为快照DataFrame"""
+        if not records:
+            return pd.DataFrame(columns=QUOTE_COLUMNS, index=pd.Index([], name='symbol'))
+        df = pd.DataFrame.from_dict(records, orient='index')
+        df.index.name = 'symbol'
+        return df
+
+
+# 进程内共享的缓存
+_quote_cache: Optional[QuoteCache] = None
+_quote_cache_lock = threading.Lock()
+
+
+def get_quote_cache() -> QuoteCache:
+    """
+    获取进程内共享的实时行情缓存
+
+    Returns:
+        有效期读取配置 performance.quote_cache_ttl 的QuoteCache
+    """
+    global _quote_cache
+    with _quote_cache_lock:
+        if _quote_cache is None:
+            ttl = get_config_section("performance").get('quote_cache_ttl', 3.0)
+            _quote_cache = QuoteCache(float(ttl))
+        return _quote_cache
@@ -0,0 +1,178 @@
+"""
+数据源限流与重试模块
+为每个数据源提供令牌桶限流器，并按 retry_count 进行指数退避重试
+"""
+
+import random
+import threading
+import time
+from typing import Any, Callable, Dict, Optional
+import logging
+
+from src.utils.config import load_data_sources_config
+
+logger = logging.getLogger(__name__)
+
+# 未在配置文件中指定时使用的默认值
+DEFAULT_SOURCE_SETTINGS = {
+    'timeout': 30,
+    'retry_count': 3,
+    'rate_limit': 5.0,   # 每秒请求数
+    'burst': 5,          # 令牌桶容量
+}
+
+
+class TokenBucket:
+    """线程安全的令牌桶限流器"""
+
+    def __init__(self, rate: float, capacity: Optional[float] = None):
+        """
+        初始化令牌桶
+
+        Args:
+            rate: 每秒补充的令牌数，小于等于0表示不限流
+            capacity: 令牌桶容量（允许的突发请求数），默认等于 max(rate, 1)
+        """
+        self.rate = rate
+        self.capacity = capacity if capacity is not None else max(rate, 1.0)
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self):
+        """按流逝时间补充令牌"""
+        now = time.monotonic()
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def try_acquire(self, tokens: float = 1.0) -> bool:
+        """
+        尝试获取令牌，不阻塞
+
+        Args:
+            tokens: 需要的令牌数
+
+        Returns:
+            是否获取成功
+        """
+        if self.rate <= 0:
+            return True
+
+        with self._lock:
+            self._refill()
+            if self._tokens >= tokens:
+                self._tokens -= tokens
+                return True
+            return False
+
+    def acquire(self, tokens: float = 1.0) -> float:
+        """
+        获取令牌，令牌不足时阻塞等待
+
+        Args:
+            tokens: 需要的令牌数
+
+        Returns:
+            等待的秒数
+        """
+        if self.rate <= 0:
+            return 0.0
+
+        waited = 0.0
+        while True:
+            with self._lock:
+                self._refill()
+                if self._tokens >= tokens:
+                    self._tokens -= tokens
+                    return waited
+                wait = (tokens - self._tokens) / self.rate
+            time.sleep(wait)
+            waited += wait
+
+
+_retry_total = 0
+_retry_lock = threading.Lock()
+
+
+def get_retry_count() -> int:
+    """进程内 call_with_retry 累计的重试次数，用于统计批量任务的重试情况"""
+    return _retry_total
+
+
+def call_with_retry(
+    func: Callable,
+    *args,
+    retry_count: int = 3,
+    limiter: Optional[TokenBucket] = None,
+    backoff_base: float = 0.5,
+    backoff_max: float = 8.0,
+    **kwargs
+) -> Any:
+    """
+    调用函数，失败时按指数退避重试
+
+    Args:
+        func: 要调用的函数
+        retry_count: 失败后的最大重试次数
+        limiter: 限流器，每次调用前获取一个令牌
+        backoff_base: 第一次重试前的等待秒数，之后每次翻倍
+        backoff_max: 单次等待的最大秒数
+
+    Returns:
+        函数返回值，重试次数用尽后抛出最后一次的异常
+    """
+    global _retry_total
+    attempt = 0
+    while True:
+        if limiter is not None:
+            limiter.acquire()
+        try:
+            return func(*args, **kwargs)
+        except Exception as e:
+            if attempt >= retry_count:
+                raise
+            # 加入随机抖动，避免并发请求同时重试
+            delay = min(backoff_max, backoff_base * (2 ** attempt))
+            delay *= 0.5 + random.random() / 2
+            attempt += 1
+            with _retry_lock:
+                _retry_total += 1
+            logger.warning(f"请求失败({e})，{delay:.2f}秒后第{attempt}次重试")
+            time.sleep(delay)
+
+
+_limiters: Dict[str, TokenBucket] = {}
+_limiters_lock = threading.Lock()
+
+
+def get_source_settings(source: str) -> Dict[str, Any]:
+    """
+    获取数据源的超时、重试与限流配置
+
+    Args:
+        source: 数据源名称，如 "akshare"
+
+    Returns:
+        合并默认值后的配置字典
+    """
+    settings = dict(DEFAULT_SOURCE_SETTINGS)
+    source_config = (load_data_sources_config().get('data_sources') or {}).get(source) or {}
+    settings.update({k: v for k, v in source_config.items() if k in DEFAULT_SOURCE_SETTINGS})
+    return settings
+
+
+def get_rate_limiter(source: str) -> TokenBucket:
+    """
+    获取数据源共享的限流器，同一进程内的所有数据提供器共用
+
+    Args:
+        source: 数据源名称
+
+    Returns:
+        TokenBucket实例
+    """
+    with _limiters_lock:
+        if source not in _limiters:
+            settings = get_source_settings(source)
+            _limiters[source] = TokenBucket(settings['rate_limit'], settings['burst'])
+        return _limiters[source]
@@ -0,0 +1,335 @@
+"""
+交易日历与证券主表模块
+本地保存交易日历、股票上市/退市日期、停牌与ST标记，用于裁剪或跳过不可能有数据的请求区间，
+并作为回测引擎的统一时间轴
+"""
+
+import pandas as pd
+import numpy as np
+import os
+import threading
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple, Union
+import logging
+
+logger = logging.getLogger(__name__)
+
+# 证券主表字段
+SECURITY_COLUMNS = ['name', 'list_date', 'delist_date', 'is_st']
+
+
+def _to_days(dates: Iterable) -> np.ndarray:
+    """转换为升序去重的 datetime64[D] 数组"""
+    index = pd.to_datetime(pd.Index(list(dates) if not isinstance(dates, (np.ndarray, pd.Index, pd.Series))
+                                    else dates))
+    return np.unique(index.values.astype('datetime64[D]'))
+
+
+class TradingCalendar:
+    """交易日历"""
+
+    def __init__(self, dates: Iterable = ()):
+        """
+        Args:
+            dates: 交易日列表
+        """
+        self.days = _to_days(dates)
+
+    def __len__(self) -> int:
+        return len(self.days)
+
+    @property
+    def first(self) -> Optional[pd.Timestamp]:
+        """日历覆盖的第一个交易日"""
+        return pd.Timestamp(self.days[0]) if len(self.days) else None
+
+    @property
+    def last(self) -> Optional[pd.Timestamp]:
+        """日历覆盖的最后一个交易日"""
+        return pd.Timestamp(self.days[-1]) if len(self.days) else None
+
+    def _bounds(self, start, end) -> Tuple[int, int]:
+        lo = 0 if start is None else np.searchsorted(self.days, np.datetime64(pd.Timestamp(start).date()), 'left')
+        hi = len(self.days) if end is None else np.searchsorted(
+            self.days, np.datetime64(pd.Timestamp(end).date()), 'right')
+        return int(lo), int(hi)
+
+    def sessions(self, start_date: Optional[str] = None, end_date: Optional[str] = None) -> pd.DatetimeIndex:
+        """
+        区间内的交易日
+
+        Args:
+            start_date: 开始日期，为None时从日历第一天开始
+            end_date: 结束日期，为None时到日历最后一天
+
+        Returns:
+            交易日索引
+        """
+        lo, hi = self._bounds(start_date, end_date)
+        return pd.DatetimeIndex(self.days[lo:hi].astype('datetime64[ns]'), name='date')
+
+    def count(self, start_date: Optional[str] = None, end_date: Optional[str] = None) -> int:
+        """区间内的交易日数"""
+        lo, hi = self._bounds(start_date, end_date)
+        return max(0, hi - lo)
+
+    def is_session(self, date: Union[str, pd.Timestamp]) -> bool:
+        """是否为交易日"""
+        lo, hi = self._bounds(date, date)
+        return hi > lo
+
+    def merge(self, dates: Iterable) -> 'TradingCalendar':
+        """合并新的交易日，返回新日历"""
+        return TradingCalendar(np.concatenate([self.days, _to_days(dates)]))
+
+
+class ReferenceData:
+    """
+    本地参考数据：交易日历、证券主表（上市/退市日期、当前是否ST）、停牌与ST日期
+
+    保存在 {目录}/calendar.parquet、securities.parquet、status.parquet，
+    status 只记录停牌或ST的交易日。
+    """
+
+    def __init__(self, reference_dir: Union[str, Path]):
+        """
+        Args:
+            reference_dir: 参考数据目录，文件不存在时各部分为空，不做任何裁剪
+        """
+        self.reference_dir = Path(reference_dir)
+        self._lock = threading.Lock()
+        self.calendar = TradingCalendar()
+        self.securities = pd.DataFrame(columns=SECURITY_COLUMNS, index=pd.Index([], name='symbol'))
+        self.status = pd.DataFrame({'symbol': pd.Series(dtype=str), 'date': pd.Series(dtype='datetime64[ns]'),
+                                    'suspended': pd.Series(dtype=bool), 'is_st': pd.Series(dtype=bool)})
+        self._suspended: Dict[str, np.ndarray] = {}
+        self._pending_status: List[pd.DataFrame] = []
+        self.reload()
+
+    @property
+    def is_empty(self) -> bool:
+        """是否没有任何参考数据"""
+        return len(self.calendar) == 0 and self.securities.empty and self.status.empty
+
+    def _path(self, name: str) -> Path:
+        return self.reference_dir / f"{name}.parquet"
+
+    def reload(self):
+        """从本地文件重新读取"""
+        with self._lock:
+            try:
+                if self._path("calendar").exists():
+                    self.calendar = TradingCalendar(pd.read_parquet(self._path("calendar"))['date'])
+                if self._path("securities").exists():
+                    self.securities = pd.read_parquet(self._path("securities"))
+                if self._path("status").exists():
+                    self.status = pd.read_parquet(self._path("status"))
+            except Exception as e:
+                logger.warning(f"读取参考数据失败: {e}")
+            self._index_status()
+
+    def _index_status(self):
+        """按股票建立停牌日期索引"""
+        suspended = self.status[self.status['suspended']]
+        self._suspended = {
+            symbol: np.unique(group['date'].values.astype('datetime64[D]'))
+            for symbol, group in suspended.groupby('symbol', observed=True)
+        }
+
+    def _save(self, name: str, df: pd.DataFrame):
+        self.reference_dir.mkdir(parents=True, exist_ok=True)
+        path = self._path(name)
+        tmp_path = path.with_suffix('.tmp')
+        df.to_parquet(tmp_path)
+        os.replace(tmp_path, path)
+
+    def update_calendar(self, dates: Iterable):
+        """
+        合并并保存交易日
+
+        Args:
+            dates: 交易日列表
+        """
+        with self._lock:
+            self.calendar = self.calendar.merge(dates)
+            self._save("calendar", pd.DataFrame({'date': self.calendar.days.astype('datetime64[ns]')}))
+
+    def update_securities(self, securities: pd.DataFrame):
+        """
+        合并并保存证券主表
+
+        Args:
+            securities: 以股票代码为索引，列为 SECURITY_COLUMNS 的DataFrame，缺失列填充空值
+        """
+        securities = securities.reindex(columns=SECURITY_COLUMNS)
+        securities['list_date'] = pd.to_datetime(securities['list_date'], errors='coerce')
+        securities['delist_date'] = pd.to_datetime(securities['delist_date'], errors='coerce')
+        securities['is_st'] = securities['is_st'].fillna(False).astype(bool)
+        securities.index.name = 'symbol'
+        with self._lock:
+            merged = pd.concat([self.securities, securities]) if not self.securities.empty else securities
+            self.securities = merged[~merged.index.duplicated(keep='last')].sort_index()
+            self._save("securities", self.securities)
+
+    def update_status(self, status: pd.DataFrame):
+        """
+        合并并保存停牌与ST日期
+
+        Args:
+            status: 列为 symbol、date、suspended、is_st 的DataFrame，正常交易的行会被丢弃
+        """
+        self.buffer_status(status)
+        self.flush_status()
+
+    def buffer_status(self, status: pd.DataFrame):
+        """
+        暂存停牌与ST日期，调用 flush_status 时再合并保存
+
+        逐只股票获取日线时使用，避免每次请求都重写整个 status 文件；
+        flush_status 之前暂存的日期不参与请求裁剪。
+
+        Args:
+            status: 列为 symbol、date、suspended、is_st 的DataFrame，正常交易的行会被丢弃
+        """
+        status = status.assign(date=pd.to_datetime(status['date']),
+                               suspended=status['suspended'].astype(bool),
+                               is_st=status['is_st'].astype(bool))
+        status = status.loc[status['suspended'] | status['is_st'], ['symbol', 'date', 'suspended', 'is_st']]
+        if status.empty:
+            return
+        with self._lock:
+            self._pending_status.append(status)
+
+    def flush_status(self):
+        """合并暂存的停牌与ST日期并保存，没有暂存数据时不写文件"""
+        with self._lock:
+            if not self._pending_status:
+                return
+            pending, self._pending_status = self._pending_status, []
+            frames = [self.status] if not self.status.empty else []
+            merged = pd.concat(frames + pending, ignore_index=True)
+            merged = merged.drop_duplicates(['symbol', 'date'], keep='last')
+            self.status = merged.sort_values(['symbol', 'date'], ignore_index=True)
+            self._save("status", self.status)
+            self._index_status()
+
+    def listing_range(self, symbol: str) -> Tuple[Optional[pd.Timestamp], Optional[pd.Timestamp]]:
+        """股票的 (上市日期, 退市日期)，未知时为None"""
+        if symbol not in self.securities.index:
+            return None, None
+        row = self.securities.loc[symbol]
+        list_date = row['list_date'] if pd.notna(row['list_date']) else None
+        delist_date = row['delist_date'] if pd.notna(row['delist_date']) else None
+        return list_date, delist_date
+
+    def is_suspended(self, symbol: str, date: Union[str, pd.Timestamp]) -> bool:
+        """指定交易日是否停牌"""
+        days = self._suspended.get(symbol)
+        if days is None:
+            return False
+        day = np.datetime64(pd.Timestamp(date).date())
+        pos = np.searchsorted(days, day)
+        return pos < len(days) and days[pos] == day
+
+    def st_dates(self, symbol: str) -> pd.DatetimeIndex:
+        """股票被标记为ST的交易日"""
+        rows = self.status[(self.status['symbol'] == symbol) & self.status['is_st']]
+        return pd.DatetimeIndex(rows['date'], name='date')
+
+    def trading_sessions(self, symbol: str, start_date: str, end_date: str) -> pd.DatetimeIndex:
+        """
+        股票在区间内实际交易的日期：上市期间的交易日，剔除停牌日
+
+        Args:
+            symbol: 股票代码
+            start_date: 开始日期
+            end_date: 结束日期
+
+        Returns:
+            交易日索引，日历为空时返回空索引
+        """
+        list_date, delist_date = self.listing_range(symbol)
+        start = max(pd.Timestamp(start_date), list_date) if list_date is not None else pd.Timestamp(start_date)
+        end = min(pd.Timestamp(end_date), delist_date) if delist_date is not None else pd.Timestamp(end_date)
+        if start > end:
+            return pd.DatetimeIndex([], name='date')
+        sessions = self.calendar.sessions(start, end)
+        suspended = self._suspended.get(symbol)
+        if suspended is not None and len(sessions):
+            sessions = sessions[~np.isin(sessions.values.astype('datetime64[D]'), suspended)]
+        return sessions
+
+    def clip_range(self, symbol: str, start_date: str, end_date: str) -> Optional[Tuple[str, str]]:
+        """
+        将请求区间裁剪到股票可能有数据的部分
+
+        先裁剪到上市至退市期间；日历已覆盖的部分再裁剪到首尾实际交易日（剔除节假日与停牌）。
+        日历未覆盖的部分保留，不做判断。
+
+        Args:
+            symbol: 股票代码
+            start_date: 开始日期
+            end_date: 结束日期
+
+        Returns:
+            裁剪后的 (开始日期, 结束日期)，格式 "YYYY-MM-DD"；区间内不可能有数据时返回None
+        """
+        list_date, delist_date = self.listing_range(symbol)
+        start, end = pd.Timestamp(start_date), pd.Timestamp(end_date)
+        if list_date is not None:
+            start = max(start, list_date)
+        if delist_date is not None:
+            end = min(end, delist_date)
+        if start > end:
+            return None
+
+        first, last = self.calendar.first, self.calendar.last
+        if first is not None and first <= start <= last:
+            sessions = self.trading_sessions(symbol, start, min(end, last))
+            if len(sessions):
+                start = sessions[0]
+                if end <= last:
+                    end = sessions[-1]
+            elif end <= last:
+                return None
+            else:
+                start = last + pd.Timedelta(days=1)
+        elif first is not None and start < first <= end <= last:
+            sessions = self.trading_sessions(symbol, first, end)
+            if len(sessions):
+                end = sessions[-1]
+
+        return start.strftime('%Y-%m-%d'), end.strftime('%Y-%m-%d')
+
+
+_references: Dict[Path, ReferenceData] = {}
+_references_lock = threading.Lock()
+
+
+def get_reference_data(reference_dir: Union[str, Path]) -> ReferenceData:
+    """
+    获取目录对应的参考数据，同一目录在进程内共享一个实例
+
+    Args:
+        reference_dir: 参考数据目录
+
+    Returns:
+        ReferenceData实例
+    """
+    key = Path(reference_dir).resolve()
+    with _references_lock:
+        if key not in _references:
+            _references[key] = ReferenceData(key)
+        return _references[key]
+
+
+if __name__ == "__main__":
+    # 测试代码
+    logging.basicConfig(level=logging.INFO)
+    from src.data.data_provider import DataProvider
+
+    provider = DataProvider("baostock")
+    provider.update_reference_data("2024-01-01", "2024-12-31")
+    reference = provider.store.reference
+    print(f"交易日: {len(reference.calendar)}，股票: {len(reference.securities)}")
+    print(reference.clip_range("000001.SZ", "2024-01-01", "2024-01-07"))
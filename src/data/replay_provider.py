@@ -0,0 +1,504 @@
+"""
+录制/回放数据提供器模块
+录制模式下把上游真实响应（AkShare/Tushare 返回的DataFrame、Baostock 结果行、东方财富/新浪的HTTP响应）
+保存到磁盘；回放模式下不访问网络，按可配置的延迟与错误率从磁盘返回录制的响应，
+用于在无网络的机器上确定性地测试批量获取、并发请求与缓存的性能。
+"""
+
+import pandas as pd
+import asyncio
+import hashlib
+import json
+import os
+import random
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple, Union
+from urllib.parse import urlparse
+import logging
+
+import requests
+
+from src.data.data_provider import DataProvider
+from src.data.free_data_provider import FreeDataProvider
+from src.data.local_store import LocalDataStore
+from src.utils.config import load_data_sources_config
+
+logger = logging.getLogger(__name__)
+
+# 未在配置文件 replay 段指定时使用的默认值
+DEFAULT_REPLAY_SETTINGS = {
+    'fixture_dir': './data/fixtures',
+    'latency': 0.0,      # 每次回放的固定延迟（秒）
+    'jitter': 0.0,       # 在固定延迟上叠加的均匀随机延迟上限（秒）
+    'error_rate': 0.0,   # 回放时抛出连接错误的概率
+    'seed': None,        # 随机数种子，指定后延迟与错误序列可复现
+}
+
+# 各数据源需要录制/回放的上游客户端属性
+UPSTREAM_CLIENTS = {
+    'tushare': 'pro',
+    'akshare': 'ak',
+    'baostock': 'bs',
+    'eastmoney': 'session',
+    'sina': 'session',
+}
+
+# Baostock 会话管理调用，不录制，回放时直接返回成功
+_SESSION_CALLS = ('login', 'logout')
+
+
+class FixtureStore:
+    """录制响应的磁盘存储，路径为 {fixture_dir}/{数据源}/{调用名}/{参数哈希}.{parquet|json}"""
+
+    def __init__(self, fixture_dir: Union[str, Path]):
+        """
+        Args:
+            fixture_dir: 录制文件根目录
+        """
+        self.fixture_dir = Path(fixture_dir)
+
+    @staticmethod
+    def make_key(name: str, args: Tuple, kwargs: Dict) -> str:
+        """由调用名与参数生成稳定的哈希键"""
+        text = json.dumps([name, list(args), sorted(kwargs.items())], default=str, ensure_ascii=False)
+        return hashlib.sha1(text.encode('utf-8')).hexdigest()[:16]
+
+    @staticmethod
+    def _safe_name(name: str) -> str:
+        return name.strip('/').replace('/', '_') or 'root'
+
+    def _base(self, source: str, name: str, key: str) -> Path:
+        return self.fixture_dir / source / self._safe_name(name) / key
+
+    def save(self, source: str, name: str, key: str, payload: Any, description: str = ""):
+        """
+        保存一次调用的响应
+
+        Args:
+            source: 数据源
+            name: 调用名（函数名或URL路径）
+            key: 参数哈希键
+            payload: DataFrame，或可JSON序列化的对象
+            description: 记录在文件中的调用说明，便于人工查看
+        """
+        base = self._base(source, name, key)
+        base.parent.mkdir(parents=True, exist_ok=True)
+        if isinstance(payload, pd.DataFrame):
+            path, tmp_path = base.with_suffix('.parquet'), base.with_suffix('.parquet.tmp')
+            payload.to_parquet(tmp_path)
+        else:
+            path, tmp_path = base.with_suffix('.json'), base.with_suffix('.json.tmp')
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump({'call': description, 'payload': payload}, f, ensure_ascii=False, default=str)
+        os.replace(tmp_path, path)
+
+    def load(self, source: str, name: str, key: str, description: str = "") -> Any:
+        """
+        读取录制的响应
+
+        Returns:
+            录制的DataFrame或JSON对象，没有录制时抛出 FileNotFoundError
+        """
+        base = self._base(source, name, key)
+        parquet_path = base.with_suffix('.parquet')
+        if parquet_path.exists():
+            return pd.read_parquet(parquet_path)
+        json_path = base.with_suffix('.json')
+        if json_path.exists():
+            with open(json_path, 'r', encoding='utf-8') as f:
+                return json.load(f)['payload']
+        raise FileNotFoundError(f"没有录制的响应: {source} {description or name}")
+
+
+class FaultInjector:
+    """按配置的延迟与错误率模拟上游（线程安全）"""
+
+    def __init__(self, latency: float = 0.0, jitter: float = 0.0, error_rate: float = 0.0,
+                 seed: Optional[int] = None):
+        if not 0 <= error_rate <= 1:
+            raise ValueError(f"错误率必须在0到1之间: {error_rate}")
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+
+    def draw(self) -> Tuple[float, bool]:
+        """抽取一次请求的 (延迟秒数, 是否失败)"""
+        with self._lock:
+            delay = self.latency + (self._rng.uniform(0, self.jitter) if self.jitter > 0 else 0.0)
+            failed = self.error_rate > 0 and self._rng.random() < self.error_rate
+        return delay, failed
+
+    def apply(self, description: str):
+        """同步等待延迟，按错误率抛出 ConnectionError"""
+        delay, failed = self.draw()
+        if delay > 0:
+            time.sleep(delay)
+        if failed:
+            raise ConnectionError(f"模拟上游错误: {description}")
+
+    async def apply_async(self, description: str):
+        """异步等待延迟，按错误率抛出 ConnectionError"""
+        delay, failed = self.draw()
+        if delay > 0:
+            await asyncio.sleep(delay)
+        if failed:
+            raise ConnectionError(f"模拟上游错误: {description}")
+
+
+class ReplayResultSet:
+    """与 Baostock ResultSet 接口一致的录制结果"""
+
+    def __init__(self, fields: List[str], rows: List[List[str]], error_code: str = '0', error_msg: str = 'success'):
+        self.fields = fields
+        self.rows = rows
+        self.error_code = error_code
+        self.error_msg = error_msg
+        self._pos = -1
+
+    def next(self) -> bool:
+        self._pos += 1
+        return self._pos < len(self.rows)
+
+    def get_row_data(self) -> List[str]:
+        return self.rows[self._pos]
+
+
+class ReplayResponse:
+    """与 requests.Response 常用接口一致的录制响应"""
+
+    def __init__(self, status_code: int, text: str, url: str = ""):
+        self.status_code = status_code
+        self.text = text
+        self.url = url
+
+    def json(self) -> Any:
+        return json.loads(self.text)
+
+    def raise_for_status(self):
+        if self.status_code >= 400:
+            raise requests.HTTPError(f"{self.status_code} Error for url: {self.url}", response=self)
+
+
+def _materialize(result: Any) -> Tuple[Any, Any]:
+    """
+    将上游返回值转换为可保存的形式
+
+    Returns:
+        (保存到磁盘的内容, 返回给调用方的对象)
+    """
+    if isinstance(result, pd.DataFrame):
+        return result, result
+    if hasattr(result, 'get_row_data') and hasattr(result, 'next'):
+        rows = []
+        while (result.error_code == '0') & result.next():
+            rows.append(result.get_row_data())
+        payload = {'fields': list(result.fields or []), 'rows': rows,
+                   'error_code': result.error_code, 'error_msg': getattr(result, 'error_msg', '')}
+        return payload, ReplayResultSet(payload['fields'], rows, payload['error_code'], payload['error_msg'])
+    return result, result
+
+
+def _restore(payload: Any) -> Any:
+    """将磁盘内容还原为上游返回值的形式"""
+    if isinstance(payload, dict) and 'fields' in payload and 'rows' in payload:
+        return ReplayResultSet(payload['fields'], payload['rows'], payload.get('error_code', '0'),
+                               payload.get('error_msg', ''))
+    return payload
+
+
+class _RecordingClient:
+    """包装上游客户端（模块或对象），调用后保存返回值"""
+
+    def __init__(self, target: Any, fixtures: FixtureStore, source: str):
+        self._target = target
+        self._fixtures = fixtures
+        self._source = source
+
+    def __getattr__(self, name: str):
+        attr = getattr(self._target, name)
+        if not callable(attr) or name in _SESSION_CALLS:
+            return attr
+
+        def call(*args, **kwargs):
+            payload, result = _materialize(attr(*args, **kwargs))
+            key = self._fixtures.make_key(name, args, kwargs)
+            self._fixtures.save(self._source, name, key, payload, f"{name}{args}{kwargs}")
+            return result
+
+        return call
+
+
+class _ReplayClient:
+    """按调用名与参数返回录制结果的上游客户端"""
+
+    def __init__(self, fixtures: FixtureStore, source: str, injector: FaultInjector):
+        self._fixtures = fixtures
+        self._source = source
+        self._injector = injector
+
+    def __getattr__(self, name: str):
+        if name.startswith('__'):
+            raise AttributeError(name)
+        if name in _SESSION_CALLS:
+            return lambda *args, **kwargs: ReplayResultSet([], [])
+
+        def call(*args, **kwargs):
+            description = f"{name}{args}{kwargs}"
+            self._injector.apply(description)
+            key = self._fixtures.make_key(name, args, kwargs)
+            return _restore(self._fixtures.load(self._source, name, key, description))
+
+        return call
+
+
+def _http_key(url: str, params: Optional[Dict]) -> Tuple[str, str]:
+    """HTTP请求的 (调用名, 参数哈希键)，只取URL路径，录制与回放的主机可以不同"""
+    path = urlparse(url).path or '/'
+    params = {k: str(v) for k, v in (params or {}).items()}
+    return path, FixtureStore.make_key(path, (), params)
+
+
+class _RecordingSession:
+    """包装 requests.Session，保存每个GET请求的状态码与响应文本"""
+
+    def __init__(self, session: requests.Session, fixtures: FixtureStore, source: str):
+        self._session = session
+        self._fixtures = fixtures
+        self._source = source
+
+    def get(self, url: str, params: Optional[Dict] = None, **kwargs):
+        response = self._session.get(url, params=params, **kwargs)
+        name, key = _http_key(url, params)
+        self._fixtures.save(self._source, name, key, {'status': response.status_code, 'text': response.text},
+                            f"GET {url} {params}")
+        return response
+
+    def __getattr__(self, name: str):
+        return getattr(self._session, name)
+
+
+class _ReplaySession:
+    """按URL路径与参数返回录制响应的HTTP会话"""
+
+    def __init__(self, fixtures: FixtureStore, source: str, injector: FaultInjector):
+        self._fixtures = fixtures
+        self._source = source
+        self._injector = injector
+        self.headers: Dict[str, str] = {}
+
+    def get(self, url: str, params: Optional[Dict] = None, **kwargs) -> ReplayResponse:
+        description = f"GET {url} {params}"
+        self._injector.apply(description)
+        name, key = _http_key(url, params)
+        record = self._fixtures.load(self._source, name, key, description)
+        return ReplayResponse(record['status'], record['text'], url)
+
+    def close(self):
+        pass
+
+
+class _RecordingAsyncFetcher:
+    """包装 AsyncHTTPFetcher，保存成功请求的JSON结果"""
+
+    def __init__(self, fetcher, fixtures: FixtureStore, source: str):
+        self._fetcher = fetcher
+        self._fixtures = fixtures
+        self._source = source
+
+    def run(self, request_list: List[Tuple[str, Dict]]) -> List[Any]:
+        payloads = self._fetcher.run(request_list)
+        for (url, params), payload in zip(request_list, payloads):
+            if payload is not None:
+                name, key = _http_key(url, params)
+                self._fixtures.save(self._source, name, key,
+                                    {'status': 200, 'text': json.dumps(payload, ensure_ascii=False)},
+                                    f"GET {url} {params}")
+        return payloads
+
+
+class _ReplayAsyncFetcher:
+    """以asyncio并发回放录制响应的批量请求器，失败的请求重试后仍失败时返回None"""
+
+    def __init__(self, fixtures: FixtureStore, source: str, injector: FaultInjector,
+                 concurrency: int = 50, retry_count: int = 3):
+        self._fixtures = fixtures
+        self._source = source
+        self._injector = injector
+        self.concurrency = concurrency
+        self.retry_count = retry_count
+
+    async def _fetch_one(self, semaphore: asyncio.Semaphore, url: str, params: Dict) -> Any:
+        description = f"GET {url} {params}"
+        name, key = _http_key(url, params)
+        async with semaphore:
+            for _ in range(self.retry_count + 1):
+                try:
+                    await self._injector.apply_async(description)
+                    record = self._fixtures.load(self._source, name, key, description)
+                    if record['status'] >= 400:
+                        return None
+                    return json.loads(record['text'])
+                except ConnectionError:
+                    continue
+                except FileNotFoundError as e:
+                    logger.error(str(e))
+                    return None
+        logger.error(f"请求失败 {url} {params}")
+        return None
+
+    async def fetch_all(self, request_list: List[Tuple[str, Dict]]) -> List[Any]:
+        semaphore = asyncio.Semaphore(self.concurrency)
+        return await asyncio.gather(*[self._fetch_one(semaphore, url, params) for url, params in request_list])
+
+    def run(self, request_list: List[Tuple[str, Dict]]) -> List[Any]:
+        return asyncio.run(self.fetch_all(request_list))
+
+
+def load_replay_settings(**overrides) -> Dict:
+    """读取配置 replay 段，非None的参数覆盖配置值"""
+    settings = dict(DEFAULT_REPLAY_SETTINGS)
+    settings.update(load_data_sources_config().get('replay') or {})
+    settings.update({k: v for k, v in overrides.items() if v is not None})
+    return settings
+
+
+class _ReplayMixin:
+    """录制/回放数据提供器的公共逻辑，替换数据提供器的上游客户端"""
+
+    def _setup_replay(self, mode: str, settings: Dict):
+        if mode not in ("record", "replay"):
+            raise ValueError(f"不支持的模式: {mode}，可选 record, replay")
+        self.mode = mode
+        self.fixtures = FixtureStore(settings['fixture_dir'])
+        self.injector = FaultInjector(float(settings['latency']), float(settings['jitter']),
+                                      float(settings['error_rate']), settings['seed'])
+
+    def _install_clients(self):
+        attr = UPSTREAM_CLIENTS.get(self.data_source)
+        if attr is None:
+            raise ValueError(f"录制/回放不支持该数据源: {self.data_source}")
+
+        if self.mode == "record":
+            target = getattr(self, attr)
+            if attr == 'session':
+                setattr(self, attr, _RecordingSession(target, self.fixtures, self.data_source))
+            else:
+                setattr(self, attr, _RecordingClient(target, self.fixtures, self.data_source))
+        elif attr == 'session':
+            setattr(self, attr, _ReplaySession(self.fixtures, self.data_source, self.injector))
+        else:
+            setattr(self, attr, _ReplayClient(self.fixtures, self.data_source, self.injector))
+        logger.info(f"{self.data_source} 数据源以{'录制' if self.mode == 'record' else '回放'}模式运行，"
+                    f"录制目录 {self.fixtures.fixture_dir}")
+
+
+class ReplayDataProvider(_ReplayMixin, DataProvider):
+    """录制/回放 Tushare、AkShare、Baostock 响应的数据提供器"""
+
+    def __init__(
+        self,
+        data_source: str = "akshare",
+        mode: str = "replay",
+        store: Optional[LocalDataStore] = None,
+        use_cache: bool = False,
+        **settings
+    ):
+        """
+        初始化数据提供器
+
+        Args:
+            data_source: 数据源类型，可选 "tushare", "akshare", "baostock"
+            mode: "record" 访问上游并保存响应，"replay" 只从录制文件返回
+            store: 本地存储
+            use_cache: 是否启用本地存储，默认关闭以便每次都经过上游（或回放）
+            **settings: 覆盖配置 replay 段的 fixture_dir、latency、jitter、error_rate、seed
+        """
+        self._setup_replay(mode, load_replay_settings(**settings))
+        super().__init__(data_source, store=store, use_cache=use_cache)
+
+    def _init_data_source(self):
+        if self.mode == "record":
+            super()._init_data_source()
+        elif self.data_source not in ("tushare", "akshare", "baostock"):
+            raise ValueError(f"不支持的数据源: {self.data_source}")
+        else:
+            setattr(self, UPSTREAM_CLIENTS[self.data_source], None)
+        self._install_clients()
+
+
+class ReplayFreeDataProvider(_ReplayMixin, FreeDataProvider):
+    """录制/回放东方财富、新浪财经、AkShare 响应的免费数据提供器"""
+
+    def __init__(
+        self,
+        data_source: str = "eastmoney",
+        mode: str = "replay",
+        store: Optional[LocalDataStore] = None,
+        use_cache: bool = False,
+        **settings
+    ):
+        """
+        初始化免费数据提供器
+
+        Args:
+            data_source: 数据源类型，可选 "eastmoney", "sina", "akshare"
+            mode: "record" 访问上游并保存响应，"replay" 只从录制文件返回
+            store: 本地存储
+            use_cache: 是否启用本地存储，默认关闭以便每次都经过上游（或回放）
+            **settings: 覆盖配置 replay 段的 fixture_dir、latency、jitter、error_rate、seed
+        """
+        self._setup_replay(mode, load_replay_settings(**settings))
+        super().__init__(data_source, store=store, use_cache=use_cache)
+
+    def _init_data_source(self):
+        if self.mode == "record":
+            super()._init_data_source()
+        elif self.data_source not in ("eastmoney", "sina", "akshare"):
+            raise ValueError(f"不支持的数据源: {self.data_source}")
+        else:
+            setattr(self, UPSTREAM_CLIENTS[self.data_source], None)
+        self._install_clients()
+
+    def _create_async_fetcher(self, concurrency: int, timeout: float):
+        if self.mode == "record":
+            return _RecordingAsyncFetcher(super()._create_async_fetcher(concurrency, timeout),
+                                          self.fixtures, self.data_source)
+        return _ReplayAsyncFetcher(self.fixtures, self.data_source, self.injector,
+                                   concurrency=concurrency, retry_count=self.retry_count)
+
+
+def create_replay_provider(data_source: str, mode: str = "replay", **settings):
+    """
+    创建录制/回放数据提供器
+
+    Args:
+        data_source: 数据源，"tushare"/"baostock" 使用 DataProvider，"eastmoney"/"sina"/"akshare" 使用 FreeDataProvider
+        mode: "record" 或 "replay"
+        **settings: 覆盖配置 replay 段的 fixture_dir、latency、jitter、error_rate、seed
+
+    Returns:
+        ReplayDataProvider 或 ReplayFreeDataProvider 实例
+    """
+    if data_source in ("tushare", "baostock"):
+        return ReplayDataProvider(data_source, mode, **settings)
+    return ReplayFreeDataProvider(data_source, mode, **settings)
+
+
+if __name__ == "__main__":
+    # 测试代码：先录制再回放
+    import sys
+    logging.basicConfig(level=logging.INFO)
+
+    symbols = ["000001.SZ", "600519.SH", "000858.SZ"]
+    if len(sys.argv) > 1 and sys.argv[1] == "record":
+        provider = create_replay_provider("eastmoney", "record")
+        provider.get_multiple_stocks(symbols, "2024-01-01", "2024-06-30")
+    else:
+        provider = create_replay_provider("eastmoney", "replay", latency=0.05, error_rate=0.05, seed=42)
+        started = time.perf_counter()
+        data = provider.get_multiple_stocks(symbols, "2024-01-01", "2024-06-30", max_workers=4)
+        print(f"回放 {len(data)} 只股票，耗时 {time.perf_counter() - started:.2f}s")
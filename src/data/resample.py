@@ -0,0 +1,290 @@
+"""
+周线/月线重采样模块
+由本地日线按周期向量化聚合生成周线、月线，结果按 (股票代码, 复权类型, 周期) 缓存，
+本地存储写入新日线时只截掉受影响的最后几个周期，下次读取时增量补算。
+"""
+
+import pandas as pd
+import numpy as np
+import threading
+from collections import OrderedDict
+from typing import Callable, Dict, Optional, Tuple, Union
+import logging
+
+from src.data.local_store import LocalDataStore
+
+logger = logging.getLogger(__name__)
+
+# 周期名称 -> 周期代码，D 日线，W 周线（周一至周日），M 月线
+FREQUENCY_ALIASES: Dict[str, str] = {
+    'D': 'D', 'daily': 'D', '日线': 'D',
+    'W': 'W', 'weekly': 'W', '周线': 'W',
+    'M': 'M', 'monthly': 'M', '月线': 'M',
+}
+
+# 聚合方式：开盘取第一根，收盘取最后一根，最高/最低取极值，成交量/额求和，其余字段取最后一根
+_FIRST_COLUMNS = ('open', 'symbol')
+_SUM_COLUMNS = ('volume', 'amount', 'turnover')
+
+DailyLoader = Callable[[str, str], pd.DataFrame]
+
+
+def normalize_frequency(frequency: str) -> str:
+    """
+    规范化周期名称
+
+    Args:
+        frequency: 周期，如 "W"、"weekly"、"周线"
+
+    Returns:
+        周期代码 "D"、"W" 或 "M"
+    """
+    code = FREQUENCY_ALIASES.get(frequency)
+    if code is None:
+        raise ValueError(f"不支持的数据频率: {frequency}")
+    return code
+
+
+def _period_keys(days: np.ndarray, frequency: str) -> np.ndarray:
+    """日期(datetime64[D])所属周期的编号"""
+    if frequency == 'W':
+        # 1970-01-01 为周四，加3后以周一为一周的开始
+        return (days.astype(np.int64) + 3) // 7
+    return days.astype('datetime64[M]').astype(np.int64)
+
+
+def period_start(date: Union[str, pd.Timestamp], frequency: str) -> pd.Timestamp:
+    """
+    日期所属周期的第一天
+
+    Args:
+        date: 日期
+        frequency: 周期代码
+
+    Returns:
+        周线为当周周一，月线为当月1日，日线为当天
+    """
+    date = pd.Timestamp(date).normalize()
+    if frequency == 'W':
+        return date - pd.Timedelta(days=date.weekday())
+    if frequency == 'M':
+        return date.replace(day=1)
+    return date
+
+
+def resample_bars(df: pd.DataFrame, frequency: str) -> pd.DataFrame:
+    """
+    将日线聚合为周线或月线
+
+    每个周期的K线以该周期最后一个交易日为索引，字段类型与日线一致；
+    有 pct_change 时按日涨跌幅连乘得到周期涨跌幅。
+
+    Args:
+        df: 以日期为索引的日线
+        frequency: 周期，如 "W"、"M"、"周线"
+
+    Returns:
+        以日期为索引的周期K线
+    """
+    frequency = normalize_frequency(frequency)
+    if frequency == 'D' or df is None or df.empty:
+        return df
+
+    if not df.index.is_monotonic_increasing:
+        df = df.sort_index()
+    keys = _period_keys(df.index.values.astype('datetime64[D]'), frequency)
+    starts = np.flatnonzero(np.r_[True, keys[1:] != keys[:-1]])
+    ends = np.r_[starts[1:], len(df)] - 1
+
+    columns = {}
+    for col in df.columns:
+        series = df[col]
+        if col in _FIRST_COLUMNS:
+            columns[col] = series.iloc[starts].to_numpy()
+            continue
+        if col in ('high', 'low', 'pct_change') or col in _SUM_COLUMNS:
+            values = series.to_numpy()
+            if col == 'high':
+                columns[col] = np.fmax.reduceat(values, starts)
+            elif col == 'low':
+                columns[col] = np.fmin.reduceat(values, starts)
+            elif col == 'pct_change':
+                growth = np.multiply.reduceat(1 + np.nan_to_num(values.astype(np.float64)) / 100, starts)
+                columns[col] = ((growth - 1) * 100).astype(values.dtype)
+            else:
+                if values.dtype.kind == 'f':
+                    values = np.nan_to_num(values)
+                columns[col] = np.add.reduceat(values, starts).astype(values.dtype)
+            continue
+        columns[col] = series.iloc[ends].to_numpy()
+
+    result = pd.DataFrame(columns, index=df.index[ends])
+    if 'symbol' in result.columns:
+        result['symbol'] = result['symbol'].astype(df['symbol'].dtype)
+    return result
+
+
+class _Entry:
+    """缓存条目：由日线区间 [start, end] 聚合得到的周期K线"""
+
+    __slots__ = ('start', 'end', 'bars')
+
+    def __init__(self, start: pd.Timestamp, end: pd.Timestamp, bars: pd.DataFrame):
+        self.start = start
+        self.end = end
+        self.bars = bars
+
+
+class ResampleCache:
+    """周线/月线缓存，注册为本地存储的数据变更回调以增量失效"""
+
+    def __init__(self, store: Optional[LocalDataStore] = None, max_entries: int = 4096):
+        """
+        初始化缓存
+
+        Args:
+            store: 日线所在的本地存储，写入新日线时截断受影响的缓存
+            max_entries: 最多缓存的 (股票, 复权类型, 周期) 数，超出时淘汰最久未使用的
+        """
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[Tuple[str, str, str], _Entry]" = OrderedDict()
+        self._lock = threading.Lock()
+        if store is not None:
+            store.add_write_listener(self.invalidate)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def invalidate(
+        self,
+        symbol: Optional[str] = None,
+        adjust: Optional[str] = None,
+        since: Optional[pd.Timestamp] = None
+    ):
+        """
+        使缓存失效
+
+        不复权日线变更时前/后复权缓存一并失效（前/后复权可能由不复权日线与复权因子计算得到）。
+
+        Args:
+            symbol: 股票代码，为None时处理全部股票
+            adjust: 复权类型，为None时处理全部复权类型
+            since: 最早变更的日期，只截掉该日期所在周期及之后的K线；为None时整条删除
+        """
+        with self._lock:
+            for key in list(self._entries):
+                key_symbol, key_adjust, frequency = key
+                if symbol is not None and key_symbol != symbol:
+                    continue
+                if adjust is not None and adjust != "None" and key_adjust != adjust:
+                    continue
+
+                entry = self._entries[key]
+                cut = period_start(since, frequency) if since is not None else None
+                if cut is None or cut <= entry.start:
+                    del self._entries[key]
+                elif cut <= entry.end:
+                    entry.bars = entry.bars[entry.bars.index < cut]
+                    entry.end = cut - pd.Timedelta(days=1)
+
+    def clear(self):
+        """清空缓存"""
+        with self._lock:
+            self._entries.clear()
+
+    def _put(self, key: Tuple[str, str, str], entry: _Entry):
+        self._entries[key] = entry
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def get(
+        self,
+        symbol: str,
+        start_date: str,
+        end_date: str,
+        adjust: str,
+        frequency: str,
+        load_daily: DailyLoader
+    ) -> pd.DataFrame:
+        """
+        获取周线或月线
+
+        开始日期向前对齐到周期第一天，保证第一根K线完整；缓存未覆盖的部分
+        只对缺少的日线区间调用 load_daily 并聚合。
+
+        Args:
+            symbol: 股票代码
+            start_date: 开始日期
+            end_date: 结束日期
+            adjust: 复权类型
+            frequency: 周期，如 "W"、"M"、"周线"
+            load_daily: 读取日线的函数，参数为 (开始日期, 结束日期)
+
+        Returns:
+            以周期最后一个交易日为索引的K线，最后一根只包含到 end_date 为止的日线
+        """
+        frequency = normalize_frequency(frequency)
+        if frequency == 'D':
+            return load_daily(start_date, end_date)
+
+        start = period_start(start_date, frequency)
+        end = pd.Timestamp(end_date).normalize()
+        key = (symbol, adjust or "None", frequency)
+
+        bars = None
+        # 读取日线时可能补齐数据并触发失效，条目被截断到本次读取区间之前时重试
+        for _ in range(3):
+            with self._lock:
+                entry = self._entries.get(key)
+                if entry is not None:
+                    self._entries.move_to_end(key)
+                    if entry.start <= start and entry.end >= end:
+                        bars = entry.bars
+                        break
+                    base = entry if start >= entry.start else None
+                    load_to = max(end, entry.end) if base is None else end
+                else:
+                    base, load_to = None, end
+            load_from = period_start(base.end, frequency) if base is not None else start
+
+            new_bars = resample_bars(load_daily(load_from.strftime('%Y-%m-%d'), load_to.strftime('%Y-%m-%d')),
+                                     frequency)
+            with self._lock:
+                if base is not None:
+                    current = self._entries.get(key)
+                    if current is None or current.end < load_from - pd.Timedelta(days=1):
+                        continue
+                    kept = current.bars[current.bars.index < load_from]
+                    merged = pd.concat([kept, new_bars]) if not kept.empty else new_bars
+                    entry = _Entry(current.start, load_to, merged)
+                else:
+                    entry = _Entry(load_from, load_to, new_bars)
+                self._put(key, entry)
+                bars = entry.bars
+            break
+
+        if bars is None:
+            logger.warning(f"{symbol} 周期K线缓存多次失效，直接计算")
+            return resample_bars(load_daily(start.strftime('%Y-%m-%d'), end_date), frequency)
+
+        result = bars[(bars.index >= start) & (bars.index <= end)]
+        later = bars[bars.index > end]
+        if not later.empty and period_start(later.index[0], frequency) <= end:
+            # end_date 落在周期中间，该周期只聚合到 end_date 为止
+            partial = resample_bars(load_daily(period_start(end, frequency).strftime('%Y-%m-%d'),
+                                               end.strftime('%Y-%m-%d')), frequency)
+            result = pd.concat([result, partial]) if not result.empty else partial
+        return result
+
+
+if __name__ == "__main__":
+    # 测试代码
+    logging.basicConfig(level=logging.INFO)
+    from src.data.data_provider import DataProvider
+
+    provider = DataProvider("akshare")
+    weekly = provider.get_bars("000001.SZ", "2024-01-01", "2024-06-30", frequency="W")
+    monthly = provider.get_bars("000001.SZ", "2024-01-01", "2024-06-30", frequency="M")
+    print(weekly.tail())
+    print(monthly)
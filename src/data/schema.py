@@ -0,0 +1,154 @@
+"""
+日线数据统一格式模块
+所有数据提供器的日线数据都经过 normalize_daily 转换为同一组字段与紧凑的数据类型
+"""
+
+import pandas as pd
+import numpy as np
+from typing import Dict, List, Optional
+import logging
+
+logger = logging.getLogger(__name__)
+
+# 统一字段及数据类型：价格与比率用float32，成交量用int64，成交额数值较大保留float64
+DAILY_SCHEMA: Dict[str, str] = {
+    'open': 'float32',
+    'high': 'float32',
+    'low': 'float32',
+    'close': 'float32',
+    'pre_close': 'float32',
+    'change': 'float32',
+    'pct_change': 'float32',
+    'amplitude': 'float32',
+    'turnover': 'float32',
+    'volume': 'int64',
+    'amount': 'float64',
+}
+
+# 所有数据源都必须提供的字段，缺失时填充NaN（成交量填0）
+REQUIRED_COLUMNS: List[str] = ['open', 'high', 'low', 'close', 'volume', 'amount']
+
+# 各数据源原始单位换算为统一单位（成交量：股，成交额：元）的倍数，未列出的数据源与字段不换算。
+# Tushare 成交量为手、成交额为千元；AkShare(stock_zh_a_hist) 与东方财富成交量为手；
+# Baostock、新浪财经、通达信与 Yahoo Finance 成交量为股
+SOURCE_UNIT_SCALE: Dict[str, Dict[str, float]] = {
+    'tushare': {'volume': 100.0, 'amount': 1000.0},
+    'akshare': {'volume': 100.0},
+    'eastmoney': {'volume': 100.0},
+}
+
+# normalize_daily 去重时出现重复的日期，以 "YYYY-MM-DD" 列表保存在 DataFrame.attrs 的此键下，写入本地存储时据此标记质量问题
+DUPLICATE_DATES_ATTR = 'duplicate_dates'
+
+# 各数据源原始列名到统一字段的映射
+COLUMN_ALIASES: Dict[str, str] = {
+    # Tushare
+    'trade_date': 'date',
+    'ts_code': 'symbol',
+    'pct_chg': 'pct_change',
+    'vol': 'volume',
+    # Baostock
+    'code': 'symbol',
+    'preclose': 'pre_close',
+    'pctChg': 'pct_change',
+    'turn': 'turnover',
+    # AkShare
+    '日期': 'date',
+    '开盘': 'open',
+    '收盘': 'close',
+    '最高': 'high',
+    '最低': 'low',
+    '成交量': 'volume',
+    '成交额': 'amount',
+    '振幅': 'amplitude',
+    '涨跌幅': 'pct_change',
+    '涨跌额': 'change',
+    '换手率': 'turnover',
+    # Yahoo Finance、新浪财经
+    'Date': 'date',
+    'day': 'date',
+    'Open': 'open',
+    'High': 'high',
+    'Low': 'low',
+    'Close': 'close',
+    'Volume': 'volume',
+}
+
+
+def symbol_column(symbol: str, length: int) -> pd.Categorical:
+    """创建只有一个类别的股票代码分类列"""
+    return pd.Categorical.from_codes(np.zeros(length, dtype=np.int8), categories=[symbol])
+
+
+def empty_daily_frame() -> pd.DataFrame:
+    """创建符合统一格式的空日线DataFrame"""
+    df = pd.DataFrame({
+        col: pd.Series(dtype=DAILY_SCHEMA[col]) for col in REQUIRED_COLUMNS
+    }, index=pd.DatetimeIndex([], name='date'))
+    df.insert(0, 'symbol', pd.Categorical([]))
+    return df
+
+
+def normalize_daily(
+    df: Optional[pd.DataFrame],
+    symbol: str,
+    date_format: Optional[str] = None,
+    source: Optional[str] = None
+) -> pd.DataFrame:
+    """
+    将数据源返回的日线数据转换为统一格式
+
+    统一格式为：名为 date 的 datetime64 索引（无时区、升序、无重复，重复日期保留最后一根，
+    出现重复的日期记录在 attrs[DUPLICATE_DATES_ATTR]），
+    分类类型的 symbol 列，以及 DAILY_SCHEMA 中的数值字段。
+    REQUIRED_COLUMNS 之外的字段只在数据源提供时保留，不在 DAILY_SCHEMA 中的列会被丢弃。
+    成交量统一为股、成交额统一为元，按 SOURCE_UNIT_SCALE 换算。
+
+    Args:
+        df: 数据源原始DataFrame，日期可以是索引或 date 列
+        symbol: 统一格式的股票代码，如 "000001.SZ"
+        date_format: 日期字符串格式，如 Tushare 的 "%Y%m%d"，默认自动识别
+        source: 数据源名称，用于换算成交量、成交额单位，为None时不换算
+
+    Returns:
+        统一格式的DataFrame，输入为空时返回 empty_daily_frame()
+    """
+    if df is None or df.empty:
+        return empty_daily_frame()
+
+    df = df.rename(columns=COLUMN_ALIASES)
+    if 'date' in df.columns:
+        df = df.set_index('date')
+
+    index = df.index
+    if not isinstance(index, pd.DatetimeIndex):
+        index = pd.DatetimeIndex(pd.to_datetime(index, format=date_format))
+    if index.tz is not None:
+        index = index.tz_localize(None)
+    index = index.astype('datetime64[ns]')
+
+    scale = SOURCE_UNIT_SCALE.get(source, {})
+    columns = {}
+    for col, dtype in DAILY_SCHEMA.items():
+        if col not in df.columns and col not in REQUIRED_COLUMNS:
+            continue
+        if col in df.columns:
+            values = pd.to_numeric(df[col], errors='coerce').to_numpy(dtype=np.float64, na_value=np.nan)
+            if col in scale:
+                values = values * scale[col]
+        else:
+            values = np.full(len(df), np.nan)
+        if dtype == 'int64':
+            values = np.nan_to_num(np.round(values), nan=0.0)
+        columns[col] = values.astype(dtype)
+
+    result = pd.DataFrame(columns, index=pd.DatetimeIndex(index, name='date'))
+    result.insert(0, 'symbol', symbol_column(symbol, len(result)))
+
+    if not result.index.is_monotonic_increasing:
+        result = result.sort_index(kind='stable')
+    if result.index.has_duplicates:
+        duplicated = result.index[result.index.duplicated()].unique()
+        result = result[~result.index.duplicated(keep='last')]
+        result.attrs[DUPLICATE_DATES_ATTR] = list(duplicated.strftime('%Y-%m-%d'))
+    return result
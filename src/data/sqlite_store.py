@@ -0,0 +1,467 @@
+"""
+SQLite行情存储模块
+将日线数据保存在 config.yaml 中 storage.database 指定的SQLite数据库，
+以 (股票代码, 日期) 为主键批量写入，按区间查询直接返回NumPy数组。
+WAL模式下命令行工具、Web应用与批处理任务可同时读取同一个数据库。
+"""
+
+import pandas as pd
+import numpy as np
+import json
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple, Union
+import logging
+
+from src.data.local_store import LocalDataStore
+from src.data.schema import DAILY_SCHEMA, REQUIRED_COLUMNS, empty_daily_frame, symbol_column
+
+logger = logging.getLogger(__name__)
+
+# 每种复权类型一张表，与Parquet存储按复权类型分目录对应
+ADJUST_TABLES: Dict[str, str] = {
+    "None": "daily_none",
+    "qfq": "daily_qfq",
+    "hfq": "daily_hfq",
+}
+
+# 行情表的数值字段，顺序即表中列的顺序
+BAR_FIELDS: List[str] = list(DAILY_SCHEMA.keys())
+
+_EPOCH = np.datetime64('1970-01-01', 'D')
+
+
+class SQLiteBarStore(LocalDataStore):
+    """SQLite日线存储，接口与LocalDataStore一致，可直接作为数据提供器的 store"""
+
+    def __init__(
+        self,
+        db_path: Union[str, Path] = "./data/tdxtools.db",
+        cache_ttl: int = 86400
+    ):
+        """
+        初始化SQLite存储
+
+        Args:
+            db_path: 数据库文件路径
+            cache_ttl: 未定型数据（获取当天及之后的日期）的有效期(秒)，小于等于0表示永不过期
+        """
+        self.db_path = Path(db_path)
+        super().__init__(self.db_path.parent, cache_ttl)
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self._local = threading.local()
+        self._create_tables()
+
+    @property
+    def conn(self) -> sqlite3.Connection:
+        """当前线程的数据库连接（sqlite3连接不能跨线程共享）"""
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            # 自动提交模式，写入时由 _transaction 显式开启事务
+            conn = sqlite3.connect(self.db_path, timeout=30, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    @contextmanager
+    def _transaction(self):
+        """写事务，开始时即获取写锁，避免先读后写的事务在并发写入时失败"""
+        conn = self.conn
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            yield conn
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        conn.execute("COMMIT")
+
+    def _create_tables(self):
+        """创建数据表"""
+        columns = ", ".join(
+            f"{field} {'INTEGER' if DAILY_SCHEMA[field] == 'int64' else 'REAL'}" for field in BAR_FIELDS
+        )
+        with self._transaction() as conn:
+            for table in ADJUST_TABLES.values():
+                # date 为1970-01-01起的天数，便于直接转换为 datetime64[D]
+                conn.execute(
+                    f"CREATE TABLE IF NOT EXISTS {table} ("
+                    f"symbol TEXT NOT NULL, date INTEGER NOT NULL, {columns}, "
+                    f"PRIMARY KEY (symbol, date)) WITHOUT ROWID"
+                )
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS coverage ("
+                "symbol TEXT NOT NULL, adjust TEXT NOT NULL, spans TEXT NOT NULL, "
+                "PRIMARY KEY (symbol, adjust)) WITHOUT ROWID"
+            )
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS adjust_factors ("
+                "symbol TEXT NOT NULL, date INTEGER NOT NULL, factor REAL NOT NULL, "
+                "PRIMARY KEY (symbol, date)) WITHOUT ROWID"
+            )
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS adjust_factor_updates ("
+                "symbol TEXT PRIMARY KEY, updated_at REAL NOT NULL)"
+            )
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS quality ("
+                "symbol TEXT NOT NULL, adjust TEXT NOT NULL, date INTEGER NOT NULL, flags INTEGER NOT NULL, "
+                "PRIMARY KEY (symbol, adjust, date)) WITHOUT ROWID"
+            )
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS fingerprints ("
+                "symbol TEXT NOT NULL, kind TEXT NOT NULL, part TEXT NOT NULL, hash TEXT NOT NULL, "
+                "version INTEGER NOT NULL, rows INTEGER NOT NULL, updated_at REAL NOT NULL, "
+                "PRIMARY KEY (symbol, kind, part)) WITHOUT ROWID"
+            )
+
+    @staticmethod
+    def _table(adjust: str) -> str:
+        """获取复权类型对应的表名"""
+        table = ADJUST_TABLES.get(adjust or "None")
+        if table is None:
+            raise ValueError(f"不支持的复权类型: {adjust}")
+        return table
+
+    @staticmethod
+    def _to_days(dates) -> np.ndarray:
+        """日期转换为1970-01-01起的天数"""
+        return (pd.DatetimeIndex(dates).values.astype('datetime64[D]') - _EPOCH).astype(np.int64)
+
+    @staticmethod
+    def _to_day(date: str) -> int:
+        """单个日期转换为1970-01-01起的天数"""
+        return int((np.datetime64(pd.Timestamp(date).date(), 'D') - _EPOCH).astype(np.int64))
+
+    def _load_meta(self, symbol: str, adjust: str) -> Dict:
+        """读取元数据（已覆盖的日期区间）"""
+        row = self.conn.execute(
+            "SELECT spans FROM coverage WHERE symbol = ? AND adjust = ?", (symbol, adjust or "None")
+        ).fetchone()
+        return {'spans': json.loads(row[0]) if row else []}
+
+    def _save_meta(self, symbol: str, adjust: str, meta: Dict):
+        """写入元数据"""
+        self.conn.execute(
+            "INSERT OR REPLACE INTO coverage (symbol, adjust, spans) VALUES (?, ?, ?)",
+            (symbol, adjust or "None", json.dumps(meta['spans']))
+        )
+
+    def _load_fingerprints(self, symbol: str) -> Dict[str, Dict[str, Dict]]:
+        """读取指纹记录"""
+        fingerprints: Dict[str, Dict[str, Dict]] = {}
+        for kind, part, digest, version, rows, updated_at in self.conn.execute(
+            "SELECT kind, part, hash, version, rows, updated_at FROM fingerprints WHERE symbol = ?", (symbol,)
+        ):
+            fingerprints.setdefault(kind, {})[part] = {'hash': digest, 'version': version, 'rows': rows,
+                                                       'updated_at': updated_at}
+        return fingerprints
+
+    def _save_fingerprints(self, symbol: str, fingerprints: Dict[str, Dict[str, Dict]]):
+        """写入指纹记录"""
+        rows = [(symbol, kind, part, record['hash'], record['version'], record['rows'], record['updated_at'])
+                for kind, records in fingerprints.items() for part, record in records.items()]
+        with self._transaction() as conn:
+            conn.execute("DELETE FROM fingerprints WHERE symbol = ?", (symbol,))
+            conn.executemany(
+                "INSERT INTO fingerprints (symbol, kind, part, hash, version, rows, updated_at) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)", rows
+            )
+
+    def query_arrays(
+        self,
+        symbol: str,
+        start_date: str,
+        end_date: str,
+        adjust: str = "qfq",
+        fields: Optional[List[str]] = None
+    ) -> Dict[str, np.ndarray]:
+        """
+        按日期区间查询，直接返回NumPy数组
+
+        Args:
+            symbol: 股票代码
+            start_date: 开始日期
+            end_date: 结束日期
+            adjust: 复权类型
+            fields: 字段列表，默认 REQUIRED_COLUMNS
+
+        Returns:
+            {'date': datetime64[D]数组, 字段: 数组}，缺失值为NaN
+        """
+        fields = list(fields or REQUIRED_COLUMNS)
+        unknown = [f for f in fields if f not in DAILY_SCHEMA]
+        if unknown:
+            raise ValueError(f"不支持的字段: {unknown}")
+
+        dtype = np.dtype([('date', np.int64)] + [(f, DAILY_SCHEMA[f]) for f in fields])
+        select = ", ".join(f"IFNULL({f}, 0)" if DAILY_SCHEMA[f] == 'int64' else f for f in fields)
+        cursor = self.conn.execute(
+            f"SELECT date, {select} FROM {self._table(adjust)} "
+            f"WHERE symbol = ? AND date BETWEEN ? AND ? ORDER BY date",
+            (symbol, self._to_day(start_date), self._to_day(end_date))
+        )
+        records = np.fromiter(cursor, dtype=dtype)
+
+        result = {'date': _EPOCH + records['date'].astype('timedelta64[D]')}
+        for field in fields:
+            result[field] = records[field]
+        return result
+
+    def load(
+        self,
+        symbol: str,
+        start_date: str,
+        end_date: str,
+        adjust: str = "qfq"
+    ) -> pd.DataFrame:
+        """
+        直接读取本地已有数据，不检查区间覆盖情况
+
+        Args:
+            symbol: 股票代码
+            start_date: 开始日期
+            end_date: 结束日期
+            adjust: 复权类型
+
+        Returns:
+            统一格式的DataFrame，只包含有数据的可选字段，没有数据时返回空DataFrame
+        """
+        arrays = self.query_arrays(symbol, start_date, end_date, adjust, BAR_FIELDS)
+        dates = arrays.pop('date')
+        if len(dates) == 0:
+            return empty_daily_frame()
+
+        columns = {
+            field: values for field, values in arrays.items()
+            if field in REQUIRED_COLUMNS or not np.isnan(values).all()
+        }
+        df = pd.DataFrame(columns, index=pd.DatetimeIndex(dates.astype('datetime64[ns]'), name='date'))
+        df.insert(0, 'symbol', symbol_column(symbol, len(df)))
+        return df
+
+    def write(
+        self,
+        symbol: str,
+        df: pd.DataFrame,
+        start_date: str,
+        end_date: str,
+        adjust: str = "qfq",
+        partial_history: bool = False
+    ):
+        """
+        在一个事务中批量写入数据并记录已覆盖区间，已有日期的数据被覆盖
+
+        Args:
+            symbol: 股票代码
+            df: 以日期为索引的日线数据
+            start_date: 本次请求的开始日期
+            end_date: 本次请求的结束日期
+            adjust: 复权类型
+            partial_history: 数据源只返回最近一段历史（如新浪最近1000根K线）时为True，
+                             已覆盖区间从返回数据的第一个交易日开始，没有返回数据时不记录覆盖区间
+        """
+        table = self._table(adjust)
+        rows = []
+        duplicated = self._duplicate_dates(df)
+        if not df.empty:
+            df = df[~df.index.duplicated(keep='last')].sort_index()
+            columns = [self._to_days(df.index).tolist()]
+            for field in BAR_FIELDS:
+                if field in df.columns:
+                    values = pd.to_numeric(df[field], errors='coerce').astype(object)
+                    columns.append(values.where(values.notna(), None).tolist())
+                else:
+                    columns.append([None] * len(df))
+            rows = [(symbol,) + row for row in zip(*columns)]
+
+        if partial_history and rows:
+            start_date = max(pd.Timestamp(start_date), df.index[0])
+
+        placeholders = ", ".join(["?"] * (len(BAR_FIELDS) + 2))
+        with self._transaction() as conn:
+            if rows:
+                conn.executemany(
+                    f"INSERT OR REPLACE INTO {table} (symbol, date, {', '.join(BAR_FIELDS)}) "
+                    f"VALUES ({placeholders})", rows
+                )
+            if not partial_history or rows:
+                meta = self._load_meta(symbol, adjust)
+                meta['spans'].append([
+                    pd.Timestamp(start_date).strftime('%Y-%m-%d'),
+                    pd.Timestamp(end_date).strftime('%Y-%m-%d'),
+                    time.time()
+                ])
+                meta['spans'] = self._normalize_spans(meta['spans'])
+                self._save_meta(symbol, adjust, meta)
+        if rows:
+            first_month = df.index[0].replace(day=1).strftime('%Y-%m-%d')
+            last_month = (df.index[-1] + pd.offsets.MonthEnd(0)).strftime('%Y-%m-%d')
+            self._record_month_fingerprints(symbol, adjust, self.load(symbol, first_month, last_month, adjust),
+                                            df.index)
+            self._update_quality(symbol, adjust, df.index[0], df.index[-1], duplicated)
+            self._notify_write(symbol, adjust or "None", df.index[0])
+
+    def _write_quality(self, symbol: str, adjust: str, start: pd.Timestamp, end: pd.Timestamp, flags: pd.Series):
+        """用 flags 替换 [start, end] 区间内已保存的质量标记，只保存有问题的K线"""
+        flags = flags[flags != 0]
+        rows = list(zip([symbol] * len(flags), [adjust or "None"] * len(flags),
+                        self._to_days(flags.index).tolist(), flags.astype(np.int64).tolist()))
+        with self._transaction() as conn:
+            conn.execute("DELETE FROM quality WHERE symbol = ? AND adjust = ? AND date BETWEEN ? AND ?",
+                         (symbol, adjust or "None", self._to_day(start), self._to_day(end)))
+            conn.executemany("INSERT INTO quality (symbol, adjust, date, flags) VALUES (?, ?, ?, ?)", rows)
+
+    def read_quality(
+        self,
+        symbol: str,
+        start_date: Optional[str] = None,
+        end_date: Optional[str] = None,
+        adjust: str = "qfq"
+    ) -> pd.Series:
+        """
+        读取入库时保存的质量标记
+
+        Args:
+            symbol: 股票代码
+            start_date: 开始日期，为None时不限
+            end_date: 结束日期，为None时不限
+            adjust: 复权类型
+
+        Returns:
+            以日期为索引的 uint8 标记，只包含有问题的K线
+        """
+        start = self._to_day(start_date) if start_date is not None else np.iinfo(np.int64).min
+        end = self._to_day(end_date) if end_date is not None else np.iinfo(np.int64).max
+        records = np.fromiter(
+            self.conn.execute(
+                "SELECT date, flags FROM quality WHERE symbol = ? AND adjust = ? AND date BETWEEN ? AND ? "
+                "ORDER BY date", (symbol, adjust or "None", int(start), int(end))
+            ),
+            dtype=[('date', np.int64), ('flags', np.uint8)]
+        )
+        index = pd.DatetimeIndex((_EPOCH + records['date'].astype('timedelta64[D]')).astype('datetime64[ns]'),
+                                 name='date')
+        return pd.Series(records['flags'], index=index, name='flags')
+
+    def read_adjust_factors(self, symbol: str, check_ttl: bool = True) -> Optional[pd.Series]:
+        """
+        读取本地复权因子
+
+        Args:
+            symbol: 股票代码
+            check_ttl: 是否检查有效期，为False时返回已过期的因子（离线使用或计算指纹）
+
+        Returns:
+            以日期为索引的累积后复权因子，不存在或（check_ttl 为True时）超过 cache_ttl 时返回None
+        """
+        row = self.conn.execute(
+            "SELECT updated_at FROM adjust_factor_updates WHERE symbol = ?", (symbol,)
+        ).fetchone()
+        if row is None or (check_ttl and not self._is_fresh(row[0])):
+            return None
+
+        records = np.fromiter(
+            self.conn.execute("SELECT date, factor FROM adjust_factors WHERE symbol = ? ORDER BY date", (symbol,)),
+            dtype=[('date', np.int64), ('factor', np.float64)]
+        )
+        index = pd.DatetimeIndex((_EPOCH + records['date'].astype('timedelta64[D]')).astype('datetime64[ns]'))
+        return pd.Series(records['factor'], index=index, name='factor')
+
+    def write_adjust_factors(self, symbol: str, factors: pd.Series):
+        """
+        写入复权因子，与已有因子按日期合并
+
+        Args:
+            symbol: 股票代码
+            factors: 以日期为索引的累积后复权因子
+        """
+        rows = list(zip([symbol] * len(factors), self._to_days(factors.index).tolist(),
+                        factors.astype(np.float64).tolist()))
+        with self._transaction() as conn:
+            conn.executemany("INSERT OR REPLACE INTO adjust_factors (symbol, date, factor) VALUES (?, ?, ?)", rows)
+            conn.execute("INSERT OR REPLACE INTO adjust_factor_updates (symbol, updated_at) VALUES (?, ?)",
+                         (symbol, time.time()))
+        self._record_fingerprints(symbol, self.FACTOR_FINGERPRINT,
+                                  {'all': self.read_adjust_factors(symbol, check_ttl=False)})
+        self._notify_adjust_factors(symbol)
+
+    def list_symbols(self, adjust: str = "qfq") -> List[str]:
+        """列出本地已存储的股票代码"""
+        rows = self.conn.execute(
+            "SELECT symbol FROM coverage WHERE adjust = ? ORDER BY symbol", (adjust or "None",)
+        ).fetchall()
+        return [row[0] for row in rows]
+
+    def clear(self, symbol: Optional[str] = None):
+        """
+        清除本地数据
+
+        Args:
+            symbol: 股票代码，为None时清除全部
+        """
+        self._notify_write(symbol, None, None)
+        tables = list(ADJUST_TABLES.values()) + ["coverage", "adjust_factors", "adjust_factor_updates", "quality",
+                                                  "fingerprints"]
+        with self._transaction() as conn:
+            for table in tables:
+                if symbol is None:
+                    conn.execute(f"DELETE FROM {table}")
+                else:
+                    conn.execute(f"DELETE FROM {table} WHERE symbol = ?", (symbol,))
+
+    def close(self):
+        """关闭当前线程的数据库连接"""
+        conn = getattr(self._local, 'conn', None)
+        if conn is not None:
+            conn.close()
+            self._local.conn = None
+
+
+def create_sqlite_store(
+    db_path: Optional[Union[str, Path]] = None,
+    cache_ttl: Optional[int] = None,
+    config_path: Optional[Union[str, Path]] = None
+) -> SQLiteBarStore:
+    """
+    创建SQLite存储
+
+    Args:
+        db_path: 数据库文件路径，默认读取配置 storage.database.path
+        cache_ttl: 缓存有效期(秒)，默认读取配置 storage.cache_ttl
+        config_path: 配置文件路径
+
+    Returns:
+        SQLiteBarStore实例
+    """
+    from src.utils.config import get_config_section
+
+    storage = get_config_section("storage", config_path)
+    database = storage.get('database') or {}
+    return SQLiteBarStore(
+        db_path=db_path or database.get('path', './data/tdxtools.db'),
+        cache_ttl=cache_ttl if cache_ttl is not None else storage.get('cache_ttl', 86400)
+    )
+
+
+if __name__ == "__main__":
+    # 测试代码
+    import tempfile
+    logging.basicConfig(level=logging.INFO)
+
+    dates = pd.bdate_range('2024-01-01', '2024-03-29', name='date')
+    df = pd.DataFrame({
+        'open': 10.0, 'high': 10.5, 'low': 9.5, 'close': 10.2,
+        'volume': 1000, 'amount': 10200.0
+    }, index=dates)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        store = SQLiteBarStore(Path(tmp) / "tdxtools.db")
+        store.write("000001.SZ", df, "2024-01-01", "2024-03-29", "None")
+        arrays = store.query_arrays("000001.SZ", "2024-02-01", "2024-02-29", "None", ['close', 'volume'])
+        print(f"查询到 {len(arrays['date'])} 条记录: {arrays['date'][:3]} {arrays['close'][:3]}")
+        print(store.missing_ranges("000001.SZ", "2023-12-01", "2024-03-29", "None"))
+        store.close()
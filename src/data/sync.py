@@ -0,0 +1,311 @@
+"""
+股票池同步模块
+以线程池并发将股票池的日线补齐到本地存储，进度定期写入检查点文件，
+中断后再次运行时跳过已完成的股票，结束时汇总吞吐量（股票数/秒、获取行数与内存占用、重试次数）
+"""
+
+import pandas as pd
+import json
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Union
+import logging
+
+from src.data.rate_limiter import call_with_retry, get_retry_count
+from src.utils.config import load_data_sources_config
+
+logger = logging.getLogger(__name__)
+
+# 检查点写入的最小间隔（秒），每完成一只股票都写入时大股票池的检查点开销过大
+CHECKPOINT_INTERVAL = 2.0
+
+
+def resolve_universe(universe: str, provider=None) -> List[str]:
+    """
+    获取股票池的股票代码
+
+    Args:
+        universe: config/data_sources.yaml 中 stock_pools 的名称，或 "all" 表示全部未退市A股
+        provider: 数据提供器，universe 为 "all" 且本地证券主表为空时用于获取证券列表
+
+    Returns:
+        股票代码列表
+    """
+    pools = load_data_sources_config().get('stock_pools') or {}
+    if universe in pools:
+        return list(dict.fromkeys(pools[universe].get('symbols') or []))
+    if universe != "all":
+        raise ValueError(f"未知的股票池: {universe}，可选 {', '.join(list(pools) + ['all'])}")
+
+    if provider is None or provider.store is None:
+        raise ValueError("同步全部A股需要启用本地存储的数据提供器")
+    reference = provider.store.reference
+    if reference.securities.empty:
+        if not hasattr(provider, '_fetch_securities'):
+            raise ValueError(f"{provider.data_source} 不提供证券列表，请先用 tushare/akshare/baostock 更新参考数据")
+        reference.update_securities(call_with_retry(provider._fetch_securities, retry_count=provider.retry_count,
+                                                    limiter=provider.rate_limiter))
+    securities = reference.securities
+    return sorted(securities.index[securities['delist_date'].isna()])
+
+
+class SyncCheckpoint:
+    """同步进度检查点，同一任务（股票池、数据源、日期区间、复权类型）中断后从检查点继续"""
+
+    def __init__(self, path: Union[str, Path], job: Dict):
+        """
+        Args:
+            path: 检查点文件路径
+            job: 任务描述，与已有检查点的任务不同时从头开始
+        """
+        self.path = Path(path)
+        self.job = job
+        # 本次任务解析出的结束日期，任务未指定结束日期（默认为当天）时中断后继续沿用
+        self.end_date: Optional[str] = None
+        self.done: Dict[str, int] = {}
+        self.failed: Dict[str, str] = {}
+        self._lock = threading.Lock()
+        self._saved_at = 0.0
+
+        if self.path.exists():
+            try:
+                with open(self.path, 'r', encoding='utf-8') as f:
+                    saved = json.load(f)
+                if saved.get('job') == job:
+                    self.done = saved.get('done', {})
+                    self.failed = saved.get('failed', {})
+                    self.end_date = saved.get('end_date')
+            except Exception as e:
+                logger.warning(f"读取同步检查点失败，从头开始: {e}")
+
+    def pending(self, symbols: List[str]) -> List[str]:
+        """尚未完成的股票，上次失败的股票会重新同步"""
+        return [symbol for symbol in symbols if symbol not in self.done]
+
+    def mark_done(self, symbol: str, rows: int):
+        with self._lock:
+            self.done[symbol] = rows
+            self.failed.pop(symbol, None)
+        self.save(force=False)
+
+    def mark_failed(self, symbol: str, error: str):
+        with self._lock:
+            self.failed[symbol] = error
+        self.save(force=False)
+
+    def save(self, force: bool = True):
+        """
+        写入检查点
+
+        Args:
+            force: 为False时距上次写入不足 CHECKPOINT_INTERVAL 秒则跳过
+        """
+        with self._lock:
+            now = time.monotonic()
+            if not force and now - self._saved_at < CHECKPOINT_INTERVAL:
+                return
+            self._saved_at = now
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = self.path.with_suffix('.tmp')
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump({'job': self.job, 'end_date': self.end_date, 'done': self.done, 'failed': self.failed,
+                           'updated_at': time.time()}, f, ensure_ascii=False)
+            os.replace(tmp_path, self.path)
+
+    def clear(self):
+        """删除检查点，下次从头开始"""
+        with self._lock:
+            self.done, self.failed, self.end_date = {}, {}, None
+            self.path.unlink(missing_ok=True)
+
+
+class SyncStats:
+    """同步统计（线程安全）"""
+
+    def __init__(self, total: int, skipped: int = 0):
+        self.total = total
+        self.skipped = skipped
+        self.synced = 0
+        self.failed = 0
+        self.requests = 0
+        self.rows = 0
+        # 获取到的 DataFrame 的内存占用（memory_usage(deep=True)），不是网络传输量或落盘大小
+        self.memory_bytes = 0
+        self.retries = 0
+        self.started = time.monotonic()
+        self.elapsed = 0.0
+        self._lock = threading.Lock()
+
+    def record_fetch(self, df: Optional[pd.DataFrame]):
+        """记录一次上游请求获取的数据"""
+        with self._lock:
+            self.requests += 1
+            if df is not None and not df.empty:
+                self.rows += len(df)
+                self.memory_bytes += int(df.memory_usage(index=True, deep=True).sum())
+
+    def record_symbol(self, success: bool):
+        with self._lock:
+            if success:
+                self.synced += 1
+            else:
+                self.failed += 1
+            self.elapsed = time.monotonic() - self.started
+
+    @property
+    def completed(self) -> int:
+        """本次运行处理完的股票数（含失败）"""
+        return self.synced + self.failed
+
+    @property
+    def symbols_per_second(self) -> float:
+        return self.completed / self.elapsed if self.elapsed > 0 else 0.0
+
+    def summary(self) -> Dict:
+        """统计摘要"""
+        return {
+            'total': self.total,
+            'skipped': self.skipped,
+            'synced': self.synced,
+            'failed': self.failed,
+            'requests': self.requests,
+            'rows': self.rows,
+            'memory_bytes': self.memory_bytes,
+            'retries': self.retries,
+            'elapsed': round(self.elapsed, 3),
+            'symbols_per_second': round(self.symbols_per_second, 2),
+        }
+
+    def format(self) -> str:
+        """单行文本摘要"""
+        return (f"{self.completed + self.skipped}/{self.total} 只股票，成功 {self.synced}，失败 {self.failed}，"
+                f"跳过 {self.skipped}；请求 {self.requests} 次，重试 {self.retries} 次，"
+                f"{self.rows} 行（内存 {self.memory_bytes / 1024 / 1024:.1f}MB）；"
+                f"耗时 {self.elapsed:.1f}s，{self.symbols_per_second:.1f} 只/秒")
+
+
+def _check_stored(provider, symbol: str, start_date: str, end_date: str, adjust: str, store_adjust: str,
+                  partial_history: bool) -> int:
+    """
+    确认股票的请求区间已写入本地存储
+
+    只返回最近一段历史的数据源允许缺少早期区间，但必须覆盖到结束日期；
+    前/后复权时有行情的股票还必须已保存复权因子。
+
+    Returns:
+        本地存储中区间内的行数
+
+    Raises:
+        ValueError: 区间或复权因子未写入本地存储
+    """
+    store = provider.store
+    gaps = store.missing_ranges(symbol, start_date, end_date, store_adjust)
+    end = min(pd.Timestamp(end_date), pd.Timestamp.now().normalize())
+    if gaps and (not partial_history or pd.Timestamp(gaps[-1][1]) >= end):
+        raise ValueError(f"{symbol} 的 {gaps[0][0]} 到 {gaps[-1][1]} 未写入本地存储")
+
+    rows = len(store.load(symbol, start_date, end_date, store_adjust))
+    if rows and store_adjust != adjust and store.read_adjust_factors(symbol, check_ttl=False) is None:
+        raise ValueError(f"{symbol} 的复权因子未写入本地存储")
+    return rows
+
+
+def sync_universe(
+    provider,
+    symbols: List[str],
+    start_date: str,
+    end_date: str,
+    adjust: str = "qfq",
+    checkpoint: Optional[SyncCheckpoint] = None,
+    max_workers: Optional[int] = None,
+    progress: Optional[Callable[[SyncStats], None]] = None
+) -> SyncStats:
+    """
+    将股票池的日线补齐到数据提供器的本地存储
+
+    每只股票调用一次 get_daily_data，本地已有的区间不会重复请求；前/后复权时存储不复权行情与复权因子。
+    只有请求区间已写入本地存储的股票记为完成，其余记为失败；中断（包括 Ctrl+C）时先写入检查点再退出。
+
+    Args:
+        provider: 启用本地存储的 DataProvider 或 FreeDataProvider
+        symbols: 股票代码列表
+        start_date: 开始日期
+        end_date: 结束日期
+        adjust: 复权类型
+        checkpoint: 检查点，为None时不记录进度
+        max_workers: 并发线程数，默认读取配置 performance.max_workers
+        progress: 每完成一只股票调用一次，参数为当前统计
+
+    Returns:
+        同步统计
+    """
+    if provider.store is None:
+        raise ValueError("未启用本地存储，无法同步")
+    store_adjust = provider._store_adjust(adjust)
+    if store_adjust is None:
+        raise ValueError(f"{provider.data_source} 的 {adjust} 行情不写入本地存储，"
+                         f"请同步不复权行情（adjust=None）或使用提供复权因子的数据源")
+    partial_history = provider.data_source in getattr(provider, 'PARTIAL_HISTORY_SOURCES', ())
+
+    symbols = list(dict.fromkeys(symbols))
+    pending = checkpoint.pending(symbols) if checkpoint is not None else symbols
+    stats = SyncStats(len(symbols), skipped=len(symbols) - len(pending))
+    if stats.skipped:
+        logger.info(f"从检查点继续，跳过已完成的 {stats.skipped} 只股票")
+
+    def sync_one(symbol: str) -> int:
+        provider.get_daily_data(symbol, start_date, end_date, adjust)
+        return _check_stored(provider, symbol, start_date, end_date, adjust, store_adjust, partial_history)
+
+    retries_before = get_retry_count()
+    max_workers = min(provider._resolve_max_workers(max_workers), max(len(pending), 1))
+    # 经数据提供器的 fetch_hooks 统计上游请求的数据量
+    provider.fetch_hooks.append(stats.record_fetch)
+    executor = ThreadPoolExecutor(max_workers=max_workers)
+    futures = {executor.submit(sync_one, symbol): symbol for symbol in pending}
+    try:
+        for future in as_completed(futures):
+            symbol = futures[future]
+            try:
+                rows = future.result()
+                if checkpoint is not None:
+                    checkpoint.mark_done(symbol, rows)
+                stats.record_symbol(True)
+            except Exception as e:
+                logger.error(f"同步 {symbol} 失败: {e}")
+                if checkpoint is not None:
+                    checkpoint.mark_failed(symbol, str(e))
+                stats.record_symbol(False)
+            stats.retries = get_retry_count() - retries_before
+            if progress is not None:
+                progress(stats)
+    finally:
+        for future in futures:
+            future.cancel()
+        executor.shutdown(wait=True)
+        provider.fetch_hooks.remove(stats.record_fetch)
+        stats.retries = get_retry_count() - retries_before
+        stats.elapsed = time.monotonic() - stats.started
+        # 获取日线时暂存的停牌与ST日期与检查点一起保存
+        provider.store.reference.flush_status()
+        if checkpoint is not None:
+            checkpoint.save()
+
+    logger.info(f"同步完成: {stats.format()}")
+    return stats
+
+
+if __name__ == "__main__":
+    # 测试代码
+    logging.basicConfig(level=logging.INFO)
+    from src.data.data_provider import DataProvider
+
+    provider = DataProvider("akshare")
+    symbols = resolve_universe("test")
+    checkpoint = SyncCheckpoint("./data/sync/test.json",
+                                {'universe': "test", 'start_date': "2024-01-01", 'end_date': "2024-06-30"})
+    stats = sync_universe(provider, symbols, "2024-01-01", "2024-06-30", checkpoint=checkpoint)
+    print(stats.summary())
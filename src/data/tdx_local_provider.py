@@ -0,0 +1,402 @@
+"""
+通达信本地数据提供器模块
+直接读取通达信安装目录下 vipdoc/{sh,sz}/lday/*.day 日线文件和 minline/fzline 分钟线文件
+"""
+
+import pandas as pd
+import numpy as np
+from pathlib import Path
+from typing import Dict, List, Optional, Union
+import logging
+import mmap
+import os
+
+from src.data.schema import empty_daily_frame, symbol_column
+from src.utils.config import load_data_sources_config
+
+logger = logging.getLogger(__name__)
+
+# 日线记录：日期(YYYYMMDD)、开高低收(价格×100)、成交额、成交量、保留字段，共32字节
+DAY_DTYPE = np.dtype([
+    ('date', '<u4'),
+    ('open', '<u4'),
+    ('high', '<u4'),
+    ('low', '<u4'),
+    ('close', '<u4'),
+    ('amount', '<f4'),
+    ('volume', '<u4'),
+    ('reserved', '<u4'),
+])
+
+# 分钟线记录：压缩日期、分钟数、开高低收、成交额、成交量、保留字段，共32字节
+MINUTE_DTYPE = np.dtype([
+    ('date', '<u2'),
+    ('time', '<u2'),
+    ('open', '<f4'),
+    ('high', '<f4'),
+    ('low', '<f4'),
+    ('close', '<f4'),
+    ('amount', '<f4'),
+    ('volume', '<u4'),
+    ('reserved', '<u4'),
+])
+
+# 分钟线文件所在子目录与扩展名
+MINUTE_FILES = {
+    '1min': ('minline', 'lc1'),
+    '5min': ('fzline', 'lc5'),
+}
+
+
+def _ymd_to_datetime64(year: np.ndarray, month: np.ndarray, day: np.ndarray) -> np.ndarray:
+    """由年月日整数数组向量化构造 datetime64[ns] 数组"""
+    months = (year.astype(np.int64) - 1970) * 12 + (month.astype(np.int64) - 1)
+    days = months.astype('datetime64[M]').astype('datetime64[D]') + (day.astype(np.int64) - 1)
+    return days.astype('datetime64[ns]')
+
+
+def _yyyymmdd_to_datetime64(raw_date: np.ndarray) -> np.ndarray:
+    """
+    将 YYYYMMDD 整数数组转换为 datetime64[ns]
+
+    先对 [最小值, 最大值] 区间内的所有整数建立查找表再按下标取值，
+    全市场上千万条记录时比逐条计算快数倍
+    """
+    raw_date = raw_date.astype(np.int64)
+    if len(raw_date) == 0:
+        return np.empty(0, dtype='datetime64[ns]')
+    lo = raw_date.min()
+    keys = np.arange(lo, raw_date.max() + 1)
+    table = _ymd_to_datetime64(keys // 10000, keys // 100 % 100, keys % 100)
+    return table[raw_date - lo]
+
+
+def _date_key(date: Optional[str], default: int) -> int:
+    """将日期转换为 YYYYMMDD 整数，用于在记录中二分查找"""
+    if date is None:
+        return default
+    ts = pd.Timestamp(date)
+    return ts.year * 10000 + ts.month * 100 + ts.day
+
+
+def _to_tdx_code(symbol: str) -> str:
+    """将 "000001.SZ" 转换为通达信文件名使用的 "sz000001" """
+    if symbol.endswith('.SZ'):
+        return f"sz{symbol[:6]}"
+    elif symbol.endswith('.SH'):
+        return f"sh{symbol[:6]}"
+    return symbol.lower()
+
+
+def _from_tdx_code(code: str) -> str:
+    """将 "sz000001" 转换为 "000001.SZ" """
+    return f"{code[2:]}.{code[:2].upper()}"
+
+
+def _price_divisor(code: str) -> float:
+    """
+    日线价格的缩放倍数
+
+    基金、ETF、可转债等价格精度为3位小数，其余为2位
+    """
+    market, num = code[:2], code[2:]
+    if market == 'sh' and num[:1] == '5':
+        return 1000.0
+    if market == 'sz' and num[:2] in ('15', '16', '18'):
+        return 1000.0
+    return 100.0
+
+
+class TdxLocalProvider:
+    """通达信本地文件数据提供器"""
+
+    def __init__(self, vipdoc_dir: Optional[Union[str, Path]] = None):
+        """
+        初始化通达信本地数据提供器
+
+        Args:
+            vipdoc_dir: 通达信 vipdoc 目录，如 "C:/new_tdx/vipdoc"，
+                        为None时读取 data_sources.yaml 中的 tdx.vipdoc_dir
+        """
+        if vipdoc_dir is None:
+            tdx_config = (load_data_sources_config().get('data_sources') or {}).get('tdx') or {}
+            vipdoc_dir = tdx_config.get('vipdoc_dir')
+        if not vipdoc_dir:
+            raise ValueError("未配置通达信 vipdoc 目录")
+
+        self.data_source = "tdx"
+        self.vipdoc_dir = Path(vipdoc_dir)
+        self._vipdoc_str = str(self.vipdoc_dir)
+        if not self.vipdoc_dir.exists():
+            raise ValueError(f"通达信 vipdoc 目录不存在: {self.vipdoc_dir}")
+        logger.info(f"通达信本地数据源初始化成功: {self.vipdoc_dir}")
+
+    def _day_path(self, code: str) -> str:
+        return os.path.join(self._vipdoc_str, code[:2], 'lday', f"{code}.day")
+
+    def _minute_path(self, code: str, freq: str) -> Path:
+        if freq not in MINUTE_FILES:
+            raise ValueError(f"不支持的分钟线周期: {freq}，可选 {list(MINUTE_FILES)}")
+        folder, ext = MINUTE_FILES[freq]
+        return self.vipdoc_dir / code[:2] / folder / f"{code}.{ext}"
+
+    @staticmethod
+    def _memmap(path: Union[str, Path], dtype: np.dtype) -> np.ndarray:
+        """以只读方式内存映射记录文件，空文件返回空数组"""
+        with open(path, 'rb') as f:
+            size = os.fstat(f.fileno()).st_size
+            count = size // dtype.itemsize
+            if count == 0:
+                return np.empty(0, dtype=dtype)
+            # 直接使用mmap，比np.memmap的构造开销小，全市场读取时差异明显
+            buffer = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        return np.frombuffer(buffer, dtype=dtype, count=count)
+
+    def read_day_records(self, symbol: str, start_date: Optional[str] = None,
+                         end_date: Optional[str] = None) -> np.ndarray:
+        """
+        读取日线原始记录
+
+        Args:
+            symbol: 股票代码，如 "000001.SZ"
+            start_date: 开始日期
+            end_date: 结束日期
+
+        Returns:
+            DAY_DTYPE结构化数组（内存映射视图，不复制数据）
+        """
+        return self._read_day_records(
+            _to_tdx_code(symbol), _date_key(start_date, 0), _date_key(end_date, 99999999)
+        )
+
+    def _read_day_records(self, code: str, start_key: int, end_key: int) -> np.ndarray:
+        """按 YYYYMMDD 整数区间读取日线记录"""
+        try:
+            records = self._memmap(self._day_path(code), DAY_DTYPE)
+        except FileNotFoundError:
+            return np.empty(0, dtype=DAY_DTYPE)
+        dates = records['date']
+        lo = np.searchsorted(dates, start_key, side='left')
+        hi = np.searchsorted(dates, end_key, side='right')
+        return records[lo:hi]
+
+    @staticmethod
+    def _records_to_frame(records: np.ndarray, divisor: Union[float, np.ndarray], symbol) -> pd.DataFrame:
+        """将日线记录转换为统一格式的DataFrame（见 src.data.schema）"""
+        index = pd.DatetimeIndex(_yyyymmdd_to_datetime64(records['date']), name='date')
+        if isinstance(symbol, str):
+            symbol = symbol_column(symbol, len(records))
+        return pd.DataFrame({
+            'symbol': symbol,
+            'open': (records['open'] / divisor).astype(np.float32),
+            'high': (records['high'] / divisor).astype(np.float32),
+            'low': (records['low'] / divisor).astype(np.float32),
+            'close': (records['close'] / divisor).astype(np.float32),
+            'volume': records['volume'].astype(np.int64),
+            'amount': records['amount'].astype(np.float64),
+        }, index=index)
+
+    def get_daily_data(
+        self,
+        symbol: str,
+        start_date: str,
+        end_date: str,
+        adjust: str = "None"
+    ) -> pd.DataFrame:
+        """
+        获取日线数据
+
+        Args:
+            symbol: 股票代码，如 "000001.SZ"
+            start_date: 开始日期，格式 "YYYY-MM-DD"
+            end_date: 结束日期，格式 "YYYY-MM-DD"
+            adjust: 复权类型，本地文件为不复权数据
+
+        Returns:
+            pandas DataFrame 包含日线数据，成交量单位为股
+        """
+        if adjust != "None":
+            logger.warning(f"通达信本地日线为不复权数据，忽略复权类型 {adjust}")
+
+        records = self.read_day_records(symbol, start_date, end_date)
+        if len(records) == 0:
+            return empty_daily_frame()
+
+        return self._records_to_frame(records, _price_divisor(_to_tdx_code(symbol)), symbol)
+
+    def get_market_daily(
+        self,
+        start_date: str,
+        end_date: str,
+        symbols: Optional[List[str]] = None
+    ) -> pd.DataFrame:
+        """
+        一次性读取全市场日线，返回单个长表
+
+        所有文件的记录先在NumPy中拼接，最后只构造一个DataFrame，
+        避免为每只股票分别构造DataFrame的开销，适合全市场扫描。
+
+        Args:
+            start_date: 开始日期
+            end_date: 结束日期
+            symbols: 股票代码列表，为None时读取本地全部代码
+
+        Returns:
+            以日期为索引、symbol为分类列的DataFrame，按股票、日期排序
+        """
+        if symbols is None:
+            symbols = self.list_symbols()
+
+        start_key, end_key = _date_key(start_date, 0), _date_key(end_date, 99999999)
+        chunks, kept, divisors = [], [], []
+        for symbol in symbols:
+            code = _to_tdx_code(symbol)
+            records = self._read_day_records(code, start_key, end_key)
+            if len(records) > 0:
+                chunks.append(records)
+                kept.append(symbol)
+                divisors.append(_price_divisor(code))
+
+        if not chunks:
+            return empty_daily_frame()
+
+        counts = np.array([len(c) for c in chunks])
+        records = np.concatenate(chunks)
+        codes = np.repeat(np.arange(len(kept)), counts)
+        divisor = np.repeat(np.array(divisors), counts)
+        symbol = pd.Categorical.from_codes(codes, categories=kept)
+
+        logger.info(f"从通达信本地文件读取 {len(kept)} 只股票，共 {len(records)} 条记录")
+        return self._records_to_frame(records, divisor, symbol)
+
+    def get_minute_data(
+        self,
+        symbol: str,
+        start_date: str,
+        end_date: str,
+        freq: str = "5min"
+    ) -> pd.DataFrame:
+        """
+        获取分钟线数据
+
+        Args:
+            symbol: 股票代码
+            start_date: 开始日期
+            end_date: 结束日期
+            freq: 周期，"1min" 读取 .lc1，"5min" 读取 .lc5
+
+        Returns:
+            以时间为索引的分钟线DataFrame
+        """
+        path = self._minute_path(_to_tdx_code(symbol), freq)
+        if not path.exists():
+            return pd.DataFrame()
+
+        records = self._memmap(path, MINUTE_DTYPE)
+        if len(records) == 0:
+            return pd.DataFrame()
+
+        # 日期编码: (年-2004)*2048 + 月*100 + 日
+        raw_date = records['date'].astype(np.int64)
+        year = raw_date // 2048 + 2004
+        month = (raw_date % 2048) // 100
+        day = (raw_date % 2048) % 100
+        minutes = records['time'].astype(np.int64).astype('timedelta64[m]')
+        index = pd.DatetimeIndex(_ymd_to_datetime64(year, month, day) + minutes, name='datetime')
+
+        df = pd.DataFrame({
+            'open': records['open'].astype(np.float64),
+            'high': records['high'].astype(np.float64),
+            'low': records['low'].astype(np.float64),
+            'close': records['close'].astype(np.float64),
+            'volume': records['volume'].astype(np.int64),
+            'amount': records['amount'].astype(np.float64),
+        }, index=index)
+        df['symbol'] = symbol
+
+        start = pd.Timestamp(start_date)
+        end = pd.Timestamp(end_date) + pd.Timedelta(days=1)
+        return df[(df.index >= start) & (df.index < end)]
+
+    def list_symbols(self, markets: Optional[List[str]] = None) -> List[str]:
+        """
+        列出本地存在日线文件的全部代码
+
+        Args:
+            markets: 市场列表，默认 ["sh", "sz"]
+
+        Returns:
+            股票代码列表，如 ["000001.SZ", ...]
+        """
+        symbols = []
+        for market in markets or ['sh', 'sz']:
+            lday = os.path.join(self._vipdoc_str, market, 'lday')
+            if os.path.isdir(lday):
+                names = sorted(n for n in os.listdir(lday) if n.endswith('.day'))
+                symbols.extend(_from_tdx_code(n[:-4]) for n in names)
+        return symbols
+
+    def get_multiple_stocks(
+        self,
+        symbols: Optional[List[str]],
+        start_date: str,
+        end_date: str,
+        adjust: str = "None"
+    ) -> Dict[str, pd.DataFrame]:
+        """
+        批量获取多只股票数据
+
+        Args:
+            symbols: 股票代码列表，为None时读取本地全部代码
+            start_date: 开始日期
+            end_date: 结束日期
+            adjust: 复权类型
+
+        Returns:
+            字典，key为股票代码，value为DataFrame
+        """
+        if symbols is None:
+            symbols = self.list_symbols()
+
+        result = {}
+        for symbol in symbols:
+            df = self.get_daily_data(symbol, start_date, end_date, adjust)
+            if not df.empty:
+                result[symbol] = df
+            else:
+                logger.debug(f"本地无 {symbol} 日线数据")
+
+        logger.info(f"从通达信本地文件读取 {len(result)} 只股票数据")
+        return result
+
+    def cleanup(self):
+        """清理资源"""
+        logger.info("通达信本地数据源清理完成")
+
+
+def create_tdx_local_provider(vipdoc_dir: Optional[Union[str, Path]] = None) -> TdxLocalProvider:
+    """
+    创建通达信本地数据提供器实例
+
+    Args:
+        vipdoc_dir: 通达信 vipdoc 目录
+
+    Returns:
+        TdxLocalProvider实例
+    """
+    return TdxLocalProvider(vipdoc_dir)
+
+
+if __name__ == "__main__":
+    # 测试代码
+    import sys
+    import time
+    logging.basicConfig(level=logging.INFO)
+
+    provider = create_tdx_local_provider(sys.argv[1] if len(sys.argv) > 1 else None)
+
+    start = time.perf_counter()
+    data = provider.get_multiple_stocks(None, "2000-01-01", "2099-12-31")
+    elapsed = time.perf_counter() - start
+    rows = sum(len(df) for df in data.values())
+    print(f"读取 {len(data)} 只股票，共 {rows} 条记录，耗时 {elapsed:.3f} 秒")
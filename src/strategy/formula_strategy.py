@@ -0,0 +1,107 @@
+"""
+通达信公式策略
+用编译后的通达信公式生成交易信号，支持横截面计算：回测时在 日期×股票 矩阵上一次算出全部股票的信号
+"""
+
+import pandas as pd
+import numpy as np
+from typing import Dict, Optional, Union
+import logging
+
+from src.backtest.backtest_engine import Strategy
+from src.strategy.tdx_ast import Program
+from src.strategy.tdx_compiler import CompiledFormula, FormulaContext, compile_formula
+from src.strategy.tdx_runtime import _condition, _time_index
+
+logger = logging.getLogger(__name__)
+
+
+def _valid_diff(signal: np.ndarray, valid: Optional[np.ndarray]) -> np.ndarray:
+    """沿日期轴与上一根有效K线的信号作差，跳过缺失K线的日期，第一根有效K线为NaN"""
+    if valid is None:
+        valid = np.ones(signal.shape, dtype=bool)
+    index = np.broadcast_to(_time_index(signal), signal.shape)
+    last = np.maximum.accumulate(np.where(valid, index, -1), axis=0)
+    previous = np.full(signal.shape, -1)
+    previous[1:] = last[:-1]
+    previous_signal = np.take_along_axis(signal, np.maximum(previous, 0), axis=0)
+    return np.where(valid & (previous >= 0), signal - previous_signal, np.nan)
+
+
+class FormulaStrategy(Strategy):
+    """
+    通达信公式策略
+
+    公式有 买入/卖出 输出时，买入条件成立为 +1、卖出条件成立为 -1；
+    否则以选股输出为持有信号，进入选股时买入、退出选股时卖出。
+    """
+
+    cross_sectional = True
+
+    def __init__(
+        self,
+        formula: Union[str, Program, CompiledFormula],
+        params: Optional[Dict[str, float]] = None,
+        name: Optional[str] = None
+    ):
+        """
+        Args:
+            formula: 公式文本、语法树或编译后的公式
+            params: 参数值，formula 为编译后的公式时忽略
+            name: 策略名称，默认使用公式名称
+        """
+        self.compiled = formula if isinstance(formula, CompiledFormula) else compile_formula(formula, params)
+        if not self.compiled.outputs:
+            raise ValueError(f"公式没有输出，无法生成信号: {self.compiled.name}")
+        super().__init__(name or self.compiled.name or "TDXFormula")
+
+    def _outputs_of(self, kind: str):
+        return [name for name, output_type in self.compiled.output_types.items() if output_type == kind]
+
+    def _positions(self, context: FormulaContext) -> np.ndarray:
+        """计算 positions（+1 买入，-1 卖出）"""
+        outputs = self.compiled.evaluate(context)
+        buys, sells = self._outputs_of('buy'), self._outputs_of('sell')
+        if buys or sells:
+            buy = np.zeros(context.shape, dtype=bool)
+            sell = np.zeros(context.shape, dtype=bool)
+            for name in buys:
+                buy |= _condition(outputs[name])
+            for name in sells:
+                sell |= _condition(outputs[name])
+            return buy.astype(np.float64) - sell.astype(np.float64)
+
+        selections = self._outputs_of('selection')
+        held = _condition(outputs[selections[0] if selections else next(iter(outputs))]).astype(np.float64)
+        if context.valid is not None:
+            held[~context.valid] = np.nan
+        return _valid_diff(held, context.valid)
+
+    def generate_signals(self, data: pd.DataFrame) -> pd.DataFrame:
+        """逐只股票生成交易信号"""
+        data = data.copy()
+        data['positions'] = self._positions(FormulaContext(data))
+        data['signal'] = np.sign(data['positions'].fillna(0)).astype(int)
+        return data
+
+    def generate_panel_signals(self, fields: Dict[str, np.ndarray]) -> np.ndarray:
+        """一次生成全部股票的 positions 矩阵"""
+        return self._positions(FormulaContext(fields))
+
+
+if __name__ == "__main__":
+    # 测试代码
+    logging.basicConfig(level=logging.INFO)
+    from src.backtest.backtest_engine import BacktestEngine
+
+    rng = np.random.default_rng(0)
+    dates = pd.bdate_range('2022-01-03', periods=500)
+    data = {}
+    for i in range(20):
+        close = 10 * np.exp(np.cumsum(rng.standard_normal(len(dates)) * 0.02))
+        data[f"{600000 + i}.SH"] = pd.DataFrame({'open': close, 'high': close, 'low': close, 'close': close,
+                                                  'volume': 1e6}, index=dates)
+
+    strategy = FormulaStrategy("选股:MA(C,5)>MA(C,20);")
+    results = BacktestEngine().run(data, strategy)
+    print(f"总收益率: {results['total_return']:.2%}, 交易次数: {results['total_trades']}")
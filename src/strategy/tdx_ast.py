@@ -0,0 +1,598 @@
+"""
+通达信公式语法树模块
+词法分析器把公式文本切分为记号，按运算符优先级（Pratt分析）构建类型化的语法树，
+语句包括中间变量（:=）、输出线（:，可带 COLORRED、NODRAW 等绘图属性）与无名输出，
+支持 {} 与 // 注释、中文标识符、全角标点以及 公式名称/公式描述/参数 头部行
+"""
+
+import re
+from typing import Dict, List, Optional, Tuple, Union
+import logging
+
+logger = logging.getLogger(__name__)
+
+# 行情字段别名（通达信标识符不区分大小写，统一为大写后查找）
+PRICE_FIELDS: Dict[str, str] = {
+    'C': 'close', 'CLOSE': 'close',
+    'O': 'open', 'OPEN': 'open',
+    'H': 'high', 'HIGH': 'high',
+    'L': 'low', 'LOW': 'low',
+    'V': 'volume', 'VOL': 'volume', 'VOLUME': 'volume',
+    'AMO': 'amount', 'AMOUNT': 'amount',
+}
+
+# 公式头部行，如 "参数: N1(5,1,100), N2(20,5,200)"
+HEADER_FIELDS: Dict[str, str] = {
+    '公式名称': 'name',
+    '公式描述': 'description',
+    '参数': 'params',
+}
+
+# 输出线名称对应的信号类型，无名输出视为选股条件
+OUTPUT_TYPES: Dict[str, str] = {
+    '选股': 'selection',
+    '买入': 'buy',
+    '卖出': 'sell',
+    'BUY': 'buy',
+    'SELL': 'sell',
+}
+
+# 二元运算符的左结合优先级，数值越大结合越紧
+BINARY_PRECEDENCE: Dict[str, int] = {
+    'OR': 10,
+    'AND': 20,
+    '==': 30, '!=': 30, '>': 30, '<': 30, '>=': 30, '<=': 30,
+    '+': 40, '-': 40,
+    '*': 50, '/': 50,
+}
+UNARY_PRECEDENCE = 60
+
+# 记号类型
+NUMBER, STRING, NAME, OP, EOF = "NUMBER", "STRING", "NAME", "OP", "EOF"
+
+# 运算符与标点，按长度优先匹配；值为规范化后的运算符
+_OPERATORS: List[Tuple[str, str]] = [
+    (':=', ':='), ('>=', '>='), ('<=', '<='), ('<>', '!='), ('!=', '!='), ('==', '=='),
+    ('&&', 'AND'), ('||', 'OR'),
+    ('=', '=='), ('>', '>'), ('<', '<'), ('+', '+'), ('-', '-'), ('*', '*'), ('/', '/'),
+    ('(', '('), (')', ')'), (',', ','), (';', ';'), (':', ':'),
+]
+_FULLWIDTH = str.maketrans({'：': ':', '；': ';', '，': ',', '（': '(', '）': ')'})
+_KEYWORD_OPERATORS = {'AND': 'AND', 'OR': 'OR'}
+_HEADER_PATTERN = re.compile(r'^\s*(' + '|'.join(HEADER_FIELDS) + r')\s*[:：]\s*(.*?)\s*;?\s*$')
+_NUMBER_PATTERN = re.compile(r'\d*\.?\d*')
+_PARAM_PATTERN = re.compile(r'([^\s,，(（]+)\s*[(（]([^)）]*)[)）]')
+
+
+class TDXSyntaxError(ValueError):
+    """公式语法错误，消息中包含行号与列号"""
+
+    def __init__(self, message: str, line: int = 0, column: int = 0):
+        super().__init__(f"第{line}行第{column}列: {message}" if line else message)
+        self.line = line
+        self.column = column
+
+
+class Token:
+    """词法记号"""
+
+    __slots__ = ('kind', 'value', 'pos', 'line', 'column')
+
+    def __init__(self, kind: str, value: Union[str, float], pos: int, line: int, column: int):
+        self.kind = kind
+        self.value = value
+        self.pos = pos
+        self.line = line
+        self.column = column
+
+    def __repr__(self):
+        return f"Token({self.kind}, {self.value!r}, {self.line}:{self.column})"
+
+
+def tokenize(text: str) -> List[Token]:
+    """
+    将公式文本切分为记号
+
+    标识符统一为大写，AND/OR/&&/|| 规范化为 AND/OR 运算符，<> 规范化为 !=，= 规范化为 ==；
+    {} 与 // 注释被跳过，全角冒号、分号、逗号、括号按半角处理。
+
+    Args:
+        text: 公式文本
+
+    Returns:
+        以 EOF 记号结尾的记号列表
+    """
+    tokens: List[Token] = []
+    pos, line, line_start = 0, 1, 0
+    n = len(text)
+
+    while pos < n:
+        ch = text[pos]
+        column = pos - line_start + 1
+        if ch == '\n':
+            pos += 1
+            line, line_start = line + 1, pos
+            continue
+        if ch.isspace():
+            pos += 1
+            continue
+        if ch == '{':
+            end = text.find('}', pos)
+            if end < 0:
+                raise TDXSyntaxError("注释缺少结束的 }", line, column)
+            for i in range(pos, end):
+                if text[i] == '\n':
+                    line, line_start = line + 1, i + 1
+            pos = end + 1
+            continue
+        if text.startswith('//', pos):
+            end = text.find('\n', pos)
+            pos = n if end < 0 else end
+            continue
+        if ch in "'\"":
+            end = text.find(ch, pos + 1)
+            if end < 0 or '\n' in text[pos:end]:
+                raise TDXSyntaxError("字符串缺少结束的引号", line, column)
+            tokens.append(Token(STRING, text[pos + 1:end], pos, line, column))
+            pos = end + 1
+            continue
+        if ch.isdigit() or (ch == '.' and pos + 1 < n and text[pos + 1].isdigit()):
+            match = _NUMBER_PATTERN.match(text, pos)
+            tokens.append(Token(NUMBER, float(match.group()), pos, line, column))
+            pos = match.end()
+            continue
+        if ch.isalpha() or ch == '_':
+            end = pos + 1
+            while end < n and (text[end].isalnum() or text[end] == '_'):
+                end += 1
+            word = text[pos:end].upper()
+            if word in _KEYWORD_OPERATORS:
+                tokens.append(Token(OP, _KEYWORD_OPERATORS[word], pos, line, column))
+            else:
+                tokens.append(Token(NAME, word, pos, line, column))
+            pos = end
+            continue
+
+        normalized = text[pos:pos + 2].translate(_FULLWIDTH)
+        for source, op in _OPERATORS:
+            if normalized.startswith(source):
+                tokens.append(Token(OP, op, pos, line, column))
+                pos += len(source)
+                break
+        else:
+            raise TDXSyntaxError(f"无法识别的字符: {ch!r}", line, column)
+
+    tokens.append(Token(EOF, '', n, line, n - line_start + 1))
+    return tokens
+
+
+class Node:
+    """表达式节点，结构相同的节点相等且哈希相同"""
+
+    __slots__ = ()
+
+    def _key(self) -> Tuple:
+        raise NotImplementedError
+
+    def children(self) -> Tuple['Node', ...]:
+        """子表达式"""
+        return ()
+
+    def __eq__(self, other):
+        return type(self) is type(other) and self._key() == other._key()
+
+    def __hash__(self):
+        return hash((type(self).__name__,) + self._key())
+
+
+class Number(Node):
+    """数值常量"""
+
+    __slots__ = ('value',)
+
+    def __init__(self, value: float):
+        self.value = float(value)
+
+    def _key(self):
+        return (self.value,)
+
+    def __repr__(self):
+        return f"Number({self.value:g})"
+
+
+class String(Node):
+    """字符串常量，如 DRAWTEXT 的文字"""
+
+    __slots__ = ('value',)
+
+    def __init__(self, value: str):
+        self.value = value
+
+    def _key(self):
+        return (self.value,)
+
+    def __repr__(self):
+        return f"String({self.value!r})"
+
+
+class Name(Node):
+    """标识符引用：行情字段、参数或中间变量"""
+
+    __slots__ = ('name',)
+
+    def __init__(self, name: str):
+        self.name = name
+
+    @property
+    def field(self) -> Optional[str]:
+        """行情字段名，不是行情字段时为None"""
+        return PRICE_FIELDS.get(self.name)
+
+    def _key(self):
+        return (self.name,)
+
+    def __repr__(self):
+        return f"Name({self.name})"
+
+
+class Call(Node):
+    """函数调用，如 MA(C,5)"""
+
+    __slots__ = ('name', 'args')
+
+    def __init__(self, name: str, args: Tuple[Node, ...]):
+        self.name = name
+        self.args = tuple(args)
+
+    def children(self):
+        return self.args
+
+    def _key(self):
+        return (self.name, self.args)
+
+    def __repr__(self):
+        return f"Call({self.name}, {list(self.args)})"
+
+
+class UnaryOp(Node):
+    """一元运算，op 为 '-' 或 '+'"""
+
+    __slots__ = ('op', 'operand')
+
+    def __init__(self, op: str, operand: Node):
+        self.op = op
+        self.operand = operand
+
+    def children(self):
+        return (self.operand,)
+
+    def _key(self):
+        return (self.op, self.operand)
+
+    def __repr__(self):
+        return f"UnaryOp({self.op!r}, {self.operand!r})"
+
+
+class BinaryOp(Node):
+    """二元运算，op 为 BINARY_PRECEDENCE 中的规范化运算符"""
+
+    __slots__ = ('op', 'left', 'right')
+
+    def __init__(self, op: str, left: Node, right: Node):
+        self.op = op
+        self.left = left
+        self.right = right
+
+    def children(self):
+        return (self.left, self.right)
+
+    def _key(self):
+        return (self.op, self.left, self.right)
+
+    def __repr__(self):
+        return f"BinaryOp({self.op!r}, {self.left!r}, {self.right!r})"
+
+
+class Statement:
+    """公式语句"""
+
+    def __init__(self, expr: Node, text: str, line: int):
+        """
+        Args:
+            expr: 表达式
+            text: 表达式的源文本
+            line: 语句所在行号
+        """
+        self.expr = expr
+        self.text = text
+        self.line = line
+
+
+class Assign(Statement):
+    """中间变量 NAME:=表达式;"""
+
+    def __init__(self, name: str, expr: Node, text: str = "", line: int = 0):
+        super().__init__(expr, text, line)
+        self.name = name
+
+    def __repr__(self):
+        return f"Assign({self.name}, {self.expr!r})"
+
+
+class Output(Statement):
+    """输出线 NAME:表达式,属性...; 或无名输出 表达式;"""
+
+    def __init__(self, name: Optional[str], expr: Node, attributes: Optional[List[str]] = None,
+                 text: str = "", line: int = 0):
+        super().__init__(expr, text, line)
+        self.name = name
+        self.attributes = list(attributes or [])
+
+    @property
+    def type(self) -> str:
+        """信号类型：selection、buy、sell，其他输出线为 output"""
+        if self.name is None:
+            return 'selection'
+        return OUTPUT_TYPES.get(self.name, 'output')
+
+    def __repr__(self):
+        return f"Output({self.name}, {self.expr!r}, {self.attributes})"
+
+
+class Program:
+    """整个公式：头部信息与按顺序排列的语句"""
+
+    def __init__(self, statements: List[Statement], info: Dict):
+        self.statements = statements
+        self.info = info
+
+    @property
+    def params(self) -> List[Dict]:
+        """参数定义 [{'name', 'default', 'min', 'max'}]"""
+        return self.info['params']
+
+    @property
+    def variables(self) -> Dict[str, Assign]:
+        """中间变量，重复定义时以最后一次为准"""
+        return {stmt.name: stmt for stmt in self.statements if isinstance(stmt, Assign)}
+
+    @property
+    def outputs(self) -> List[Output]:
+        """输出线"""
+        return [stmt for stmt in self.statements if isinstance(stmt, Output)]
+
+    def __repr__(self):
+        return f"Program({self.info['name']}, {len(self.statements)}条语句)"
+
+
+class TDXParser:
+    """按运算符优先级分析记号序列的语法分析器"""
+
+    def __init__(self, text: str):
+        """
+        Args:
+            text: 不含头部行的公式文本
+        """
+        self.text = text
+        self.tokens = tokenize(text)
+        self.index = 0
+
+    @property
+    def current(self) -> Token:
+        return self.tokens[self.index]
+
+    def _advance(self) -> Token:
+        token = self.tokens[self.index]
+        if token.kind != EOF:
+            self.index += 1
+        return token
+
+    def _peek(self, offset: int = 1) -> Token:
+        return self.tokens[min(self.index + offset, len(self.tokens) - 1)]
+
+    def _is_op(self, value: str, token: Optional[Token] = None) -> bool:
+        token = token or self.current
+        return token.kind == OP and token.value == value
+
+    def _expect_op(self, value: str) -> Token:
+        if not self._is_op(value):
+            self._error(f"缺少 {value}")
+        return self._advance()
+
+    def _error(self, message: str, token: Optional[Token] = None):
+        token = token or self.current
+        found = "公式结尾" if token.kind == EOF else repr(token.value)
+        raise TDXSyntaxError(f"{message}，遇到 {found}", token.line, token.column)
+
+    def parse_program(self) -> List[Statement]:
+        """分析全部语句"""
+        statements = []
+        while self.current.kind != EOF:
+            if self._is_op(';'):
+                self._advance()
+                continue
+            statements.append(self._statement())
+        return statements
+
+    def _statement(self) -> Statement:
+        """NAME := expr ; | NAME : expr {, 属性} ; | expr ;"""
+        line = self.current.line
+        name = None
+        assign = False
+        if self.current.kind == NAME and (self._is_op(':=', self._peek()) or self._is_op(':', self._peek())):
+            name = self._advance().value
+            assign = self._advance().value == ':='
+
+        start = self.current.pos
+        expr = self.parse_expression()
+        text = self.text[start:self.current.pos].strip()
+        attributes = []
+        while self._is_op(','):
+            self._advance()
+            if self.current.kind != NAME:
+                self._error("绘图属性应为标识符")
+            attributes.append(self._advance().value)
+        if self.current.kind != EOF:
+            self._expect_op(';')
+
+        if assign:
+            if attributes:
+                raise TDXSyntaxError(f"中间变量 {name} 不能带绘图属性", line)
+            return Assign(name, expr, text, line)
+        return Output(name, expr, attributes, text, line)
+
+    def parse_expression(self, min_precedence: int = 0) -> Node:
+        """
+        分析表达式，只消费优先级不低于 min_precedence 的二元运算
+
+        Args:
+            min_precedence: 最低优先级
+
+        Returns:
+            表达式节点
+        """
+        left = self._prefix()
+        while True:
+            token = self.current
+            precedence = BINARY_PRECEDENCE.get(token.value) if token.kind == OP else None
+            if precedence is None or precedence <= min_precedence:
+                return left
+            self._advance()
+            left = BinaryOp(token.value, left, self.parse_expression(precedence))
+
+    def _prefix(self) -> Node:
+        token = self._advance()
+        if token.kind == NUMBER:
+            return Number(token.value)
+        if token.kind == STRING:
+            return String(token.value)
+        if token.kind == NAME:
+            if self._is_op('('):
+                return Call(token.value, self._arguments())
+            return Name(token.value)
+        if token.kind == OP and token.value in ('-', '+'):
+            operand = self.parse_expression(UNARY_PRECEDENCE)
+            if token.value == '+':
+                return operand
+            if isinstance(operand, Number):
+                return Number(-operand.value)
+            return UnaryOp('-', operand)
+        if token.kind == OP and token.value == '(':
+            expr = self.parse_expression()
+            self._expect_op(')')
+            return expr
+        self._error("缺少表达式", token)
+
+    def _arguments(self) -> Tuple[Node, ...]:
+        self._expect_op('(')
+        args = []
+        if not self._is_op(')'):
+            args.append(self.parse_expression())
+            while self._is_op(','):
+                self._advance()
+                args.append(self.parse_expression())
+        self._expect_op(')')
+        return tuple(args)
+
+
+def _parse_number(text: str) -> Union[float, str, None]:
+    text = text.strip()
+    if not text:
+        return None
+    try:
+        return float(text)
+    except ValueError:
+        return text
+
+
+def parse_params(text: str) -> List[Dict]:
+    """
+    解析参数头部，如 "N1(5,1,100), N2(20,5,200)" 表示参数N1默认值5、最小值1、最大值100
+
+    Args:
+        text: 参数定义文本
+
+    Returns:
+        [{'name', 'default', 'min', 'max'}]
+    """
+    params = []
+    for match in _PARAM_PATTERN.finditer(text):
+        values = [_parse_number(v) for v in re.split(r'[,，]', match.group(2))]
+        values += [None] * (3 - len(values))
+        params.append({
+            'name': match.group(1).upper(),
+            'default': values[0],
+            'min': values[1] if isinstance(values[1], float) else None,
+            'max': values[2] if isinstance(values[2], float) else None,
+        })
+    return params
+
+
+def split_header(text: str) -> Tuple[Dict, str]:
+    """
+    取出 公式名称/公式描述/参数 头部行
+
+    Args:
+        text: 公式文本
+
+    Returns:
+        (头部信息 {'name', 'description', 'params'}, 去掉头部行后的公式正文，行号不变)
+    """
+    info = {'name': '未命名公式', 'description': '', 'params': []}
+    body = []
+    for line in text.split('\n'):
+        match = _HEADER_PATTERN.match(line)
+        if match is None:
+            body.append(line)
+            continue
+        key, value = HEADER_FIELDS[match.group(1)], match.group(2)
+        if key == 'params':
+            info['params'].extend(parse_params(value))
+        elif value:
+            info[key] = value
+        body.append('')
+    return info, '\n'.join(body)
+
+
+def parse_expression(text: str) -> Node:
+    """
+    分析单个表达式
+
+    Args:
+        text: 表达式文本，如 "CLOSE>MA(CLOSE,10) AND VOL>MA(VOL,20)"
+
+    Returns:
+        表达式节点
+    """
+    parser = TDXParser(text)
+    expr = parser.parse_expression()
+    if parser._is_op(';'):
+        parser._advance()
+    if parser.current.kind != EOF:
+        parser._error("表达式之后有多余内容")
+    return expr
+
+
+def parse_program(text: str) -> Program:
+    """
+    分析完整公式
+
+    Args:
+        text: 公式文本
+
+    Returns:
+        语法树
+    """
+    info, body = split_header(text)
+    return Program(TDXParser(body).parse_program(), info)
+
+
+if __name__ == "__main__":
+    # 测试代码
+    from src.strategy.tdx_formula_parser import EXAMPLE_FORMULA
+
+    program = parse_program(EXAMPLE_FORMULA)
+    print(program, program.params)
+    for stmt in program.statements:
+        print(stmt)
+    print(parse_expression("C>=REF(C,1)*1.05 AND V>MA(V,5) OR -C<0"))
@@ -0,0 +1,432 @@
+"""
+通达信公式编译器
+把公式的语法树编译为去重后的计算图：中间变量与输出线内联展开，参数替换为数值，
+每个结构相同的子表达式（如多处出现的 MA(CLOSE,5)、REF(C,1)）用规范签名合并为一个节点，
+一次计算中只算一次；共享同一份行情数据的多个公式通过 FormulaContext 按签名复用中间结果。
+数据可以是 日期×股票 的面板，全部股票沿日期轴一次向量化计算，用于全市场选股
+"""
+
+import pandas as pd
+import numpy as np
+from typing import Dict, List, Optional, Tuple, Union
+import logging
+
+from src.data.panel_store import MarketPanel
+from src.strategy.tdx_ast import (BinaryOp, Call, Name, Node, Number, Output, Program, String, UnaryOp,
+                                  parse_program)
+from src.strategy.tdx_runtime import TDX_FUNCTIONS, _condition
+
+logger = logging.getLogger(__name__)
+
+# 交换律成立的运算符，签名中按操作数排序，使 A+B 与 B+A 合并
+COMMUTATIVE_OPERATORS = {'+', '*', '==', '!=', 'AND', 'OR'}
+
+# 计算图节点类型
+CONST, FIELD, CALL, NEGATE, BINARY = "const", "field", "call", "negate", "binary"
+
+
+class FormulaContext:
+    """
+    一份行情数据上的计算上下文，按签名缓存中间结果，供多个公式共用
+
+    数据可以是单只股票，也可以是 日期×股票 的面板，沿日期轴一次计算全部股票。
+    某只股票缺少K线的日期（停牌、未上市）默认不参与计算：每列的有效K线先紧凑排列，
+    算完再放回原位置，结果与逐只股票计算一致，缺失日期的结果为无效值（条件为不成立）。
+    """
+
+    def __init__(
+        self,
+        data: Union[MarketPanel, pd.DataFrame, Dict[str, Union[np.ndarray, pd.DataFrame]]],
+        start_date: Optional[str] = None,
+        end_date: Optional[str] = None,
+        skip_missing: bool = True
+    ):
+        """
+        Args:
+            data: MarketPanel 面板；以行情字段（close、volume 等）为列的单只股票DataFrame；
+                  或 字段 -> 一维/二维数组（或 日期×股票 DataFrame）的字典
+            start_date: 开始日期，仅对面板有效
+            end_date: 结束日期，仅对面板有效
+            skip_missing: 缺失K线的日期是否跳过（按 close 为NaN判断），False 时按NaN直接参与计算
+        """
+        self.index: Optional[pd.Index] = None
+        self.columns: Optional[List[str]] = None
+        self._panel: Optional[MarketPanel] = None
+        self._data: Dict[str, Union[np.ndarray, pd.Series, pd.DataFrame]] = {}
+
+        if isinstance(data, MarketPanel):
+            self._panel = data
+            self._rows = (start_date, end_date)
+            self.index = data.dates[data.date_slice(start_date, end_date)]
+            self.columns = list(data.symbols)
+            fields = data.fields
+        elif isinstance(data, pd.DataFrame):
+            self.index = data.index
+            self._data = {column: data[column] for column in data.columns}
+            fields = list(self._data)
+        else:
+            self._data = dict(data)
+            fields = list(self._data)
+            frames = [value for value in self._data.values() if isinstance(value, pd.DataFrame)]
+            if frames:
+                self.index, self.columns = frames[0].index, list(frames[0].columns)
+        if not fields:
+            raise ValueError("行情数据为空")
+        self.fields: List[str] = list(fields)
+
+        # 各列有效K线紧凑排列的顺序，没有缺失K线时为None
+        self.valid: Optional[np.ndarray] = None
+        self._order: Optional[np.ndarray] = None
+        if skip_missing:
+            valid = ~np.isnan(self._raw('close' if 'close' in self.fields else self.fields[0]))
+            if not valid.all():
+                self.valid = valid
+                self._order = np.argsort(~valid, axis=0, kind='stable')
+
+        # 签名 -> 计算结果（紧凑排列的空间）
+        self.cache: Dict[str, Union[np.ndarray, float]] = {}
+        self.stats = {'hits': 0, 'misses': 0}
+
+    def _raw(self, name: str) -> np.ndarray:
+        """按原始日期排列的字段数组"""
+        if name not in self.fields:
+            raise ValueError(f"行情数据中没有该字段: {name}，可用字段: {self.fields}")
+        if self._panel is not None:
+            return np.asarray(self._panel.field(name, *self._rows), dtype=np.float64)
+        values = self._data[name]
+        if isinstance(values, (pd.Series, pd.DataFrame)):
+            values = values.to_numpy()
+        return np.asarray(values, dtype=np.float64)
+
+    @property
+    def shape(self) -> Tuple[int, ...]:
+        """结果数组的形状"""
+        if self._panel is not None:
+            return (len(self.index), len(self.columns))
+        return np.shape(self._data[self.fields[0]])
+
+    def field(self, name: str) -> np.ndarray:
+        """获取参与计算的float64字段数组（有缺失K线时为紧凑排列）"""
+        values = self._raw(name)
+        if self._order is None:
+            return values
+        return np.take_along_axis(values, self._order, axis=0)
+
+    def restore(self, value) -> np.ndarray:
+        """把计算结果放回原始日期位置，缺失K线处为无效值（布尔结果为不成立）"""
+        value = np.asarray(value)
+        if value.shape != self.shape:
+            value = np.broadcast_to(value, self.shape).copy()
+        if self._order is None:
+            return value
+        result = np.empty_like(value)
+        np.put_along_axis(result, self._order, value, axis=0)
+        result[~self.valid] = False if result.dtype == np.bool_ else np.nan
+        return result
+
+    def to_frame(self, value: np.ndarray) -> Union[pd.DataFrame, pd.Series]:
+        """把计算结果转换为 日期×股票 DataFrame（单只股票为Series）"""
+        if np.ndim(value) == 1:
+            return pd.Series(value, index=self.index)
+        return pd.DataFrame(value, index=self.index, columns=self.columns)
+
+    def clear(self):
+        """释放缓存的中间结果"""
+        self.cache.clear()
+
+
+def _numeric(value):
+    """布尔条件参与算术运算时转为0/1"""
+    if isinstance(value, np.ndarray) and value.dtype == np.bool_:
+        return value.astype(np.float64)
+    return value
+
+
+def _binary(op: str, left, right):
+    """二元运算，比较结果为布尔数组（无效值不成立），逻辑运算按非0为真"""
+    if op == 'AND':
+        return _condition(left) & _condition(right)
+    if op == 'OR':
+        return _condition(left) | _condition(right)
+    left, right = _numeric(left), _numeric(right)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        if op == '+':
+            return left + right
+        if op == '-':
+            return left - right
+        if op == '*':
+            return left * right
+        if op == '/':
+            return np.true_divide(left, right)
+        if op == '>':
+            return np.greater(left, right)
+        if op == '<':
+            return np.less(left, right)
+        if op == '>=':
+            return np.greater_equal(left, right)
+        if op == '<=':
+            return np.less_equal(left, right)
+        if op == '==':
+            return np.equal(left, right)
+        if op == '!=':
+            # 无效值与任何值比较都不成立
+            return np.not_equal(left, right) & ~(np.isnan(left) | np.isnan(right))
+    raise ValueError(f"不支持的运算符: {op}")
+
+
+class CompiledFormula:
+    """编译后的公式：去重的计算步骤（按依赖顺序）与输出线、中间变量对应的节点签名"""
+
+    def __init__(self, name: str, steps: Dict[str, Tuple], outputs: Dict[str, str],
+                 variables: Dict[str, str], params: Dict[str, float], node_count: int,
+                 output_types: Optional[Dict[str, str]] = None):
+        """
+        Args:
+            name: 公式名称
+            steps: 签名 -> (节点类型, 取值, 参数签名)，子节点在前
+            outputs: 输出名称 -> 签名
+            variables: 中间变量名称 -> 签名
+            params: 编译时使用的参数值
+            node_count: 公式中表达式节点的总数（未去重）
+            output_types: 输出名称 -> 信号类型（selection、buy、sell、output）
+        """
+        self.name = name
+        self.steps = steps
+        self.outputs = outputs
+        self.variables = variables
+        self.params = params
+        self.node_count = node_count
+        self.output_types = output_types or {name: 'output' for name in outputs}
+
+    @property
+    def duplication(self) -> float:
+        """去重倍数：未去重的节点数 / 实际计算的节点数"""
+        return self.node_count / len(self.steps) if self.steps else 1.0
+
+    def _compute(self, kind: str, payload, args: Tuple[str, ...], values: Dict, context: FormulaContext):
+        """计算单个节点"""
+        if kind == CONST:
+            return payload
+        if kind == FIELD:
+            return context.field(payload)
+        operands = [values[arg] for arg in args]
+        if kind == CALL:
+            return TDX_FUNCTIONS[payload](*operands)
+        if kind == NEGATE:
+            return -_numeric(operands[0])
+        return _binary(payload, *operands)
+
+    def evaluate(
+        self,
+        data: Union[FormulaContext, MarketPanel, pd.DataFrame, Dict[str, np.ndarray]],
+        memoize: bool = True,
+        variables: bool = False
+    ) -> Dict[str, np.ndarray]:
+        """
+        计算公式
+
+        Args:
+            data: 计算上下文或行情数据；多个公式传入同一个 FormulaContext 即可共用中间结果
+            memoize: 是否把中间结果留在上下文中供其他公式复用，False 时仍在本次计算内去重
+            variables: 是否同时返回中间变量
+
+        Returns:
+            输出名称（及中间变量名称） -> 与行情数据同形状的数组，条件为布尔数组
+        """
+        context = data if isinstance(data, FormulaContext) else FormulaContext(data)
+        values = context.cache if memoize else {}
+
+        for signature, (kind, payload, args) in self.steps.items():
+            if signature in values:
+                context.stats['hits'] += 1
+                continue
+            values[signature] = self._compute(kind, payload, args, values, context)
+            context.stats['misses'] += 1
+
+        names = dict(self.outputs)
+        if variables:
+            names.update(self.variables)
+        return {name: context.restore(values[signature]) for name, signature in names.items()}
+
+    def __repr__(self):
+        return f"CompiledFormula({self.name}, {len(self.steps)}个节点, 去重前{self.node_count}个)"
+
+
+class _Builder:
+    """按规范签名合并节点，构建计算步骤"""
+
+    def __init__(self, params: Dict[str, float]):
+        self.params = params
+        self.env: Dict[str, str] = {}
+        self.steps: Dict[str, Tuple] = {}
+        self.node_count = 0
+
+    def _add(self, signature: str, kind: str, payload, args: Tuple[str, ...] = ()) -> str:
+        self.node_count += 1
+        if signature not in self.steps:
+            self.steps[signature] = (kind, payload, args)
+        return signature
+
+    def intern(self, node: Node) -> str:
+        """返回节点的规范签名，结构相同的节点签名相同"""
+        if isinstance(node, Number):
+            return self._add(repr(float(node.value)), CONST, float(node.value))
+        if isinstance(node, Name):
+            if node.name in self.env:
+                return self.env[node.name]
+            if node.name in self.params:
+                value = float(self.params[node.name])
+                return self._add(repr(value), CONST, value)
+            if node.field:
+                return self._add(node.field, FIELD, node.field)
+            raise ValueError(f"未定义的变量或字段: {node.name}")
+        if isinstance(node, Call):
+            if node.name not in TDX_FUNCTIONS:
+                raise ValueError(f"不支持的函数: {node.name}")
+            args = tuple(self.intern(arg) for arg in node.args)
+            return self._add(f"{node.name}({','.join(args)})", CALL, node.name, args)
+        if isinstance(node, UnaryOp):
+            operand = self.intern(node.operand)
+            return self._add(f"(-{operand})", NEGATE, '-', (operand,))
+        if isinstance(node, BinaryOp):
+            left, right = self.intern(node.left), self.intern(node.right)
+            if node.op in COMMUTATIVE_OPERATORS and right < left:
+                left, right = right, left
+            return self._add(f"({left}{node.op}{right})", BINARY, node.op, (left, right))
+        if isinstance(node, String):
+            raise ValueError(f"公式计算不支持字符串常量: {node.value!r}")
+        raise ValueError(f"不支持的语法树节点: {node!r}")
+
+
+def compile_formula(formula: Union[str, Program], params: Optional[Dict[str, float]] = None) -> CompiledFormula:
+    """
+    编译通达信公式
+
+    Args:
+        formula: 公式文本或 parse_program 的结果
+        params: 参数值，覆盖公式中 参数: 行的默认值（参数名不区分大小写）
+
+    Returns:
+        编译后的公式
+    """
+    program = parse_program(formula) if isinstance(formula, str) else formula
+
+    values = {param['name']: param['default'] for param in program.params}
+    for key, value in (params or {}).items():
+        if key.upper() not in values:
+            raise ValueError(f"公式没有该参数: {key}，可用参数: {list(values)}")
+        values[key.upper()] = value
+
+    builder = _Builder(values)
+    variables: Dict[str, str] = {}
+    outputs: Dict[str, str] = {}
+    output_types: Dict[str, str] = {}
+    for i, stmt in enumerate(program.statements):
+        signature = builder.intern(stmt.expr)
+        name = stmt.name
+        if isinstance(stmt, Output):
+            key = name or stmt.type
+            key = key if key not in outputs else f"{key}_{i}"
+            outputs[key] = signature
+            output_types[key] = stmt.type
+        else:
+            variables[name] = signature
+        # 中间变量与有名输出线都可被后续语句引用
+        if name:
+            builder.env[name] = signature
+
+    compiled = CompiledFormula(program.info.get('name', ''), builder.steps, outputs, variables,
+                               values, builder.node_count, output_types)
+    logger.debug(f"编译公式 {compiled.name}: {builder.node_count} 个节点去重为 {len(builder.steps)} 个")
+    return compiled
+
+
+def evaluate_formulas(
+    formulas: Dict[str, Union[str, Program, CompiledFormula]],
+    data: Union[FormulaContext, MarketPanel, pd.DataFrame, Dict[str, np.ndarray]]
+) -> Dict[str, Dict[str, np.ndarray]]:
+    """
+    在同一份行情数据上计算一组公式，公式之间共用相同的中间结果
+
+    Args:
+        formulas: 名称 -> 公式文本、语法树或编译后的公式
+        data: 计算上下文或行情数据
+
+    Returns:
+        名称 -> 该公式的输出
+    """
+    context = data if isinstance(data, FormulaContext) else FormulaContext(data)
+    results = {}
+    for name, formula in formulas.items():
+        compiled = formula if isinstance(formula, CompiledFormula) else compile_formula(formula)
+        results[name] = compiled.evaluate(context)
+    logger.info(f"计算 {len(formulas)} 个公式: 复用 {context.stats['hits']} 个节点, 计算 {context.stats['misses']} 个")
+    return results
+
+
+def screen(
+    formula: Union[str, Program, CompiledFormula],
+    data: Union[FormulaContext, MarketPanel, Dict[str, pd.DataFrame]],
+    date: Optional[str] = None,
+    output: Optional[str] = None,
+    params: Optional[Dict[str, float]] = None
+) -> List[str]:
+    """
+    全市场选股：在 日期×股票 面板上一次计算公式，返回某日条件成立的股票
+
+    Args:
+        formula: 公式文本、语法树或编译后的公式
+        data: 计算上下文、MarketPanel 或 字段 -> 日期×股票 DataFrame 的字典
+        date: 选股日期，默认最后一个交易日
+        output: 作为选股条件的输出名称，默认第一个选股输出（没有则为第一个输出）
+        params: 参数值，formula 为编译后的公式时忽略
+
+    Returns:
+        条件成立的股票代码
+    """
+    compiled = formula if isinstance(formula, CompiledFormula) else compile_formula(formula, params)
+    if not compiled.outputs:
+        raise ValueError(f"公式没有输出: {compiled.name}")
+    if output is None:
+        selections = [name for name, kind in compiled.output_types.items() if kind == 'selection']
+        output = selections[0] if selections else next(iter(compiled.outputs))
+    elif output not in compiled.outputs:
+        raise ValueError(f"公式没有该输出: {output}，可用输出: {list(compiled.outputs)}")
+
+    context = data if isinstance(data, FormulaContext) else FormulaContext(data)
+    if context.columns is None or len(context.shape) != 2:
+        raise ValueError("选股需要 日期×股票 的面板数据")
+    row = len(context.index) - 1 if date is None else context.index.get_loc(pd.Timestamp(date))
+    selected = _condition(compiled.evaluate(context)[output][row])
+    return [symbol for symbol, hit in zip(context.columns, selected) if hit]
+
+
+if __name__ == "__main__":
+    # 测试代码
+    logging.basicConfig(level=logging.INFO)
+    from src.strategy.tdx_formula_parser import EXAMPLE_FORMULA
+
+    rng = np.random.default_rng(0)
+    close = 10 + np.cumsum(rng.standard_normal(500)) * 0.1
+    data = pd.DataFrame({'open': close, 'high': close + 0.1, 'low': close - 0.1, 'close': close,
+                         'volume': rng.integers(1000, 5000, 500).astype(float)},
+                        index=pd.bdate_range('2023-01-02', periods=500))
+
+    compiled = compile_formula(EXAMPLE_FORMULA)
+    print(compiled)
+    for signature in compiled.steps:
+        print("  ", signature)
+
+    macd = compile_formula("DIF:EMA(C,12)-EMA(C,26); DEA:EMA(DIF,9); MACD:(DIF-DEA)*2;")
+    results = evaluate_formulas({'金叉': compiled, 'MACD': macd, '放量': "V>MA(V,5)*2 AND C>REF(C,1);"}, data)
+    print({name: {key: int(np.nansum(value)) for key, value in outputs.items()} for name, outputs in results.items()})
+
+    # 全市场面板：2500个交易日 × 2000只股票
+    import time
+    dates, symbols = pd.bdate_range('2015-01-01', periods=2500), [f"{i:06d}.SZ" for i in range(2000)]
+    close = 10 * np.exp(np.cumsum(rng.standard_normal((2500, 2000)) * 0.02, axis=0))
+    panel = {'close': pd.DataFrame(close, index=dates, columns=symbols),
+             'volume': pd.DataFrame(rng.integers(1000, 5000, close.shape).astype(float), index=dates, columns=symbols)}
+    started = time.perf_counter()
+    selected = screen("选股:CROSS(MA(C,5),MA(C,20)) AND V>MA(V,5);", panel)
+    print(f"全市场选股 {close.shape}: {time.perf_counter() - started:.2f}秒, 选出 {len(selected)} 只")
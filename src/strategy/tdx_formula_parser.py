@@ -4,10 +4,11 @@
 """
 
 import re
-import ast
 from typing import Dict, List, Optional, Tuple, Any
 import logging
 
+from src.strategy.tdx_ast import BinaryOp, Call, Name, Node, Number, String, UnaryOp, parse_expression, parse_program
+
 logger = logging.getLogger(__name__)
 
 
@@ -26,54 +27,57 @@ class TDXFunction:
 class TDXFormulaParser:
     """通达信公式解析器"""
     
-    # 通达信内置函数映射到Python
+    # 通达信内置函数映射到Python（rt 为 src.strategy.tdx_runtime）
     FUNCTION_MAP = {
         # 数学函数
-        'ABS': 'abs',
-        'MAX': 'max',
-        'MIN': 'min',
-        'POW': 'pow',
-        'SQRT': 'sqrt',
-        'LN': 'np.log',
-        'LOG': 'np.log10',
-        'EXP': 'np.exp',
-        
+        'ABS': 'rt.ABS',
+        'MAX': 'rt.MAX',
+        'MIN': 'rt.MIN',
+        'POW': 'rt.POW',
+        'SQRT': 'rt.SQRT',
+        'LN': 'rt.LN',
+        'LOG': 'rt.LOG',
+        'EXP': 'rt.EXP',
+        'SIGN': 'rt.SIGN',
+        'MOD': 'rt.MOD',
+
         # 统计函数
-        'MA': 'ta.MA',  # 移动平均
-        'EMA': 'ta.EMA',  # 指数移动平均
-        'SMA': 'ta.SMA',  # 简单移动平均
-        'HHV': 'ta.MAX',  # 最高值
-        'LLV': 'ta.MIN',  # 最低值
-        'SUM': 'ta.SUM',  # 求和
-        'COUNT': 'ta.COUNT',  # 计数
-        'REF': 'ta.REF',  # 引用前N周期
-        'CROSS': 'ta.CROSS',  # 交叉函数
-        
-        # 技术指标
-        'MACD': 'ta.MACD',
-        'KDJ': 'ta.STOCH',
-        'RSI': 'ta.RSI',
-        'BOLL': 'ta.BBANDS',
-        'CCI': 'ta.CCI',
-        'WR': 'ta.WILLR',
-        
+        'MA': 'rt.MA',  # 移动平均
+        'WMA': 'rt.WMA',  # 加权移动平均
+        'EMA': 'rt.EMA',  # 指数移动平均
+        'EXPMA': 'rt.EMA',
+        'SMA': 'rt.SMA',  # 扩展指数加权移动平均
+        'DMA': 'rt.DMA',  # 动态移动平均
+        'HHV': 'rt.HHV',  # 最高值
+        'LLV': 'rt.LLV',  # 最低值
+        'SUM': 'rt.SUM',  # 求和
+        'COUNT': 'rt.COUNT',  # 计数
+        'REF': 'rt.REF',  # 引用前N周期
+        'STD': 'rt.STD',
+        'STDP': 'rt.STDP',
+        'VAR': 'rt.VAR',
+        'VARP': 'rt.VARP',
+        'AVEDEV': 'rt.AVEDEV',
+
         # 逻辑函数
-        'IF': 'np.where',
-        'AND': 'np.logical_and',
-        'OR': 'np.logical_or',
-        'NOT': 'np.logical_not',
-        
-        # 价格数据
-        'CLOSE': 'close',
-        'OPEN': 'open',
-        'HIGH': 'high',
-        'LOW': 'low',
-        'VOLUME': 'volume',
-        'AMOUNT': 'amount',
-        
+        'CROSS': 'rt.CROSS',  # 交叉函数
+        'IF': 'rt.IF',
+        'IFF': 'rt.IF',
+        'NOT': 'rt.NOT',
+        'EVERY': 'rt.EVERY',
+        'EXIST': 'rt.EXIST',
+        'BETWEEN': 'rt.BETWEEN',
+        'FILTER': 'rt.FILTER',  # 过滤连续信号
+
         # 其他
-        'BARSLAST': 'ta.BARSLAST',  # 上一次条件成立到当前的周期数
-        'BARSCOUNT': 'ta.BARSCOUNT',  # 有效数据周期数
+        'BARSLAST': 'rt.BARSLAST',  # 上一次条件成立到当前的周期数
+        'BARSCOUNT': 'rt.BARSCOUNT',  # 有效数据周期数
+    }
+    
+    # 语法树中的运算符映射到Python（作用于NumPy数组的按位与/或）
+    OPERATOR_MAP = {
+        'AND': '&',
+        'OR': '|',
     }
     
     def __init__(self):
@@ -88,23 +92,23 @@ class TDXFormulaParser:
             formula_text: 通达信公式文本
             
         Returns:
-            解析后的公式结构
+            解析后的公式结构，program 为语法树
         """
         logger.info("开始解析通达信公式")
         
-        # 清理公式文本
-        cleaned_text = self._clean_formula_text(formula_text)
-        
-        # 提取公式信息
-        formula_info = self._extract_formula_info(cleaned_text)
+        # 词法与语法分析
+        program = parse_program(formula_text)
+        formula_info = dict(program.info)
         
-        # 解析变量定义
-        variables = self._parse_variables(cleaned_text)
-        
-        # 解析输出条件
-        output_conditions = self._parse_output_conditions(cleaned_text)
+        # 中间变量与输出条件
+        variables = {name: stmt.text for name, stmt in program.variables.items()}
+        output_conditions = [
+            {'name': output.name, 'expression': output.text, 'type': output.type}
+            for output in program.outputs
+        ]
         
         # 转换为Python代码
+        cleaned_text = self._clean_formula_text(formula_text)
         python_code = self._convert_to_python(cleaned_text, formula_info, variables, output_conditions)
         
         result = {
@@ -112,6 +116,7 @@ class TDXFormulaParser:
             'variables': variables,
             'output_conditions': output_conditions,
             'python_code': python_code,
+            'program': program,
             'original_text': formula_text,
             'cleaned_text': cleaned_text
         }
@@ -139,92 +144,6 @@ class TDXFormulaParser:
         
         return cleaned_text
     
-    def _extract_formula_info(self, text: str) -> Dict:
-        """提取公式基本信息"""
-        info = {
-            'name': '未命名公式',
-            'description': '',
-            'params': []
-        }
-        
-        # 尝试提取公式名称（通达信公式通常以特定格式开始）
-        name_match = re.search(r'公式名称[:：]\s*([^\s;]+)', text)
-        if name_match:
-            info['name'] = name_match.group(1)
-            
-        # 提取描述
-        desc_match = re.search(r'公式描述[:：]\s*([^;]+)', text)
-        if desc_match:
-            info['description'] = desc_match.group(1).strip()
-            
-        # 提取参数（简化处理）
-        param_matches = re.finditer(r'参数[:：]\s*([^;]+)', text)
-        for match in param_matches:
-            params_text = match.group(1)
-            # 解析参数定义，如 "N1(5,1,100)" 表示参数N1，默认值5，最小值1，最大值100
-            param_defs = re.finditer(r'(\w+)\(([^)]+)\)', params_text)
-            for param_match in param_defs:
-                param_name = param_match.group(1)
-                param_values = param_match.group(2).split(',')
-                
-                param_info = {
-                    'name': param_name,
-                    'default': float(param_values[0]) if param_values[0].replace('.', '').isdigit() else param_values[0],
-                    'min': float(param_values[1]) if len(param_values) > 1 and param_values[1].replace('.', '').isdigit() else None,
-                    'max': float(param_values[2]) if len(param_values) > 2 and param_values[2].replace('.', '').isdigit() else None
-                }
-                info['params'].append(param_info)
-                
-        return info
-    
-    def _parse_variables(self, text: str) -> Dict[str, str]:
-        """解析变量定义"""
-        variables = {}
-        
-        # 查找变量赋值语句，如 "MA5:=MA(CLOSE,5);"
-        var_pattern = r'(\w+)\s*:=\s*([^;]+);'
-        matches = re.finditer(var_pattern, text)
-        
-        for match in matches:
-            var_name = match.group(1)
-            var_expr = match.group(2).strip()
-            variables[var_name] = var_expr
-            
-        return variables
-    
-    def _parse_output_conditions(self, text: str) -> List[Dict]:
-        """解析输出条件"""
-        conditions = []
-        
-        # 查找输出语句，如 "选股:条件表达式;"
-        output_pattern = r'选股\s*[:：]\s*([^;]+);'
-        matches = re.finditer(output_pattern, text)
-        
-        for match in matches:
-            condition_expr = match.group(1).strip()
-            conditions.append({
-                'expression': condition_expr,
-                'type': 'selection'  # 选股条件
-            })
-            
-        # 查找买入卖出条件
-        buy_pattern = r'买入\s*[:：]\s*([^;]+);'
-        sell_pattern = r'卖出\s*[:：]\s*([^;]+);'
-        
-        for match in re.finditer(buy_pattern, text):
-            conditions.append({
-                'expression': match.group(1).strip(),
-                'type': 'buy'
-            })
-            
-        for match in re.finditer(sell_pattern, text):
-            conditions.append({
-                'expression': match.group(1).strip(),
-                'type': 'sell'
-            })
-            
-        return conditions
-    
     def _convert_to_python(self, text: str, formula_info: Dict, variables: Dict, conditions: List[Dict]) -> str:
         """转换为Python代码"""
         python_lines = []
@@ -232,7 +151,7 @@ class TDXFormulaParser:
         # 添加导入语句
         python_lines.append("import numpy as np")
         python_lines.append("import pandas as pd")
-        python_lines.append("import talib as ta")
+        python_lines.append("from src.strategy import tdx_runtime as rt")
         python_lines.append("")
         
         # 添加函数定义
@@ -301,28 +220,29 @@ class TDXFormulaParser:
     
     def _convert_expression(self, expr: str) -> str:
         """转换表达式为Python语法"""
-        # 替换通达信函数为Python函数
-        converted = expr
-        
-        # 首先替换内置变量
-        for tdx_func, py_func in self.FUNCTION_MAP.items():
-            # 使用正则表达式确保只替换函数调用，不替换变量名的一部分
-            pattern = r'\b' + re.escape(tdx_func) + r'\b'
-            converted = re.sub(pattern, py_func, converted)
-        
-        # 替换逻辑运算符
-        converted = converted.replace('AND', '&').replace('OR', '|').replace('NOT', '~')
-        
-        # 替换比较运算符
-        converted = converted.replace('>', '>').replace('<', '<')
-        converted = converted.replace('>=', '>=').replace('<=', '<=')
-        converted = converted.replace('=', '==').replace('<>', '!=')
-        
-        # 处理通达信特有的语法
-        # 例如：CROSS(A,B) 表示A上穿B
-        # 这里简化处理，实际需要更复杂的转换
-        
-        return converted
+        return self._node_to_python(parse_expression(expr))
+    
+    def _node_to_python(self, node: Node) -> str:
+        """由语法树生成Python表达式，子运算一律加括号，不依赖Python的运算符优先级"""
+        if isinstance(node, Number):
+            return repr(int(node.value)) if node.value.is_integer() else repr(node.value)
+        if isinstance(node, String):
+            return repr(node.value)
+        if isinstance(node, Name):
+            return node.field or node.name
+        if isinstance(node, Call):
+            args = ', '.join(self._node_to_python(arg) for arg in node.args)
+            return f"{self.FUNCTION_MAP.get(node.name, node.name)}({args})"
+        
+        def operand(child: Node) -> str:
+            text = self._node_to_python(child)
+            return f"({text})" if isinstance(child, (BinaryOp, UnaryOp)) else text
+        
+        if isinstance(node, UnaryOp):
+            return f"{node.op}{operand(node.operand)}"
+        if isinstance(node, BinaryOp):
+            return f"{operand(node.left)} {self.OPERATOR_MAP.get(node.op, node.op)} {operand(node.right)}"
+        raise ValueError(f"不支持的语法树节点: {node!r}")
     
     def generate_strategy_class(self, formula_text: str) -> str:
         """
@@ -0,0 +1,115 @@
+"""
+通达信路径相关函数的JIT内核
+SMA/EMA/DMA 递推、BARSLAST、FILTER 与变周期 REF 依赖前一时刻的状态，NumPy只能逐日期循环；
+安装 numba 时这些内核编译为机器码，逐列逐日期计算，没有 numba 时 tdx_runtime 使用NumPy实现。
+内核只处理二维 (日期, 列) 的连续数组，由 tdx_runtime 负责形状转换与后端选择
+"""
+
+import numpy as np
+import time
+from typing import Callable
+import logging
+
+logger = logging.getLogger(__name__)
+
+try:
+    import numba
+    HAS_NUMBA = True
+except ImportError:
+    numba = None
+    HAS_NUMBA = False
+
+
+def _jit(func: Callable) -> Callable:
+    """有 numba 时编译为 nopython 函数（缓存到 __pycache__），否则原样返回"""
+    if not HAS_NUMBA:
+        return func
+    return numba.njit(cache=True, nogil=True)(func)
+
+
+# 内核按日期在外、列在内循环，每列的状态保存在数组中，按行连续访问 (日期, 列) 数组
+
+@_jit
+def recursive_kernel(x, alpha, out):
+    """Y = alpha*X + (1-alpha)*Y'，从第一个有效值开始；X无效时结果无效，之后重新开始"""
+    n, m = x.shape
+    previous = np.full(m, np.nan)
+    for t in range(n):
+        for j in range(m):
+            current = x[t, j]
+            if np.isnan(previous[j]):
+                previous[j] = current
+            else:
+                a = alpha[t, j]
+                previous[j] = a * current + (1 - a) * previous[j]
+            out[t, j] = previous[j]
+
+
+@_jit
+def barslast_kernel(cond, out):
+    """上一次条件成立到当前的周期数，从未成立为NaN"""
+    n, m = cond.shape
+    last = np.full(m, -1)
+    for t in range(n):
+        for j in range(m):
+            if cond[t, j]:
+                last[j] = t
+            out[t, j] = t - last[j] if last[j] >= 0 else np.nan
+
+
+@_jit
+def filter_kernel(cond, period, out):
+    """条件成立后其后 period 个周期的信号置为不成立"""
+    n, m = cond.shape
+    blocked = np.zeros(m, dtype=np.int64)
+    for t in range(n):
+        for j in range(m):
+            hit = cond[t, j] and blocked[j] == 0
+            out[t, j] = hit
+            if hit:
+                blocked[j] = period
+            elif blocked[j] > 0:
+                blocked[j] -= 1
+
+
+@_jit
+def ref_kernel(x, periods, out):
+    """变周期引用：out[t] = x[t - N[t]]，N无效、为负或引用位置早于第一个周期时为NaN"""
+    n, m = x.shape
+    for t in range(n):
+        for j in range(m):
+            k = periods[t, j]
+            if np.isnan(k) or k < 0:
+                out[t, j] = np.nan
+                continue
+            source = t - int(k)
+            out[t, j] = x[source, j] if source >= 0 else np.nan
+
+
+if __name__ == "__main__":
+    # 测试代码
+    logging.basicConfig(level=logging.INFO)
+    from src.strategy import tdx_runtime as rt
+
+    rng = np.random.default_rng(0)
+    values = 10 + np.cumsum(rng.standard_normal((2500, 500)), axis=0) * 0.1
+    periods = rng.integers(0, 20, values.shape).astype(float)
+    cases = {
+        'SMA': lambda: rt.SMA(values, 9, 1),
+        'DMA': lambda: rt.DMA(values, 0.1),
+        'BARSLAST': lambda: rt.BARSLAST(values > rt.REF(values, 1)),
+        'FILTER': lambda: rt.FILTER(values > rt.REF(values, 1), 5),
+        'REF(X,N序列)': lambda: rt.REF(values, periods),
+    }
+
+    print(f"numba 可用: {HAS_NUMBA}，2500个交易日 × 500只股票")
+    for name, case in cases.items():
+        timings = {}
+        for backend in (["numpy", "numba"] if HAS_NUMBA else ["numpy"]):
+            rt.set_backend(backend)
+            case()  # 预热（首次调用编译）
+            started = time.perf_counter()
+            case()
+            timings[backend] = (time.perf_counter() - started) * 1000
+        print(name, {backend: f"{ms:.1f}ms" for backend, ms in timings.items()})
+    rt.set_backend("auto")
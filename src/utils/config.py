@@ -0,0 +1,74 @@
+"""
+配置加载模块
+读取 config/config.yaml 与 config/data_sources.yaml
+"""
+
+from pathlib import Path
+from typing import Any, Dict, Optional, Union
+import logging
+
+logger = logging.getLogger(__name__)
+
+# 项目根目录及默认配置文件路径
+PROJECT_ROOT = Path(__file__).resolve().parents[2]
+DEFAULT_CONFIG_PATH = PROJECT_ROOT / "config" / "config.yaml"
+DATA_SOURCES_CONFIG_PATH = PROJECT_ROOT / "config" / "data_sources.yaml"
+
+
+def _load_yaml(path: Union[str, Path]) -> Dict:
+    """读取YAML文件，文件不存在或解析失败时返回空字典"""
+    path = Path(path)
+    if not path.exists():
+        logger.warning(f"配置文件不存在: {path}")
+        return {}
+
+    try:
+        import yaml
+        with open(path, 'r', encoding='utf-8') as f:
+            return yaml.safe_load(f) or {}
+    except Exception as e:
+        logger.error(f"读取配置文件失败 {path}: {e}")
+        return {}
+
+
+def load_config(config_path: Optional[Union[str, Path]] = None) -> Dict:
+    """
+    加载主配置文件
+    
+    Args:
+        config_path: 配置文件路径，默认为 config/config.yaml
+        
+    Returns:
+        配置字典
+    """
+    return _load_yaml(config_path or DEFAULT_CONFIG_PATH)
+
+
+def load_data_sources_config(config_path: Optional[Union[str, Path]] = None) -> Dict:
+    """
+    加载数据源配置文件
+    
+    Args:
+        config_path: 配置文件路径，默认为 config/data_sources.yaml
+        
+    Returns:
+        配置字典
+    """
+    return _load_yaml(config_path or DATA_SOURCES_CONFIG_PATH)
+
+
+def get_config_section(
+    section: str,
+    config_path: Optional[Union[str, Path]] = None
+) -> Dict[str, Any]:
+    """
+    获取主配置中的某个配置段
+    
+    Args:
+        section: 配置段名称，如 "storage"、"performance"
+        config_path: 配置文件路径
+        
+    Returns:
+        配置段字典，不存在时返回空字典
+    """
+    return load_config(config_path).get(section) or {}
@@ -7,12 +7,14 @@ import argparse
 import sys
 import os
 import logging
+from datetime import datetime
 from pathlib import Path
 
 # 添加项目根目录到路径
 sys.path.insert(0, str(Path(__file__).parent.parent))
 
 from src.data.data_provider import create_data_provider
+from src.data.sync import SyncCheckpoint, resolve_universe, sync_universe
 from src.backtest.backtest_engine import create_backtest_engine, MovingAverageCrossover
 from src.strategy.tdx_formula_parser import TDXFormulaParser
 
@@ -155,6 +157,77 @@ def parse_formula(args):
         print(f"❌ 公式解析失败: {e}")
 
 
+def sync_data(args) -> int:
+    """将股票池的日线同步到本地存储"""
+    today = datetime.now().strftime('%Y-%m-%d')
+    print(f"\n同步股票池: {args.universe} ({args.start_date} 到 {args.end_date or today}, {args.data_source})")
+    
+    if args.data_source in ("eastmoney", "sina"):
+        from src.data.free_data_provider import create_free_data_provider
+        provider = create_free_data_provider(args.data_source)
+    else:
+        provider = create_data_provider(args.data_source)
+        
+    try:
+        if provider.store is None:
+            print("❌ 未启用本地存储，请在 config/config.yaml 中设置 storage.cache_enabled")
+            return 1
+            
+        if args.update_reference:
+            if not hasattr(provider, 'update_reference_data'):
+                print(f"❌ {args.data_source} 不提供交易日历与证券列表")
+                return 1
+            provider.update_reference_data(args.start_date, args.end_date or today)
+            
+        if args.symbols:
+            symbols = [s.strip() for s in args.symbols.split(',') if s.strip()]
+        else:
+            symbols = resolve_universe(args.universe, provider)
+        print(f"共 {len(symbols)} 只股票")
+        
+        # 未指定结束日期时任务不含结束日期，跨天中断后仍可继续，结束日期沿用检查点中记录的值
+        job = {
+            'universe': args.universe if not args.symbols else ",".join(symbols),
+            'data_source': args.data_source,
+            'start_date': args.start_date,
+            'end_date': args.end_date,
+            'adjust': args.adjust,
+        }
+        name = "custom" if args.symbols else args.universe
+        checkpoint_path = args.checkpoint or provider.store.data_dir / "sync" / f"{name}_{args.adjust}.json"
+        checkpoint = SyncCheckpoint(checkpoint_path, job)
+        if args.restart:
+            checkpoint.clear()
+        end_date = args.end_date or checkpoint.end_date or today
+        checkpoint.end_date = end_date
+        if end_date != (args.end_date or today):
+            print(f"从检查点继续，结束日期沿用 {end_date}")
+            
+        def progress(stats):
+            if args.verbose or stats.completed % 100 == 0:
+                print(f"  {stats.format()}")
+                
+        stats = sync_universe(provider, symbols, args.start_date, end_date, args.adjust,
+                              checkpoint=checkpoint, max_workers=args.workers, progress=progress)
+        
+        print(f"{'✅' if stats.failed == 0 else '⚠️'} 同步完成: {stats.format()}")
+        if checkpoint.failed:
+            print(f"   失败的股票（下次运行时重试）: {', '.join(sorted(checkpoint.failed)[:20])}")
+        elif args.end_date is None:
+            # 同步到当天的任务全部完成后删除检查点，下次运行同步到新的当天
+            checkpoint.clear()
+        return 0 if stats.failed == 0 else 2
+        
+    except KeyboardInterrupt:
+        print("\n⚠️ 同步已中断，进度已保存，再次运行同一命令即可继续")
+        return 130
+    except ValueError as e:
+        print(f"❌ 同步失败: {e}")
+        return 1
+    finally:
+        provider.cleanup()
+
+
 def show_help(args):
     """显示帮助信息"""
     print("""
@@ -169,7 +242,10 @@ def show_help(args):
   3. 解析通达信公式
      tdxtools parse --formula-file my_formula.txt
      
-  4. 查看帮助
+  4. 同步股票池到本地存储（可中断后继续）
+     tdxtools sync --universe csi300 --start-date 2015-01-01
+     
+  5. 查看帮助
      tdxtools --help
      
 示例:
@@ -182,6 +258,9 @@ def show_help(args):
   
   # 解析通达信公式
   tdxtools parse --formula-file formula.txt --output strategy.py
+  
+  # 每晚同步全部A股（cron），失败的股票下次运行时重试
+  tdxtools sync --universe all --data-source baostock --update-reference
 """)
 
 
@@ -231,6 +310,33 @@ def main():
                             help="通达信公式文件路径")
     parse_parser.add_argument("--output", help="输出文件路径")
     
+    # 同步命令
+    sync_parser = subparsers.add_parser("sync", help="同步股票池日线到本地存储")
+    sync_parser.add_argument("--universe", default="test",
+                           help="股票池名称（config/data_sources.yaml 中的 stock_pools），或 all 表示全部A股")
+    sync_parser.add_argument("--symbols",
+                           help="股票代码，多个用逗号分隔，指定时忽略 --universe")
+    sync_parser.add_argument("--start-date", default="2015-01-01",
+                           help="开始日期")
+    sync_parser.add_argument("--end-date",
+                           help="结束日期，默认今天")
+    sync_parser.add_argument("--data-source", default="akshare",
+                           choices=["tushare", "akshare", "baostock", "eastmoney", "sina"],
+                           help="数据源类型")
+    sync_parser.add_argument("--adjust", default="qfq",
+                           choices=["qfq", "hfq", "None"],
+                           help="复权类型")
+    sync_parser.add_argument("--workers", type=int,
+                           help="并发线程数，默认读取配置 performance.max_workers")
+    sync_parser.add_argument("--checkpoint",
+                           help="检查点文件路径，默认 {存储目录}/sync/{股票池}_{复权类型}.json")
+    sync_parser.add_argument("--restart", action="store_true",
+                           help="忽略已有检查点，从头开始")
+    sync_parser.add_argument("--update-reference", action="store_true",
+                           help="同步前更新交易日历与证券主表（tushare/akshare/baostock）")
+    sync_parser.add_argument("--verbose", action="store_true",
+                           help="每完成一只股票打印一次进度")
+    
     # 帮助命令
     help_parser = subparsers.add_parser("help", help="显示帮助信息")
     
@@ -246,6 +352,8 @@ def main():
         run_backtest(args)
     elif args.command == "parse":
         parse_formula(args)
+    elif args.command == "sync":
+        sys.exit(sync_data(args))
     elif args.command == "help":
         show_help(args)
     else:
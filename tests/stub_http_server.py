@@ -0,0 +1,98 @@
+"""
+回放录制响应的本地HTTP桩服务器，用于离线测试HTTP数据源
+"""
+
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from urllib.parse import parse_qs, urlparse
+
+FIXTURE_DIR = Path(__file__).parent / "fixtures" / "http"
+
+# 请求路径 -> (录制文件名前缀, 用于区分股票的查询参数)，参数为None时所有请求回放同一文件
+ROUTES = {
+    '/api/qt/stock/kline/get': ('eastmoney', 'secid'),
+    '/quotes_service/api/json_v2.php/CN_MarketData.getKLineData': ('sina', 'symbol'),
+    '/api/qt/ulist.np/get': ('eastmoney_quotes', None),
+    '/': ('sina_quotes', None),
+}
+
+
+class StubHTTPServer:
+    """在后台线程中运行的桩服务器，按 {数据源}_{参数值}.json 回放录制的响应"""
+
+    def __init__(self, fixture_dir: Path = FIXTURE_DIR, latency: float = 0.0):
+        self.fixture_dir = Path(fixture_dir)
+        self.latency = latency
+        self.request_count = 0
+        self.active = 0
+        self.peak = 0
+        self._lock = threading.Lock()
+        self._server = ThreadingHTTPServer(('127.0.0.1', 0), self._make_handler())
+        self._server.daemon_threads = True
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+
+    @property
+    def base_url(self) -> str:
+        host, port = self._server.server_address
+        return f"http://{host}:{port}"
+
+    def _make_handler(self):
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+
+            def do_GET(self):
+                with stub._lock:
+                    stub.request_count += 1
+                    stub.active += 1
+                    stub.peak = max(stub.peak, stub.active)
+                try:
+                    if stub.latency:
+                        time.sleep(stub.latency)
+                    url = urlparse(self.path)
+                    route = ROUTES.get(url.path)
+                    path = None
+                    if route:
+                        source, key = route
+                        if key is None:
+                            path = stub.fixture_dir / f"{source}.json"
+                        else:
+                            value = parse_qs(url.query).get(key, [''])[0]
+                            path = stub.fixture_dir / f"{source}_{value}.json"
+
+                    if path is not None and path.exists():
+                        body = path.read_bytes()
+                        self.send_response(200)
+                    else:
+                        body = b'null'
+                        self.send_response(404)
+                    self.send_header('Content-Type', 'application/json')
+                    self.send_header('Content-Length', str(len(body)))
+                    self.end_headers()
+                    self.wfile.write(body)
+                finally:
+                    with stub._lock:
+                        stub.active -= 1
+
+            def log_message(self, format, *args):
+                pass
+
+        return Handler
+
+    def start(self) -> 'StubHTTPServer':
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
@@ -0,0 +1,228 @@
+"""
+复权计算测试
+"""
+
+import unittest
+import tempfile
+import shutil
+import pandas as pd
+import numpy as np
+from unittest import mock
+
+from src.data.adjustment import apply_adjustment, factors_from_events
+from src.data.data_provider import DataProvider
+from src.data.free_data_provider import FreeDataProvider
+from src.data.local_store import LocalDataStore
+from src.data.rate_limiter import TokenBucket
+
+
+def make_raw_frame(symbol: str = "000001.SZ") -> pd.DataFrame:
+    """创建2024-01-15除权（每股派1元、10送10）的不复权日线"""
+    dates = pd.bdate_range("2024-01-08", "2024-01-19", name='date')
+    close = np.array([21.0, 21.0, 21.0, 21.0, 21.0, 10.0, 10.0, 10.0, 10.0, 10.0])
+    return pd.DataFrame({
+        'open': close, 'high': close + 0.5, 'low': close - 0.5, 'close': close,
+        'volume': np.full(len(dates), 1000.0), 'symbol': symbol
+    }, index=dates)
+
+
+class FactorProvider(DataProvider):
+    """只提供不复权行情与复权因子的测试用数据提供器"""
+
+    def _init_data_source(self):
+        self.calls = []
+        self.factor_calls = 0
+
+    def _fetch_daily(self, symbol, start_date, end_date, adjust):
+        self.calls.append(adjust)
+        df = make_raw_frame(symbol)
+        return df.loc[start_date:end_date]
+
+    def _fetch_adjust_factors(self, symbol):
+        self.factor_calls += 1
+        return pd.Series([1.0, 2.0], index=pd.DatetimeIndex(["2000-01-04", "2024-01-15"]), name='factor')
+
+
+class FreeFactorProvider(FreeDataProvider):
+    """上游复权因子为空的免费数据源测试用提供器"""
+
+    def _init_data_source(self):
+        pass
+
+    def _fetch_daily(self, symbol, start_date, end_date, adjust):
+        return make_raw_frame(symbol).loc[start_date:end_date]
+
+    def _fetch_adjust_factors(self, symbol):
+        return pd.Series(dtype=np.float64, name='factor')
+
+
+class FakeTicker:
+    """模拟 yfinance.Ticker：2024-01-15 每股派1元，价格已按拆股调整，end 不包含在内"""
+
+    history_calls = []
+
+    def __init__(self, symbol):
+        self.symbol = symbol
+
+    def history(self, start=None, end=None, period=None, auto_adjust=True):
+        FakeTicker.history_calls.append(period or "window")
+        raw = make_raw_frame()
+        df = pd.DataFrame({
+            'Open': raw['open'] + 0.2, 'High': raw['high'], 'Low': raw['low'], 'Close': raw['close'],
+            'Volume': raw['volume'], 'Dividends': 0.0, 'Stock Splits': 0.0
+        }).set_axis(raw.index.tz_localize('Asia/Shanghai').rename('Date'))
+        df.loc[df.index[5], 'Dividends'] = 1.0
+        if period == "max":
+            return df
+        return df[(df.index >= pd.Timestamp(start, tz='Asia/Shanghai'))
+                  & (df.index < pd.Timestamp(end, tz='Asia/Shanghai'))]
+
+
+class TestAdjustment(unittest.TestCase):
+    """测试复权因子计算与复权"""
+
+    def test_factors_from_events(self):
+        """测试由除权除息事件计算累积因子"""
+        close = make_raw_frame()['close']
+        events = pd.DataFrame({'cash_dividend': [0.1], 'bonus_ratio': [1.0]},
+                              index=pd.DatetimeIndex(["2024-01-15"]))
+        factors = factors_from_events(close, events)
+
+        # 除权价 = (21 - 0.1) / 2 = 10.45
+        self.assertAlmostEqual(factors.iloc[4], 1.0)
+        self.assertAlmostEqual(factors.iloc[5], 21.0 / 10.45)
+        self.assertAlmostEqual(factors.iloc[-1], 21.0 / 10.45)
+
+    def test_event_on_non_trading_day(self):
+        """测试除权日不是交易日时顺延，区间外事件忽略"""
+        close = make_raw_frame()['close']
+        events = pd.DataFrame({'bonus_ratio': [1.0, 1.0]},
+                              index=pd.DatetimeIndex(["2024-01-13", "2023-06-01"]))
+        factors = factors_from_events(close, events)
+
+        self.assertEqual(list(factors.values), [1.0] * 5 + [2.0] * 5)
+
+    def test_qfq_hfq(self):
+        """测试前复权以最新因子为基准，后复权以上市首日为基准"""
+        raw = make_raw_frame()
+        factors = pd.Series([1.0, 2.0], index=pd.DatetimeIndex(["2000-01-04", "2024-01-15"]))
+
+        qfq = apply_adjustment(raw, factors, "qfq")
+        hfq = apply_adjustment(raw, factors, "hfq")
+
+        self.assertEqual(list(qfq['close']), [10.5] * 5 + [10.0] * 5)
+        self.assertEqual(list(hfq['close']), [21.0] * 5 + [20.0] * 5)
+        pd.testing.assert_series_equal(qfq['volume'], raw['volume'])
+        self.assertIs(apply_adjustment(raw, factors, "None"), raw)
+
+
+class TestProviderAdjustment(unittest.TestCase):
+    """测试数据提供器只存储不复权行情并按需复权"""
+
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.store = LocalDataStore(self.tmp_dir, cache_ttl=3600)
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir, ignore_errors=True)
+
+    def test_raw_bars_stored_once(self):
+        """测试前复权、后复权与不复权共用同一份本地行情"""
+        provider = FactorProvider("tushare", store=self.store)
+        provider.rate_limiter = TokenBucket(rate=0)
+
+        qfq = provider.get_daily_data("000001.SZ", "2024-01-08", "2024-01-19", "qfq")
+        hfq = provider.get_daily_data("000001.SZ", "2024-01-08", "2024-01-19", "hfq")
+        raw = provider.get_daily_data("000001.SZ", "2024-01-08", "2024-01-19", "None")
+
+        self.assertEqual(provider.calls, ["None"])
+        self.assertEqual(provider.factor_calls, 1)
+        self.assertEqual(self.store.list_symbols("qfq"), [])
+        self.assertEqual(qfq.loc["2024-01-12", "close"], 10.5)
+        self.assertEqual(hfq.loc["2024-01-19", "close"], 20.0)
+        self.assertEqual(raw.loc["2024-01-12", "close"], 21.0)
+
+    def test_factors_cached(self):
+        """测试复权因子写入本地存储"""
+        provider = FactorProvider("tushare", store=self.store)
+        provider.rate_limiter = TokenBucket(rate=0)
+        provider.get_daily_data("000001.SZ", "2024-01-08", "2024-01-19", "qfq")
+
+        factors = self.store.read_adjust_factors("000001.SZ")
+        self.assertEqual(list(factors.values), [1.0, 2.0])
+
+        self.store.clear("000001.SZ")
+        self.assertIsNone(self.store.read_adjust_factors("000001.SZ"))
+
+
+    def test_missing_factors_raise(self):
+        """测试取不到复权因子时前/后复权请求抛出异常，不返回不复权价格"""
+        provider = FactorProvider("tushare", store=self.store)
+        provider.rate_limiter = TokenBucket(rate=0)
+        provider.retry_count = 0
+        provider._fetch_adjust_factors = mock.Mock(side_effect=ConnectionError("模拟请求失败"))
+
+        for adjust in ["qfq", "hfq"]:
+            with self.subTest(adjust=adjust):
+                with self.assertRaises(ValueError):
+                    provider.get_daily_data("000001.SZ", "2024-01-08", "2024-01-19", adjust)
+        raw = provider.get_daily_data("000001.SZ", "2024-01-08", "2024-01-19", "None")
+        self.assertEqual(raw.loc["2024-01-12", "close"], 21.0)
+        self.assertEqual(self.store.list_symbols("qfq"), [])
+
+        free = FreeFactorProvider("akshare", store=self.store)
+        free.rate_limiter = TokenBucket(rate=0)
+        free.retry_count = 0
+        with self.assertRaises(ValueError):
+            free.get_daily_data("000002.SZ", "2024-01-08", "2024-01-19", "qfq")
+
+
+class TestYFinanceAdjustment(unittest.TestCase):
+    """测试Yahoo Finance按全部历史的分红复权"""
+
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.store = LocalDataStore(self.tmp_dir, cache_ttl=3600)
+        FakeTicker.history_calls = []
+        patcher = mock.patch('src.data.free_data_provider.yf', mock.Mock(Ticker=FakeTicker))
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir, ignore_errors=True)
+
+    def make_provider(self, store=None):
+        provider = FreeDataProvider("yfinance", store=store, use_cache=store is not None)
+        provider.rate_limiter = TokenBucket(rate=0)
+        return provider
+
+    def test_ohlc_adjusted(self):
+        """测试开高低收按同一因子复权，复权后价格关系不变"""
+        qfq = self.make_provider().get_daily_data("000001.SZ", "2024-01-08", "2024-01-20", "qfq")
+
+        # 除权价 = 21 - 1 = 20，除权前价格乘以 20/21
+        self.assertAlmostEqual(float(qfq.loc["2024-01-12", "close"]), 20.0, places=4)
+        self.assertAlmostEqual(float(qfq.loc["2024-01-12", "open"]), 21.2 * 20 / 21, places=4)
+        self.assertAlmostEqual(float(qfq.loc["2024-01-12", "high"]), 21.5 * 20 / 21, places=4)
+        self.assertAlmostEqual(float(qfq.loc["2024-01-12", "low"]), 20.5 * 20 / 21, places=4)
+        self.assertTrue((qfq['low'] <= qfq[['open', 'close']].min(axis=1)).all())
+        self.assertTrue((qfq['high'] >= qfq[['open', 'close']].max(axis=1)).all())
+
+    def test_raw_bars_stored_once(self):
+        """测试只存储不复权行情，不同区间的前复权以同一最新因子为基准"""
+        provider = self.make_provider(self.store)
+
+        before = provider.get_daily_data("000001.SZ", "2024-01-08", "2024-01-12", "qfq")
+        full = provider.get_daily_data("000001.SZ", "2024-01-08", "2024-01-19", "qfq")
+        raw = provider.get_daily_data("000001.SZ", "2024-01-08", "2024-01-19", "None")
+
+        self.assertEqual(self.store.list_symbols("qfq"), [])
+        self.assertEqual(FakeTicker.history_calls.count("max"), 1)
+        self.assertAlmostEqual(float(before.loc["2024-01-12", "close"]), 20.0, places=4)
+        pd.testing.assert_frame_equal(before, full.loc[:"2024-01-12"])
+        self.assertEqual(float(raw.loc["2024-01-12", "close"]), 21.0)
+        self.assertIsNotNone(self.store.read_adjust_factors("000001.SZ"))
+
+
+if __name__ == '__main__':
+    unittest.main()
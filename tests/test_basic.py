@@ -181,7 +181,7 @@ MA10:=MA(CLOSE,N2);
         # 测试基本表达式
         expr1 = "MA(CLOSE,5)"
         converted1 = self.parser._convert_expression(expr1)
-        self.assertIn('ta.MA', converted1)
+        self.assertIn('rt.MA', converted1)
         
         # 测试逻辑表达式
         expr2 = "CLOSE > MA(CLOSE,10) AND VOLUME > MA(VOLUME,20)"
@@ -191,7 +191,7 @@ MA10:=MA(CLOSE,N2);
         # 测试交叉函数
         expr3 = "CROSS(MA5,MA10)"
         converted3 = self.parser._convert_expression(expr3)
-        self.assertIn('ta.CROSS', converted3)
+        self.assertIn('rt.CROSS', converted3)
     
     def test_strategy_generation(self):
         """测试策略生成"""
@@ -0,0 +1,155 @@
+"""
+数据指纹与派生结果失效测试
+"""
+
+import unittest
+import tempfile
+import shutil
+import pandas as pd
+
+from src.data.fingerprint import ArtifactCache, frame_fingerprint
+from src.data.local_store import LocalDataStore
+from src.data.panel_store import build_panel_from_store
+from src.data.sqlite_store import SQLiteBarStore
+from tests.test_local_store import CountingProvider, make_daily_frame
+
+
+class TestFrameFingerprint(unittest.TestCase):
+    """测试内容哈希"""
+
+    def test_canonical(self):
+        """测试列顺序与数值类型不影响哈希，内容变化时哈希变化"""
+        df = make_daily_frame("2024-01-01", "2024-01-31")
+        reordered = df[list(reversed(df.columns))].astype({'volume': 'int64'})
+        reordered['turnover'] = float('nan')
+        self.assertEqual(frame_fingerprint(df), frame_fingerprint(reordered))
+
+        changed = df.copy()
+        changed.iloc[5, changed.columns.get_loc('close')] += 0.01
+        self.assertNotEqual(frame_fingerprint(df), frame_fingerprint(changed))
+
+
+class TestStoreFingerprints(unittest.TestCase):
+    """测试本地存储按月记录指纹"""
+
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.stores = [LocalDataStore(self.tmp_dir, cache_ttl=0),
+                       SQLiteBarStore(f"{self.tmp_dir}/bars.db", cache_ttl=0)]
+
+    def tearDown(self):
+        self.stores[1].close()
+        shutil.rmtree(self.tmp_dir, ignore_errors=True)
+
+    def test_versions(self):
+        """测试重复写入相同数据不改变指纹，修改某月数据只影响包含该月的区间"""
+        for store in self.stores:
+            df = make_daily_frame("2024-01-01", "2024-03-29")
+            store.write("000001.SZ", df, "2024-01-01", "2024-03-29", "None")
+            whole = store.fingerprint("000001.SZ", adjust="None")
+            january = store.fingerprint("000001.SZ", "2024-01-01", "2024-01-31", "None")
+            self.assertEqual(sorted(store.read_fingerprints("000001.SZ", "None")), ["2024-01", "2024-02", "2024-03"])
+
+            store.write("000001.SZ", df.loc["2024-02"], "2024-02-01", "2024-02-29", "None")
+            self.assertEqual(store.fingerprint("000001.SZ", adjust="None"), whole)
+            self.assertEqual(store.read_fingerprints("000001.SZ", "None")["2024-02"]['version'], 1)
+
+            changed = df.loc["2024-02-15":"2024-02-15"].copy()
+            changed['close'] += 0.5
+            store.write("000001.SZ", changed, "2024-02-15", "2024-02-15", "None")
+            self.assertNotEqual(store.fingerprint("000001.SZ", adjust="None"), whole)
+            self.assertEqual(store.fingerprint("000001.SZ", "2024-01-01", "2024-01-31", "None"), january)
+            self.assertEqual(store.read_fingerprints("000001.SZ", "None")["2024-02"]['version'], 2)
+
+            self.assertIsNone(store.fingerprint("600000.SH", adjust="None"))
+            store.clear("000001.SZ")
+            self.assertEqual(store.read_fingerprints("000001.SZ", "None"), {})
+
+    def test_adjust_factors(self):
+        """测试复权因子变化时前复权指纹变化，不复权指纹不变"""
+        for store in self.stores:
+            store.write("000001.SZ", make_daily_frame("2024-01-01", "2024-01-31"), "2024-01-01", "2024-01-31", "None")
+            store.write_adjust_factors("000001.SZ", pd.Series([1.0], index=pd.DatetimeIndex(["2020-01-02"])))
+            raw, qfq = store.fingerprint("000001.SZ", adjust="None"), store.fingerprint("000001.SZ", adjust="qfq")
+
+            store.write_adjust_factors("000001.SZ", pd.Series([1.1], index=pd.DatetimeIndex(["2024-01-15"])))
+            self.assertEqual(store.fingerprint("000001.SZ", adjust="None"), raw)
+            self.assertNotEqual(store.fingerprint("000001.SZ", adjust="qfq"), qfq)
+
+    def test_backfill(self):
+        """测试为启用指纹之前写入的数据补算指纹"""
+        store = self.stores[0]
+        store.write("000001.SZ", make_daily_frame("2024-01-01", "2024-02-29"), "2024-01-01", "2024-02-29", "None")
+        expected = store.fingerprint("000001.SZ", adjust="None")
+        store._fingerprint_path("000001.SZ").unlink()
+        self.assertEqual(store.fingerprint("000001.SZ", adjust="None"), expected)
+
+    def test_provider_writes_fingerprints(self):
+        """测试数据提供器获取的数据入库时记录指纹"""
+        provider = CountingProvider("akshare", store=self.stores[0])
+        provider.get_daily_data("000001.SZ", "2024-01-01", "2024-02-29", adjust="None")
+        self.assertEqual(sorted(self.stores[0].read_fingerprints("000001.SZ", "None")), ["2024-01", "2024-02"])
+
+
+class TestDerivedArtifacts(unittest.TestCase):
+    """测试派生结果按输入指纹失效"""
+
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.store = LocalDataStore(self.tmp_dir, cache_ttl=0)
+        for symbol in ("000001.SZ", "000002.SZ"):
+            self.store.write(symbol, make_daily_frame("2024-01-01", "2024-03-29", symbol),
+                             "2024-01-01", "2024-03-29", "None")
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir, ignore_errors=True)
+
+    def test_artifact_cache(self):
+        """测试输入数据不变时命中缓存，变化时重新计算"""
+        cache = ArtifactCache(f"{self.tmp_dir}/artifacts", self.store)
+        symbols = ["000001.SZ", "000002.SZ"]
+        computed = []
+
+        def compute():
+            computed.append(1)
+            return {'final_value': 100.0 + len(computed)}
+
+        def get(start_date="2024-01-01", end_date="2024-01-31"):
+            return cache.get_or_compute("backtest", {'short_window': 5}, symbols, start_date, end_date,
+                                        compute, adjust="None")
+
+        self.assertEqual(get(), {'final_value': 101.0})
+        self.assertEqual(get(), {'final_value': 101.0})
+
+        # 区间之外的数据变化不影响结果
+        changed = make_daily_frame("2024-03-01", "2024-03-01", "000002.SZ")
+        changed['close'] += 1
+        self.store.write("000002.SZ", changed, "2024-03-01", "2024-03-01", "None")
+        self.assertEqual(get(), {'final_value': 101.0})
+        self.assertEqual(get("2024-01-01", "2024-03-29"), {'final_value': 102.0})
+
+        changed = make_daily_frame("2024-01-10", "2024-01-10", "000001.SZ")
+        changed['close'] += 1
+        self.store.write("000001.SZ", changed, "2024-01-10", "2024-01-10", "None")
+        self.assertEqual(get(), {'final_value': 103.0})
+        self.assertEqual(cache.stats['invalidated'], 1)
+        self.assertEqual(len(computed), 3)
+
+    def test_panel_staleness(self):
+        """测试本地数据变化后面板被判定为过期"""
+        panel = build_panel_from_store(self.store, f"{self.tmp_dir}/panel", "2024-01-01", "2024-02-29",
+                                       adjust="None")
+        self.assertEqual(panel.stale_symbols(self.store), [])
+
+        self.store.write("000002.SZ", make_daily_frame("2024-03-01", "2024-03-29", "000002.SZ"),
+                         "2024-03-01", "2024-03-29", "None")
+        self.assertFalse(panel.is_stale(self.store))
+
+        changed = make_daily_frame("2024-02-01", "2024-02-01", "000002.SZ")
+        changed['volume'] = 0.0
+        self.store.write("000002.SZ", changed, "2024-02-01", "2024-02-01", "None")
+        self.assertEqual(panel.stale_symbols(self.store), ["000002.SZ"])
+
+
+if __name__ == '__main__':
+    unittest.main()
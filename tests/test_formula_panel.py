@@ -0,0 +1,134 @@
+"""
+公式横截面（日期×股票）计算测试
+"""
+
+import shutil
+import tempfile
+import unittest
+
+import numpy as np
+import pandas as pd
+
+from src.backtest.backtest_engine import BacktestEngine
+from src.data.panel_store import build_panel
+from src.strategy.formula_strategy import FormulaStrategy
+from src.strategy.tdx_compiler import FormulaContext, compile_formula, screen
+
+FORMULA = """
+MA5:=MA(C,5);
+MA20:=MA(C,20);
+强度:SUM(C>REF(C,1),10)/10;
+选股:CROSS(MA5,MA20) AND V>MA(V,5);
+"""
+
+
+def make_market(n_symbols: int = 8, n_dates: int = 160, seed: int = 7) -> dict:
+    """模拟多只股票日线，含停牌日与晚上市的股票"""
+    rng = np.random.default_rng(seed)
+    dates = pd.bdate_range('2023-01-02', periods=n_dates)
+    data = {}
+    for i in range(n_symbols):
+        close = 10 * np.exp(np.cumsum(rng.standard_normal(n_dates) * 0.03))
+        df = pd.DataFrame({'open': close, 'high': close * 1.01, 'low': close * 0.99, 'close': close,
+                           'volume': rng.integers(1000, 5000, n_dates).astype(float)}, index=dates)
+        keep = rng.random(n_dates) > 0.1
+        keep[:i * 9] = False
+        data[f"{600000 + i}.SH"] = df[keep]
+    return data
+
+
+def wide_fields(data: dict) -> dict:
+    """转换为 字段 -> 日期×股票 DataFrame"""
+    return {field: pd.DataFrame({symbol: df[field] for symbol, df in data.items()})
+            for field in ['open', 'high', 'low', 'close', 'volume']}
+
+
+class TestPanelEvaluation(unittest.TestCase):
+    """测试面板计算与逐只股票计算一致"""
+
+    def setUp(self):
+        self.data = make_market()
+        self.compiled = compile_formula(FORMULA)
+
+    def assert_matches_per_symbol(self, outputs: dict, index: pd.Index, symbols: list):
+        for j, symbol in enumerate(symbols):
+            expected = self.compiled.evaluate(self.data[symbol])
+            rows = index.get_indexer(self.data[symbol].index)
+            missing = np.setdiff1d(np.arange(len(index)), rows)
+            for name, values in outputs.items():
+                np.testing.assert_allclose(values[rows, j], expected[name], equal_nan=True,
+                                           err_msg=f"{symbol} {name}")
+                self.assertFalse(np.nan_to_num(values[missing, j]).any())
+
+    def test_wide_frames(self):
+        """测试停牌日跳过后结果与逐只股票一致，缺失日期为无效值"""
+        fields = wide_fields(self.data)
+        context = FormulaContext(fields)
+        outputs = self.compiled.evaluate(context)
+        self.assertEqual(outputs['选股'].shape, fields['close'].shape)
+        self.assertEqual(outputs['选股'].dtype, bool)
+        self.assert_matches_per_symbol(outputs, fields['close'].index, list(fields['close'].columns))
+
+        frame = context.to_frame(outputs['强度'])
+        self.assertEqual(list(frame.columns), list(self.data))
+
+    def test_skip_missing_disabled(self):
+        """测试不跳过缺失K线时NaN直接参与计算"""
+        fields = wide_fields(self.data)
+        outputs = compile_formula("X:MA(C,3);").evaluate(FormulaContext(fields, skip_missing=False))
+        close = fields['close'].to_numpy()
+        np.testing.assert_allclose(outputs['X'][2:], (close[2:] + close[1:-1] + close[:-2]) / 3, equal_nan=True)
+
+    def test_market_panel_and_screen(self):
+        """测试直接在内存映射面板上计算与全市场选股"""
+        panel_dir = tempfile.mkdtemp()
+        try:
+            panel = build_panel(self.data, panel_dir, dtype="float64")
+            outputs = self.compiled.evaluate(FormulaContext(panel))
+            self.assert_matches_per_symbol(outputs, panel.dates, panel.symbols)
+
+            hits = np.flatnonzero(outputs['选股'].any(axis=1))
+            date = panel.dates[hits[-1]]
+            selected = screen(FORMULA, panel, date=str(date.date()))
+            self.assertTrue(selected)
+            self.assertEqual(selected, [s for j, s in enumerate(panel.symbols) if outputs['选股'][hits[-1], j]])
+
+            late = screen(FORMULA, FormulaContext(panel, start_date=str(date.date())), output='选股')
+            self.assertIsInstance(late, list)
+            with self.assertRaises(ValueError):
+                screen(FORMULA, panel, output='不存在')
+        finally:
+            shutil.rmtree(panel_dir, ignore_errors=True)
+
+
+class PerSymbolFormulaStrategy(FormulaStrategy):
+    """关闭横截面计算，逐只股票生成信号"""
+
+    cross_sectional = False
+
+
+class TestFormulaStrategy(unittest.TestCase):
+    """测试公式策略的横截面回测"""
+
+    def test_cross_sectional_backtest(self):
+        """测试横截面信号与逐只股票信号的回测结果一致"""
+        data = make_market()
+        for formula in ("选股:MA(C,5)>MA(C,20);", "买入:CROSS(C,MA(C,10)); 卖出:CROSS(MA(C,10),C);"):
+            panel = BacktestEngine().run(data, FormulaStrategy(formula), start_date='2023-03-01')
+            per_symbol = BacktestEngine().run(data, PerSymbolFormulaStrategy(formula), start_date='2023-03-01')
+            self.assertGreater(panel['total_trades'], 0)
+            self.assertEqual(panel['total_trades'], per_symbol['total_trades'])
+            self.assertAlmostEqual(panel['final_value'], per_symbol['final_value'])
+
+    def test_generate_signals(self):
+        """测试逐只股票的信号列"""
+        df = make_market(1)["600000.SH"]
+        signals = FormulaStrategy("选股:C>MA(C,5);").generate_signals(df)
+        self.assertTrue(np.isnan(signals['positions'].iloc[0]))
+        self.assertTrue(set(signals['positions'].dropna().unique()) <= {-1.0, 0.0, 1.0})
+        with self.assertRaises(ValueError):
+            FormulaStrategy("A:=C;")
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,128 @@
+"""
+HTTP会话池与异步批量获取测试（使用本地桩服务器，无需网络）
+"""
+
+import unittest
+import tempfile
+import shutil
+import pandas as pd
+
+from src.data.free_data_provider import FreeDataProvider
+from src.data.http_client import AsyncHTTPFetcher, get_http_session
+from src.data.local_store import LocalDataStore
+from src.data.rate_limiter import TokenBucket
+from tests.stub_http_server import StubHTTPServer
+
+
+class TestHTTPClient(unittest.TestCase):
+    """测试共享会话与异步请求器"""
+
+    @classmethod
+    def setUpClass(cls):
+        cls.server = StubHTTPServer(latency=0.02).start()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.stop()
+
+    def test_shared_session(self):
+        """测试同一数据源复用会话"""
+        self.assertIs(get_http_session("eastmoney"), get_http_session("eastmoney"))
+        self.assertIsNot(get_http_session("eastmoney"), get_http_session("sina"))
+
+    def test_fetch_all_keeps_order(self):
+        """测试批量请求结果与请求顺序一致，失败请求返回None"""
+        url = f"{self.server.base_url}/api/qt/stock/kline/get"
+        request_list = [(url, {'secid': secid}) for secid in ["1.600519", "0.000001", "0.999999"] * 20]
+
+        fetcher = AsyncHTTPFetcher(concurrency=16, timeout=5, retry_count=0)
+        results = fetcher.run(request_list)
+
+        self.assertEqual(len(results), 60)
+        self.assertEqual(results[0]['data']['code'], "600519")
+        self.assertEqual(results[1]['data']['code'], "000001")
+        self.assertIsNone(results[2])
+        self.assertGreater(self.server.peak, 1)
+
+
+class TestAsyncMultipleStocks(unittest.TestCase):
+    """测试FreeDataProvider的异步批量获取"""
+
+    def setUp(self):
+        self.server = StubHTTPServer().start()
+        self.tmp_dir = tempfile.mkdtemp()
+        self.symbols = ["000001.SZ", "600519.SH"]
+
+    def tearDown(self):
+        self.server.stop()
+        shutil.rmtree(self.tmp_dir, ignore_errors=True)
+
+    def make_provider(self, source, store=None):
+        provider = FreeDataProvider(source, store=store, use_cache=store is not None)
+        provider.rate_limiter = TokenBucket(rate=0)
+        provider.EASTMONEY_KLINE_URL = f"{self.server.base_url}/api/qt/stock/kline/get"
+        provider.SINA_KLINE_URL = (f"{self.server.base_url}"
+                                   "/quotes_service/api/json_v2.php/CN_MarketData.getKLineData")
+        return provider
+
+    def test_async_matches_sync(self):
+        """测试异步结果与逐只同步获取一致"""
+        for source in ["eastmoney", "sina"]:
+            provider = self.make_provider(source)
+            async_result = provider.get_multiple_stocks_async(
+                self.symbols, "2024-01-01", "2024-01-31", concurrency=8)
+            sync_result = provider.get_multiple_stocks(
+                self.symbols, "2024-01-01", "2024-01-31", max_workers=1)
+
+            self.assertEqual(list(async_result.keys()), self.symbols)
+            for symbol in self.symbols:
+                pd.testing.assert_frame_equal(async_result[symbol], sync_result[symbol])
+                self.assertEqual(len(async_result[symbol]), 5)
+
+    def test_async_uses_local_store(self):
+        """测试异步获取写入本地存储，再次获取不发请求"""
+        store = LocalDataStore(self.tmp_dir, cache_ttl=0)
+        provider = self.make_provider("eastmoney", store)
+
+        first = provider.get_multiple_stocks_async(self.symbols, "2024-01-01", "2024-01-31", adjust="None")
+        count = self.server.request_count
+        second = provider.get_multiple_stocks_async(self.symbols, "2024-01-01", "2024-01-31", adjust="None")
+
+        self.assertEqual(count, 2)
+        self.assertEqual(self.server.request_count, count)
+        for symbol in self.symbols:
+            pd.testing.assert_frame_equal(first[symbol], second[symbol])
+
+    def test_sina_one_request_per_symbol(self):
+        """测试新浪接口忽略日期区间，本地存储有多个缺口时每只股票只请求一次"""
+        store = LocalDataStore(self.tmp_dir, cache_ttl=0)
+        for symbol in self.symbols:
+            store.write(symbol, pd.DataFrame(), "2024-01-04", "2024-01-04", "None")
+        provider = self.make_provider("sina", store)
+
+        result = provider.get_multiple_stocks_async(self.symbols, "2024-01-01", "2024-01-31", adjust="None")
+
+        self.assertEqual(self.server.request_count, 2)
+        for symbol in self.symbols:
+            self.assertEqual(len(result[symbol]), 4)
+
+    def test_upstream_qfq_not_stored(self):
+        """测试东方财富的前复权行情基准随时间变化，不写入本地存储"""
+        store = LocalDataStore(self.tmp_dir, cache_ttl=0)
+        provider = self.make_provider("eastmoney", store)
+
+        provider.get_multiple_stocks_async(self.symbols, "2024-01-01", "2024-01-31")
+        provider.get_daily_data(self.symbols[0], "2024-01-01", "2024-01-31", "qfq")
+
+        self.assertEqual(self.server.request_count, 3)
+        self.assertEqual(store.list_symbols("qfq"), [])
+
+    def test_unsupported_source(self):
+        """测试不支持的数据源"""
+        provider = self.make_provider("yfinance")
+        with self.assertRaises(ValueError):
+            provider.get_multiple_stocks_async(self.symbols, "2024-01-01", "2024-01-31")
+
+
+if __name__ == '__main__':
+    unittest.main()
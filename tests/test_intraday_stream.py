@@ -0,0 +1,114 @@
+"""
+盘中分钟线流式接收测试
+"""
+
+import unittest
+import numpy as np
+import pandas as pd
+
+from src.data.intraday_stream import BarRingBuffer, IntradayStream
+
+
+class TestBarRingBuffer(unittest.TestCase):
+    """测试环形缓冲区"""
+
+    def test_wraparound_views(self):
+        """测试写满后最近 n 根仍为连续只读视图"""
+        buffer = BarRingBuffer(capacity=5)
+        start = pd.Timestamp("2024-01-26 09:31")
+        for i in range(12):
+            buffer.append(start + pd.Timedelta(minutes=i), close=float(i), volume=i * 100)
+
+        self.assertEqual(len(buffer), 5)
+        self.assertEqual(buffer.total, 12)
+        close = buffer.field('close')
+        self.assertEqual(list(close), [7.0, 8.0, 9.0, 10.0, 11.0])
+        self.assertEqual(list(buffer.field('volume', 2)), [1000, 1100])
+        self.assertEqual(buffer.last_time, start + pd.Timedelta(minutes=11))
+        self.assertIsNotNone(close.base)
+        with self.assertRaises(ValueError):
+            close[0] = 0.0
+
+        frame = buffer.to_frame(3)
+        self.assertEqual(list(frame['close']), [9.0, 10.0, 11.0])
+        self.assertEqual(frame.index[0], start + pd.Timedelta(minutes=9))
+
+    def test_memory_bounded(self):
+        """测试占用内存与写入根数无关"""
+        buffer = BarRingBuffer(capacity=240)
+        before = buffer.nbytes
+        for i in range(10000):
+            buffer.append(i, close=1.0)
+        self.assertEqual(buffer.nbytes, before)
+        self.assertEqual(len(BarRingBuffer(capacity=3).field('close')), 0)
+
+
+class TestIntradayStream(unittest.TestCase):
+    """测试流式接收与K线收盘事件"""
+
+    def setUp(self):
+        self.stream = IntradayStream(capacity=10, interval=60)
+        self.events = []
+        self.stream.subscribe(lambda symbol, buffer: self.events.append(
+            (symbol, buffer.last_time, float(buffer.field('close', 1)[0]))))
+
+    def test_ticks_aggregate_to_bars(self):
+        """测试逐笔成交按分钟聚合，跨入新分钟时上一根收盘"""
+        ticks = [("09:30:05", 10.0, 100), ("09:30:30", 10.5, 200), ("09:30:59", 9.8, 100),
+                 ("09:31:00", 10.1, 300), ("09:31:40", 10.2, 100), ("09:32:10", 10.3, 100)]
+        for t, price, volume in ticks:
+            self.stream.on_tick("000001.SZ", f"2024-01-26 {t}", price, volume)
+
+        self.assertEqual(self.events, [("000001.SZ", pd.Timestamp("2024-01-26 09:31"), 9.8),
+                                       ("000001.SZ", pd.Timestamp("2024-01-26 09:32"), 10.2)])
+        bar = self.stream.buffer("000001.SZ").to_frame().iloc[0]
+        self.assertEqual((bar['open'], bar['high'], bar['low'], bar['close']), (10.0, 10.5, 9.8, 9.8))
+        self.assertEqual(bar['volume'], 400)
+
+        self.stream.flush()
+        self.assertEqual(self.events[-1], ("000001.SZ", pd.Timestamp("2024-01-26 09:33"), 10.3))
+
+    def test_quote_snapshots(self):
+        """测试行情快照按累计成交量差值生成成交"""
+        def quotes(time, price, volume):
+            return pd.DataFrame({'price': [price], 'volume': [volume], 'amount': [price * volume],
+                                 'time': [pd.Timestamp(f"2024-01-26 {time}")]},
+                                index=pd.Index(["600519.SH"], name='symbol'))
+
+        self.stream.on_quotes(quotes("09:30:03", 1680.0, 1000))
+        self.stream.on_quotes(quotes("09:30:33", 1685.0, 1500))
+        self.stream.on_quotes(quotes("09:31:03", 1690.0, 1800))
+
+        bar = self.stream.buffer("600519.SH").to_frame().iloc[-1]
+        self.assertEqual(bar['volume'], 500)
+        self.assertEqual(bar['close'], 1685.0)
+
+    def test_bars_and_seed(self):
+        """测试直接接收分钟线、忽略重复K线、历史填充不触发事件"""
+        history = pd.DataFrame({'open': 1.0, 'high': 1.0, 'low': 1.0, 'close': np.arange(15, dtype=float),
+                                'volume': 1, 'amount': 1.0},
+                               index=pd.date_range("2024-01-25 09:31", periods=15, freq="min"))
+        self.stream.seed("000001.SZ", history)
+        self.assertEqual(self.events, [])
+        self.assertEqual(list(self.stream.buffer("000001.SZ").field('close', 3)), [12.0, 13.0, 14.0])
+
+        self.stream.on_bar("000001.SZ", "2024-01-26 09:31", 10, 11, 9, 10.5, 1000)
+        self.stream.on_bar("000001.SZ", "2024-01-26 09:31", 10, 11, 9, 99.0, 1000)
+        self.assertEqual(len(self.events), 1)
+        self.assertEqual(list(self.stream.snapshot('close', 2)["000001.SZ"]), [14.0, 10.5])
+
+    def test_subscriber_errors_isolated(self):
+        """测试回调异常不影响其他订阅者"""
+        def broken(symbol, buffer):
+            raise RuntimeError("回调失败")
+
+        self.stream.subscribe(broken)
+        self.stream.on_bar("000001.SZ", "2024-01-26 09:31", 10, 11, 9, 10.5)
+        self.assertEqual(len(self.events), 1)
+
+        self.stream.unsubscribe(broken)
+        self.assertEqual(len(self.stream._subscribers), 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
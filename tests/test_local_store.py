@@ -0,0 +1,178 @@
+"""
+本地存储测试
+"""
+
+import unittest
+import tempfile
+import shutil
+import time
+from datetime import datetime
+import pandas as pd
+import numpy as np
+
+from src.data.local_store import LocalDataStore
+from src.data.data_provider import DataProvider
+from src.data.free_data_provider import FreeDataProvider
+from src.data.rate_limiter import TokenBucket
+
+
+def make_daily_frame(start: str, end: str, symbol: str = "000001.SZ") -> pd.DataFrame:
+    """创建模拟日线数据"""
+    dates = pd.date_range(start, end, freq='B', name='date')
+    price = 10 + np.arange(len(dates), dtype=float) * 0.1
+    return pd.DataFrame({
+        'open': price,
+        'high': price * 1.01,
+        'low': price * 0.99,
+        'close': price,
+        'volume': np.full(len(dates), 1000.0),
+        'symbol': symbol
+    }, index=dates)
+
+
+class CountingProvider(DataProvider):
+    """记录上游请求次数的测试用数据提供器"""
+
+    def _init_data_source(self):
+        self.calls = []
+
+    def _fetch_daily(self, symbol, start_date, end_date, adjust):
+        self.calls.append((symbol, start_date, end_date))
+        return make_daily_frame(start_date, end_date, symbol)
+
+    def _fetch_adjust_factors(self, symbol):
+        return pd.Series([1.0], index=pd.DatetimeIndex(["2000-01-01"]), name='factor')
+
+
+class TruncatingSinaProvider(FreeDataProvider):
+    """只返回 2024-01-15 之后K线的模拟新浪数据源（如最近1000根K线的限制）"""
+
+    def _fetch_daily(self, symbol, start_date, end_date, adjust):
+        return make_daily_frame(max(start_date, "2024-01-15"), end_date, symbol)
+
+
+class TestLocalDataStore(unittest.TestCase):
+    """测试本地Parquet存储"""
+
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.store = LocalDataStore(self.tmp_dir, cache_ttl=0)
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir, ignore_errors=True)
+
+    def test_miss_then_hit(self):
+        """测试未命中与命中"""
+        self.assertIsNone(self.store.read("000001.SZ", "2023-12-01", "2024-01-31"))
+
+        df = make_daily_frame("2023-12-01", "2024-01-31")
+        self.store.write("000001.SZ", df, "2023-12-01", "2024-01-31")
+
+        cached = self.store.read("000001.SZ", "2023-12-15", "2024-01-15")
+        self.assertIsNotNone(cached)
+        expected = df.loc["2023-12-15":"2024-01-15"]
+        pd.testing.assert_frame_equal(cached, expected, check_freq=False)
+
+        # 按年份分区
+        self.assertTrue((self.store._symbol_dir("000001.SZ", "qfq") / "2023.parquet").exists())
+        self.assertTrue((self.store._symbol_dir("000001.SZ", "qfq") / "2024.parquet").exists())
+
+    def test_expired_cache(self):
+        """测试未定型数据过期"""
+        store = LocalDataStore(self.tmp_dir, cache_ttl=1)
+        store.write("000001.SZ", make_daily_frame("2024-01-01", "2024-01-31"),
+                    "2024-01-01", "2024-01-31")
+        # 模拟在2024-01-15获取，之后的部分随缓存过期
+        meta = store._load_meta("000001.SZ", "qfq")
+        fetched_at = time.mktime(datetime(2024, 1, 15, 12).timetuple())
+        meta['spans'] = [["2024-01-01", "2024-01-31", fetched_at]]
+        store._save_meta("000001.SZ", "qfq", meta)
+
+        self.assertIsNone(store.read("000001.SZ", "2024-01-01", "2024-01-31"))
+        self.assertIsNotNone(store.read("000001.SZ", "2024-01-01", "2024-01-14"))
+        self.assertEqual(store.missing_ranges("000001.SZ", "2024-01-01", "2024-01-31"),
+                         [("2024-01-15", "2024-01-31")])
+
+    def test_missing_ranges(self):
+        """测试缺失区间计算与区间合并"""
+        for start, end in [("2024-01-01", "2024-01-31"), ("2024-03-01", "2024-03-31"),
+                           ("2024-02-01", "2024-02-10")]:
+            self.store.write("000001.SZ", make_daily_frame(start, end), start, end)
+
+        self.assertEqual(self.store.covered_ranges("000001.SZ", "qfq"),
+                         [(pd.Timestamp("2024-01-01"), pd.Timestamp("2024-02-10")),
+                          (pd.Timestamp("2024-03-01"), pd.Timestamp("2024-03-31"))])
+        self.assertEqual(self.store.missing_ranges("000001.SZ", "2023-12-01", "2024-04-30"),
+                         [("2023-12-01", "2023-12-31"), ("2024-02-11", "2024-02-29"),
+                          ("2024-04-01", "2024-04-30")])
+        self.assertEqual(self.store.missing_ranges("000001.SZ", "2024-01-05", "2024-02-01"), [])
+
+    def test_partial_history_span(self):
+        """测试只返回部分历史的数据源按返回数据记录覆盖区间"""
+        self.store.write("000001.SZ", make_daily_frame("2024-01-15", "2024-01-31"),
+                         "2024-01-01", "2024-01-31", partial_history=True)
+        self.store.write("600519.SH", make_daily_frame("2024-01-15", "2024-01-14"),
+                         "2024-01-01", "2024-01-14", partial_history=True)
+
+        self.assertEqual(self.store.covered_ranges("000001.SZ", "qfq"),
+                         [(pd.Timestamp("2024-01-15"), pd.Timestamp("2024-01-31"))])
+        self.assertEqual(self.store.covered_ranges("600519.SH", "qfq"), [])
+
+    def test_truncating_source_not_marked_covered(self):
+        """测试新浪截断的早期区间不被记为已覆盖"""
+        provider = TruncatingSinaProvider("sina", store=self.store)
+        provider.rate_limiter = TokenBucket(rate=0)
+        df = provider.get_daily_data("000001.SZ", "2024-01-01", "2024-01-31", "None")
+
+        self.assertEqual(df.index[0], pd.Timestamp("2024-01-15"))
+        self.assertEqual(self.store.missing_ranges("000001.SZ", "2024-01-01", "2024-01-31", "None"),
+                         [("2024-01-01", "2024-01-14")])
+
+    def test_provider_fetches_only_gaps(self):
+        """测试数据提供器只请求缺失区间"""
+        provider = CountingProvider("akshare", store=self.store)
+        provider.get_daily_data("000001.SZ", "2024-01-01", "2024-03-31")
+        df = provider.get_daily_data("000001.SZ", "2023-12-01", "2024-04-30")
+
+        self.assertEqual(provider.calls, [
+            ("000001.SZ", "2024-01-01", "2024-03-31"),
+            ("000001.SZ", "2023-12-01", "2023-12-31"),
+            ("000001.SZ", "2024-04-01", "2024-04-30"),
+        ])
+        self.assertTrue(df.index.is_monotonic_increasing)
+        self.assertFalse(df.index.has_duplicates)
+        self.assertEqual(df.index[0], pd.Timestamp("2023-12-01"))
+        self.assertEqual(df.index[-1], pd.Timestamp("2024-04-30"))
+
+    def test_empty_gap_marked_covered(self):
+        """测试上游没有数据的区间（周末、节假日）记为已覆盖，不重复请求"""
+        provider = CountingProvider("akshare", store=self.store)
+        first = provider.get_daily_data("000001.SZ", "2024-01-06", "2024-01-07", "None")
+        second = provider.get_daily_data("000001.SZ", "2024-01-06", "2024-01-07", "None")
+
+        self.assertTrue(first.empty and second.empty)
+        self.assertEqual(provider.calls, [("000001.SZ", "2024-01-06", "2024-01-07")])
+        self.assertEqual(self.store.missing_ranges("000001.SZ", "2024-01-06", "2024-01-07", "None"), [])
+
+    def test_provider_read_through(self):
+        """测试数据提供器透明读取本地存储"""
+        provider = CountingProvider("akshare", store=self.store)
+
+        first = provider.get_daily_data("000001.SZ", "2024-01-01", "2024-03-31")
+        second = provider.get_daily_data("000001.SZ", "2024-01-01", "2024-03-31")
+
+        self.assertEqual(len(provider.calls), 1)
+        pd.testing.assert_frame_equal(first, second, check_freq=False)
+
+    def test_provider_without_cache(self):
+        """测试关闭本地存储"""
+        provider = CountingProvider("akshare", use_cache=False)
+        provider.get_daily_data("000001.SZ", "2024-01-01", "2024-01-31")
+        provider.get_daily_data("000001.SZ", "2024-01-01", "2024-01-31")
+
+        self.assertIsNone(provider.store)
+        self.assertEqual(len(provider.calls), 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,100 @@
+"""
+分钟线存储测试
+"""
+
+import unittest
+import tempfile
+import shutil
+import time
+import numpy as np
+import pandas as pd
+
+from src.data.local_store import LocalDataStore
+from src.data.minute_store import MinuteBarStore
+
+
+def make_minute_frame(start: str, end: str, seed: int = 0) -> pd.DataFrame:
+    """生成区间内每个工作日 9:31-11:30、13:01-15:00 的1分钟线"""
+    days = pd.bdate_range(start, end)
+    minutes = np.r_[np.arange(9 * 60 + 31, 11 * 60 + 31), np.arange(13 * 60 + 1, 15 * 60 + 1)]
+    times = (days.values[:, None] + minutes * np.timedelta64(1, 'm')).ravel()
+    times = pd.DatetimeIndex(times.astype('datetime64[ns]'), name='time')
+    rng = np.random.default_rng(seed)
+    close = np.round(10 + np.cumsum(rng.standard_normal(len(times))) * 0.01, 2)
+    volume = rng.integers(1, 1000, len(times)) * 100
+    return pd.DataFrame({'open': np.round(close - 0.01, 2), 'high': np.round(close + 0.02, 2),
+                         'low': np.round(close - 0.02, 2), 'close': close,
+                         'volume': volume.astype(np.int64), 'amount': close * volume}, index=times)
+
+
+class TestMinuteBarStore(unittest.TestCase):
+    """测试按月分块的分钟线存储"""
+
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.store = MinuteBarStore(f"{self.tmp_dir}/minute")
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir, ignore_errors=True)
+
+    def test_round_trip(self):
+        """测试写入后按区间读取，只读取涉及的月份"""
+        df = make_minute_frame("2024-01-01", "2024-03-31")
+        self.assertEqual(self.store.write("000001.SZ", df), len(df))
+        self.assertEqual(self.store.months("000001.SZ"), ["2024-01", "2024-02", "2024-03"])
+
+        pd.testing.assert_frame_equal(self.store.read("000001.SZ"), df)
+        february = self.store.read("000001.SZ", "2024-02-01", "2024-02-29")
+        pd.testing.assert_frame_equal(february, df.loc["2024-02"])
+
+        across = self.store.read("000001.SZ", "2024-01-31 14:00", "2024-02-01 10:00", fields=['close'])
+        self.assertEqual(list(across.columns), ['close'])
+        self.assertEqual(len(across), 61 + 30)
+        self.assertTrue(self.store.read("000001.SZ", "2024-05-01", "2024-05-31").empty)
+        with self.assertRaises(ValueError):
+            self.store.read("000001.SZ", fields=['vwap'])
+
+    def test_merge(self):
+        """测试与已有月份合并，时间相同时以新数据为准"""
+        df = make_minute_frame("2024-01-01", "2024-01-31")
+        self.store.write("000001.SZ", df.iloc[:1000])
+        update = df.iloc[900:].copy()
+        update['close'] += 1
+        self.store.write("000001.SZ", update)
+
+        stored = self.store.read("000001.SZ")
+        self.assertEqual(len(stored), len(df))
+        np.testing.assert_allclose(stored['close'].iloc[:900], df['close'].iloc[:900])
+        np.testing.assert_allclose(stored['close'].iloc[900:], update['close'])
+
+        with self.assertRaises(ValueError):
+            self.store.write("000001.SZ", df.drop(columns=['amount']))
+        self.store.clear("000001.SZ")
+        self.assertEqual(self.store.list_symbols(), [])
+
+    def test_compression_and_speed(self):
+        """测试压缩率与单只股票一个月的读取速度"""
+        df = make_minute_frame("2024-01-01", "2024-01-31")
+        self.store.write("000001.SZ", df)
+        usage = self.store.disk_usage()
+        self.assertEqual(usage['rows'], len(df))
+        # 未压缩时每根K线48字节
+        self.assertLess(usage['bytes'], len(df) * 48 / 3)
+
+        self.store.read("000001.SZ", "2024-01-01", "2024-01-31")
+        started = time.perf_counter()
+        self.store.read("000001.SZ", "2024-01-01", "2024-01-31")
+        self.assertLess(time.perf_counter() - started, 0.05)
+
+    def test_local_store_minute(self):
+        """测试本地存储目录下的分钟线存储，周期分开保存"""
+        store = LocalDataStore(self.tmp_dir, cache_ttl=0)
+        df = make_minute_frame("2024-01-02", "2024-01-02")
+        store.minute.write("000001.SZ", df.iloc[4::5], scale=5)
+        self.assertEqual(store.minute.list_symbols(), [])
+        self.assertEqual(store.minute.list_symbols(scale=5), ["000001.SZ"])
+        self.assertEqual(len(store.minute.read("000001.SZ", scale=5)), 48)
+
+
+if __name__ == '__main__':
+    unittest.main()
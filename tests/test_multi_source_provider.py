@@ -0,0 +1,204 @@
+"""
+多数据源对冲获取测试（使用模拟数据源，无需网络）
+"""
+
+import unittest
+import tempfile
+import shutil
+import threading
+import time
+import pandas as pd
+
+from src.data.local_store import LocalDataStore
+from src.data.multi_source_provider import MultiSourceProvider, SourceStats
+from src.data.rate_limiter import TokenBucket
+from tests.test_local_store import make_daily_frame
+
+
+class FakeSource:
+    """按设定耗时返回数据或抛出异常的模拟数据源"""
+
+    def __init__(self, latency: float = 0.0, fail: bool = False, empty: bool = False):
+        self.latency = latency
+        self.fail = fail
+        self.empty = empty
+        self.calls = []
+        self.rate_limiter = TokenBucket(rate=0)
+        self._lock = threading.Lock()
+
+    def _fetch_daily(self, symbol, start_date, end_date, adjust):
+        with self._lock:
+            self.calls.append((symbol, start_date, end_date))
+        time.sleep(self.latency)
+        if self.fail:
+            raise ConnectionError("模拟请求失败")
+        if self.empty:
+            return pd.DataFrame()
+        return make_daily_frame(start_date, end_date, symbol)
+
+
+class FactorSource(FakeSource):
+    """同时提供复权因子的模拟数据源：2024-01-15 起因子翻倍"""
+
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self.factor_calls = 0
+
+    def _fetch_adjust_factors(self, symbol):
+        self.factor_calls += 1
+        return pd.Series([1.0, 2.0], index=pd.DatetimeIndex(["2000-01-04", "2024-01-15"]), name='factor')
+
+
+class TestSourceStats(unittest.TestCase):
+    """测试耗时统计"""
+
+    def test_summary(self):
+        """测试分位数与错误率"""
+        stats = SourceStats(window=100)
+        for i in range(1, 101):
+            stats.record(i / 100, True)
+        stats.record(5.0, False)
+
+        summary = stats.summary()
+        self.assertAlmostEqual(summary['p50'], 0.505)
+        self.assertGreater(summary['p99'], 0.98)
+        self.assertAlmostEqual(summary['error_rate'], 0.01)
+        self.assertIsNone(SourceStats().quantile(0.5))
+
+
+class TestMultiSourceProvider(unittest.TestCase):
+    """测试对冲获取"""
+
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir, ignore_errors=True)
+
+    def make_provider(self, sources, store=None):
+        provider = MultiSourceProvider(store=store, use_cache=store is not None, providers=sources)
+        provider.default_hedge_delay = 0.05
+        provider.min_hedge_delay = 0.01
+        provider.min_samples = 3
+        self.addCleanup(provider.cleanup)
+        return provider
+
+    def test_fast_primary_not_hedged(self):
+        """测试主数据源及时返回时不发出对冲请求"""
+        primary, backup = FakeSource(0.0), FakeSource(0.0)
+        provider = self.make_provider({'eastmoney': primary, 'sina': backup})
+
+        df, source = provider.fetch_hedged("000001.SZ", "2024-01-01", "2024-01-31")
+        self.assertEqual(source, "eastmoney")
+        self.assertEqual(len(df), 23)
+        self.assertEqual(len(backup.calls), 0)
+
+    def test_slow_primary_hedged(self):
+        """测试主数据源过慢时采用对冲请求的结果"""
+        primary, backup = FakeSource(1.0), FakeSource(0.0)
+        provider = self.make_provider({'eastmoney': primary, 'sina': backup})
+
+        started = time.monotonic()
+        df, source = provider.fetch_hedged("000001.SZ", "2024-01-01", "2024-01-31")
+        self.assertEqual(source, "sina")
+        self.assertLess(time.monotonic() - started, 0.5)
+        self.assertEqual(len(primary.calls), 1)
+
+    def test_failover(self):
+        """测试请求失败时立即切换数据源，全部失败时抛出异常"""
+        provider = self.make_provider({'eastmoney': FakeSource(fail=True), 'sina': FakeSource()})
+        provider.default_hedge_delay = 10.0
+
+        started = time.monotonic()
+        _, source = provider.fetch_hedged("000001.SZ", "2024-01-01", "2024-01-31")
+        self.assertEqual(source, "sina")
+        self.assertLess(time.monotonic() - started, 1.0)
+
+        failing = self.make_provider({'eastmoney': FakeSource(fail=True), 'sina': FakeSource(fail=True)})
+        with self.assertRaises(ConnectionError):
+            failing.fetch_hedged("000001.SZ", "2024-01-01", "2024-01-31")
+
+    def test_empty_result(self):
+        """测试所有数据源都没有数据时返回空DataFrame"""
+        provider = self.make_provider({'eastmoney': FakeSource(empty=True), 'sina': FakeSource(empty=True)})
+        df, _ = provider.fetch_hedged("000001.SZ", "2024-01-01", "2024-01-31")
+        self.assertTrue(df.empty)
+
+    def test_empty_failover(self):
+        """测试数据源返回空数据时切换到下一个数据源"""
+        empty, backup = FakeSource(empty=True), FakeSource()
+        provider = self.make_provider({'eastmoney': empty, 'sina': backup})
+        provider.default_hedge_delay = 10.0
+
+        df, source = provider.fetch_hedged("000001.SZ", "2024-01-01", "2024-01-31")
+        self.assertEqual(source, "sina")
+        self.assertEqual(len(df), 23)
+        self.assertEqual(len(empty.calls), 1)
+
+    def test_routing_by_latency(self):
+        """测试统计样本足够后优先使用历史更快的数据源"""
+        slow, fast = FakeSource(0.03), FakeSource(0.0)
+        provider = self.make_provider({'eastmoney': slow, 'sina': fast})
+        provider.default_hedge_delay = 10.0
+
+        for source in ['eastmoney', 'sina']:
+            for _ in range(3):
+                provider._fetch_from(source, "000001.SZ", "2024-01-01", "2024-01-05", "qfq")
+
+        self.assertEqual(provider.rank_sources(), ['sina', 'eastmoney'])
+        stats = provider.get_source_stats()
+        self.assertGreater(stats['eastmoney']['p50'], stats['sina']['p50'])
+        self.assertEqual(stats['sina']['requests'], 3)
+
+    def test_store_gaps(self):
+        """测试只对本地缺失区间发出请求"""
+        store = LocalDataStore(self.tmp_dir, cache_ttl=0)
+        primary = FakeSource()
+        provider = self.make_provider({'eastmoney': primary}, store=store)
+
+        provider.get_daily_data("000001.SZ", "2024-01-01", "2024-01-31", "None")
+        result = provider.get_multiple_stocks(["000001.SZ"], "2024-01-01", "2024-02-29", "None", max_workers=2)
+
+        self.assertEqual(primary.calls, [("000001.SZ", "2024-01-01", "2024-01-31"),
+                                         ("000001.SZ", "2024-02-01", "2024-02-29")])
+        self.assertEqual(len(result["000001.SZ"]), 44)
+
+    def test_store_raw_bars_with_factors(self):
+        """测试本地存储只保存不复权行情，前复权按复权因子计算，Yahoo 行情不写入存储"""
+        store = LocalDataStore(self.tmp_dir, cache_ttl=0)
+        yahoo, baostock = FakeSource(), FactorSource(latency=0.02)
+        provider = self.make_provider({'yfinance': yahoo, 'baostock': baostock}, store=store)
+
+        qfq = provider.get_daily_data("000001.SZ", "2024-01-01", "2024-01-31", "qfq")
+        raw = provider.get_daily_data("000001.SZ", "2024-01-01", "2024-01-31", "None")
+
+        self.assertEqual(yahoo.calls, [])
+        self.assertEqual(len(baostock.calls), 1)
+        self.assertEqual(baostock.factor_calls, 1)
+        self.assertEqual(store.list_symbols("qfq"), [])
+        pd.testing.assert_series_equal(qfq.loc[:"2024-01-12", 'close'], raw.loc[:"2024-01-12", 'close'] / 2,
+                                       check_dtype=False)
+        pd.testing.assert_series_equal(qfq.loc["2024-01-15":, 'close'], raw.loc["2024-01-15":, 'close'])
+
+    def test_qfq_without_factor_source_not_stored(self):
+        """测试没有数据源提供复权因子时，前复权行情直接获取，不写入本地存储"""
+        store = LocalDataStore(self.tmp_dir, cache_ttl=0)
+        primary = FakeSource()
+        provider = self.make_provider({'eastmoney': primary}, store=store)
+
+        provider.get_daily_data("000001.SZ", "2024-01-01", "2024-01-31", "qfq")
+        provider.get_daily_data("000001.SZ", "2024-01-01", "2024-01-31", "qfq")
+
+        self.assertEqual(len(primary.calls), 2)
+        self.assertEqual(store.list_symbols("qfq"), [])
+        self.assertEqual(store.list_symbols("None"), [])
+
+    def test_executor_sized_for_workers(self):
+        """测试对冲线程池按 并发线程数 × 数据源数 配置"""
+        provider = self.make_provider({'eastmoney': FakeSource(), 'sina': FakeSource()})
+        provider.get_multiple_stocks(["000001.SZ"], "2024-01-01", "2024-01-31", max_workers=8)
+        self.assertEqual(provider._executor_size, 16)
+
+
+if __name__ == '__main__':
+    unittest.main()
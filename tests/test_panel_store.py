@@ -0,0 +1,153 @@
+"""
+内存映射面板测试
+"""
+
+import unittest
+import tempfile
+import shutil
+import os
+import time
+from pathlib import Path
+import pandas as pd
+import numpy as np
+from unittest import mock
+
+from src.data.local_store import LocalDataStore
+from src.data.panel_store import MarketPanel, build_panel, build_panel_from_store, load_panel
+from src.backtest.backtest_engine import BacktestEngine, MovingAverageCrossover
+
+
+def make_data() -> dict:
+    """创建两只股票的模拟数据，600519.SH 缺少前5个交易日"""
+    dates = pd.bdate_range("2024-01-01", "2024-03-29", name='date')
+    np.random.seed(0)
+    data = {}
+    for symbol, base, skip in [("000001.SZ", 10.0, 0), ("600519.SH", 1700.0, 5)]:
+        price = base + np.cumsum(np.random.randn(len(dates)))
+        data[symbol] = pd.DataFrame({
+            'open': price, 'high': price + 1, 'low': price - 1, 'close': price,
+            'volume': np.arange(len(dates), dtype=float) * 100, 'symbol': symbol
+        }, index=dates).iloc[skip:]
+    return data
+
+
+class TestMarketPanel(unittest.TestCase):
+    """测试面板构建与读取"""
+
+    def setUp(self):
+        self.tmp_dir = Path(tempfile.mkdtemp())
+        self.data = make_data()
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir, ignore_errors=True)
+
+    def test_build_and_slice(self):
+        """测试构建后按字段、股票切片"""
+        panel = build_panel(self.data, self.tmp_dir / "panel", dtype="float64")
+
+        self.assertEqual(panel.shape, (65, 2, 6))
+        self.assertEqual(panel.symbols, ["000001.SZ", "600519.SH"])
+        self.assertIsInstance(panel.values, np.memmap)
+
+        close = panel.field('close')
+        self.assertTrue(np.shares_memory(close, panel.values))
+        np.testing.assert_allclose(close[:, 0], self.data["000001.SZ"]['close'].values)
+        self.assertTrue(np.isnan(close[:5, 1]).all())
+
+        march = panel.symbol("600519.SH", "2024-03-01", "2024-03-29")
+        np.testing.assert_allclose(march[:, panel.field_index('close')],
+                                   self.data["600519.SH"].loc["2024-03-01":, 'close'].values)
+
+    def test_reopen_and_to_dict(self):
+        """测试重新打开面板并还原为数据字典"""
+        build_panel(self.data, self.tmp_dir / "panel")
+        panel = load_panel(self.tmp_dir / "panel")
+
+        self.assertEqual(panel.values.dtype, np.float32)
+        restored = panel.to_dict()
+        self.assertEqual(len(restored["600519.SH"]), len(self.data["600519.SH"]))
+        np.testing.assert_allclose(restored["000001.SZ"]['close'].values,
+                                   self.data["000001.SZ"]['close'].values, rtol=1e-6)
+
+        with self.assertRaises(ValueError):
+            panel.field('turnover')
+        with self.assertRaises(ValueError):
+            MarketPanel(self.tmp_dir / "not_exists")
+
+    def test_rebuild_while_open(self):
+        """测试重新构建时切换版本指针，已打开的旧面板仍可读取，旧版本目录被清理"""
+        old = build_panel(self.data, self.tmp_dir / "panel", dtype="float64")
+        old_close = np.array(old.field('close'))
+
+        changed = {symbol: df.assign(close=df['close'] + 1) for symbol, df in self.data.items()}
+        new = build_panel(changed, self.tmp_dir / "panel", dtype="float64")
+
+        np.testing.assert_allclose(old.field('close'), old_close)
+        np.testing.assert_allclose(new.field('close'), old_close + 1)
+        np.testing.assert_allclose(load_panel(self.tmp_dir / "panel").field('close'), old_close + 1)
+        versions = [p.name for p in (self.tmp_dir / "panel").iterdir() if p.is_dir()]
+        self.assertEqual(versions, [new.version_dir.name])
+
+    def test_build_from_store(self):
+        """测试由本地存储的不复权行情与复权因子构建前复权面板"""
+        store = LocalDataStore(self.tmp_dir / "store", cache_ttl=0)
+        for symbol, df in self.data.items():
+            store.write(symbol, df, "2024-01-01", "2024-03-29", "None")
+        store.write_adjust_factors("000001.SZ", pd.Series(
+            [1.0, 2.0], index=pd.DatetimeIndex(["2000-01-04", "2024-03-01"])))
+
+        panel = build_panel_from_store(store, self.tmp_dir / "panel", "2024-01-01", "2024-03-29",
+                                       adjust="qfq", dtype="float64")
+        close = panel.to_frame('close')
+
+        raw = self.data["000001.SZ"]['close']
+        self.assertAlmostEqual(close.loc["2024-02-29", "000001.SZ"], raw.loc["2024-02-29"] / 2)
+        self.assertAlmostEqual(close.loc["2024-03-01", "000001.SZ"], raw.loc["2024-03-01"])
+        self.assertEqual(panel.adjust, "qfq")
+
+    def test_build_from_store_stale_factors(self):
+        """测试复权因子超过 cache_ttl 时仍用于构建面板，不丢失股票"""
+        store = LocalDataStore(self.tmp_dir / "store", cache_ttl=60)
+        for symbol, df in self.data.items():
+            store.write(symbol, df, "2024-01-01", "2024-03-29", "None")
+            store.write_adjust_factors(symbol, pd.Series(
+                [1.0, 2.0], index=pd.DatetimeIndex(["2000-01-04", "2024-03-01"])))
+            os.utime(store._factor_path(symbol), (time.time() - 3600, time.time() - 3600))
+        self.assertIsNone(store.read_adjust_factors("000001.SZ"))
+
+        panel = build_panel_from_store(store, self.tmp_dir / "panel", "2024-01-01", "2024-03-29",
+                                       adjust="qfq", dtype="float64")
+
+        self.assertEqual(panel.symbols, ["000001.SZ", "600519.SH"])
+        raw = self.data["600519.SH"]['close']
+        self.assertAlmostEqual(panel.to_frame('close').loc["2024-02-29", "600519.SH"], raw.loc["2024-02-29"] / 2)
+
+    def test_backtest_from_panel(self):
+        """测试回测引擎直接使用面板，结果与数据字典一致"""
+        panel = build_panel(self.data, self.tmp_dir / "panel", dtype="float64")
+        strategy = MovingAverageCrossover(5, 20)
+
+        from_dict = BacktestEngine().run(self.data, strategy)
+        from_panel = BacktestEngine().run(panel, strategy)
+
+        self.assertAlmostEqual(from_dict['final_value'], from_panel['final_value'])
+        self.assertEqual(from_dict['total_trades'], from_panel['total_trades'])
+
+    def test_backtest_panel_without_frames(self):
+        """测试面板回测直接按字段切片，不转换为数据字典，横截面与逐只策略结果与数据字典一致"""
+        from src.strategy.formula_strategy import FormulaStrategy
+        panel = build_panel(self.data, self.tmp_dir / "panel", dtype="float64")
+
+        for strategy in [MovingAverageCrossover(5, 20), FormulaStrategy("选股:MA(C,5)>MA(C,20);")]:
+            with self.subTest(strategy=strategy.name):
+                from_dict = BacktestEngine().run(self.data, strategy, start_date="2024-02-01")
+                with mock.patch.object(MarketPanel, 'to_dict', side_effect=AssertionError("不应构造数据字典")):
+                    from_panel = BacktestEngine().run(panel, strategy, start_date="2024-02-01")
+
+                self.assertAlmostEqual(from_dict['final_value'], from_panel['final_value'])
+                self.assertEqual(from_dict['total_trades'], from_panel['total_trades'])
+                self.assertEqual(from_dict['dates'], from_panel['dates'])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,176 @@
+"""
+数据质量校验测试
+"""
+
+import unittest
+import tempfile
+import shutil
+import time
+import numpy as np
+import pandas as pd
+
+from src.backtest.backtest_engine import BacktestEngine, MovingAverageCrossover
+from src.data.data_provider import DataProvider
+from src.data.local_store import LocalDataStore
+from src.data.panel_store import build_panel_from_store
+from src.data.quality import (QUALITY_DUPLICATE, QUALITY_GAP, QUALITY_HIGH_LOW, QUALITY_MISSING,
+                              QUALITY_ZERO_VOLUME, apply_quality, flag_names, validate_bars, validate_panel)
+from src.data.rate_limiter import TokenBucket
+from src.data.sqlite_store import SQLiteBarStore
+from tests.test_local_store import make_daily_frame
+
+
+class DuplicateAkShare:
+    """2024-01-05 重复返回两次的模拟 akshare 模块"""
+
+    def stock_zh_a_hist(self, symbol, period, start_date, end_date, adjust):
+        df = make_daily_frame(start_date, end_date)
+        raw = pd.DataFrame({'日期': df.index.strftime('%Y-%m-%d'), '开盘': df['open'], '收盘': df['close'],
+                            '最高': df['high'], '最低': df['low'], '成交量': df['volume'] / 100,
+                            '成交额': df['close'] * df['volume']}).reset_index(drop=True)
+        return pd.concat([raw, raw[raw['日期'] == "2024-01-05"]], ignore_index=True)
+
+
+class DuplicateProvider(DataProvider):
+    """使用 DuplicateAkShare 的数据提供器"""
+
+    def _init_data_source(self):
+        self.ak = DuplicateAkShare()
+
+
+def make_bad_frame() -> pd.DataFrame:
+    """2024年1月的日线，其中几根K线有问题"""
+    df = make_daily_frame("2024-01-01", "2024-01-31")
+    df.loc["2024-01-03", 'high'] = 5.0            # 最高价低于最低价
+    df.loc["2024-01-04", 'close'] = np.nan        # 缺失值
+    df.loc["2024-01-05", 'volume'] = 0            # 停牌占位
+    return df.drop(pd.Timestamp("2024-01-10"))    # 缺少一个交易日
+
+
+class TestValidateBars(unittest.TestCase):
+    """测试向量化校验"""
+
+    def test_flags(self):
+        """测试各类问题的标记"""
+        df = make_bad_frame()
+        sessions = pd.bdate_range("2024-01-01", "2024-01-31")
+        flags = pd.Series(validate_bars(df, sessions), index=df.index)
+
+        self.assertEqual(flags["2024-01-03"], QUALITY_HIGH_LOW)
+        self.assertEqual(flags["2024-01-04"], QUALITY_MISSING)
+        self.assertEqual(flags["2024-01-05"], QUALITY_ZERO_VOLUME)
+        self.assertEqual(flags["2024-01-11"], QUALITY_GAP)
+        self.assertEqual(int((flags != 0).sum()), 4)
+        self.assertEqual(flag_names(QUALITY_GAP | QUALITY_MISSING), ['missing', 'gap'])
+
+        duplicated = pd.concat([df.iloc[:3], df.iloc[[1]]])
+        self.assertEqual(list(validate_bars(duplicated) & QUALITY_DUPLICATE), [0, QUALITY_DUPLICATE, 0, 0])
+
+    def test_panel_matches_bars(self):
+        """测试面板校验与逐只校验一致，没有K线的位置不标记"""
+        df = make_bad_frame()
+        fields = ['open', 'high', 'low', 'close', 'volume']
+        values = np.full((len(df) + 1, 2, len(fields)), np.nan, dtype=np.float32)
+        values[:-1, 0, :] = df[fields].to_numpy(dtype=np.float32)
+        values[:-1, 1, :] = df[fields].to_numpy(dtype=np.float32)
+        values[:-1, 1, 0] = np.nan  # 第二只股票缺少开盘价
+
+        flags = validate_panel(values, fields)
+        np.testing.assert_array_equal(flags[:-1, 0], validate_bars(df))
+        self.assertTrue((flags[:-1, 1] & QUALITY_MISSING).all())
+        self.assertEqual(flags[-1].tolist(), [0, 0])
+
+    def test_panel_speed(self):
+        """测试一千只股票一年的面板校验在毫秒级完成"""
+        close = 10 + np.random.default_rng(0).standard_normal((250, 1000)).cumsum(axis=0) * 0.1
+        values = np.stack([close, close * 1.01, close * 0.99, close, np.full_like(close, 1e6)], axis=2)
+        values = values.astype(np.float32)
+        fields = ['open', 'high', 'low', 'close', 'volume']
+        validate_panel(values, fields)
+        started = time.perf_counter()
+        validate_panel(values, fields)
+        self.assertLess(time.perf_counter() - started, 0.2)
+
+    def test_apply_quality(self):
+        """测试剔除与修复问题K线"""
+        df = make_bad_frame()
+        flags = pd.Series(validate_bars(df), index=df.index)
+        flags = flags[flags != 0]
+
+        excluded = apply_quality(df, flags, "exclude")
+        self.assertEqual(len(excluded), len(df) - 3)
+
+        repaired = apply_quality(df, flags, "repair")
+        self.assertEqual(len(repaired), len(df))
+        self.assertEqual(repaired.loc["2024-01-04", 'close'], df.loc["2024-01-02", 'close'])
+        self.assertEqual(repaired.loc["2024-01-03", 'high'], df.loc["2024-01-02", 'close'])
+        self.assertEqual(repaired.loc["2024-01-05", 'volume'], 0)
+        self.assertIs(apply_quality(df, flags, "keep"), df)
+        with self.assertRaises(ValueError):
+            apply_quality(df, flags, "drop")
+
+
+class TestStoredQuality(unittest.TestCase):
+    """测试入库时保存质量标记"""
+
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.stores = [LocalDataStore(self.tmp_dir, cache_ttl=0),
+                       SQLiteBarStore(f"{self.tmp_dir}/bars.db", cache_ttl=0)]
+        for store in self.stores:
+            store.reference.update_calendar(pd.bdate_range("2024-01-01", "2024-03-29"))
+
+    def tearDown(self):
+        self.stores[1].close()
+        shutil.rmtree(self.tmp_dir, ignore_errors=True)
+
+    def test_write_and_repair(self):
+        """测试写入后保存标记，补齐缺失交易日后标记被更新"""
+        for store in self.stores:
+            store.write("000001.SZ", make_bad_frame(), "2024-01-01", "2024-01-31", "None")
+            flags = store.read_quality("000001.SZ", adjust="None")
+            self.assertEqual(list(flags.index.strftime('%m-%d')), ["01-03", "01-04", "01-05", "01-11"])
+            self.assertEqual(flags["2024-01-11"], QUALITY_GAP)
+
+            fixed = make_daily_frame("2024-01-10", "2024-01-10")
+            store.write("000001.SZ", fixed, "2024-01-10", "2024-01-10", "None")
+            flags = store.read_quality("000001.SZ", "2024-01-01", "2024-01-31", "None")
+            self.assertEqual(list(flags.index.strftime('%m-%d')), ["01-03", "01-04", "01-05"])
+
+            report = store.quality_report(adjust="None")
+            self.assertEqual(report.loc["000001.SZ", 'flagged'], 3)
+            self.assertEqual(report.loc["000001.SZ", 'zero_volume'], 1)
+
+            store.clear("000001.SZ")
+            self.assertTrue(store.read_quality("000001.SZ", adjust="None").empty)
+
+    def test_provider_duplicates_flagged(self):
+        """测试经数据提供器获取时，上游返回的重复日期在去重后仍被标记"""
+        for store in self.stores:
+            provider = DuplicateProvider("akshare", store=store)
+            provider.rate_limiter = TokenBucket(rate=0)
+            df = provider.get_daily_data("000001.SZ", "2024-01-01", "2024-01-31", "None")
+
+            self.assertFalse(df.index.has_duplicates)
+            flags = store.read_quality("000001.SZ", adjust="None")
+            self.assertEqual(list(flags.index.strftime('%m-%d')), ["01-05"])
+            self.assertEqual(flags["2024-01-05"], QUALITY_DUPLICATE)
+
+    def test_engine_uses_panel_quality(self):
+        """测试回测引擎使用面板中的质量标记剔除问题K线"""
+        store = self.stores[0]
+        store.write("000001.SZ", make_bad_frame(), "2024-01-01", "2024-01-31", "None")
+        panel = build_panel_from_store(store, f"{self.tmp_dir}/panel", "2024-01-01", "2024-01-31",
+                                       adjust="None", dtype="float64")
+        self.assertEqual(len(panel.quality_flags()["000001.SZ"]), 4)
+
+        strategy = MovingAverageCrossover(short_window=2, long_window=4)
+        excluded = BacktestEngine().run(
+            {"000001.SZ": apply_quality(make_bad_frame(), store.read_quality("000001.SZ", adjust="None"))},
+            strategy)
+        from_panel = BacktestEngine().run(panel, strategy, bad_bars="exclude")
+        self.assertAlmostEqual(from_panel['final_value'], excluded['final_value'])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,132 @@
+"""
+限流、重试与并发批量获取测试
+"""
+
+import unittest
+import unittest.mock
+import threading
+import time
+import pandas as pd
+import numpy as np
+
+from src.data.rate_limiter import TokenBucket, call_with_retry
+from src.data.data_provider import DataProvider
+
+
+class SlowProvider(DataProvider):
+    """模拟网络延迟并记录并发度的测试用数据提供器"""
+
+    def _init_data_source(self):
+        self.active = 0
+        self.peak = 0
+        self.lock = threading.Lock()
+        self.failures = {}
+
+    def _fetch_daily(self, symbol, start_date, end_date, adjust):
+        with self.lock:
+            self.active += 1
+            self.peak = max(self.peak, self.active)
+        try:
+            time.sleep(0.02)
+            if self.failures.get(symbol, 0) > 0:
+                self.failures[symbol] -= 1
+                raise ConnectionError("模拟网络错误")
+            dates = pd.date_range(start_date, end_date, freq='B', name='date')
+            return pd.DataFrame({'close': np.arange(len(dates), dtype=float)}, index=dates)
+        finally:
+            with self.lock:
+                self.active -= 1
+
+
+class TestTokenBucket(unittest.TestCase):
+    """测试令牌桶限流器"""
+
+    def test_burst_then_throttle(self):
+        """测试突发额度用完后按速率限流"""
+        bucket = TokenBucket(rate=50, capacity=2)
+        self.assertTrue(bucket.try_acquire())
+        self.assertTrue(bucket.try_acquire())
+        self.assertFalse(bucket.try_acquire())
+
+        start = time.monotonic()
+        for _ in range(5):
+            bucket.acquire()
+        self.assertGreaterEqual(time.monotonic() - start, 0.08)
+
+    def test_unlimited(self):
+        """测试速率为0时不限流"""
+        bucket = TokenBucket(rate=0)
+        self.assertTrue(all(bucket.try_acquire() for _ in range(1000)))
+
+
+class TestCallWithRetry(unittest.TestCase):
+    """测试指数退避重试"""
+
+    def test_retry_until_success(self):
+        """测试失败后重试成功"""
+        attempts = []
+
+        def flaky():
+            attempts.append(1)
+            if len(attempts) < 3:
+                raise ConnectionError("timeout")
+            return "ok"
+
+        self.assertEqual(call_with_retry(flaky, retry_count=3, backoff_base=0), "ok")
+        self.assertEqual(len(attempts), 3)
+
+    def test_retry_exhausted(self):
+        """测试重试次数用尽后抛出异常"""
+        attempts = []
+
+        def broken():
+            attempts.append(1)
+            raise ConnectionError("down")
+
+        with self.assertRaises(ConnectionError):
+            call_with_retry(broken, retry_count=2, backoff_base=0)
+        self.assertEqual(len(attempts), 3)
+
+
+class TestConcurrentMultipleStocks(unittest.TestCase):
+    """测试并发批量获取"""
+
+    def setUp(self):
+        self.symbols = [f"{i:06d}.SZ" for i in range(1, 13)]
+
+    def make_provider(self):
+        provider = SlowProvider("akshare", use_cache=False)
+        provider.rate_limiter = TokenBucket(rate=0)
+        provider.retry_count = 1
+        return provider
+
+    def test_same_result_as_sequential(self):
+        """测试并发结果与顺序获取一致"""
+        sequential = self.make_provider().get_multiple_stocks(
+            self.symbols, "2024-01-01", "2024-01-31", max_workers=1)
+        provider = self.make_provider()
+        concurrent = provider.get_multiple_stocks(
+            self.symbols, "2024-01-01", "2024-01-31", max_workers=4)
+
+        self.assertEqual(list(concurrent.keys()), self.symbols)
+        for symbol in self.symbols:
+            pd.testing.assert_frame_equal(concurrent[symbol], sequential[symbol])
+        self.assertGreater(provider.peak, 1)
+        self.assertLessEqual(provider.peak, 4)
+
+    def test_failures_are_retried_or_skipped(self):
+        """测试失败的股票会重试，重试用尽后被跳过"""
+        provider = self.make_provider()
+        provider.failures = {self.symbols[0]: 1, self.symbols[1]: 5}
+
+        with unittest.mock.patch('src.data.rate_limiter.time.sleep'):
+            result = provider.get_multiple_stocks(
+                self.symbols, "2024-01-01", "2024-01-31", max_workers=4)
+
+        self.assertIn(self.symbols[0], result)
+        self.assertNotIn(self.symbols[1], result)
+        self.assertEqual(len(result), len(self.symbols) - 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,140 @@
+"""
+批量实时行情与共享缓存测试（使用本地桩服务器，无需网络）
+"""
+
+import unittest
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+import pandas as pd
+
+from src.data.free_data_provider import FreeDataProvider
+from src.data.quote_cache import QUOTE_COLUMNS, QuoteCache, get_quote_cache
+from src.data.rate_limiter import TokenBucket
+from tests.stub_http_server import StubHTTPServer
+
+
+class TestQuoteCache(unittest.TestCase):
+    """测试行情缓存"""
+
+    def make_snapshot(self, symbols, price=10.0):
+        return pd.DataFrame({'price': [price] * len(symbols)},
+                            index=pd.Index(symbols, name='symbol'))
+
+    def test_ttl(self):
+        """测试有效期内命中、过期后未命中"""
+        cache = QuoteCache(ttl=0.1)
+        cache.put("eastmoney", self.make_snapshot(["000001.SZ"]))
+
+        hit, missing = cache.get("eastmoney", ["000001.SZ", "600519.SH"])
+        self.assertEqual(list(hit.index), ["000001.SZ"])
+        self.assertEqual(missing, ["600519.SH"])
+
+        time.sleep(0.15)
+        hit, missing = cache.get("eastmoney", ["000001.SZ"])
+        self.assertTrue(hit.empty)
+        self.assertEqual(missing, ["000001.SZ"])
+
+    def test_fetch_only_missing(self):
+        """测试只获取未命中的股票，结果按请求顺序排列"""
+        cache = QuoteCache(ttl=60)
+        requested = []
+
+        def fetch(symbols):
+            requested.append(list(symbols))
+            return self.make_snapshot(symbols)
+
+        cache.get_or_fetch("sina", ["000001.SZ"], fetch)
+        result = cache.get_or_fetch("sina", ["600519.SH", "000001.SZ", "600519.SH"], fetch)
+
+        self.assertEqual(requested, [["000001.SZ"], ["600519.SH"]])
+        self.assertEqual(list(result.index), ["600519.SH", "000001.SZ"])
+
+    def test_concurrent_callers_coalesce(self):
+        """测试并发调用方只触发一次上游请求"""
+        cache = QuoteCache(ttl=60)
+        calls = []
+        lock = threading.Lock()
+
+        def fetch(symbols):
+            with lock:
+                calls.append(symbols)
+            time.sleep(0.05)
+            return self.make_snapshot(symbols)
+
+        with ThreadPoolExecutor(max_workers=8) as executor:
+            results = list(executor.map(
+                lambda _: cache.get_or_fetch("eastmoney", ["000001.SZ", "600519.SH"], fetch), range(8)))
+
+        self.assertEqual(len(calls), 1)
+        for result in results:
+            self.assertEqual(list(result.index), ["000001.SZ", "600519.SH"])
+
+
+class TestRealtimeQuotes(unittest.TestCase):
+    """测试FreeDataProvider的批量实时行情"""
+
+    @classmethod
+    def setUpClass(cls):
+        cls.server = StubHTTPServer().start()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.stop()
+
+    def setUp(self):
+        get_quote_cache().clear()
+        self.symbols = ["600519.SH", "000001.SZ"]
+
+    def make_provider(self, source):
+        provider = FreeDataProvider(source, use_cache=False)
+        provider.rate_limiter = TokenBucket(rate=0)
+        provider.EASTMONEY_QUOTE_URL = f"{self.server.base_url}/api/qt/ulist.np/get"
+        provider.SINA_QUOTE_URL = f"{self.server.base_url}/"
+        return provider
+
+    def test_sources_agree(self):
+        """测试东方财富与新浪财经解析为相同格式"""
+        frames = {}
+        for source in ["eastmoney", "sina"]:
+            quotes = self.make_provider(source).get_realtime_quotes(self.symbols + ["999999.SZ"])
+            self.assertEqual(list(quotes.index), self.symbols)
+            self.assertEqual(list(quotes.columns), QUOTE_COLUMNS)
+            frames[source] = quotes
+
+        for column in ['price', 'open', 'high', 'low', 'pre_close', 'amount']:
+            pd.testing.assert_series_equal(frames['eastmoney'][column], frames['sina'][column],
+                                           check_exact=False, rtol=1e-6)
+        self.assertEqual(frames['sina'].loc["600519.SH", 'name'], "贵州茅台")
+        self.assertEqual(frames['eastmoney'].loc["000001.SZ", 'time'], pd.Timestamp("2024-01-26 15:00:00"))
+        self.assertEqual(frames['sina'].loc["000001.SZ", 'time'], pd.Timestamp("2024-01-26 15:00:00"))
+
+    def test_one_request_per_batch(self):
+        """测试每批股票只发出一个请求，超过批大小时分批"""
+        provider = self.make_provider("eastmoney")
+        provider.QUOTE_BATCH_SIZE = 2
+        before = self.server.request_count
+
+        provider.get_realtime_quotes(self.symbols)
+        self.assertEqual(self.server.request_count - before, 1)
+
+        get_quote_cache().clear()
+        provider.get_realtime_quotes(self.symbols + ["000002.SZ", "600000.SH", "300750.SZ"])
+        self.assertEqual(self.server.request_count - before, 4)
+
+    def test_cache_shared_between_providers(self):
+        """测试有效期内不同提供器实例共享快照"""
+        before = self.server.request_count
+        self.make_provider("sina").get_realtime_quotes(self.symbols)
+        quote = self.make_provider("sina").get_realtime_quote("000001.SZ")
+
+        self.assertEqual(self.server.request_count - before, 1)
+        self.assertAlmostEqual(quote['price'], 9.25)
+        self.assertEqual(quote['time'], "2024-01-26 15:00:00")
+
+        self.make_provider("sina").get_realtime_quotes(self.symbols, use_cache=False)
+        self.assertEqual(self.server.request_count - before, 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
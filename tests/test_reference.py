@@ -0,0 +1,133 @@
+"""
+交易日历与证券主表测试
+"""
+
+import unittest
+import tempfile
+import shutil
+import numpy as np
+import pandas as pd
+from unittest import mock
+
+from src.backtest.backtest_engine import BacktestEngine, MovingAverageCrossover
+from src.data.local_store import LocalDataStore
+from src.data.reference import ReferenceData, TradingCalendar
+from tests.test_local_store import CountingProvider, make_daily_frame
+
+# 2024年春节休市
+HOLIDAYS = pd.date_range("2024-02-09", "2024-02-16")
+SESSIONS = pd.bdate_range("2024-01-01", "2024-03-29").difference(HOLIDAYS).difference([pd.Timestamp("2024-01-01")])
+
+
+class TestTradingCalendar(unittest.TestCase):
+    """测试交易日历"""
+
+    def test_sessions(self):
+        """测试区间交易日查询"""
+        calendar = TradingCalendar(list(SESSIONS.strftime('%Y-%m-%d')) + ["2024-01-02"])
+        self.assertEqual(len(calendar), len(SESSIONS))
+        self.assertEqual(calendar.first, pd.Timestamp("2024-01-02"))
+        self.assertEqual(calendar.count("2024-02-05", "2024-02-23"), 9)
+        self.assertEqual(list(calendar.sessions("2024-02-08", "2024-02-19").strftime('%m-%d')),
+                         ["02-08", "02-19"])
+        self.assertTrue(calendar.is_session("2024-02-19"))
+        self.assertFalse(calendar.is_session("2024-02-12"))
+
+
+class TestReferenceData(unittest.TestCase):
+    """测试参考数据与请求裁剪"""
+
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.reference = ReferenceData(f"{self.tmp_dir}/reference")
+        self.reference.update_calendar(SESSIONS)
+        self.reference.update_securities(pd.DataFrame({
+            'name': ["平安银行", "新股", "退市股"],
+            'list_date': [pd.Timestamp("1991-04-03"), pd.Timestamp("2024-03-04"), pd.Timestamp("2000-01-04")],
+            'delist_date': [pd.NaT, pd.NaT, pd.Timestamp("2024-01-19")],
+        }, index=pd.Index(["000001.SZ", "301999.SZ", "600999.SH"], name='symbol')))
+        self.reference.update_status(pd.DataFrame({
+            'symbol': "000001.SZ",
+            'date': pd.bdate_range("2024-03-18", "2024-03-29"),
+            'suspended': True,
+            'is_st': False,
+        }))
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir, ignore_errors=True)
+
+    def test_clip_range(self):
+        """测试按上市期间、节假日与停牌裁剪"""
+        clip = self.reference.clip_range
+        self.assertEqual(clip("000001.SZ", "2024-02-10", "2024-02-25"), ("2024-02-19", "2024-02-23"))
+        self.assertIsNone(clip("000001.SZ", "2024-02-10", "2024-02-18"))
+        self.assertEqual(clip("000001.SZ", "2024-03-01", "2024-03-29"), ("2024-03-01", "2024-03-15"))
+        self.assertIsNone(clip("000001.SZ", "2024-03-18", "2024-03-29"))
+        self.assertEqual(clip("301999.SZ", "2024-01-01", "2024-03-08"), ("2024-03-04", "2024-03-08"))
+        self.assertIsNone(clip("600999.SH", "2024-02-01", "2024-03-31"))
+        # 日历未覆盖的部分不裁剪
+        self.assertEqual(clip("000001.SZ", "2024-03-25", "2024-04-10"), ("2024-03-30", "2024-04-10"))
+        self.assertEqual(clip("000002.SZ", "2023-12-01", "2024-01-07"), ("2023-12-01", "2024-01-05"))
+
+    def test_persistence(self):
+        """测试保存后重新读取"""
+        loaded = ReferenceData(f"{self.tmp_dir}/reference")
+        self.assertEqual(len(loaded.calendar), len(SESSIONS))
+        self.assertEqual(loaded.listing_range("301999.SZ")[0], pd.Timestamp("2024-03-04"))
+        self.assertTrue(loaded.is_suspended("000001.SZ", "2024-03-20"))
+        self.assertFalse(loaded.is_suspended("000001.SZ", "2024-03-15"))
+        self.assertEqual(len(loaded.trading_sessions("000001.SZ", "2024-03-11", "2024-03-29")), 5)
+
+    def test_buffered_status(self):
+        """测试暂存的停牌日期在 flush_status 时才合并保存，多次暂存只写一次文件"""
+        for day in ["2024-03-04", "2024-03-05"]:
+            self.reference.buffer_status(pd.DataFrame({
+                'symbol': ["301999.SZ"], 'date': [day], 'suspended': [True], 'is_st': [False],
+            }))
+        self.assertFalse(self.reference.is_suspended("301999.SZ", "2024-03-04"))
+        self.assertEqual(len(ReferenceData(f"{self.tmp_dir}/reference").status), 10)
+
+        with mock.patch.object(self.reference, '_save', wraps=self.reference._save) as save:
+            self.reference.flush_status()
+            self.reference.flush_status()
+        self.assertEqual(save.call_count, 1)
+        self.assertTrue(self.reference.is_suspended("301999.SZ", "2024-03-05"))
+        loaded = ReferenceData(f"{self.tmp_dir}/reference")
+        self.assertEqual(len(loaded.status), 12)
+
+    def test_store_skips_impossible_requests(self):
+        """测试本地存储只请求可能有数据的区间"""
+        store = LocalDataStore(self.tmp_dir, cache_ttl=0)
+        store.reference.reload()
+        provider = CountingProvider("akshare", store=store)
+
+        provider.get_daily_data("301999.SZ", "2024-01-01", "2024-03-08", adjust="None")
+        provider.get_daily_data("000001.SZ", "2024-02-01", "2024-02-08", adjust="None")
+        provider.get_daily_data("000001.SZ", "2024-02-01", "2024-02-18", adjust="None")
+        provider.get_daily_data("600999.SH", "2024-02-01", "2024-03-31", adjust="None")
+
+        self.assertEqual(provider.calls, [("301999.SZ", "2024-03-04", "2024-03-08"),
+                                          ("000001.SZ", "2024-02-01", "2024-02-08")])
+
+
+class TestEngineCalendar(unittest.TestCase):
+    """测试回测引擎使用交易日历作为时间轴"""
+
+    def test_calendar_timeline(self):
+        """测试有日历时与合并日期的结果一致"""
+        data = {}
+        for i, symbol in enumerate(["000001.SZ", "000002.SZ"]):
+            df = make_daily_frame("2024-01-02", "2024-03-29", symbol).reindex(SESSIONS)
+            df['close'] = 10 + np.sin(np.arange(len(df)) / (3 + i)) * 2
+            data[symbol] = df
+        calendar = TradingCalendar(SESSIONS)
+
+        strategy = MovingAverageCrossover(short_window=3, long_window=8)
+        by_union = BacktestEngine().run(data, strategy)
+        by_calendar = BacktestEngine().run(data, strategy, calendar=calendar)
+        self.assertEqual(by_union['total_trades'], by_calendar['total_trades'])
+        self.assertAlmostEqual(by_union['final_value'], by_calendar['final_value'])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,200 @@
+"""
+录制/回放数据提供器测试（录制使用本地桩服务器与模拟模块，回放无需网络）
+"""
+
+import sys
+import unittest
+import tempfile
+import shutil
+import time
+from unittest import mock
+import pandas as pd
+
+from src.data.rate_limiter import TokenBucket
+from src.data.replay_provider import (FaultInjector, FixtureStore, ReplayDataProvider,
+                                      ReplayFreeDataProvider, create_replay_provider)
+from tests.stub_http_server import StubHTTPServer
+
+
+class FakeAkShare:
+    """模拟 akshare 模块"""
+
+    def __init__(self):
+        self.calls = 0
+
+    def stock_zh_a_hist(self, symbol, period, start_date, end_date, adjust):
+        self.calls += 1
+        dates = pd.bdate_range(start_date, end_date)
+        return pd.DataFrame({
+            '日期': dates.strftime('%Y-%m-%d'),
+            '开盘': 10.0, '收盘': 10.5, '最高': 11.0, '最低': 9.5,
+            '成交量': 1000, '成交额': 10500.0,
+        })
+
+
+class FakeResultSet:
+    """模拟 Baostock 查询结果"""
+
+    def __init__(self, fields, rows):
+        self.fields = fields
+        self.rows = rows
+        self.error_code = '0'
+        self.error_msg = 'success'
+        self._pos = -1
+
+    def next(self):
+        self._pos += 1
+        return self._pos < len(self.rows)
+
+    def get_row_data(self):
+        return self.rows[self._pos]
+
+
+class FakeBaostock:
+    """模拟 baostock 模块"""
+
+    def login(self):
+        return FakeResultSet([], [])
+
+    def logout(self):
+        return FakeResultSet([], [])
+
+    def query_history_k_data_plus(self, code, fields, start_date, end_date, frequency, adjustflag):
+        rows = [[date, code, "10.0", "11.0", "9.5", "10.5", "10.0", "1000", "10500.0", adjustflag,
+                 "0.5", "1", "5.0", "0"] for date in pd.bdate_range(start_date, end_date).strftime('%Y-%m-%d')]
+        return FakeResultSet(fields.split(','), rows)
+
+
+class TestFaultInjector(unittest.TestCase):
+    """测试延迟与错误注入"""
+
+    def test_seeded_errors_are_reproducible(self):
+        """测试指定种子时错误序列可复现，错误率接近配置值"""
+        def sequence():
+            injector = FaultInjector(error_rate=0.3, seed=7)
+            failures = []
+            for _ in range(1000):
+                try:
+                    injector.apply("test")
+                    failures.append(False)
+                except ConnectionError:
+                    failures.append(True)
+            return failures
+
+        first = sequence()
+        self.assertEqual(first, sequence())
+        self.assertAlmostEqual(sum(first) / len(first), 0.3, delta=0.05)
+
+        with self.assertRaises(ValueError):
+            FaultInjector(error_rate=1.5)
+
+    def test_latency(self):
+        """测试固定延迟"""
+        injector = FaultInjector(latency=0.02)
+        started = time.perf_counter()
+        for _ in range(5):
+            injector.apply("test")
+        self.assertGreaterEqual(time.perf_counter() - started, 0.1)
+
+
+class TestReplayFreeDataProvider(unittest.TestCase):
+    """测试HTTP数据源的录制与回放"""
+
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.symbols = ["000001.SZ", "600519.SH"]
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir, ignore_errors=True)
+
+    def make_provider(self, source, mode, **settings):
+        provider = ReplayFreeDataProvider(source, mode, fixture_dir=self.tmp_dir, **settings)
+        provider.rate_limiter = TokenBucket(rate=0)
+        provider.retry_count = 0
+        return provider
+
+    def record(self, source):
+        server = StubHTTPServer().start()
+        try:
+            provider = self.make_provider(source, "record")
+            provider.EASTMONEY_KLINE_URL = f"{server.base_url}/api/qt/stock/kline/get"
+            provider.SINA_KLINE_URL = (f"{server.base_url}"
+                                       "/quotes_service/api/json_v2.php/CN_MarketData.getKLineData")
+            return provider.get_multiple_stocks(self.symbols, "2024-01-01", "2024-01-31", max_workers=1)
+        finally:
+            server.stop()
+
+    def test_replay_matches_recording(self):
+        """测试回放结果与录制时一致，同步与异步批量获取都可回放"""
+        for source in ["eastmoney", "sina"]:
+            recorded = self.record(source)
+            provider = self.make_provider(source, "replay")
+            replayed = provider.get_multiple_stocks(self.symbols, "2024-01-01", "2024-01-31", max_workers=2)
+            replayed_async = provider.get_multiple_stocks_async(self.symbols, "2024-01-01", "2024-01-31")
+
+            self.assertEqual(list(replayed.keys()), self.symbols)
+            for symbol in self.symbols:
+                self.assertEqual(len(recorded[symbol]), 5)
+                pd.testing.assert_frame_equal(replayed[symbol], recorded[symbol])
+                pd.testing.assert_frame_equal(replayed_async[symbol], recorded[symbol])
+
+    def test_injected_latency_and_errors(self):
+        """测试回放时注入延迟与错误"""
+        self.record("eastmoney")
+
+        slow = self.make_provider("eastmoney", "replay", latency=0.05)
+        started = time.perf_counter()
+        slow.get_daily_data("000001.SZ", "2024-01-01", "2024-01-31")
+        self.assertGreaterEqual(time.perf_counter() - started, 0.05)
+
+        failing = self.make_provider("eastmoney", "replay", error_rate=1.0)
+        with self.assertRaises(ConnectionError):
+            failing.get_daily_data("000001.SZ", "2024-01-01", "2024-01-31")
+        self.assertEqual(failing.get_multiple_stocks_async(self.symbols, "2024-01-01", "2024-01-31"), {})
+
+    def test_missing_fixture(self):
+        """测试没有录制的请求在回放时失败"""
+        provider = self.make_provider("eastmoney", "replay")
+        with self.assertRaises(FileNotFoundError):
+            provider.get_daily_data("000001.SZ", "2024-01-01", "2024-01-31")
+        with self.assertRaises(FileNotFoundError):
+            FixtureStore(self.tmp_dir).load("eastmoney", "/api", "0000")
+
+
+class TestReplayDataProvider(unittest.TestCase):
+    """测试AkShare、Baostock的录制与回放"""
+
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir, ignore_errors=True)
+
+    def test_record_and_replay(self):
+        """测试录制DataFrame与Baostock结果集后离线回放"""
+        for source, module in [("akshare", FakeAkShare()), ("baostock", FakeBaostock())]:
+            with mock.patch.object(sys, 'modules', {**sys.modules, source: module}):
+                recording = ReplayDataProvider(source, "record", fixture_dir=self.tmp_dir)
+            recorded = recording.get_daily_data("000001.SZ", "2024-01-01", "2024-01-31", adjust="None")
+
+            replaying = ReplayDataProvider(source, "replay", fixture_dir=self.tmp_dir)
+            replayed = replaying.get_daily_data("000001.SZ", "2024-01-01", "2024-01-31", adjust="None")
+
+            self.assertEqual(len(recorded), 23)
+            pd.testing.assert_frame_equal(replayed, recorded)
+
+    def test_factory(self):
+        """测试按数据源选择提供器类"""
+        self.assertIsInstance(create_replay_provider("baostock", fixture_dir=self.tmp_dir), ReplayDataProvider)
+        self.assertIsInstance(create_replay_provider("sina", fixture_dir=self.tmp_dir), ReplayFreeDataProvider)
+
+    def test_unsupported_mode(self):
+        """测试不支持的模式与数据源"""
+        with self.assertRaises(ValueError):
+            ReplayDataProvider("akshare", "live", fixture_dir=self.tmp_dir)
+        with self.assertRaises(ValueError):
+            ReplayFreeDataProvider("yfinance", "replay", fixture_dir=self.tmp_dir)
+
+
+if __name__ == '__main__':
+    unittest.main()
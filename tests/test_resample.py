@@ -0,0 +1,135 @@
+"""
+周线/月线重采样与缓存测试
+"""
+
+import unittest
+import tempfile
+import shutil
+import numpy as np
+import pandas as pd
+
+from src.data.local_store import LocalDataStore
+from src.data.resample import ResampleCache, period_start, resample_bars
+from src.data.schema import normalize_daily
+from tests.test_local_store import CountingProvider, make_daily_frame
+
+
+class TestResampleBars(unittest.TestCase):
+    """测试向量化聚合"""
+
+    def setUp(self):
+        df = make_daily_frame("2024-01-01", "2024-03-31")
+        df['close'] = df['close'] + np.sin(np.arange(len(df)))
+        df['amount'] = df['close'] * df['volume']
+        df['pct_change'] = df['close'].pct_change().fillna(0) * 100
+        self.daily = normalize_daily(df, "000001.SZ")
+
+    def test_matches_pandas_resample(self):
+        """测试与pandas按周/月重采样结果一致"""
+        for frequency, rule in [("W", "W-SUN"), ("M", "ME")]:
+            bars = resample_bars(self.daily, frequency)
+            expected = self.daily.resample(rule).agg(
+                {'open': 'first', 'high': 'max', 'low': 'min', 'close': 'last', 'volume': 'sum'}).dropna()
+
+            np.testing.assert_allclose(bars[['open', 'high', 'low', 'close']].to_numpy(),
+                                       expected[['open', 'high', 'low', 'close']].to_numpy(), rtol=1e-6)
+            self.assertEqual(list(bars['volume']), list(expected['volume']))
+            self.assertEqual(bars['close'].dtype, self.daily['close'].dtype)
+            self.assertEqual(bars['symbol'].dtype, self.daily['symbol'].dtype)
+
+        monthly = resample_bars(self.daily, "月线")
+        self.assertEqual(list(monthly.index.strftime('%Y-%m-%d')), ["2024-01-31", "2024-02-29", "2024-03-29"])
+        # 周期涨跌幅为日涨跌幅连乘
+        feb = self.daily.loc["2024-02"]
+        expected_pct = (np.prod(1 + feb['pct_change'].to_numpy(np.float64) / 100) - 1) * 100
+        self.assertAlmostEqual(float(monthly['pct_change'].iloc[1]), expected_pct, places=3)
+
+    def test_period_start(self):
+        """测试周期第一天"""
+        self.assertEqual(period_start("2024-01-26", "W"), pd.Timestamp("2024-01-22"))
+        self.assertEqual(period_start("2024-02-29", "M"), pd.Timestamp("2024-02-01"))
+        with self.assertRaises(ValueError):
+            resample_bars(self.daily, "Q")
+
+
+class TestResampleCache(unittest.TestCase):
+    """测试由本地日线生成周线/月线的缓存"""
+
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.store = LocalDataStore(self.tmp_dir, cache_ttl=0)
+        self.provider = CountingProvider("akshare", store=self.store)
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir, ignore_errors=True)
+
+    def expected(self, start, end, frequency):
+        daily = self.provider.get_daily_data("000001.SZ", period_start(start, frequency).strftime('%Y-%m-%d'), end)
+        return resample_bars(daily, frequency)
+
+    def test_cache_hit_without_reload(self):
+        """测试缓存命中时不再读取日线"""
+        weekly = self.provider.get_bars("000001.SZ", "2024-01-03", "2024-03-31", frequency="W")
+        self.assertEqual(weekly.index[0], pd.Timestamp("2024-01-05"))
+        self.assertEqual(len(self.provider.calls), 1)
+
+        loads = []
+        cache = self.provider.resampler
+        again = cache.get("000001.SZ", "2024-02-01", "2024-03-31", "qfq", "W",
+                          lambda s, e: loads.append((s, e)) or pd.DataFrame())
+        self.assertEqual(loads, [])
+        pd.testing.assert_frame_equal(again, weekly.loc["2024-02-01":])
+
+    def test_incremental_extension(self):
+        """测试结束日期延后时只补读最后一个周期之后的日线"""
+        self.provider.get_bars("000001.SZ", "2024-01-01", "2024-03-13", frequency="W")
+        loads = []
+        original = self.provider.get_daily_data
+
+        def counting_load(symbol, start, end, adjust="qfq"):
+            loads.append((start, end))
+            return original(symbol, start, end, adjust)
+
+        self.provider.get_daily_data = counting_load
+        weekly = self.provider.get_bars("000001.SZ", "2024-01-01", "2024-04-30", frequency="W")
+        self.assertEqual(loads, [("2024-03-11", "2024-04-30")])
+        self.assertEqual(self.provider.calls[-1], ("000001.SZ", "2024-03-14", "2024-04-30"))
+
+        self.provider.get_daily_data = original
+        pd.testing.assert_frame_equal(weekly, self.expected("2024-01-01", "2024-04-30", "W"))
+
+    def test_partial_last_period(self):
+        """测试结束日期落在周期中间时最后一根只聚合到结束日期"""
+        self.provider.get_bars("000001.SZ", "2024-01-01", "2024-06-30", frequency="M")
+        monthly = self.provider.get_bars("000001.SZ", "2024-01-01", "2024-03-13", frequency="M")
+        self.assertEqual(monthly.index[-1], pd.Timestamp("2024-03-13"))
+        pd.testing.assert_frame_equal(monthly, self.expected("2024-01-01", "2024-03-13", "M"))
+
+    def test_store_write_invalidates(self):
+        """测试写入新日线后受影响的周期重新计算"""
+        before = self.provider.get_bars("000001.SZ", "2024-01-01", "2024-03-31", frequency="W", adjust="None")
+
+        changed = make_daily_frame("2024-02-14", "2024-02-14")
+        changed['high'] = 99.0
+        self.store.write("000001.SZ", changed, "2024-02-14", "2024-02-14", "None")
+        entry = self.provider.resampler._entries[("000001.SZ", "None", "W")]
+        self.assertEqual(entry.end, pd.Timestamp("2024-02-11"))
+
+        after = self.provider.get_bars("000001.SZ", "2024-01-01", "2024-03-31", frequency="W", adjust="None")
+        self.assertEqual(after.loc["2024-02-16", 'high'], 99.0)
+        pd.testing.assert_frame_equal(after.loc[:"2024-02-09"], before.loc[:"2024-02-09"])
+
+        self.store.clear("000001.SZ")
+        self.assertEqual(len(self.provider.resampler), 0)
+
+    def test_eviction(self):
+        """测试超过容量时淘汰最久未使用的条目"""
+        cache = ResampleCache(max_entries=2)
+        daily = make_daily_frame("2024-01-01", "2024-01-31")
+        for symbol in ["A", "B", "C"]:
+            cache.get(symbol, "2024-01-01", "2024-01-31", "None", "W", lambda s, e: daily)
+        self.assertEqual([key[0] for key in cache._entries], ["B", "C"])
+
+
+if __name__ == '__main__':
+    unittest.main()
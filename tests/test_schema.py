@@ -0,0 +1,111 @@
+"""
+日线统一格式测试
+"""
+
+import unittest
+import tempfile
+import shutil
+import pandas as pd
+import numpy as np
+
+from src.data.schema import DAILY_SCHEMA, REQUIRED_COLUMNS, normalize_daily, empty_daily_frame
+from src.data.local_store import LocalDataStore
+
+
+class TestNormalizeDaily(unittest.TestCase):
+    """测试各数据源原始数据转换为统一格式"""
+
+    def assert_schema(self, df: pd.DataFrame):
+        """检查统一格式"""
+        self.assertIsInstance(df.index, pd.DatetimeIndex)
+        self.assertEqual(df.index.name, 'date')
+        self.assertIsNone(df.index.tz)
+        self.assertIsInstance(df['symbol'].dtype, pd.CategoricalDtype)
+        for col in REQUIRED_COLUMNS:
+            self.assertEqual(df[col].dtype, np.dtype(DAILY_SCHEMA[col]), col)
+
+    def test_tushare(self):
+        """测试Tushare列名、YYYYMMDD日期与倒序数据"""
+        raw = pd.DataFrame({
+            'ts_code': "000001.SZ", 'trade_date': ['20240103', '20240102'],
+            'open': [10.5, 10.0], 'high': [10.8, 10.2], 'low': [10.4, 9.9], 'close': [10.6, 10.1],
+            'pre_close': [10.1, 9.9], 'change': [0.5, 0.2], 'pct_chg': [4.95, 2.02],
+            'vol': [12345.0, 23456.0], 'amount': [1.3e7, 2.4e7],
+        })
+        df = normalize_daily(raw, "000001.SZ", date_format='%Y%m%d')
+
+        self.assert_schema(df)
+        self.assertEqual(list(df.index), [pd.Timestamp("2024-01-02"), pd.Timestamp("2024-01-03")])
+        self.assertEqual(df['volume'].iloc[0], 23456)
+        self.assertAlmostEqual(df['pct_change'].iloc[1], 4.95, places=5)
+        self.assertNotIn('ts_code', df.columns)
+
+    def test_baostock_strings(self):
+        """测试Baostock字符串数值、代码格式与多余字段"""
+        raw = pd.DataFrame({
+            'date': ['2024-01-02'], 'code': ['sz.000001'], 'open': ['10.00'], 'high': ['10.20'],
+            'low': ['9.90'], 'close': ['10.10'], 'preclose': ['9.90'], 'volume': ['2345600'],
+            'amount': ['23690000.00'], 'adjustflag': ['3'], 'turn': ['0.12'],
+            'tradestatus': ['1'], 'pctChg': ['2.02'], 'isST': ['0'],
+        })
+        df = normalize_daily(raw, "000001.SZ")
+
+        self.assert_schema(df)
+        self.assertEqual(list(df['symbol']), ["000001.SZ"])
+        self.assertAlmostEqual(df['pre_close'].iloc[0], 9.9, places=5)
+        self.assertEqual(df['turnover'].dtype, np.float32)
+        self.assertNotIn('adjustflag', df.columns)
+
+    def test_yfinance_timezone(self):
+        """测试带时区的索引与缺失字段"""
+        index = pd.DatetimeIndex(["2024-01-02", "2024-01-03"], tz="Asia/Shanghai", name="Date")
+        raw = pd.DataFrame({'Open': [1.0, 2.0], 'High': [1.0, 2.0], 'Low': [1.0, 2.0],
+                            'close': [1.0, 2.0], 'volume': [100.0, np.nan]}, index=index)
+        df = normalize_daily(raw, "AAPL")
+
+        self.assert_schema(df)
+        self.assertEqual(df.index[0], pd.Timestamp("2024-01-02"))
+        self.assertEqual(list(df['volume']), [100, 0])
+        self.assertTrue(df['amount'].isna().all())
+
+    def test_source_units(self):
+        """测试按数据源把成交量换算为股、成交额换算为元"""
+        raw = pd.DataFrame({'trade_date': ['20240102'], 'close': [10.0], 'vol': [123.0], 'amount': [45.6]})
+        tushare = normalize_daily(raw, "000001.SZ", date_format='%Y%m%d', source="tushare")
+        self.assertEqual(tushare['volume'].iloc[0], 12300)
+        self.assertAlmostEqual(tushare['amount'].iloc[0], 45600.0)
+
+        akshare = normalize_daily(pd.DataFrame({'日期': ['2024-01-02'], '成交量': [123], '成交额': [45.6]}),
+                                  "000001.SZ", source="akshare")
+        self.assertEqual(akshare['volume'].iloc[0], 12300)
+        self.assertAlmostEqual(akshare['amount'].iloc[0], 45.6)
+
+        baostock = normalize_daily(pd.DataFrame({'date': ['2024-01-02'], 'volume': ['12300']}),
+                                   "000001.SZ", source="baostock")
+        self.assertEqual(baostock['volume'].iloc[0], 12300)
+
+    def test_empty(self):
+        """测试空数据"""
+        self.assertTrue(normalize_daily(None, "000001.SZ").empty)
+        self.assertEqual(list(empty_daily_frame().columns), ['symbol'] + REQUIRED_COLUMNS)
+
+    def test_store_round_trip(self):
+        """测试统一格式写入本地存储后类型不变"""
+        tmp_dir = tempfile.mkdtemp()
+        try:
+            dates = pd.bdate_range("2023-12-25", "2024-01-05")
+            raw = pd.DataFrame({'open': 1.0, 'high': 1.0, 'low': 1.0, 'close': 1.0,
+                                'volume': 100.0, 'amount': 100.0}, index=dates)
+            df = normalize_daily(raw, "000001.SZ")
+            store = LocalDataStore(tmp_dir, cache_ttl=0)
+            store.write("000001.SZ", df, "2023-12-25", "2024-01-05", "None")
+
+            loaded = store.load("000001.SZ", "2023-12-25", "2024-01-05", "None")
+            self.assert_schema(loaded)
+            pd.testing.assert_frame_equal(loaded, df, check_freq=False)
+        finally:
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    unittest.main()
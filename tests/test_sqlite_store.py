@@ -0,0 +1,132 @@
+"""
+SQLite行情存储测试
+"""
+
+import unittest
+import tempfile
+import shutil
+from pathlib import Path
+from concurrent.futures import ThreadPoolExecutor
+import pandas as pd
+import numpy as np
+import yaml
+
+from src.data.local_store import create_local_store
+from src.data.schema import normalize_daily
+from src.data.sqlite_store import SQLiteBarStore
+from tests.test_local_store import CountingProvider, make_daily_frame
+
+
+class TestSQLiteBarStore(unittest.TestCase):
+    """测试SQLite日线存储"""
+
+    def setUp(self):
+        self.tmp_dir = Path(tempfile.mkdtemp())
+        self.store = SQLiteBarStore(self.tmp_dir / "tdxtools.db", cache_ttl=0)
+
+    def tearDown(self):
+        self.store.close()
+        shutil.rmtree(self.tmp_dir, ignore_errors=True)
+
+    def test_round_trip(self):
+        """测试写入后读取为统一格式"""
+        df = normalize_daily(make_daily_frame("2023-12-01", "2024-01-31"), "000001.SZ")
+        self.store.write("000001.SZ", df, "2023-12-01", "2024-01-31", "None")
+
+        loaded = self.store.read("000001.SZ", "2023-12-01", "2024-01-31", "None")
+        pd.testing.assert_frame_equal(loaded, df, check_freq=False)
+        self.assertIsNone(self.store.read("000001.SZ", "2023-11-01", "2024-01-31", "None"))
+        self.assertTrue(self.store.load("000001.SZ", "2023-12-01", "2024-01-31", "qfq").empty)
+
+    def test_upsert_and_arrays(self):
+        """测试重复日期覆盖写入与数组查询"""
+        df = make_daily_frame("2024-01-01", "2024-01-31")
+        self.store.write("000001.SZ", df, "2024-01-01", "2024-01-31", "None")
+        update = make_daily_frame("2024-01-15", "2024-02-09")
+        update['close'] = 99.0
+        self.store.write("000001.SZ", update, "2024-01-15", "2024-02-09", "None")
+
+        arrays = self.store.query_arrays("000001.SZ", "2024-01-10", "2024-01-19", "None", ['close', 'volume'])
+        self.assertEqual(arrays['date'].dtype, np.dtype('datetime64[D]'))
+        self.assertEqual(list(arrays['date'].astype(str)),
+                         ["2024-01-10", "2024-01-11", "2024-01-12", "2024-01-15",
+                          "2024-01-16", "2024-01-17", "2024-01-18", "2024-01-19"])
+        self.assertEqual(list(arrays['close'][3:]), [99.0] * 5)
+        self.assertEqual(arrays['volume'].dtype, np.int64)
+
+        with self.assertRaises(ValueError):
+            self.store.query_arrays("000001.SZ", "2024-01-01", "2024-01-31", "None", ['unknown'])
+        with self.assertRaises(ValueError):
+            self.store.load("000001.SZ", "2024-01-01", "2024-01-31", "xfq")
+
+    def test_partial_history_span(self):
+        """测试只返回部分历史的数据源按返回数据记录覆盖区间"""
+        self.store.write("000001.SZ", make_daily_frame("2024-01-15", "2024-01-31"),
+                         "2024-01-01", "2024-01-31", "None", partial_history=True)
+
+        self.assertEqual(self.store.missing_ranges("000001.SZ", "2024-01-01", "2024-01-31", "None"),
+                         [("2024-01-01", "2024-01-14")])
+
+    def test_provider_fetches_only_gaps(self):
+        """测试作为数据提供器的本地存储只请求缺失区间"""
+        provider = CountingProvider("akshare", store=self.store)
+        provider.get_daily_data("000001.SZ", "2024-01-01", "2024-03-31")
+        df = provider.get_daily_data("000001.SZ", "2023-12-01", "2024-04-30")
+
+        self.assertEqual(provider.calls, [
+            ("000001.SZ", "2024-01-01", "2024-03-31"),
+            ("000001.SZ", "2023-12-01", "2023-12-31"),
+            ("000001.SZ", "2024-04-01", "2024-04-30"),
+        ])
+        self.assertEqual(df.index[0], pd.Timestamp("2023-12-01"))
+        self.assertFalse(df.index.has_duplicates)
+        self.assertEqual(self.store.list_symbols("None"), ["000001.SZ"])
+
+    def test_concurrent_writes(self):
+        """测试多线程同时写入不同股票"""
+        symbols = [f"{i:06d}.SZ" for i in range(16)]
+
+        def write(symbol):
+            self.store.write(symbol, make_daily_frame("2024-01-01", "2024-06-30", symbol),
+                             "2024-01-01", "2024-06-30", "None")
+
+        with ThreadPoolExecutor(max_workers=8) as executor:
+            list(executor.map(write, symbols))
+
+        self.assertEqual(self.store.list_symbols("None"), symbols)
+        for symbol in symbols:
+            self.assertTrue(self.store.has_range(symbol, "2024-01-01", "2024-06-30", "None"))
+
+    def test_adjust_factors_and_clear(self):
+        """测试复权因子读写与清除"""
+        factors = pd.Series([1.0, 1.5], index=pd.DatetimeIndex(["2000-01-04", "2024-06-01"]))
+        self.store.write_adjust_factors("000001.SZ", factors)
+        self.store.write("000001.SZ", make_daily_frame("2024-01-01", "2024-01-31"),
+                         "2024-01-01", "2024-01-31", "None")
+
+        loaded = self.store.read_adjust_factors("000001.SZ")
+        self.assertEqual(list(loaded.values), [1.0, 1.5])
+        self.assertEqual(loaded.index[1], pd.Timestamp("2024-06-01"))
+
+        self.store.clear("000001.SZ")
+        self.assertIsNone(self.store.read_adjust_factors("000001.SZ"))
+        self.assertEqual(self.store.list_symbols("None"), [])
+
+    def test_create_from_config(self):
+        """测试根据配置 storage.database 创建SQLite存储"""
+        config_path = self.tmp_dir / "config.yaml"
+        db_path = self.tmp_dir / "from_config.db"
+        config_path.write_text(yaml.safe_dump({'storage': {
+            'cache_enabled': True, 'cache_ttl': 60,
+            'database': {'enabled': True, 'type': 'sqlite', 'path': str(db_path)},
+        }}), encoding='utf-8')
+
+        store = create_local_store(config_path)
+        self.assertIsInstance(store, SQLiteBarStore)
+        self.assertEqual(store.db_path, db_path)
+        self.assertTrue(db_path.exists())
+        store.close()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,169 @@
+"""
+股票池同步测试
+"""
+
+import unittest
+import tempfile
+import shutil
+import threading
+import pandas as pd
+
+from src.data.local_store import LocalDataStore
+from src.data.rate_limiter import TokenBucket
+from src.data.sync import SyncCheckpoint, resolve_universe, sync_universe
+from src.data.free_data_provider import FreeDataProvider
+from tests.test_local_store import CountingProvider, make_daily_frame
+
+SYMBOLS = [f"{i:06d}.SZ" for i in range(1, 21)]
+JOB = {'universe': "test", 'start_date': "2024-01-01", 'end_date': "2024-03-31", 'adjust': "None"}
+
+
+class FlakyProvider(CountingProvider):
+    """前几次请求失败、可在指定股票处中断的测试用数据提供器"""
+
+    def _init_data_source(self):
+        super()._init_data_source()
+        self.lock = threading.Lock()
+        self.failures = {}
+        self.interrupt_at = None
+
+    def _fetch_daily(self, symbol, start_date, end_date, adjust):
+        with self.lock:
+            if symbol == self.interrupt_at:
+                raise KeyboardInterrupt
+            if self.failures.get(symbol, 0) > 0:
+                self.failures[symbol] -= 1
+                raise ConnectionError(f"模拟请求失败: {symbol}")
+        return super()._fetch_daily(symbol, start_date, end_date, adjust)
+
+
+class EmptySinaProvider(FreeDataProvider):
+    """第二只股票没有返回数据的模拟新浪数据源（只返回最近K线，空结果不记为已覆盖）"""
+
+    def _fetch_daily(self, symbol, start_date, end_date, adjust):
+        if symbol == SYMBOLS[1]:
+            return make_daily_frame(start_date, start_date, symbol).iloc[:0]
+        return make_daily_frame(start_date, end_date, symbol)
+
+
+class TestSyncUniverse(unittest.TestCase):
+    """测试并发同步、检查点与统计"""
+
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.store = LocalDataStore(self.tmp_dir, cache_ttl=0)
+        self.provider = FlakyProvider("akshare", store=self.store)
+        self.provider.retry_count = 1
+        self.provider.rate_limiter = TokenBucket(rate=0)
+        self.checkpoint_path = f"{self.tmp_dir}/sync/test.json"
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir, ignore_errors=True)
+
+    def test_sync_and_stats(self):
+        """测试同步全部股票，重试与失败计入统计，再次运行只同步失败的股票"""
+        self.provider.failures = {SYMBOLS[0]: 1, SYMBOLS[1]: 2}
+        checkpoint = SyncCheckpoint(self.checkpoint_path, JOB)
+        stats = sync_universe(self.provider, SYMBOLS, "2024-01-01", "2024-03-31", "None",
+                              checkpoint=checkpoint, max_workers=4)
+
+        self.assertEqual((stats.synced, stats.failed, stats.skipped), (19, 1, 0))
+        self.assertEqual(stats.retries, 2)
+        self.assertEqual(stats.requests, 19)
+        self.assertEqual(stats.rows, 19 * 65)
+        self.assertGreater(stats.memory_bytes, 0)
+        self.assertGreater(stats.symbols_per_second, 0)
+        self.assertEqual(list(checkpoint.failed), [SYMBOLS[1]])
+        self.assertEqual(self.store.list_symbols("None"), sorted(set(SYMBOLS) - {SYMBOLS[1]}))
+        self.assertEqual(self.provider.fetch_hooks, [])
+
+        # 同一任务再次运行只重试失败的股票
+        calls = len(self.provider.calls)
+        stats = sync_universe(self.provider, SYMBOLS, "2024-01-01", "2024-03-31", "None",
+                              checkpoint=SyncCheckpoint(self.checkpoint_path, JOB))
+        self.assertEqual((stats.synced, stats.skipped), (1, 19))
+        self.assertEqual(self.provider.calls[calls:], [(SYMBOLS[1], "2024-01-01", "2024-03-31")])
+
+    def test_resume_after_interrupt(self):
+        """测试中断后检查点已保存，再次运行从中断处继续"""
+        self.provider.interrupt_at = SYMBOLS[10]
+        with self.assertRaises(KeyboardInterrupt):
+            sync_universe(self.provider, SYMBOLS, "2024-01-01", "2024-03-31", "None",
+                          checkpoint=SyncCheckpoint(self.checkpoint_path, JOB), max_workers=1)
+
+        checkpoint = SyncCheckpoint(self.checkpoint_path, JOB)
+        self.assertEqual(sorted(checkpoint.done), SYMBOLS[:10])
+
+        self.provider.interrupt_at = None
+        stats = sync_universe(self.provider, SYMBOLS, "2024-01-01", "2024-03-31", "None",
+                              checkpoint=checkpoint, max_workers=1)
+        self.assertEqual((stats.synced, stats.skipped), (10, 10))
+        self.assertEqual(len(self.provider.calls), 20)
+
+        # 任务参数变化时从头开始
+        self.assertEqual(SyncCheckpoint(self.checkpoint_path, dict(JOB, end_date="2024-04-30")).done, {})
+
+    def test_checkpoint_keeps_resolved_end_date(self):
+        """测试未指定结束日期的任务记录解析出的结束日期，中断后继续时沿用，清除后重置"""
+        job = dict(JOB, end_date=None)
+        checkpoint = SyncCheckpoint(self.checkpoint_path, job)
+        checkpoint.end_date = "2024-03-31"
+        checkpoint.mark_done(SYMBOLS[0], 65)
+        checkpoint.save()
+
+        resumed = SyncCheckpoint(self.checkpoint_path, job)
+        self.assertEqual(resumed.end_date, "2024-03-31")
+        self.assertEqual(list(resumed.done), [SYMBOLS[0]])
+
+        resumed.clear()
+        self.assertIsNone(SyncCheckpoint(self.checkpoint_path, job).end_date)
+
+    def test_qfq_stores_raw_bars_and_factors(self):
+        """测试同步前复权行情时，本地存储写入不复权行情与复权因子"""
+        checkpoint = SyncCheckpoint(self.checkpoint_path, dict(JOB, adjust="qfq"))
+        stats = sync_universe(self.provider, SYMBOLS[:2], "2024-01-01", "2024-03-31", "qfq",
+                              checkpoint=checkpoint, max_workers=2)
+
+        self.assertEqual(stats.synced, 2)
+        self.assertEqual(self.store.list_symbols("None"), SYMBOLS[:2])
+        self.assertEqual(self.store.list_symbols("qfq"), [])
+        for symbol in SYMBOLS[:2]:
+            self.assertEqual(len(self.store.load(symbol, "2024-01-01", "2024-03-31", "None")), 65)
+            self.assertIsNotNone(self.store.read_adjust_factors(symbol))
+        self.assertEqual(checkpoint.done, {symbol: 65 for symbol in SYMBOLS[:2]})
+
+    def test_unstorable_adjust_rejected(self):
+        """测试数据源的复权行情不写入本地存储时拒绝同步"""
+        provider = FreeDataProvider("eastmoney", store=self.store)
+        with self.assertRaises(ValueError):
+            sync_universe(provider, SYMBOLS[:2], "2024-01-01", "2024-03-31", "qfq",
+                          checkpoint=SyncCheckpoint(self.checkpoint_path, JOB))
+        self.assertFalse(SyncCheckpoint(self.checkpoint_path, JOB).done)
+
+    def test_unwritten_symbol_not_done(self):
+        """测试没有写入本地存储的股票记为失败，不记入已完成"""
+        provider = EmptySinaProvider("sina", store=self.store)
+        provider.rate_limiter = TokenBucket(rate=0)
+        checkpoint = SyncCheckpoint(self.checkpoint_path, JOB)
+        stats = sync_universe(provider, SYMBOLS[:2], "2024-01-01", "2024-03-31", "None",
+                              checkpoint=checkpoint, max_workers=1)
+
+        self.assertEqual((stats.synced, stats.failed), (1, 1))
+        self.assertEqual(list(checkpoint.done), [SYMBOLS[0]])
+        self.assertEqual(list(checkpoint.failed), [SYMBOLS[1]])
+
+    def test_resolve_universe(self):
+        """测试按股票池名称与证券主表获取股票列表"""
+        self.assertEqual(resolve_universe("test"), ["000001.SZ", "000002.SZ", "000858.SZ"])
+        with self.assertRaises(ValueError):
+            resolve_universe("no_such_pool")
+
+        self.store.reference.update_securities(pd.DataFrame({
+            'list_date': [pd.Timestamp("1991-04-03"), pd.Timestamp("2000-01-04")],
+            'delist_date': [pd.NaT, pd.Timestamp("2024-01-19")],
+        }, index=pd.Index(["000001.SZ", "600999.SH"], name='symbol')))
+        self.assertEqual(resolve_universe("all", self.provider), ["000001.SZ"])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,97 @@
+"""
+通达信公式词法/语法分析测试
+"""
+
+import unittest
+
+from src.strategy.tdx_ast import (Assign, BinaryOp, Call, Name, Number, Output, TDXSyntaxError, UnaryOp,
+                                  parse_expression, parse_program, tokenize)
+from src.strategy.tdx_formula_parser import TDXFormulaParser
+
+
+class TestTokenize(unittest.TestCase):
+    """测试词法分析"""
+
+    def test_operators_and_identifiers(self):
+        """测试运算符规范化、标识符大写与中文标识符"""
+        tokens = tokenize("ma5:=MA(c,5);  金叉 ：= x>=y && a<>b || 1=.5 {注释 AND} // 行尾注释")
+        values = [t.value for t in tokens[:-1]]
+        self.assertEqual(values, ['MA5', ':=', 'MA', '(', 'C', ',', 5.0, ')', ';',
+                                  '金叉', ':=', 'X', '>=', 'Y', 'AND', 'A', '!=', 'B', 'OR', 1.0, '==', 0.5])
+        self.assertEqual(tokens[-1].kind, "EOF")
+
+    def test_errors(self):
+        """测试语法错误给出行号与列号"""
+        with self.assertRaises(TDXSyntaxError) as ctx:
+            tokenize("A:=1;\nB:=C @ 2;")
+        self.assertEqual((ctx.exception.line, ctx.exception.column), (2, 6))
+        with self.assertRaises(TDXSyntaxError):
+            tokenize("A:=1; { 没有结束")
+
+
+class TestParser(unittest.TestCase):
+    """测试语法分析"""
+
+    def test_precedence(self):
+        """测试运算符优先级与结合性"""
+        expr = parse_expression("C>REF(C,1)*1.05 AND V>MA(V,5) OR -C+2<0")
+        self.assertEqual(expr.op, 'OR')
+        self.assertEqual(expr.left, BinaryOp('AND',
+                                             BinaryOp('>', Name('C'), BinaryOp('*', Call('REF', (Name('C'), Number(1))),
+                                                                               Number(1.05))),
+                                             BinaryOp('>', Name('V'), Call('MA', (Name('V'), Number(5))))))
+        self.assertEqual(expr.right, BinaryOp('<', BinaryOp('+', UnaryOp('-', Name('C')), Number(2)), Number(0)))
+        self.assertEqual(parse_expression("10-2-3"), BinaryOp('-', BinaryOp('-', Number(10), Number(2)), Number(3)))
+        self.assertEqual(parse_expression("(1+2)*3").op, '*')
+        self.assertEqual(parse_expression("-5"), Number(-5))
+
+    def test_program(self):
+        """测试中间变量、输出线、绘图属性、无名输出与头部行"""
+        program = parse_program("""
+公式名称: 测试
+参数: N(5,1,100), M(10)
+{ 块注释 }
+MA1 := MA(CLOSE, N);   // 均线
+均线 : MA1, COLORRED, LINETHICK2;
+买入：CROSS(C, MA1)；
+C > MA1 AND VOL > REF(VOL, 1)
+""")
+        self.assertEqual(program.info['name'], "测试")
+        self.assertEqual(program.params, [{'name': 'N', 'default': 5.0, 'min': 1.0, 'max': 100.0},
+                                          {'name': 'M', 'default': 10.0, 'min': None, 'max': None}])
+        assign, line, buy, selection = program.statements
+        self.assertIsInstance(assign, Assign)
+        self.assertEqual((assign.name, assign.text, assign.line), ('MA1', "MA(CLOSE, N)", 5))
+        self.assertIsInstance(line, Output)
+        self.assertEqual((line.name, line.attributes, line.type), ('均线', ['COLORRED', 'LINETHICK2'], 'output'))
+        self.assertEqual((buy.type, buy.expr), ('buy', Call('CROSS', (Name('C'), Name('MA1')))))
+        self.assertEqual((selection.name, selection.type), (None, 'selection'))
+        self.assertEqual(list(program.variables), ['MA1'])
+
+    def test_syntax_errors(self):
+        """测试不完整的表达式与语句"""
+        for text in ("MA(C,5", "A:=C>;", "A:=1 2;", "A:=C, COLORRED;", "B:C, 3;"):
+            with self.assertRaises(TDXSyntaxError, msg=text):
+                parse_program(text)
+
+    def test_structural_equality(self):
+        """测试结构相同的子表达式相等且哈希相同"""
+        expr = parse_expression("MA(C,5)>REF(MA(C,5),1)")
+        self.assertEqual(expr.left, expr.right.args[0])
+        self.assertEqual(len({expr.left, expr.right.args[0], parse_expression("ma(close,5)")}), 2)
+
+
+class TestExpressionConversion(unittest.TestCase):
+    """测试由语法树生成Python表达式"""
+
+    def test_convert(self):
+        """测试比较运算符、行情字段别名与逻辑运算"""
+        parser = TDXFormulaParser()
+        self.assertEqual(parser._convert_expression("C>=REF(C,1) AND V<>0"),
+                         "(close >= rt.REF(close, 1)) & (volume != 0)")
+        self.assertEqual(parser._convert_expression("HIGH=LOW OR BANDWIDTH>1"), "(high == low) | (BANDWIDTH > 1)")
+        self.assertEqual(parser._convert_expression("-(O-C)/2"), "(-(open - close)) / 2")
+
+
+if __name__ == '__main__':
+    unittest.main()
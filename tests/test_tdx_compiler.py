@@ -0,0 +1,111 @@
+"""
+通达信公式编译器测试
+"""
+
+import unittest
+import unittest.mock
+
+import numpy as np
+import pandas as pd
+
+from src.strategy import tdx_runtime as rt
+from src.strategy.tdx_compiler import FormulaContext, compile_formula, evaluate_formulas
+
+
+def make_daily(n: int = 200, seed: int = 3) -> pd.DataFrame:
+    """模拟单只股票日线"""
+    rng = np.random.default_rng(seed)
+    close = 10 + np.cumsum(rng.standard_normal(n)) * 0.2
+    return pd.DataFrame({'open': close + 0.05, 'high': close + 0.2, 'low': close - 0.2, 'close': close,
+                         'volume': rng.integers(1000, 5000, n).astype(float)},
+                        index=pd.bdate_range('2024-01-01', periods=n))
+
+
+FORMULA = """
+公式名称: 重复子表达式
+参数: N(5)
+MA1:=MA(CLOSE,N);
+UP:=C>MA(C,5) AND C>REF(C,1);
+DOWN:=REF(C,1)>C AND MA(CLOSE,5)>C;
+选股:UP AND V>MA(V,N)*1.5;
+卖出:DOWN OR 1.5*MA(VOL,5)<V;
+"""
+
+
+class TestCompile(unittest.TestCase):
+    """测试计算图去重"""
+
+    def test_common_subexpressions(self):
+        """测试变量、别名、参数与交换律写法合并为同一节点"""
+        compiled = compile_formula(FORMULA)
+        calls = [s for s, (kind, _, _) in compiled.steps.items() if kind == "call"]
+        self.assertEqual(sorted(calls), ['MA(close,5.0)', 'MA(volume,5.0)', 'REF(close,1.0)'])
+        self.assertEqual(len(compiled.steps), len(set(compiled.steps)))
+        self.assertGreater(compiled.duplication, 1.5)
+        self.assertEqual(compiled.variables['MA1'], 'MA(close,5.0)')
+        self.assertEqual(list(compiled.outputs), ['选股', '卖出'])
+
+    def test_params_and_outputs(self):
+        """测试参数覆盖、输出线被后续语句引用与错误"""
+        compiled = compile_formula(FORMULA, params={'n': 10})
+        self.assertIn('MA(close,10.0)', compiled.steps)
+        self.assertEqual(compiled.params['N'], 10)
+
+        macd = compile_formula("DIF:EMA(C,12)-EMA(C,26); DEA:EMA(DIF,9); MACD:(DIF-DEA)*2;")
+        data = make_daily()
+        result = macd.evaluate(data)
+        dif = rt.EMA(data['close'], 12) - rt.EMA(data['close'], 26)
+        np.testing.assert_allclose(result['MACD'], (dif - rt.EMA(dif, 9)) * 2)
+
+        for text, params in (("A:=MA(C,5)+X;", None), ("A:=FOO(C);", None), ("A:=C;", {'M': 1})):
+            with self.assertRaises(ValueError, msg=text):
+                compile_formula(text, params)
+
+
+class TestEvaluate(unittest.TestCase):
+    """测试计算结果与中间结果复用"""
+
+    def test_matches_runtime(self):
+        """测试结果与直接调用运行时函数一致"""
+        data = make_daily()
+        result = compile_formula(FORMULA).evaluate(data, variables=True)
+        close, volume = data['close'].to_numpy(), data['volume'].to_numpy()
+        up = (close > rt.MA(close, 5)) & (close > rt.REF(close, 1))
+        np.testing.assert_array_equal(result['UP'], up)
+        np.testing.assert_array_equal(result['选股'], up & (volume > rt.MA(volume, 5) * 1.5))
+        np.testing.assert_array_equal(result['卖出'], result['DOWN'] | (1.5 * rt.MA(volume, 5) < volume))
+        self.assertEqual(result['选股'].dtype, bool)
+
+        constant = compile_formula("X:1;").evaluate(data)['X']
+        self.assertEqual(constant.shape, (len(data),))
+
+    def test_each_node_computed_once(self):
+        """测试同一次计算中重复出现的函数只调用一次"""
+        counting = unittest.mock.Mock(side_effect=rt.MA)
+        with unittest.mock.patch.dict(rt.TDX_FUNCTIONS, {'MA': counting}):
+            compile_formula(FORMULA).evaluate(make_daily())
+        self.assertEqual(counting.call_count, 2)
+
+    def test_memoize_across_formulas(self):
+        """测试共享上下文的多个公式复用中间结果"""
+        data = make_daily()
+        context = FormulaContext(data)
+        counting = unittest.mock.Mock(side_effect=rt.MA)
+        with unittest.mock.patch.dict(rt.TDX_FUNCTIONS, {'MA': counting}):
+            results = evaluate_formulas({
+                'a': FORMULA,
+                'b': "金叉:CROSS(MA(C,5),MA(C,20));",
+                'c': compile_formula(FORMULA, params={'N': 5}),
+            }, context)
+        self.assertEqual(counting.call_count, 3)
+        self.assertGreater(context.stats['hits'], 0)
+        np.testing.assert_array_equal(results['a']['选股'], results['c']['选股'])
+        expected = compile_formula("金叉:CROSS(MA(C,5),MA(C,20));").evaluate(data, memoize=False)
+        np.testing.assert_array_equal(results['b']['金叉'], expected['金叉'])
+
+        context.clear()
+        self.assertEqual(context.cache, {})
+
+
+if __name__ == '__main__':
+    unittest.main()
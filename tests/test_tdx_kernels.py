@@ -0,0 +1,137 @@
+"""
+路径相关函数JIT内核与NumPy实现的一致性测试
+"""
+
+import unittest
+import unittest.mock
+
+import numpy as np
+import pandas as pd
+
+from src.strategy import tdx_kernels
+from src.strategy import tdx_runtime as rt
+from src.strategy.tdx_compiler import compile_formula
+
+
+def make_inputs(seed: int = 11) -> dict:
+    """含开头与中间无效值的一维、二维、空数组与单行输入"""
+    rng = np.random.default_rng(seed)
+    panel = 10 + np.cumsum(rng.standard_normal((240, 7)), axis=0) * 0.3
+    panel[:15, 2] = np.nan
+    panel[rng.random(panel.shape) < 0.03] = np.nan
+    return {
+        'panel': panel,
+        'series': panel[:, 2].copy(),
+        'empty': np.empty((0, 3)),
+        'single': panel[:1],
+    }
+
+
+def path_dependent_cases(x: np.ndarray) -> dict:
+    """路径相关函数在输入 x 上的各种调用"""
+    rng = np.random.default_rng(x.size)
+    periods = rng.integers(-2, 30, x.shape).astype(float)
+    periods[rng.random(x.shape) < 0.05] = np.nan
+    alpha = rng.uniform(0.05, 0.95, x.shape)
+    cond = x > rt.REF(x, 1)
+    return {
+        'EMA': lambda: rt.EMA(x, 12),
+        'SMA': lambda: rt.SMA(x, 9, 2),
+        'DMA': lambda: rt.DMA(x, 0.3),
+        'DMA(序列)': lambda: rt.DMA(x, alpha),
+        'BARSLAST': lambda: rt.BARSLAST(cond),
+        'BARSLAST(数值)': lambda: rt.BARSLAST(np.where(np.isnan(x), np.nan, cond)),
+        'FILTER': lambda: rt.FILTER(cond, 3),
+        'FILTER(0)': lambda: rt.FILTER(cond, 0),
+        'REF(序列)': lambda: rt.REF(x, periods),
+        'REF(BARSLAST)': lambda: rt.REF(x, rt.BARSLAST(cond)),
+    }
+
+
+def run_all(backend: str) -> dict:
+    rt.set_backend(backend)
+    return {(name, case): func()
+            for name, x in make_inputs().items()
+            for case, func in path_dependent_cases(x).items()}
+
+
+class TestBackendEquivalence(unittest.TestCase):
+    """测试两种后端结果完全相同"""
+
+    def tearDown(self):
+        rt.set_backend("auto")
+
+    @unittest.skipUnless(tdx_kernels.HAS_NUMBA, "未安装numba")
+    def test_numba_matches_numpy(self):
+        """测试numba内核与NumPy实现逐元素相同（含NaN位置与数据类型）"""
+        expected = run_all("numpy")
+        actual = run_all("numba")
+        for key, value in expected.items():
+            with self.subTest(key=key):
+                self.assertEqual(actual[key].dtype, value.dtype)
+                self.assertEqual(actual[key].shape, value.shape)
+                np.testing.assert_array_equal(actual[key], value)
+
+    def test_python_kernels_match_numpy(self):
+        """测试内核的纯Python版本（numba编译前的函数）与NumPy实现相同，不依赖numba"""
+        rt.set_backend("numpy")
+        x = make_inputs()['panel'][:60]
+        cond = x > rt.REF(x, 1)
+        periods = np.tile(np.arange(-1, 6, dtype=float), (60, 1))
+
+        def python(kernel):
+            return getattr(kernel, 'py_func', kernel)
+
+        np.testing.assert_array_equal(rt._run_kernel(python(tdx_kernels.recursive_kernel), np.float64,
+                                                     x, np.full(x.shape, 0.2)), rt.DMA(x, 0.2))
+        np.testing.assert_array_equal(rt._run_kernel(python(tdx_kernels.barslast_kernel), np.float64, cond),
+                                      rt.BARSLAST(cond))
+        np.testing.assert_array_equal(rt._run_kernel(python(tdx_kernels.filter_kernel), np.bool_, cond, 4),
+                                      rt.FILTER(cond, 4))
+        np.testing.assert_array_equal(rt._run_kernel(python(tdx_kernels.ref_kernel), np.float64, x, periods),
+                                      rt.REF(x, periods))
+
+    @unittest.skipUnless(tdx_kernels.HAS_NUMBA, "未安装numba")
+    def test_formula_results(self):
+        """测试整条公式在两种后端下结果相同"""
+        compiled = compile_formula("""
+D:=BARSLAST(CROSS(C,MA(C,10)));
+买入:FILTER(C>REF(C,D+1) AND SMA(C,6,1)>EMA(C,12),5);
+X:DMA(C,0.2)-REF(C,D);
+""")
+        data = {'close': pd.DataFrame(make_inputs()['panel'])}
+        rt.set_backend("numpy")
+        expected = compiled.evaluate(data)
+        rt.set_backend("numba")
+        actual = compiled.evaluate(data)
+        for name in expected:
+            np.testing.assert_array_equal(actual[name], expected[name])
+
+
+class TestBackendSelection(unittest.TestCase):
+    """测试后端选择"""
+
+    def tearDown(self):
+        rt.set_backend("auto")
+
+    def test_set_backend(self):
+        """测试auto按numba是否可用选择，未知后端报错"""
+        rt.set_backend("auto")
+        self.assertEqual(rt.get_backend(), "numba" if tdx_kernels.HAS_NUMBA else "numpy")
+        rt.set_backend("numpy")
+        self.assertEqual(rt.get_backend(), "numpy")
+        with self.assertRaises(ValueError):
+            rt.set_backend("cuda")
+
+    def test_missing_numba(self):
+        """测试没有numba时使用NumPy实现，强制numba报错"""
+        with unittest.mock.patch.object(rt, 'HAS_NUMBA', False):
+            rt.set_backend("auto")
+            self.assertEqual(rt.get_backend(), "numpy")
+            np.testing.assert_array_equal(rt.BARSLAST(np.array([0, 1, 0])), [np.nan, 0, 1])
+            with self.assertRaises(ValueError):
+                rt.set_backend("numba")
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,127 @@
+"""
+通达信本地文件读取测试（使用生成的vipdoc目录）
+"""
+
+import unittest
+import tempfile
+import shutil
+from pathlib import Path
+import numpy as np
+import pandas as pd
+
+from src.data.tdx_local_provider import TdxLocalProvider, DAY_DTYPE, MINUTE_DTYPE
+from src.data.schema import empty_daily_frame
+
+
+def write_day_file(vipdoc: Path, code: str, dates: pd.DatetimeIndex, base: float):
+    """按通达信日线格式写入 .day 文件"""
+    path = vipdoc / code[:2] / 'lday' / f"{code}.day"
+    path.parent.mkdir(parents=True, exist_ok=True)
+    records = np.zeros(len(dates), dtype=DAY_DTYPE)
+    price = base + np.arange(len(dates)) * 0.01
+    records['date'] = dates.strftime('%Y%m%d').astype(int)
+    records['open'] = np.round(price * 100)
+    records['high'] = np.round(price * 100) + 10
+    records['low'] = np.round(price * 100) - 10
+    records['close'] = np.round(price * 100) + 5
+    records['amount'] = price * 1e6
+    records['volume'] = 1000 + np.arange(len(dates))
+    records.tofile(path)
+
+
+def write_minute_file(vipdoc: Path, code: str, times: pd.DatetimeIndex):
+    """按通达信分钟线格式写入 .lc5 文件"""
+    path = vipdoc / code[:2] / 'fzline' / f"{code}.lc5"
+    path.parent.mkdir(parents=True, exist_ok=True)
+    records = np.zeros(len(times), dtype=MINUTE_DTYPE)
+    records['date'] = (times.year - 2004) * 2048 + times.month * 100 + times.day
+    records['time'] = times.hour * 60 + times.minute
+    records['close'] = np.arange(len(times), dtype=np.float32) + 10
+    records['open'] = records['close']
+    records['high'] = records['close'] + 0.5
+    records['low'] = records['close'] - 0.5
+    records['volume'] = 100
+    records.tofile(path)
+
+
+class TestTdxLocalProvider(unittest.TestCase):
+    """测试通达信本地数据提供器"""
+
+    def setUp(self):
+        self.vipdoc = Path(tempfile.mkdtemp())
+        self.dates = pd.bdate_range("2024-01-01", "2024-03-29")
+        write_day_file(self.vipdoc, "sz000001", self.dates, 10.0)
+        write_day_file(self.vipdoc, "sh600519", self.dates, 1700.0)
+        write_day_file(self.vipdoc, "sh510300", self.dates, 3.5)
+        self.provider = TdxLocalProvider(self.vipdoc)
+
+    def tearDown(self):
+        shutil.rmtree(self.vipdoc, ignore_errors=True)
+
+    def test_daily_data(self):
+        """测试日线读取与日期截取"""
+        df = self.provider.get_daily_data("000001.SZ", "2024-01-10", "2024-01-31")
+
+        self.assertEqual(df.index[0], pd.Timestamp("2024-01-10"))
+        self.assertEqual(df.index[-1], pd.Timestamp("2024-01-31"))
+        self.assertEqual(len(df), 16)
+        self.assertAlmostEqual(df['open'].iloc[0], 10.07)
+        self.assertAlmostEqual(df['close'].iloc[0], 10.12)
+        self.assertEqual(df['volume'].iloc[0], 1007)
+        self.assertTrue((df['symbol'] == "000001.SZ").all())
+
+    def test_empty_daily_schema(self):
+        """测试没有数据时返回统一格式的空日线"""
+        for df in [self.provider.get_daily_data("000002.SZ", "2024-01-01", "2024-01-31"),
+                   self.provider.get_market_daily("2030-01-01", "2030-01-31")]:
+            self.assertTrue(df.empty)
+            self.assertEqual(list(df.columns), list(empty_daily_frame().columns))
+            self.assertIsInstance(df.index, pd.DatetimeIndex)
+
+    def test_etf_price_precision(self):
+        """测试ETF价格按3位小数解析"""
+        df = self.provider.get_daily_data("510300.SH", "2024-01-01", "2024-01-01")
+        self.assertAlmostEqual(df['open'].iloc[0], 0.35)
+
+    def test_multiple_stocks(self):
+        """测试批量读取全部本地代码"""
+        self.assertEqual(self.provider.list_symbols(), ["510300.SH", "600519.SH", "000001.SZ"])
+
+        data = self.provider.get_multiple_stocks(None, "2024-01-01", "2024-12-31")
+        self.assertEqual(set(data.keys()), {"510300.SH", "600519.SH", "000001.SZ"})
+        self.assertEqual(len(data["600519.SH"]), len(self.dates))
+
+        missing = self.provider.get_multiple_stocks(["000002.SZ"], "2024-01-01", "2024-12-31")
+        self.assertEqual(missing, {})
+
+    def test_market_daily(self):
+        """测试全市场长表读取与逐只读取一致"""
+        market = self.provider.get_market_daily("2024-02-01", "2024-02-29")
+
+        self.assertEqual(list(market['symbol'].cat.categories), self.provider.list_symbols())
+        for symbol in self.provider.list_symbols():
+            single = self.provider.get_daily_data(symbol, "2024-02-01", "2024-02-29")
+            part = market[market['symbol'] == symbol]
+            np.testing.assert_allclose(part['close'].values, single['close'].values)
+            self.assertTrue(part.index.equals(single.index))
+
+    def test_minute_data(self):
+        """测试5分钟线读取"""
+        times = pd.DatetimeIndex(["2024-01-02 09:35", "2024-01-02 09:40", "2024-01-03 15:00"])
+        write_minute_file(self.vipdoc, "sz000001", times)
+
+        df = self.provider.get_minute_data("000001.SZ", "2024-01-02", "2024-01-02", freq="5min")
+        self.assertEqual(list(df.index), list(times[:2]))
+        self.assertEqual(list(df['close']), [10.0, 11.0])
+
+        with self.assertRaises(ValueError):
+            self.provider.get_minute_data("000001.SZ", "2024-01-02", "2024-01-02", freq="15min")
+
+    def test_missing_vipdoc(self):
+        """测试目录不存在"""
+        with self.assertRaises(ValueError):
+            TdxLocalProvider(self.vipdoc / "not_exists")
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,133 @@
+"""
+通达信函数运行时测试
+"""
+
+import unittest
+
+import numpy as np
+import pandas as pd
+
+from src.strategy import tdx_runtime as rt
+from src.strategy.tdx_formula_parser import EXAMPLE_FORMULA, TDXFormulaParser
+
+
+def make_panel(n_dates: int = 300, n_symbols: int = 6, seed: int = 1) -> np.ndarray:
+    """模拟价格面板，部分股票开头有无效值（上市较晚）"""
+    rng = np.random.default_rng(seed)
+    values = 10 + np.cumsum(rng.standard_normal((n_dates, n_symbols)), axis=0) * 0.2
+    for column in range(1, n_symbols, 2):
+        values[:column * 7, column] = np.nan
+    return values
+
+
+class TestPandasEquivalence(unittest.TestCase):
+    """测试与pandas滚动/指数加权写法一致"""
+
+    def test_matches_pandas(self):
+        """测试各函数在二维面板（含开头无效值）上与pandas结果一致"""
+        values = make_panel()
+        frame = pd.DataFrame(values)
+        for name, (runtime, pandas_equivalent) in rt._pandas_cases().items():
+            with self.subTest(name=name):
+                np.testing.assert_allclose(runtime(values), pandas_equivalent(frame).to_numpy(),
+                                           rtol=1e-9, atol=1e-9, equal_nan=True)
+
+    def test_one_dimensional(self):
+        """测试一维输入与二维逐列计算一致，并接受Series"""
+        values = make_panel()
+        for name, (runtime, _) in rt._pandas_cases().items():
+            with self.subTest(name=name):
+                panel = np.asarray(runtime(values), dtype=float)
+                for column in (0, 3):
+                    np.testing.assert_allclose(runtime(pd.Series(values[:, column])), panel[:, column],
+                                               rtol=1e-9, equal_nan=True)
+
+    def test_benchmark(self):
+        """测试基准测试输出耗时与误差"""
+        result = rt.benchmark(60, 4, repeat=1, functions=['MA', 'EMA'])
+        self.assertEqual(list(result.index), ['MA', 'EMA'])
+        self.assertTrue((result['max_abs_diff'] < 1e-9).all())
+        self.assertTrue((result['runtime_ms'] > 0).all())
+
+
+class TestTDXSemantics(unittest.TestCase):
+    """测试通达信的预热期、无效值与条件语义"""
+
+    def test_warm_up(self):
+        """测试需要完整窗口的函数与按已有周期计算的函数"""
+        x = np.array([1.0, 2.0, 3.0, 4.0, 5.0])
+        np.testing.assert_array_equal(rt.MA(x, 3), [np.nan, np.nan, 2, 3, 4])
+        np.testing.assert_array_equal(rt.SUM(x, 3), [1, 3, 6, 9, 12])
+        np.testing.assert_array_equal(rt.SUM(x, 0), [1, 3, 6, 10, 15])
+        np.testing.assert_array_equal(rt.HHV(x[::-1], 2), [5, 5, 4, 3, 2])
+        np.testing.assert_array_equal(rt.LLV(x, 0), [1, 1, 1, 1, 1])
+        np.testing.assert_allclose(rt.WMA(x, 3), [np.nan, np.nan, 14 / 6, 20 / 6, 26 / 6])
+        np.testing.assert_array_equal(rt.AVEDEV(x, 5), [np.nan] * 4 + [1.2])
+        np.testing.assert_allclose(rt.STDP(x, 5)[-1], np.sqrt(2))
+        np.testing.assert_array_equal(rt.REF(x, 2), [np.nan, np.nan, 1, 2, 3])
+        np.testing.assert_array_equal(rt.REF(x, 0), x)
+
+    def test_recursive(self):
+        """测试EMA/SMA/DMA从第一个有效值开始递推"""
+        x = np.array([np.nan, 10.0, 20.0, 20.0])
+        np.testing.assert_allclose(rt.EMA(x, 3), [np.nan, 10, 15, 17.5])
+        np.testing.assert_allclose(rt.SMA(x, 4, 2), [np.nan, 10, 15, 17.5])
+        np.testing.assert_allclose(rt.DMA(x, [0.5, 0.5, 0.1, 1.0]), [np.nan, 10, 11, 20])
+        with self.assertRaises(ValueError):
+            rt.SMA(x, 2, 3)
+        with self.assertRaises(ValueError):
+            rt.MA(x, [1, 2, 3, 4])
+
+    def test_conditions(self):
+        """测试CROSS、BARSLAST、FILTER、EVERY/EXIST与IF"""
+        a = np.array([1.0, 3.0, 1.0, 3.0, np.nan, 3.0])
+        cross = rt.CROSS(a, 2)
+        self.assertEqual(cross.dtype, bool)
+        np.testing.assert_array_equal(cross, [False, True, False, True, False, False])
+
+        cond = np.array([0, 1, 0, 0, 1, 1, 0], dtype=float)
+        np.testing.assert_array_equal(rt.BARSLAST(cond), [np.nan, 0, 1, 2, 0, 0, 1])
+        np.testing.assert_array_equal(rt.FILTER(np.ones(7), 2), [1, 0, 0, 1, 0, 0, 1])
+        np.testing.assert_array_equal(rt.COUNT(cond, 3), [0, 1, 1, 1, 1, 2, 2])
+        np.testing.assert_array_equal(rt.EVERY(cond, 2), [0, 0, 0, 0, 0, 1, 0])
+        np.testing.assert_array_equal(rt.EXIST(cond, 2), [0, 1, 1, 0, 1, 1, 1])
+        np.testing.assert_array_equal(rt.IF(np.array([1, np.nan, 0]), 1, -1), [1, -1, -1])
+        np.testing.assert_array_equal(rt.NOT(np.array([1, np.nan, 0])), [False, True, True])
+        np.testing.assert_array_equal(rt.BARSCOUNT(np.array([np.nan, np.nan, 5, 6])), [np.nan, np.nan, 1, 2])
+        np.testing.assert_array_equal(rt.BETWEEN(np.array([1, 5, 9]), 8, 2), [False, True, False])
+
+    def test_variable_ref(self):
+        """测试变周期REF（二维面板逐元素取数）"""
+        x = np.arange(10, dtype=float)
+        np.testing.assert_array_equal(rt.REF(x, rt.BARSLAST(x % 4 == 0)), [0, 0, 0, 0, 4, 4, 4, 4, 8, 8])
+        panel = make_panel(20, 3)
+        periods = np.tile([[0, 1, 30]], (20, 1))
+        result = rt.REF(panel, periods)
+        np.testing.assert_array_equal(result[:, 0], panel[:, 0])
+        np.testing.assert_array_equal(result[:, 1], rt.REF(panel[:, 1], 1))
+        self.assertTrue(np.isnan(result[:, 2]).all())
+
+
+class TestGeneratedCode(unittest.TestCase):
+    """测试生成的Python代码可直接在运行时上执行"""
+
+    def test_exec_generated_code(self):
+        """测试示例公式生成的函数无需TA-Lib即可运行"""
+        code = TDXFormulaParser().parse_formula(EXAMPLE_FORMULA)['python_code']
+        self.assertNotIn('talib', code)
+        namespace = {}
+        exec(code, namespace)
+
+        close = pd.Series(np.r_[np.full(25, 10.0), np.linspace(10, 12, 10)],
+                          index=pd.bdate_range('2024-01-01', periods=35))
+        data = pd.DataFrame({'open': close, 'high': close, 'low': close, 'close': close, 'volume': 1e6})
+        data.iloc[:25, data.columns.get_loc('close')] = np.linspace(11, 9, 25)
+        _, signals = namespace['双均线金叉选股'](data)
+        crossed = signals['selection_0']
+        self.assertEqual(crossed.sum(), 1)
+        expected = rt.CROSS(rt.MA(data['close'], 5), rt.MA(data['close'], 20))
+        np.testing.assert_array_equal(crossed.to_numpy(), expected)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,160 @@
+"""
+Tushare按交易日批量获取测试（使用模拟的pro接口）
+"""
+
+import unittest
+import tempfile
+import shutil
+import pandas as pd
+
+from src.data.data_provider import DataProvider
+from src.data.local_store import LocalDataStore
+from src.data.rate_limiter import TokenBucket
+
+
+class FakePro:
+    """模拟Tushare pro接口，按交易日返回全市场行情"""
+
+    SYMBOLS = ["000001.SZ", "000002.SZ", "600519.SH"]
+
+    def __init__(self):
+        self.daily_calls = []
+        self.adj_factor_calls = []
+        self.failing_dates = set()
+
+    def trade_cal(self, exchange, start_date, end_date, is_open='1'):
+        dates = pd.bdate_range(start_date, end_date)
+        return pd.DataFrame({
+            'exchange': exchange,
+            'cal_date': dates.strftime('%Y%m%d'),
+            'is_open': 1,
+        })
+
+    def daily(self, trade_date=None, ts_code=None, start_date=None, end_date=None):
+        self.daily_calls.append(trade_date)
+        if trade_date in self.failing_dates:
+            raise ConnectionError("模拟请求失败")
+        day = pd.Timestamp(trade_date).day
+        rows = []
+        for i, symbol in enumerate(self.SYMBOLS):
+            # 600519.SH 在每月10日停牌
+            if symbol == "600519.SH" and day == 10:
+                continue
+            price = 10.0 * (i + 1) + day
+            rows.append({
+                'ts_code': symbol, 'trade_date': trade_date,
+                'open': price, 'high': price + 1, 'low': price - 1, 'close': price,
+                'pre_close': price - 1, 'change': 1.0, 'pct_chg': 1.0,
+                'vol': 1000.0 * (i + 1), 'amount': 10000.0,
+            })
+        return pd.DataFrame(rows)
+
+    def adj_factor(self, ts_code=None, trade_date=None):
+        self.adj_factor_calls.append(ts_code)
+        # 000002.SZ 在2024-01-15除权，因子由1.0变为2.0
+        factor = 2.0 if ts_code == "000002.SZ" else 1.0
+        return pd.DataFrame({
+            'ts_code': ts_code,
+            'trade_date': ['20200101', '20240115'],
+            'adj_factor': [1.0, factor],
+        })
+
+
+class BulkProvider(DataProvider):
+    """使用模拟pro接口的数据提供器"""
+
+    def _init_data_source(self):
+        self.pro = FakePro()
+
+
+class TestTushareBulk(unittest.TestCase):
+    """测试按交易日批量获取"""
+
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir, ignore_errors=True)
+
+    def make_provider(self, store=None):
+        provider = BulkProvider("tushare", store=store, use_cache=store is not None)
+        provider.rate_limiter = TokenBucket(rate=0)
+        return provider
+
+    def test_one_call_per_trade_date(self):
+        """测试每个交易日只请求一次并按股票拆分"""
+        provider = self.make_provider()
+        result = provider.get_market_daily_bulk("2024-01-01", "2024-01-31", adjust="None", max_workers=4)
+
+        self.assertEqual(len(provider.pro.daily_calls), 23)
+        self.assertEqual(sorted(result.keys()), FakePro.SYMBOLS)
+        self.assertEqual(len(result["000001.SZ"]), 23)
+        self.assertEqual(len(result["600519.SH"]), 22)
+        self.assertTrue(result["000001.SZ"].index.is_monotonic_increasing)
+        self.assertEqual(result["000002.SZ"].loc["2024-01-02", "close"], 22.0)
+
+    def test_panel_output(self):
+        """测试面板输出"""
+        provider = self.make_provider()
+        panel = provider.get_market_daily_bulk("2024-01-01", "2024-01-31", as_panel=True)
+
+        close = panel['close']
+        self.assertEqual(close.shape, (23, 3))
+        self.assertEqual(list(close.columns), FakePro.SYMBOLS)
+        self.assertTrue(pd.isna(close.loc["2024-01-10", "600519.SH"]))
+        self.assertIn('volume', panel)
+
+    def test_store_skips_covered_dates(self):
+        """测试写入本地存储后不再重复请求"""
+        store = LocalDataStore(self.tmp_dir, cache_ttl=0)
+        provider = self.make_provider(store)
+        provider.get_market_daily_bulk("2024-01-01", "2024-01-31")
+        self.assertEqual(store.missing_ranges("600519.SH", "2024-01-01", "2024-01-31", "None"), [])
+
+        provider.pro.daily_calls.clear()
+        result = provider.get_market_daily_bulk(
+            "2024-01-01", "2024-02-07", symbols=["000001.SZ", "600519.SH"])
+
+        self.assertEqual(len(provider.pro.daily_calls), 5)
+        self.assertEqual(sorted(result.keys()), ["000001.SZ", "600519.SH"])
+        self.assertEqual(len(result["000001.SZ"]), 28)
+
+    def test_failed_dates_only_skip_affected_symbols(self):
+        """测试部分交易日失败时只跳过需要这些交易日的股票，本地已覆盖的数据照常读取"""
+        store = LocalDataStore(self.tmp_dir, cache_ttl=0)
+        provider = self.make_provider(store)
+        provider.retry_count = 0
+        provider.get_market_daily_bulk("2024-01-01", "2024-01-31", symbols=["000001.SZ"])
+
+        provider.pro.failing_dates = {"20240105"}
+        result = provider.get_market_daily_bulk(
+            "2024-01-01", "2024-02-07", symbols=["000001.SZ", "600519.SH"])
+
+        self.assertEqual(len(result["000001.SZ"]), 28)
+        self.assertEqual(store.missing_ranges("000001.SZ", "2024-01-01", "2024-02-07", "None"), [])
+        self.assertEqual(len(result["600519.SH"]), 26)
+        self.assertEqual(store.missing_ranges("600519.SH", "2024-01-01", "2024-02-07", "None"),
+                         [("2024-01-01", "2024-02-07")])
+
+    def test_adjust_from_factors(self):
+        """测试批量结果按复权因子计算前复权与后复权"""
+        provider = self.make_provider()
+        raw = provider.get_market_daily_bulk("2024-01-01", "2024-01-31", adjust="None")
+        self.assertEqual(provider.pro.adj_factor_calls, [])
+        qfq = provider.get_market_daily_bulk("2024-01-01", "2024-01-31", adjust="qfq")
+        hfq = provider.get_market_daily_bulk("2024-01-01", "2024-01-31", adjust="hfq")
+
+        self.assertEqual(qfq["000002.SZ"].loc["2024-01-12", "close"], raw["000002.SZ"].loc["2024-01-12", "close"] / 2)
+        self.assertEqual(qfq["000002.SZ"].loc["2024-01-15", "close"], raw["000002.SZ"].loc["2024-01-15", "close"])
+        self.assertEqual(hfq["000002.SZ"].loc["2024-01-15", "close"], raw["000002.SZ"].loc["2024-01-15", "close"] * 2)
+        pd.testing.assert_frame_equal(qfq["000001.SZ"], raw["000001.SZ"])
+
+    def test_unsupported_source(self):
+        """测试非Tushare数据源"""
+        provider = BulkProvider("akshare", use_cache=False)
+        with self.assertRaises(ValueError):
+            provider.get_market_daily_bulk("2024-01-01", "2024-01-31")
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -373,38 +373,41 @@ def show_data_acquisition():
                 all_data = []
                 success_count = 0
                 
-                # 使用AkShare下载数据
+                # 使用AkShare下载日线，周线/月线由本地日线聚合
                 try:
-                    import akshare as ak
+                    from src.data.data_provider import DataProvider
+                    provider = DataProvider("akshare")
                     for code in codes[:5]:  # 限制最多5只股票
                         try:
                             # 处理A股代码
-                            if '.' not in code and code.isdigit() and len(code) == 6:
-                                # AkShare使用纯数字代码
-                                ak_code = code
+                            if '.' in code:
+                                symbol = code.upper()
+                            elif code.startswith(('6', '9')):
+                                symbol = f"{code}.SH"
                             else:
-                                ak_code = code.split('.')[0] if '.' in code else code
+                                symbol = f"{code}.SZ"
                             
                             # 获取股票数据
-                            df_ak = ak.stock_zh_a_hist(symbol=ak_code, period="daily", 
-                                                     start_date=start_date.strftime("%Y%m%d"),
-                                                     end_date=end_date.strftime("%Y%m%d"),
-                                                     adjust="qfq")  # 前复权
+                            df_bars = provider.get_bars(symbol,
+                                                        start_date.strftime("%Y-%m-%d"),
+                                                        end_date.strftime("%Y-%m-%d"),
+                                                        adjust="qfq" if adjust_price else "None",
+                                                        frequency=frequency)
                             
-                            if not df_ak.empty:
-                                for _, row in df_ak.iterrows():
+                            if not df_bars.empty:
+                                for date, row in df_bars.iterrows():
                                     all_data.append({
                                         "股票代码": code,
-                                        "日期": pd.to_datetime(row['日期']),
-                                        "开盘价": float(row['开盘']),
-                                        "最高价": float(row['最高']),
-                                        "最低价": float(row['最低']),
-                                        "收盘价": float(row['收盘']),
-                                        "成交量": int(row['成交量']),
-                                        "成交额": float(row['成交额']) if '成交额' in row else 0
+                                        "日期": date,
+                                        "开盘价": float(row['open']),
+                                        "最高价": float(row['high']),
+                                        "最低价": float(row['low']),
+                                        "收盘价": float(row['close']),
+                                        "成交量": int(row['volume']),
+                                        "成交额": float(row['amount'])
                                     })
                                 success_count += 1
-                                st.info(f"✅ {code} 数据下载成功 (AkShare)")
+                                st.info(f"✅ {code} {frequency}数据下载成功 (AkShare)")
                             else:
                                 st.warning(f"⚠️ {code} 无可用数据")
                                 